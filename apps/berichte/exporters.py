@@ -2,20 +2,22 @@
 Export-Klassen für verschiedene Formate.
 
 Alle Exporte verwenden deutsche Spaltennamen und Formatierungen.
+
+QuerySets werden mit iterator() blockweise gelesen, ohne die Instanzen im
+QuerySet-Cache zu halten. Der CSV-Export wird zusätzlich gestreamt
+(StreamingHttpResponse): der Speicherbedarf bleibt unabhängig von der
+Zeilenzahl, und die Kopfzeile geht sofort an den Client.
 """
 import csv
 import io
 from datetime import datetime
-from django.http import HttpResponse
+from django.db.models import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+
+from apps.kern import pdf
 
 
 class BaseExporter:
@@ -38,6 +40,49 @@ class BaseExporter:
         self.spalten = spalten
         self.titel = titel
 
+    # Anzahl Datensätze, die pro Datenbankabfrage gelesen werden
+    chunk_size = 2000
+
+    def get_data_row(self, obj):
+        """
+        Extrahiert die Werte einer Zeile aus einem Objekt.
+
+        Returns:
+            List[str]: Formatierte Werte in Spaltenreihenfolge
+        """
+        row = []
+        for feldname, _ in self.spalten:
+            # Verschachtelte Felder unterstützen (z.B. 'notarstelle__name')
+            wert = obj
+            for teil in feldname.split('__'):
+                wert = getattr(wert, teil, '')
+                if wert is None:
+                    wert = ''
+
+            # Formatiere Wert
+            if hasattr(wert, 'strftime'):  # Datum/Zeit
+                wert = wert.strftime('%d.%m.%Y %H:%M') if hasattr(wert, 'hour') else wert.strftime('%d.%m.%Y')
+            elif isinstance(wert, bool):
+                wert = 'Ja' if wert else 'Nein'
+            elif hasattr(wert, 'get_display'):  # Choice-Felder
+                wert = wert.get_display()
+
+            row.append(str(wert))
+        return row
+
+    def iter_data_rows(self):
+        """
+        Liefert die Daten-Zeilen einzeln; QuerySets werden blockweise gelesen.
+
+        Yields:
+            List[str]: Eine Zeile pro Objekt
+        """
+        objekte = self.queryset
+        if isinstance(objekte, QuerySet):
+            objekte = objekte.iterator(chunk_size=self.chunk_size)
+        for obj in objekte:
+            yield self.get_data_row(obj)
+
     def get_data_rows(self):
         """
         Extrahiert Daten-Zeilen aus dem QuerySet.
@@ -45,28 +90,7 @@ class BaseExporter:
         Returns:
             List[List]: Liste von Zeilen, jede Zeile ist eine Liste von Werten
         """
-        rows = []
-        for obj in self.queryset:
-            row = []
-            for feldname, _ in self.spalten:
-                # Verschachtelte Felder unterstützen (z.B. 'notarstelle__name')
-                wert = obj
-                for teil in feldname.split('__'):
-                    wert = getattr(wert, teil, '')
-                    if wert is None:
-                        wert = ''
-
-                # Formatiere Wert
-                if hasattr(wert, 'strftime'):  # Datum/Zeit
-                    wert = wert.strftime('%d.%m.%Y %H:%M') if hasattr(wert, 'hour') else wert.strftime('%d.%m.%Y')
-                elif isinstance(wert, bool):
-                    wert = 'Ja' if wert else 'Nein'
-                elif hasattr(wert, 'get_display'):  # Choice-Felder
-                    wert = wert.get_display()
-
-                row.append(str(wert))
-            rows.append(row)
-        return rows
+        return list(self.iter_data_rows())
 
     def get_spalten_namen(self):
         """
@@ -91,31 +115,52 @@ class BaseExporter:
 
 class CSVExporter(BaseExporter):
     """
-    Exportiert Daten als CSV-Datei mit deutschen Spaltennamen.
+    Exportiert Daten als gestreamte CSV-Datei mit deutschen Spaltennamen.
     """
 
-    def export(self):
+    # Anzahl Zeilen, die zusammen als ein Block gesendet werden
+    zeilen_pro_block = 500
+
+    def stream(self):
         """
-        Erstellt CSV-Export.
+        Erzeugt den CSV-Inhalt blockweise als UTF-8-Bytes.
 
-        Returns:
-            HttpResponse: CSV-Datei zum Download
+        Yields:
+            bytes: BOM und Kopfzeile, danach Blöcke von zeilen_pro_block Zeilen
         """
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = f'attachment; filename="{self.titel}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+        puffer = io.StringIO()
+        writer = csv.writer(puffer, delimiter=';', quoting=csv.QUOTE_ALL)
 
-        # BOM für Excel-Kompatibilität
-        response.write('\ufeff')
+        def leeren():
+            inhalt = puffer.getvalue().encode('utf-8')
+            puffer.seek(0)
+            puffer.truncate()
+            return inhalt
 
-        writer = csv.writer(response, delimiter=';', quoting=csv.QUOTE_ALL)
+        # BOM für Excel-Kompatibilität
+        puffer.write('\ufeff')
 
         # Header
         writer.writerow(self.get_spalten_namen())
+        yield leeren()
 
         # Daten
-        for row in self.get_data_rows():
+        for nummer, row in enumerate(self.iter_data_rows(), 1):
             writer.writerow(row)
+            if nummer % self.zeilen_pro_block == 0:
+                yield leeren()
+        if puffer.tell():
+            yield leeren()
+
+    def export(self):
+        """
+        Erstellt CSV-Export.
 
+        Returns:
+            StreamingHttpResponse: CSV-Datei zum Download
+        """
+        response = StreamingHttpResponse(self.stream(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{self.titel}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
         return response
 
 
@@ -196,91 +241,17 @@ class PDFExporter(BaseExporter):
         Returns:
             HttpResponse: PDF-Datei zum Download
         """
-        buffer = io.BytesIO()
-
         # Landscape für mehr Spalten
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=landscape(A4),
-            rightMargin=1.5*cm,
-            leftMargin=1.5*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-
-        # Container für PDF-Elemente
-        elements = []
-
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            textColor=colors.HexColor('#0D6EFD'),
-            spaceAfter=20,
-            alignment=1  # Center
+        elemente = [
+            *pdf.kopf(self.titel, farbe=pdf.BERICHT, zentriert=True, datum=True),
+            pdf.datentabelle(self.get_spalten_namen(), self.get_data_rows()),
+        ]
+        inhalt = pdf.erstellen(elemente, querformat=True, rand=1.5*cm, rand_oben=2*cm)
+
+        return pdf.pdf_antwort(
+            inhalt, f'{self.titel}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
         )
 
-        # Titel
-        title = Paragraph(self.titel, title_style)
-        elements.append(title)
-
-        # Datum
-        datum_text = f"Erstellt am: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
-        datum = Paragraph(datum_text, styles['Normal'])
-        elements.append(datum)
-        elements.append(Spacer(1, 0.5*cm))
-
-        # Tabelle vorbereiten
-        data = [self.get_spalten_namen()]  # Header
-        data.extend(self.get_data_rows())  # Daten
-
-        # Tabelle erstellen
-        table = Table(data, repeatRows=1)
-
-        # Tabellen-Style
-        table_style = TableStyle([
-            # Header
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0D6EFD')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-
-            # Daten
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('TOPPADDING', (0, 1), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-
-            # Gitternetz
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-
-            # Alternierende Zeilen
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8F9FA')]),
-        ])
-
-        table.setStyle(table_style)
-        elements.append(table)
-
-        # PDF generieren
-        doc.build(elements)
-
-        # Response
-        pdf = buffer.getvalue()
-        buffer.close()
-
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{self.titel}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf"'
-        response.write(pdf)
-
-        return response
-
 
 # Factory-Funktion für einfache Verwendung
 def export_data(queryset, spalten, format_typ, titel='Export'):
@@ -1,8 +1,11 @@
 """
 Filter-Formulare für Berichte.
 """
+from datetime import date
+
 from django import forms
 from apps.notarstellen.models import Notarstelle
+from apps.sprengel.models import Sprengel
 from apps.workflows.models import WorkflowTyp
 
 
@@ -272,3 +275,104 @@ class SprengelFilterForm(forms.Form):
         required=False,
         widget=forms.Select(attrs={'class': 'form-control'})
     )
+
+
+class VakanzenFilterForm(forms.Form):
+    """Filter-Formular für den Bericht über unbesetzte Notarstellen."""
+
+    von = forms.DateField(
+        label='Von',
+        required=False,
+        help_text='Standard: 1. Jänner des laufenden Jahres',
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        })
+    )
+
+    bis = forms.DateField(
+        label='Bis',
+        required=False,
+        help_text='Standard: heute',
+        widget=forms.DateInput(attrs={
+            'class': 'form-control',
+            'type': 'date'
+        })
+    )
+
+    sprengel = forms.ModelChoiceField(
+        label='Sprengel',
+        queryset=Sprengel.objects.all(),
+        required=False,
+        empty_label='Alle',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+    def zeitraum(self):
+        """Gewählter Zeitraum (von, bis); fehlende Angaben werden mit den Standardwerten ergänzt."""
+        daten = self.cleaned_data if self.is_valid() else {}
+        heute = date.today()
+        von = daten.get('von') or date(heute.year, 1, 1)
+        bis = daten.get('bis') or max(heute, von)
+        return von, bis
+
+    def clean_bis(self):
+        von, bis = self.cleaned_data.get('von'), self.cleaned_data.get('bis')
+        if von and bis and bis < von:
+            raise forms.ValidationError('Das Ende des Zeitraums liegt vor dem Beginn.')
+        return bis
+
+
+class PrognoseFilterForm(forms.Form):
+    """Filter-Formular für die Abgangs- und Nachbesetzungsprognose."""
+
+    erstes_jahr = forms.IntegerField(
+        label='Ab Jahr',
+        required=False,
+        min_value=1900,
+        max_value=2200,
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Laufendes Jahr'
+        })
+    )
+
+    anzahl_jahre = forms.IntegerField(
+        label='Anzahl Jahre',
+        required=False,
+        min_value=1,
+        max_value=30,
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control',
+            'placeholder': '10'
+        })
+    )
+
+    sprengel = forms.ModelChoiceField(
+        label='Sprengel',
+        queryset=Sprengel.objects.all(),
+        required=False,
+        empty_label='Alle',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+    max_amtsdauer = forms.IntegerField(
+        label='Max. Amtsdauer (Jahre)',
+        required=False,
+        min_value=1,
+        max_value=60,
+        widget=forms.NumberInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Nur Ende-Datum'
+        })
+    )
+
+    def prognose_parameter(self):
+        """Argumente für apps.sprengel.prognose.prognose(); ungültige Angaben fallen auf die Standardwerte zurück."""
+        daten = self.cleaned_data if self.is_valid() else {}
+        return {
+            'erstes_jahr': daten.get('erstes_jahr'),
+            'anzahl_jahre': daten.get('anzahl_jahre') or 10,
+            'sprengel': daten.get('sprengel'),
+            'max_amtsdauer': daten.get('max_amtsdauer'),
+        }
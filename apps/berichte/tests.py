@@ -129,7 +129,7 @@ class CSVExporterTestCase(ExporterTestCase):
         self.assertIn('.csv"', response['Content-Disposition'])
 
         # CSV-Inhalt prüfen
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         reader = csv.reader(io.StringIO(content), delimiter=';')
         rows = list(reader)
 
@@ -159,7 +159,7 @@ class CSVExporterTestCase(ExporterTestCase):
 
         self.assertEqual(response.status_code, 200)
 
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         reader = csv.reader(io.StringIO(content), delimiter=';')
         rows = list(reader)
 
@@ -358,7 +358,7 @@ class DateFormatTestCase(ExporterTestCase):
         exporter = CSVExporter(queryset, spalten)
         response = exporter.export()
 
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         reader = csv.reader(io.StringIO(content), delimiter=';')
         rows = list(reader)
 
@@ -390,7 +390,7 @@ class DateFormatTestCase(ExporterTestCase):
         exporter = CSVExporter(queryset, spalten)
         response = exporter.export()
 
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         reader = csv.reader(io.StringIO(content), delimiter=';')
         rows = list(reader)
 
@@ -412,7 +412,7 @@ class GermanColumnNamesTestCase(ExporterTestCase):
         exporter = CSVExporter(queryset, spalten)
         response = exporter.export()
 
-        content = response.content.decode('utf-8-sig')
+        content = response.getvalue().decode('utf-8-sig')
         reader = csv.reader(io.StringIO(content), delimiter=';')
         rows = list(reader)
 
@@ -438,3 +438,43 @@ class GermanColumnNamesTestCase(ExporterTestCase):
         self.assertEqual(ws.cell(1, 1).value, 'Notarnummer')
         self.assertEqual(ws.cell(1, 2).value, 'Name')
         self.assertEqual(ws.cell(1, 3).value, 'Stadt')
+
+
+class StreamingCSVExportTestCase(TestCase):
+    """Tests für den gestreamten CSV-Export."""
+
+    def setUp(self):
+        self.notarstelle = Notarstelle.objects.create(
+            bezeichnung='NST-000001', name='Notariat Wien; "Innere Stadt"',
+            strasse='Graben 1', plz='1010', stadt='Wien'
+        )
+        Notar.objects.bulk_create([
+            Notar(
+                notar_id=f'NOT-{i:06d}', vorname='Karl', nachname=f'Notar {i}',
+                email=f'notar{i}@example.com', notarstelle=self.notarstelle,
+                bestellt_am=timezone.now().date(), beginn_datum=timezone.now().date()
+            )
+            for i in range(1, 8)
+        ])
+
+    def test_blockweise_mit_bom_und_quoting(self):
+        """Kopfzeile kommt ohne Query, Daten in Blöcken über iterator(); Format bleibt gleich."""
+        queryset = Notar.objects.select_related('notarstelle').order_by('notar_id')
+        exporter = CSVExporter(queryset, [('notar_id', 'Notar-ID'), ('notarstelle__name', 'Notarstelle')])
+        exporter.zeilen_pro_block = 3
+        response = exporter.export()
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+        bloecke = iter(response.streaming_content)
+        with self.assertNumQueries(0):
+            kopf = next(bloecke)
+        self.assertEqual(kopf, '\ufeff"Notar-ID";"Notarstelle"\r\n'.encode('utf-8'))
+
+        rest = list(bloecke)
+        self.assertEqual(len(rest), 3)  # 3 + 3 + 1 Zeilen
+        self.assertIsNone(queryset._result_cache)
+        rows = list(csv.reader(io.StringIO(b''.join(rest).decode('utf-8')), delimiter=';'))
+        self.assertEqual(rows[0], ['NOT-000001', 'Notariat Wien; "Innere Stadt"'])
+        self.assertEqual(len(rows), 7)
+        self.assertIn(b'"Notariat Wien; ""Innere Stadt"""', rest[0])
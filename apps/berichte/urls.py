@@ -14,6 +14,8 @@ urlpatterns = [
     path('filter/notarstellen/', views.notarstellen_filter_view, name='filter_notarstellen'),
     path('filter/workflows/', views.workflows_filter_view, name='filter_workflows'),
     path('filter/sprengel/', views.sprengel_filter_view, name='filter_sprengel'),
+    path('filter/vakanzen/', views.vakanzen_filter_view, name='filter_vakanzen'),
+    path('filter/prognose/', views.prognose_filter_view, name='filter_prognose'),
 
     # Exports
     path('export/notare/', views.export_notare_view, name='export_notare'),
@@ -21,4 +23,6 @@ urlpatterns = [
     path('export/notarstellen/', views.export_notarstellen_view, name='export_notarstellen'),
     path('export/workflows/', views.export_workflows_view, name='export_workflows'),
     path('export/sprengel/', views.export_sprengel_view, name='export_sprengel'),
+    path('export/vakanzen/', views.export_vakanzen_view, name='export_vakanzen'),
+    path('export/prognose/', views.export_prognose_view, name='export_prognose'),
 ]
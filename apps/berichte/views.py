@@ -4,17 +4,21 @@ Views für Berichte und Exports.
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from django.db.models import Q
+from apps.personen import besetzungen
 from apps.personen.models import Notar, NotarAnwaerter
 from apps.notarstellen.models import Notarstelle
 from apps.workflows.models import WorkflowInstanz
 from .exporters import export_data
+from apps.sprengel import prognose
 from apps.sprengel.models import Sprengel
 from .forms import (
     NotareFilterForm,
     AnwaerterFilterForm,
     NotarstellenFilterForm,
     WorkflowsFilterForm,
-    SprengelFilterForm
+    SprengelFilterForm,
+    VakanzenFilterForm,
+    PrognoseFilterForm
 )
 
 
@@ -55,6 +59,18 @@ def berichte_uebersicht_view(request):
                 'filter_url': 'filter_sprengel',
                 'export_url': 'export_sprengel',
             },
+            {
+                'titel': 'Vakanzen',
+                'beschreibung': 'Unbesetzte Zeiträume der aktiven Notarstellen',
+                'filter_url': 'filter_vakanzen',
+                'export_url': 'export_vakanzen',
+            },
+            {
+                'titel': 'Nachbesetzungsprognose',
+                'beschreibung': 'Abgänge von Notaren und anstehende Bestellungen pro Sprengel und Jahr',
+                'filter_url': 'filter_prognose',
+                'export_url': 'export_prognose',
+            },
         ]
     }
     return render(request, 'berichte/uebersicht.html', context)
@@ -498,7 +514,7 @@ def export_sprengel_view(request):
     format_typ = request.GET.get('format', 'csv')
 
     # Basis-Queryset
-    queryset = Sprengel.objects.all().order_by('bezeichnung')
+    queryset = Sprengel.objects.mit_zaehlern().order_by('bezeichnung')
 
     # Filter anwenden
     form = SprengelFilterForm(request.GET)
@@ -533,3 +549,81 @@ def export_sprengel_view(request):
     ]
 
     return export_data(queryset, spalten, format_typ, titel='Sprengel')
+
+
+def _vakanzen(form):
+    """Vakanzen der aktiven Notarstellen im gewählten Zeitraum (und Sprengel)."""
+    von, bis = form.zeitraum()
+    notarstellen = Notarstelle.objects.filter(ist_aktiv=True)
+    if form.is_valid() and form.cleaned_data.get('sprengel'):
+        notarstellen = notarstellen.filter(sprengel=form.cleaned_data['sprengel'])
+    return besetzungen.vakanzen(von, bis, notarstellen)
+
+
+@login_required
+def vakanzen_filter_view(request):
+    """Filter-Seite für den Vakanzen-Export."""
+    form = VakanzenFilterForm(request.GET or None)
+    vakanzen = _vakanzen(form)
+
+    context = {
+        'form': form,
+        'queryset': vakanzen,
+        'anzahl': len(vakanzen),
+        'titel': 'Vakanzen',
+        'export_url_name': 'export_vakanzen',
+    }
+    return render(request, 'berichte/filter.html', context)
+
+
+@login_required
+def export_vakanzen_view(request):
+    """Exportiert die unbesetzten Zeiträume der Notarstellen."""
+    format_typ = request.GET.get('format', 'csv')
+    vakanzen = _vakanzen(VakanzenFilterForm(request.GET))
+
+    spalten = [
+        ('notarstelle__bezeichnung', 'Notarstelle'),
+        ('notarstelle__name', 'Name'),
+        ('von', 'Unbesetzt von'),
+        ('bis', 'Unbesetzt bis'),
+        ('tage', 'Tage'),
+    ]
+
+    return export_data(vakanzen, spalten, format_typ, titel='Vakanzen')
+
+
+@login_required
+def prognose_filter_view(request):
+    """Filter-Seite für den Export der Nachbesetzungsprognose."""
+    form = PrognoseFilterForm(request.GET or None)
+    zeilen = prognose.prognose(**form.prognose_parameter())
+
+    context = {
+        'form': form,
+        'queryset': zeilen,
+        'anzahl': len(zeilen),
+        'titel': 'Nachbesetzungsprognose',
+        'export_url_name': 'export_prognose',
+    }
+    return render(request, 'berichte/filter.html', context)
+
+
+@login_required
+def export_prognose_view(request):
+    """Exportiert die Nachbesetzungsprognose pro Sprengel und Jahr."""
+    format_typ = request.GET.get('format', 'csv')
+    zeilen = prognose.prognose(**PrognoseFilterForm(request.GET).prognose_parameter())
+
+    spalten = [
+        ('sprengel_bezeichnung', 'Sprengel'),
+        ('sprengel_name', 'Name'),
+        ('jahr', 'Jahr'),
+        ('bestand', 'Notare zu Jahresbeginn'),
+        ('abgaenge', 'Abgänge'),
+        ('kandidaten', 'Kandidaten zur Bestellung'),
+        ('saldo', 'Saldo'),
+        ('saldo_kumuliert', 'Saldo kumuliert'),
+    ]
+
+    return export_data(zeilen, spalten, format_typ, titel='Nachbesetzungsprognose')
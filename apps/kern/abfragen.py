@@ -0,0 +1,22 @@
+"""
+Bausteine für Datenbankabfragen, die mehrere Apps verwenden.
+"""
+from django.db.models import F, Func, IntegerField, Subquery
+
+
+def anzahl_unterabfrage(queryset):
+    """
+    Skalare Unterabfrage, die die (verschiedenen) Einträge eines korrelierten QuerySets zählt.
+
+    Anders als mehrere Count()-Annotationen über JOINs vervielfachen sich
+    die Zeilen nicht, jeder Zähler bleibt eine eigene Unterabfrage.
+
+    Beispiel:
+        Notarstelle.objects.annotate(anzahl=anzahl_unterabfrage(
+            Notar.objects.filter(notarstelle=OuterRef('pk'))
+        ))
+    """
+    zaehlung = queryset.order_by().annotate(
+        anzahl=Func(F('pk'), function='COUNT', template='%(function)s(DISTINCT %(expressions)s)')
+    ).values('anzahl')
+    return Subquery(zaehlung, output_field=IntegerField())
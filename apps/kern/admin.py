@@ -1,3 +1,16 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IdZaehler
+
+
+@admin.register(IdZaehler)
+class IdZaehlerAdmin(admin.ModelAdmin):
+    """Admin für die ID-Zähler (nur lesend, Pflege über apps.kern.ids)."""
+    list_display = ['praefix', 'letzte_nummer', 'aktualisiert_am']
+    readonly_fields = ['praefix', 'letzte_nummer', 'aktualisiert_am']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,153 @@
+"""
+Zentrale Vergabe fortlaufender IDs (NOT-000001, NKA-000001, NST-000001, SPR-000001).
+
+Jeder Präfix hat eine Zeile in IdZaehler. Eine Reservierung erhöht den
+Zähler mit einem einzigen atomaren UPDATE um die gewünschte Anzahl; parallele
+Anlagen erhalten dadurch nie dieselbe Nummer, und ein Import kann z.B. 5.000
+IDs mit zwei Queries reservieren.
+
+Beim ersten Zugriff auf einen Präfix wird der Zähler aus den vorhandenen
+Datensätzen initialisiert. Reservierte, aber nicht verwendete Nummern
+bleiben als Lücke bestehen. Formulare reservieren deshalb nichts, sondern
+zeigen nur vorschau_id() an; nach dem Speichern hebt zaehler_anheben() den
+Zähler auf die tatsächlich verwendete ID an.
+"""
+import re
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import IdZaehler
+
+# Präfix -> (App, Model, ID-Feld)
+ID_KREISE = {
+    'NOT': ('personen', 'Notar', 'notar_id'),
+    'NKA': ('personen', 'NotarAnwaerter', 'anwaerter_id'),
+    'NST': ('notarstellen', 'Notarstelle', 'bezeichnung'),
+    'SPR': ('sprengel', 'Sprengel', 'bezeichnung'),
+}
+
+STELLEN = 6
+
+
+def formatieren(praefix, nummer):
+    """Formatiert eine Nummer als ID, z.B. ('NOT', 12) -> 'NOT-000012'."""
+    return f"{praefix}-{nummer:0{STELLEN}d}"
+
+
+def hoechste_vorhandene_nummer(praefix):
+    """
+    Ermittelt die höchste bereits verwendete Nummer eines Präfix.
+
+    Berücksichtigt auch Alt-IDs mit weniger Stellen (z.B. NOT-001).
+    """
+    app_label, model_name, feld = ID_KREISE[praefix]
+    model = apps.get_model(app_label, model_name)
+    muster = re.compile(rf'^{praefix}-(\d+)$')
+    hoechste = 0
+    werte = model.objects.filter(**{f'{feld}__startswith': f'{praefix}-'}).values_list(feld, flat=True)
+    for wert in werte.iterator(chunk_size=2000):
+        match = muster.match(wert)
+        if match:
+            hoechste = max(hoechste, int(match.group(1)))
+    return hoechste
+
+
+def _zaehler_anlegen(praefix):
+    if praefix not in ID_KREISE:
+        raise ValueError(f'Unbekannter ID-Präfix: {praefix}')
+    IdZaehler.objects.get_or_create(
+        praefix=praefix,
+        defaults={'letzte_nummer': hoechste_vorhandene_nummer(praefix)}
+    )
+
+
+@transaction.atomic
+def nummern_reservieren(praefix, anzahl=1):
+    """
+    Reserviert `anzahl` fortlaufende Nummern.
+
+    Args:
+        praefix: 'NOT', 'NKA', 'NST' oder 'SPR'
+        anzahl: Anzahl der Nummern (mindestens 1)
+
+    Returns:
+        range: Die reservierten Nummern
+    """
+    if anzahl < 1:
+        raise ValueError('Es muss mindestens eine Nummer reserviert werden.')
+    zaehler = IdZaehler.objects.filter(praefix=praefix)
+    if not zaehler.update(letzte_nummer=F('letzte_nummer') + anzahl):
+        _zaehler_anlegen(praefix)
+        zaehler.update(letzte_nummer=F('letzte_nummer') + anzahl)
+    letzte = IdZaehler.objects.values_list('letzte_nummer', flat=True).get(praefix=praefix)
+    return range(letzte - anzahl + 1, letzte + 1)
+
+
+def ids_reservieren(praefix, anzahl=1):
+    """Reserviert `anzahl` IDs und gibt sie formatiert zurück."""
+    return [formatieren(praefix, nummer) for nummer in nummern_reservieren(praefix, anzahl)]
+
+
+def naechste_id(praefix):
+    """Reserviert genau eine ID, z.B. naechste_id('NOT') -> 'NOT-000042'."""
+    return ids_reservieren(praefix)[0]
+
+
+def vorschau_id(praefix):
+    """
+    Nächste freie ID, ohne sie zu reservieren (z.B. zur Vorbelegung eines Formulars).
+
+    Bei gleichzeitigen Anlagen kann dieselbe ID mehrfach angezeigt werden;
+    gespeichert wird sie nur einmal (Unique-Constraint).
+    """
+    if praefix not in ID_KREISE:
+        raise ValueError(f'Unbekannter ID-Präfix: {praefix}')
+    letzte = IdZaehler.objects.filter(praefix=praefix).values_list('letzte_nummer', flat=True).first()
+    if letzte is None:
+        letzte = hoechste_vorhandene_nummer(praefix)
+    return formatieren(praefix, letzte + 1)
+
+
+@transaction.atomic
+def zaehler_anheben(praefix, wert):
+    """
+    Hebt den Zähler auf die Nummer einer gespeicherten ID an, falls sie höher ist.
+
+    Für IDs, die nicht über den Allocator reserviert wurden (Formulare mit
+    vorschau_id() oder manuell eingetragene IDs). Der Zähler wird nie
+    verringert; IDs in fremdem Format werden ignoriert.
+    """
+    match = re.match(rf'^{praefix}-(\d+)$', wert or '')
+    if not match:
+        return
+    nummer = int(match.group(1))
+    zaehler = IdZaehler.objects.filter(praefix=praefix)
+    if not zaehler.filter(letzte_nummer__lt=nummer).update(letzte_nummer=nummer, aktualisiert_am=timezone.now()):
+        if not zaehler.exists():
+            _zaehler_anlegen(praefix)
+
+
+@transaction.atomic
+def zaehler_abgleichen(praefix):
+    """
+    Hebt den Zähler auf die höchste vorhandene Nummer an.
+
+    Nötig, wenn IDs außerhalb des Allocators vergeben wurden (z.B. Importe
+    mit festen IDs). Der Zähler wird nie verringert.
+
+    Returns:
+        tuple: (alter Stand, neuer Stand)
+    """
+    zaehler = IdZaehler.objects.select_for_update().filter(praefix=praefix).first()
+    if zaehler is None:
+        _zaehler_anlegen(praefix)
+        return 0, IdZaehler.objects.values_list('letzte_nummer', flat=True).get(praefix=praefix)
+    alt = zaehler.letzte_nummer
+    neu = max(alt, hoechste_vorhandene_nummer(praefix))
+    if neu != alt:
+        zaehler.letzte_nummer = neu
+        zaehler.save(update_fields=['letzte_nummer', 'aktualisiert_am'])
+    return alt, neu
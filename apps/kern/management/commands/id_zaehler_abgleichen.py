@@ -0,0 +1,55 @@
+"""
+Management Command: Gleicht die ID-Zähler mit den vorhandenen Datensätzen ab.
+
+Die Zähler in IdZaehler werden bei jeder Vergabe über apps.kern.ids
+fortgeschrieben. Wurden IDs auf anderem Weg vergeben (z.B. Import mit festen
+IDs, migrate_ids), hebt dieser Command die Zähler auf die höchste vorhandene
+Nummer an, damit keine doppelten IDs reserviert werden.
+"""
+from django.core.management.base import BaseCommand
+from apps.kern import ids
+from apps.kern.models import IdZaehler
+
+
+class Command(BaseCommand):
+    help = 'Hebt die ID-Zähler (NOT, NKA, NST, SPR) auf die höchste vorhandene Nummer an'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Zeigt nur Abweichungen an, ohne Änderungen vorzunehmen'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING('DRY RUN - Keine Änderungen werden gespeichert')
+            )
+
+        korrigiert = 0
+        for praefix in ids.ID_KREISE:
+            if dry_run:
+                alt = IdZaehler.objects.filter(praefix=praefix).values_list(
+                    'letzte_nummer', flat=True
+                ).first() or 0
+                neu = max(alt, ids.hoechste_vorhandene_nummer(praefix))
+            else:
+                alt, neu = ids.zaehler_abgleichen(praefix)
+
+            if neu != alt:
+                korrigiert += 1
+                self.stdout.write(f'  {praefix}: {alt} → {neu}')
+            else:
+                self.stdout.write(f'  {praefix}: {alt} (korrekt)')
+
+        if not korrigiert:
+            self.stdout.write(self.style.SUCCESS('\nAlle ID-Zähler sind aktuell.'))
+        elif dry_run:
+            self.stdout.write(
+                self.style.WARNING(f'\nDRY RUN: {korrigiert} Zähler würden angehoben werden.')
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(f'\n✓ {korrigiert} Zähler angehoben!'))
@@ -0,0 +1,74 @@
+"""
+Management Command: Misst die CPU-Zeit pro PDF für alle PDF-Exporte.
+
+Rendert Notar-Vergleich, Kandidaten-Vergleich, Bericht-PDF, Stammblatt und
+Besetzungsvorschlag mit vorhandenen Daten und gibt die CPU-Zeit des ersten
+Aufrufs (inkl. Aufbau der Styles) und den Mittelwert der Folgeaufrufe aus.
+Es wird nichts gespeichert.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+
+class Command(BaseCommand):
+    help = 'Misst die CPU-Zeit pro PDF für die PDF-Exporte (apps.kern.pdf)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--anzahl',
+            type=int,
+            default=50,
+            help='Anzahl Durchläufe pro PDF (Standard: 50)'
+        )
+
+    def handle(self, *args, **options):
+        from apps.berichte.exporters import PDFExporter
+        from apps.notarstellen.models import Notarstelle
+        from apps.personen import views
+        from apps.personen.models import Notar, NotarAnwaerter
+        from apps.services.services.dokument_services import (
+            BesetzungsvorschlagService,
+            StammblattPDFEinzelnService,
+        )
+
+        notare = list(Notar.objects.select_related('notarstelle')[:3])
+        kandidaten = list(NotarAnwaerter.objects.select_related(
+            'notarstelle', 'betreuender_notar__notarstelle'
+        )[:3])
+        notarstelle = Notarstelle.objects.first()
+        if len(notare) < 2 or len(kandidaten) < 2 or notarstelle is None:
+            raise CommandError('Benötigt mindestens 2 Notare, 2 Kandidaten und eine Notarstelle.')
+
+        request = RequestFactory().get('/')
+        spalten = [
+            ('notar_id', 'ID'), ('vorname', 'Vorname'), ('nachname', 'Nachname'),
+            ('email', 'E-Mail'), ('notarstelle', 'Notarstelle'),
+        ]
+        bericht = Notar.objects.select_related('notarstelle')
+        faelle = [
+            ('Notar-Vergleich', lambda: views.notare_vergleich_pdf_export(notare)),
+            ('Kandidaten-Vergleich', lambda: views.anwaerter_vergleich_pdf_export(request, kandidaten)),
+            (f'Bericht ({bericht.count()} Zeilen)', lambda: PDFExporter(bericht, spalten, 'Notare').export()),
+            ('Stammblatt', lambda: StammblattPDFEinzelnService._erstelle_stammblatt_pdf(None, kandidaten[0])),
+            ('Besetzungsvorschlag', lambda: BesetzungsvorschlagService._erstelle_besetzungsvorschlag_pdf(
+                None, notarstelle, kandidaten, 'Empfehlung'
+            )),
+        ]
+
+        anzahl = max(options['anzahl'], 1)
+        self.stdout.write(f'{"PDF":28} {"erster Aufruf":>14} {"pro PDF":>10}')
+        for name, erzeugen in faelle:
+            start = time.process_time()
+            erzeugen()
+            erster = time.process_time() - start
+
+            start = time.process_time()
+            for _ in range(anzahl):
+                erzeugen()
+            mittel = (time.process_time() - start) / anzahl
+
+            self.stdout.write(f'{name:28} {erster * 1000:11.1f} ms {mittel * 1000:7.2f} ms')
+
+        self.stdout.write(self.style.SUCCESS(f'\n✓ {anzahl} Durchläufe pro PDF gemessen'))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdZaehler',
+            fields=[
+                ('praefix', models.CharField(max_length=10, primary_key=True, serialize=False, verbose_name='Präfix')),
+                ('letzte_nummer', models.PositiveBigIntegerField(default=0, verbose_name='Letzte vergebene Nummer')),
+                ('aktualisiert_am', models.DateTimeField(auto_now=True, verbose_name='Aktualisiert am')),
+            ],
+            options={
+                'verbose_name': 'ID-Zähler',
+                'verbose_name_plural': 'ID-Zähler',
+                'ordering': ['praefix'],
+            },
+        ),
+    ]
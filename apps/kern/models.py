@@ -50,3 +50,32 @@ class AktivModel(models.Model):
         """Deaktiviert den Datensatz."""
         self.ist_aktiv = False
         self.save()
+
+
+class IdZaehler(models.Model):
+    """
+    Zähler für fortlaufende IDs (NOT-, NKA-, NST-, SPR-).
+
+    Wird ausschließlich über apps.kern.ids fortgeschrieben.
+    """
+    praefix = models.CharField(
+        max_length=10,
+        primary_key=True,
+        verbose_name='Präfix'
+    )
+    letzte_nummer = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Letzte vergebene Nummer'
+    )
+    aktualisiert_am = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Aktualisiert am'
+    )
+
+    class Meta:
+        verbose_name = 'ID-Zähler'
+        verbose_name_plural = 'ID-Zähler'
+        ordering = ['praefix']
+
+    def __str__(self):
+        return f"{self.praefix}: {self.letzte_nummer}"
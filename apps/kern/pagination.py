@@ -0,0 +1,168 @@
+"""
+Keyset-(Cursor-)Paginierung für große, zeitlich sortierte Listen.
+
+Statt OFFSET zu verwenden (die Datenbank muss alle übersprungenen Zeilen
+lesen), merkt sich der Cursor den Sortierschlüssel der letzten bzw. ersten
+Zeile der Seite. Die nächste Seite ist dann eine einfache Bereichsabfrage
+über (feld, id) und kostet auf Seite 500 genauso viel wie auf Seite 1.
+"""
+import base64
+import binascii
+import hashlib
+import json
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+def seitengroesse(request, standard=25, maximum=100):
+    """Liest ?pro_seite aus dem Request, begrenzt auf 1..maximum."""
+    try:
+        return min(max(int(request.GET.get('pro_seite', standard)), 1), maximum)
+    except ValueError:
+        return standard
+
+
+class KeysetSeite:
+    """Eine Seite einer Keyset-Paginierung."""
+
+    def __init__(self, objekte, naechster_cursor=None, vorheriger_cursor=None,
+                 pro_seite=25, gesamt=None):
+        self.objekte = objekte
+        self.naechster_cursor = naechster_cursor
+        self.vorheriger_cursor = vorheriger_cursor
+        self.pro_seite = pro_seite
+        self.gesamt = gesamt
+
+    def __iter__(self):
+        return iter(self.objekte)
+
+    def __len__(self):
+        return len(self.objekte)
+
+    @property
+    def hat_naechste(self):
+        return self.naechster_cursor is not None
+
+    @property
+    def hat_vorherige(self):
+        return self.vorheriger_cursor is not None
+
+    @property
+    def hat_weitere_seiten(self):
+        return self.hat_naechste or self.hat_vorherige
+
+
+class KeysetPaginator:
+    """
+    Paginiert ein QuerySet absteigend nach (feld, id).
+
+    `feld` kann ein Model-Feld oder eine Annotation des QuerySets sein.
+
+    Beispiel:
+        paginator = KeysetPaginator(WorkflowInstanz.objects.all(), 'erstellt_am')
+        seite = paginator.seite(request.GET.get('cursor'))
+    """
+
+    GESAMT_CACHE_SEKUNDEN = 60
+
+    def __init__(self, queryset, feld, pro_seite=25):
+        self.queryset = queryset
+        self.feld = feld
+        self.pro_seite = pro_seite
+
+    def seite(self, cursor=None, mit_gesamt=False):
+        """
+        Liefert die Seite zum Cursor (ohne Cursor: erste Seite).
+
+        Ungültige Cursor werden wie kein Cursor behandelt.
+
+        Args:
+            cursor: Cursor-Token aus einer vorherigen Seite
+            mit_gesamt: Ungefähre Gesamtanzahl mitliefern (gecacht)
+
+        Returns:
+            KeysetSeite
+        """
+        richtung, wert, pk = self._decode(cursor)
+        feld = self.feld
+
+        if richtung == 'v':
+            # Rückwärts: aufsteigend lesen, danach umdrehen
+            qs = self.queryset.filter(
+                Q(**{f'{feld}__gt': wert}) | Q(**{feld: wert, 'pk__gt': pk})
+            ).order_by(feld, 'pk')
+        elif richtung == 'n':
+            qs = self.queryset.filter(
+                Q(**{f'{feld}__lt': wert}) | Q(**{feld: wert, 'pk__lt': pk})
+            ).order_by(f'-{feld}', '-pk')
+        else:
+            qs = self.queryset.order_by(f'-{feld}', '-pk')
+
+        objekte = list(qs[:self.pro_seite + 1])
+        weitere = len(objekte) > self.pro_seite
+        objekte = objekte[:self.pro_seite]
+
+        if richtung == 'v':
+            objekte.reverse()
+            hat_vorherige, hat_naechste = weitere, True
+        else:
+            hat_vorherige, hat_naechste = richtung == 'n', weitere
+
+        return KeysetSeite(
+            objekte,
+            naechster_cursor=self._encode('n', objekte[-1]) if objekte and hat_naechste else None,
+            vorheriger_cursor=self._encode('v', objekte[0]) if objekte and hat_vorherige else None,
+            pro_seite=self.pro_seite,
+            gesamt=self.gesamt_ungefaehr() if mit_gesamt else None,
+        )
+
+    def gesamt_ungefaehr(self):
+        """
+        Gesamtanzahl der Treffer, für kurze Zeit pro Abfrage gecacht.
+
+        Beim Blättern durch dieselbe Liste wird so nur einmal gezählt.
+        """
+        sql = str(self.queryset.order_by().query)
+        schluessel = 'keyset-gesamt-' + hashlib.sha1(sql.encode('utf-8')).hexdigest()
+        gesamt = cache.get(schluessel)
+        if gesamt is None:
+            gesamt = self.queryset.order_by().count()
+            cache.set(schluessel, gesamt, self.GESAMT_CACHE_SEKUNDEN)
+        return gesamt
+
+    def _encode(self, richtung, objekt):
+        wert = getattr(objekt, self.feld)
+        if isinstance(wert, (datetime, date)):
+            wert = wert.isoformat()
+        daten = json.dumps([richtung, wert, objekt.pk], separators=(',', ':'))
+        return base64.urlsafe_b64encode(daten.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def _decode(self, cursor):
+        if not cursor:
+            return None, None, None
+        try:
+            daten = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            richtung, wert, pk = json.loads(daten)
+        except (ValueError, TypeError, binascii.Error):
+            return None, None, None
+        if richtung not in ('n', 'v') or wert is None or pk is None:
+            return None, None, None
+
+        try:
+            pk = self.queryset.model._meta.pk.to_python(pk)
+            try:
+                feld = self.queryset.model._meta.get_field(self.feld)
+            except FieldDoesNotExist:
+                # Annotationen (z.B. Relevanz) haben kein Model-Feld zum Konvertieren
+                if isinstance(wert, bool) or not isinstance(wert, (int, float, str)):
+                    return None, None, None
+            else:
+                wert = feld.to_python(wert)
+        except (ValueError, TypeError, ValidationError):
+            return None, None, None
+        if wert is None or pk is None:
+            return None, None, None
+        return richtung, wert, pk
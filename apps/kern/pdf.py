@@ -0,0 +1,276 @@
+"""
+Gemeinsame PDF-Bausteine auf Basis von ReportLab.
+
+Stylesheets, Tabellen-Styles und Schriften werden einmal pro Prozess
+aufgebaut und danach von allen PDF-Exporten (Vergleiche, Berichte,
+Dokument-Services) wiederverwendet. ParagraphStyle- und TableStyle-Objekte
+werden von ReportLab beim Rendern nur gelesen und können daher zwischen
+Requests und Threads geteilt werden.
+
+Schriften: Standard ist die eingebaute Helvetica. Über die Einstellung
+PDF_SCHRIFTEN = {'normal': '/pfad/Regular.ttf', 'fett': '/pfad/Bold.ttf'}
+kann eine TrueType-Schrift verwendet werden; sie wird beim ersten Zugriff
+einmalig registriert.
+
+ASCII85-Kodierung der Seiteninhalte: ReportLab liest rl_config.useA85 erst
+beim Rendern und kennt keine Option pro Dokument; das Modul ändert die
+Einstellung daher nicht. Ohne die C-Beschleunigung von ReportLab kostet die
+Kodierung in reinem Python einen großen Teil der Renderzeit - sie lässt
+sich für den ganzen Prozess über die Umgebungsvariable RL_useA85=0 (oder
+reportlab_settings.py) abschalten.
+"""
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+# Farben der Kammer
+AKZENT = '#9EBDD5'
+BERICHT = '#0D6EFD'
+DUNKEL = '#2c3e50'
+
+
+@lru_cache(maxsize=None)
+def schriften():
+    """
+    Liefert (normal, fett) als registrierte Schriftnamen.
+
+    Registriert die TrueType-Schriften aus PDF_SCHRIFTEN beim ersten Aufruf.
+    """
+    konfiguration = getattr(settings, 'PDF_SCHRIFTEN', None)
+    if not konfiguration:
+        return 'Helvetica', 'Helvetica-Bold'
+    pdfmetrics.registerFont(TTFont('Kammer', konfiguration['normal']))
+    pdfmetrics.registerFont(TTFont('Kammer-Fett', konfiguration.get('fett', konfiguration['normal'])))
+    pdfmetrics.registerFontFamily('Kammer', normal='Kammer', bold='Kammer-Fett')
+    return 'Kammer', 'Kammer-Fett'
+
+
+@lru_cache(maxsize=None)
+def stile():
+    """
+    Stylesheet mit den ReportLab-Standardstilen und den Stilen der Kammer.
+
+    Zusätzlich zu 'Normal', 'Heading1', ...:
+    'Klein' (Tabellenzellen), 'Abschnitt' (Überschriften in Dokumenten),
+    'Fusszeile' und 'FusszeileZentriert'.
+    """
+    normal, fett = schriften()
+    stylesheet = getSampleStyleSheet()
+    for name in ('Normal', 'BodyText', 'Heading1', 'Heading2'):
+        stylesheet[name].fontName = fett if name.startswith('Heading') else normal
+    stylesheet.add(ParagraphStyle(
+        'Klein', parent=stylesheet['Normal'], fontSize=8, leading=10,
+    ))
+    stylesheet.add(ParagraphStyle(
+        'Abschnitt', parent=stylesheet['Heading2'], fontSize=14,
+        textColor=colors.HexColor(DUNKEL), spaceAfter=12, spaceBefore=20,
+    ))
+    stylesheet.add(ParagraphStyle(
+        'Fusszeile', parent=stylesheet['Normal'], fontSize=8, textColor=colors.grey,
+    ))
+    stylesheet.add(ParagraphStyle(
+        'FusszeileZentriert', parent=stylesheet['Normal'], fontSize=9,
+        textColor=colors.grey, alignment=TA_CENTER,
+    ))
+    return stylesheet
+
+
+@lru_cache(maxsize=None)
+def titel_stil(farbe=AKZENT, groesse=16, zentriert=False, abstand=20):
+    """Titel-Stil (Heading1) in Farbe und Größe des jeweiligen Dokuments."""
+    return ParagraphStyle(
+        f'Titel-{farbe}-{groesse}-{zentriert}-{abstand}',
+        parent=stile()['Heading1'],
+        fontSize=groesse,
+        textColor=colors.HexColor(farbe),
+        spaceAfter=abstand,
+        alignment=TA_CENTER if zentriert else 0,
+    )
+
+
+@lru_cache(maxsize=None)
+def vergleich_tabellenstil(farbe=AKZENT):
+    """Tabellen-Style für Vergleiche: Kopfzeile farbig, erste Spalte als Beschriftung."""
+    normal, fett = schriften()
+    return TableStyle([
+        # Kopfzeile
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(farbe)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('FONTNAME', (0, 0), (-1, 0), fett),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('TOPPADDING', (0, 0), (-1, 0), 12),
+
+        # Erste Spalte (Beschriftungen)
+        ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#F5F5F7')),
+        ('FONTNAME', (0, 1), (0, -1), fett),
+        ('FONTSIZE', (0, 1), (0, -1), 9),
+
+        # Daten
+        ('FONTNAME', (1, 1), (-1, -1), normal),
+        ('FONTSIZE', (1, 1), (-1, -1), 9),
+        ('ROWBACKGROUNDS', (1, 1), (-1, -1), [colors.white, colors.HexColor('#FAFAFA')]),
+
+        # Rahmen
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('BOX', (0, 0), (-1, -1), 1, colors.HexColor(farbe)),
+
+        # Abstände
+        ('LEFTPADDING', (0, 0), (-1, -1), 8),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+        ('TOPPADDING', (0, 1), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+    ])
+
+
+@lru_cache(maxsize=None)
+def daten_tabellenstil(farbe=BERICHT, kopf_zentriert=True, schrift=8, kopf_schrift=10, abstand=6):
+    """Tabellen-Style für Listen: farbige Kopfzeile, Gitter, Zebra-Streifen."""
+    normal, fett = schriften()
+    return TableStyle([
+        # Kopfzeile
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(farbe)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER' if kopf_zentriert else 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), fett),
+        ('FONTSIZE', (0, 0), (-1, 0), kopf_schrift),
+        ('TOPPADDING', (0, 0), (-1, 0), abstand),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12 if abstand < 8 else abstand),
+
+        # Daten
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 1), (-1, -1), normal),
+        ('FONTSIZE', (0, 1), (-1, -1), schrift),
+        ('TOPPADDING', (0, 1), (-1, -1), abstand),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), abstand),
+
+        # Gitternetz und alternierende Zeilen
+        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8F9FA')]),
+    ])
+
+
+@lru_cache(maxsize=None)
+def schluessel_wert_stil():
+    """Tabellen-Style für Beschriftung/Wert-Paare (z.B. Stammblatt)."""
+    normal, fett = schriften()
+    return TableStyle([
+        ('FONTNAME', (0, 0), (0, -1), fett),
+        ('FONTNAME', (1, 0), (1, -1), normal),
+        ('FONTSIZE', (0, 0), (-1, -1), 11),
+        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor(DUNKEL)),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ])
+
+
+def dokument(buffer, querformat=False, rand=2 * cm, rand_oben=None):
+    """SimpleDocTemplate in A4 (hoch oder quer) mit einheitlichen Rändern."""
+    rand_oben = rand if rand_oben is None else rand_oben
+    return SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(A4) if querformat else A4,
+        leftMargin=rand,
+        rightMargin=rand,
+        topMargin=rand_oben,
+        bottomMargin=rand_oben,
+    )
+
+
+def kopf(titel, farbe=AKZENT, groesse=16, zentriert=False, abstand=20, datum=False):
+    """Titel (optional mit Erstellungsdatum) als Liste von Flowables."""
+    elemente = [Paragraph(titel, titel_stil(farbe, groesse, zentriert, abstand))]
+    if datum:
+        elemente.append(Paragraph(
+            f"Erstellt am: {timezone.localtime().strftime('%d.%m.%Y %H:%M')}", stile()['Normal']
+        ))
+    elemente.append(Spacer(1, 0.5 * cm))
+    return elemente
+
+
+def fuss(text='Notariatskammer Verwaltung', zentriert=False):
+    """Fußzeile mit Erstellungszeitpunkt als Liste von Flowables."""
+    jetzt = timezone.localtime()
+    if zentriert:
+        zeile = f"Erstellt am {jetzt.strftime('%d.%m.%Y um %H:%M Uhr')} | {text}"
+        stil = stile()['FusszeileZentriert']
+    else:
+        zeile = f"Erstellt am: {jetzt.strftime('%d.%m.%Y %H:%M')} | {text}"
+        stil = stile()['Fusszeile']
+    return [Spacer(1, 1 * cm), Paragraph(zeile, stil)]
+
+
+def klein(text):
+    """Umbrechender Absatz für lange Tabellenzellen."""
+    return Paragraph(text or '—', stile()['Klein'])
+
+
+def vergleichstabelle(spalten, zeilen, breite=landscape(A4)[0] - 2 * cm, farbe=AKZENT,
+                      beschriftung_breite=4.5 * cm):
+    """
+    Vergleichstabelle: eine Spalte je verglichenem Objekt.
+
+    Args:
+        spalten: Spaltenköpfe der verglichenen Objekte
+        zeilen: Liste von (Beschriftung, [Wert je Objekt])
+        breite: Gesamtbreite der Tabelle (Standard: A4 quer mit 1 cm Rand)
+    """
+    daten = [['Eigenschaft', *spalten]]
+    daten.extend([beschriftung, *werte] for beschriftung, werte in zeilen)
+    spaltenbreite = (breite - beschriftung_breite) / max(len(spalten), 1)
+    tabelle = Table(daten, colWidths=[beschriftung_breite] + [spaltenbreite] * len(spalten))
+    tabelle.setStyle(vergleich_tabellenstil(farbe))
+    return tabelle
+
+
+def datentabelle(kopfzeile, zeilen, stil=None, spaltenbreiten=None):
+    """Tabelle mit wiederholter Kopfzeile (Standard-Style: daten_tabellenstil())."""
+    tabelle = Table([list(kopfzeile), *zeilen], colWidths=spaltenbreiten, repeatRows=1)
+    tabelle.setStyle(stil or daten_tabellenstil())
+    return tabelle
+
+
+def schluessel_wert_tabelle(zeilen, spaltenbreiten=(5 * cm, 12 * cm)):
+    """Zweispaltige Tabelle aus (Beschriftung, Wert)-Paaren."""
+    tabelle = Table([list(zeile) for zeile in zeilen], colWidths=list(spaltenbreiten))
+    tabelle.setStyle(schluessel_wert_stil())
+    return tabelle
+
+
+def erstellen(elemente, **optionen):
+    """
+    Rendert die Flowables zu PDF-Bytes.
+
+    Args:
+        elemente: Liste von Flowables
+        **optionen: Argumente für dokument() (querformat, rand, rand_oben)
+
+    Returns:
+        bytes: Das PDF
+    """
+    buffer = BytesIO()
+    dokument(buffer, **optionen).build(elemente)
+    return buffer.getvalue()
+
+
+def pdf_antwort(inhalt, dateiname):
+    """HttpResponse zum Download eines PDFs."""
+    response = HttpResponse(inhalt, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{dateiname}"'
+    return response
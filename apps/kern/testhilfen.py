@@ -0,0 +1,66 @@
+"""
+Gemeinsame Fixtures für die Tests der Apps.
+
+SeitenTestMixin meldet einen Testbenutzer an und prüft mit
+assertQueryAnzahlKonstant, dass Seiten bei wachsender Datenmenge nicht mehr
+Queries brauchen (keine Abfragen pro Zeile):
+
+    class NotareListeTest(SeitenTestMixin, TestCase):
+        def test_query_anzahl_unabhaengig_von_datenmenge(self):
+            self.assertQueryAnzahlKonstant(
+                self._notare_anlegen, [lambda: self.client.get(reverse('notare_liste'))]
+            )
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def notarstelle_anlegen(bezeichnung='NST-000001', **felder):
+    """Legt eine Notarstelle mit Standard-Adresse in Wien an."""
+    from apps.notarstellen.models import Notarstelle
+
+    werte = {
+        'name': 'Notariat Wien 1', 'strasse': 'Stephansplatz 3', 'plz': '1010', 'stadt': 'Wien',
+    }
+    werte.update(felder)
+    return Notarstelle.objects.create(bezeichnung=bezeichnung, **werte)
+
+
+class SeitenTestMixin:
+    """Angemeldeter Testbenutzer (self.benutzer) und Prüfung der Query-Anzahl."""
+
+    def setUp(self):
+        super().setUp()
+        self.benutzer = get_user_model().objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.benutzer)
+
+    def assertQueryAnzahlKonstant(self, anlegen, aufrufe, anzahl=2, weitere=20):
+        """
+        Prüft, dass die Aufrufe mit mehr Daten dieselbe Anzahl Queries brauchen.
+
+        Args:
+            anlegen: anlegen(anzahl, start) legt Testdaten an
+            aufrufe: Callables, z.B. Seitenaufrufe über self.client
+            anzahl: Datensätze für die erste Messung
+            weitere: danach zusätzlich angelegte Datensätze
+
+        Returns:
+            list[int]: Anzahl Queries je Aufruf
+        """
+        anlegen(anzahl, 0)
+        erste = []
+        for aufruf in aufrufe:
+            with CaptureQueriesContext(connection) as abfragen:
+                aufruf()
+            erste.append(len(abfragen.captured_queries))
+
+        anlegen(weitere, anzahl)
+        for aufruf, queries in zip(aufrufe, erste):
+            with self.assertNumQueries(queries):
+                aufruf()
+        return erste
@@ -1,3 +1,117 @@
+"""
+Tests für die Kern-Funktionalität.
+"""
+from datetime import date
+
 from django.test import TestCase
 
-# Create your tests here.
+
+class IdVergabeTest(TestCase):
+    """Tests für die zentrale ID-Vergabe (apps.kern.ids)."""
+
+    def setUp(self):
+        from apps.notarstellen.models import Notarstelle
+
+        self.stelle = Notarstelle.objects.create(
+            bezeichnung='NST-000007', name='Notariat Wien 1',
+            strasse='Stephansplatz 3', plz='1010', stadt='Wien'
+        )
+
+    def test_initialisierung_aus_bestand(self):
+        """Der erste Zugriff setzt auf der höchsten vorhandenen Nummer auf, auch bei Alt-IDs."""
+        from apps.kern import ids
+        from apps.personen.models import Notar
+
+        for notar_id in ['NOT-009', 'NOT-000002']:
+            Notar.objects.create(
+                notar_id=notar_id, vorname='Max', nachname='Muster',
+                email=f'{notar_id}@example.com', notarstelle=self.stelle,
+                bestellt_am=date(2015, 1, 1), beginn_datum=date(2015, 1, 1)
+            )
+
+        self.assertEqual(Notar.generate_next_id(), 'NOT-000010')
+        self.assertEqual(Notar.generate_next_id(), 'NOT-000011')
+        self.assertEqual(ids.naechste_id('NST'), 'NST-000008')
+        self.assertEqual(ids.naechste_id('SPR'), 'SPR-000001')
+
+    def test_batch_reservierung(self):
+        """Eine Reservierung liefert einen zusammenhängenden Block mit konstanter Query-Anzahl."""
+        from apps.kern import ids
+
+        ids.naechste_id('NKA')
+        with self.assertNumQueries(4):  # Savepoint, UPDATE, SELECT, Release
+            block = ids.ids_reservieren('NKA', 5000)
+        self.assertEqual(len(block), 5000)
+        self.assertEqual((block[0], block[-1]), ('NKA-000002', 'NKA-005001'))
+        self.assertEqual(ids.naechste_id('NKA'), 'NKA-005002')
+
+        with self.assertRaises(ValueError):
+            ids.ids_reservieren('XYZ')
+
+    def test_abgleichen_hebt_zaehler_an(self):
+        """Nachträglich vergebene IDs werden beim Abgleich übernommen, nie zurückgesetzt."""
+        from apps.kern import ids
+        from apps.notarstellen.models import Notarstelle
+
+        self.assertEqual(ids.naechste_id('NST'), 'NST-000008')
+        Notarstelle.objects.create(
+            bezeichnung='NST-000050', name='Notariat Graz',
+            strasse='Hauptplatz 1', plz='8010', stadt='Graz'
+        )
+        self.assertEqual(ids.zaehler_abgleichen('NST'), (8, 50))
+        self.assertEqual(ids.zaehler_abgleichen('NST'), (50, 50))
+        self.assertEqual(Notarstelle.generate_next_id(), 'NST-000051')
+
+    def test_formular_reserviert_erst_beim_speichern(self):
+        """Das Anzeigen des Formulars verbraucht keine Nummer; manuelle IDs heben den Zähler an."""
+        from django.contrib.auth import get_user_model
+        from django.urls import reverse
+        from apps.kern import ids
+        from apps.kern.models import IdZaehler
+
+        benutzer = get_user_model().objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(benutzer)
+        for _ in range(3):
+            response = self.client.get(reverse('notarstelle_erstellen'))
+            self.assertEqual(response.context['form'].initial['bezeichnung'], 'NST-000008')
+        self.assertFalse(IdZaehler.objects.filter(praefix='NST').exists())
+
+        response = self.client.post(reverse('notarstelle_erstellen'), {
+            'bezeichnung': 'NST-000020', 'name': 'Notariat Linz', 'strasse': 'Hauptplatz 1',
+            'plz': '4020', 'stadt': 'Linz', 'bundesland': 'Oberösterreich', 'ist_aktiv': 'on',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ids.vorschau_id('NST'), 'NST-000021')
+        self.assertEqual(ids.naechste_id('NST'), 'NST-000021')
+
+        # Niedrigere IDs senken den Zähler nicht
+        ids.zaehler_anheben('NST', 'NST-000010')
+        ids.zaehler_anheben('NST', 'fremdes Format')
+        self.assertEqual(ids.vorschau_id('NST'), 'NST-000022')
+
+
+class PdfTest(TestCase):
+    """Tests für die gemeinsamen PDF-Bausteine (apps.kern.pdf)."""
+
+    def test_styles_werden_gecacht(self):
+        """Stylesheets und Tabellenstile werden nur einmal pro Prozess aufgebaut."""
+        from apps.kern import pdf
+
+        self.assertIs(pdf.stile(), pdf.stile())
+        self.assertIs(pdf.daten_tabellenstil(), pdf.daten_tabellenstil())
+        self.assertIsNot(pdf.daten_tabellenstil(), pdf.daten_tabellenstil(farbe=pdf.DUNKEL))
+
+    def test_erstellen_und_antwort(self):
+        """Kopf, Tabellen und Fußzeile ergeben ein PDF mit korrekter HTTP-Antwort."""
+        from apps.kern import pdf
+
+        elemente = pdf.kopf('Test', datum=True)
+        elemente.append(pdf.datentabelle(['A', 'B'], [['1', '2'], ['3', '4']]))
+        elemente.append(pdf.vergleichstabelle(['X', 'Y'], [('Name', ['a', 'b'])]))
+        elemente.extend(pdf.fuss())
+        inhalt = pdf.erstellen(elemente, querformat=True)
+        self.assertTrue(inhalt.startswith(b'%PDF'))
+
+        response = pdf.pdf_antwort(inhalt, 'test.pdf')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('test.pdf', response['Content-Disposition'])
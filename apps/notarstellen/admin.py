@@ -43,6 +43,10 @@ class NotarstelleAdmin(admin.ModelAdmin):
 
     readonly_fields = ['erstellt_am', 'aktualisiert_am']
 
+    def get_queryset(self, request):
+        """Zähler für die Liste in derselben Abfrage laden."""
+        return super().get_queryset(request).mit_zaehlern()
+
     def get_readonly_fields(self, request, obj=None):
         """Macht bezeichnung read-only nach Erstellung (ist PK!)."""
         if obj:  # Bearbeiten
@@ -53,8 +57,10 @@ class NotarstelleAdmin(admin.ModelAdmin):
         """Zeigt Anzahl der Notare."""
         return obj.anzahl_notare()
     anzahl_notare.short_description = 'Notare'
+    anzahl_notare.admin_order_field = '_anzahl_notare'
 
     def anzahl_anwaerter(self, obj):
         """Zeigt Anzahl der Kandidat."""
         return obj.anzahl_anwaerter()
     anzahl_anwaerter.short_description = 'Kandidat'
+    anzahl_anwaerter.admin_order_field = '_anzahl_anwaerter'
@@ -1,100 +1,107 @@
 """
 Management Command zum automatischen Zuordnen von Sprengeln zu Notarstellen.
 
-Ordnet Notarstellen basierend auf ihrer Stadt einem passenden Sprengel zu.
+Ordnet Notarstellen nach Regeln (PLZ-Bereich oder Stadt -> Sprengel) einem
+passenden Sprengel zu, siehe apps.sprengel.zuordnung. Ohne --regeln gilt
+die eingebaute Stadt-Tabelle.
+
+Regeldatei (CSV oder Excel), z.B.:
+
+    sprengel,stadt,plz
+    SPR-000001,,1010-1019
+    SPR-000008,Linz,
+
+    python manage.py sprengel_zuordnen --regeln sprengel_regeln.csv --ueberschreiben --dry-run
 """
-from django.core.management.base import BaseCommand
-from apps.notarstellen.models import Notarstelle
-from apps.sprengel.models import Sprengel
+from django.core.management.base import BaseCommand, CommandError
+from apps.personen.importer import QuellenFehler, zeilen_lesen
+from apps.sprengel.zuordnung import (
+    RegelFehler,
+    Regelwerk,
+    regeln_aus_zeilen,
+    standard_regeln,
+    zuordnen,
+)
 
 
 class Command(BaseCommand):
-    help = 'Ordnet Notarstellen automatisch Sprengeln zu basierend auf Stadt/Gerichtsbezirk'
+    help = 'Ordnet Notarstellen nach PLZ- oder Stadt-Regeln automatisch Sprengeln zu'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--regeln',
+            type=str,
+            help='CSV- oder Excel-Datei mit Regeln (Spalten sprengel und stadt, plz oder plz_von/plz_bis)',
+        )
+        parser.add_argument(
+            '--blatt',
+            type=str,
+            help='Name des Excel-Blatts (Standard: aktives Blatt)',
+        )
+        parser.add_argument(
+            '--ueberschreiben',
+            action='store_true',
+            help='Auch Notarstellen neu zuordnen, die bereits einen Sprengel haben',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Zeigt nur an, was geändert würde',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Anzahl Notarstellen pro Block (Standard: 1000)',
+        )
 
     def handle(self, *args, **options):
+        dry_run = options['dry_run']
         self.stdout.write(self.style.SUCCESS('Starte Sprengel-Zuordnung...'))
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN - Keine Änderungen werden gespeichert'))
 
-        # Mapping von Stadt zu Sprengel (basierend auf Gerichtsbezirk)
-        stadt_mapping = {
-            # Wien - verteilen auf verschiedene Sprengel
-            'Wien': 'SPR-000001',  # Wien Innere Stadt als Standard
-            # Niederösterreich
-            'St. Pölten': 'SPR-000004',
-            'Wiener Neustadt': 'SPR-000005',
-            'Baden': 'SPR-000006',
-            'Krems': 'SPR-000007',
-            'Amstetten': 'SPR-000004',  # → St. Pölten
-            # Oberösterreich
-            'Linz': 'SPR-000008',
-            'Wels': 'SPR-000009',
-            'Steyr': 'SPR-000010',
-            'Traun': 'SPR-000008',  # → Linz
-            # Steiermark
-            'Graz': 'SPR-000011',
-            'Leoben': 'SPR-000012',
-            'Kapfenberg': 'SPR-000012',  # → Leoben
-            # Kärnten
-            'Klagenfurt': 'SPR-000013',
-            'Villach': 'SPR-000014',
-            'Wolfsberg': 'SPR-000013',  # → Klagenfurt
-            'Spittal an der Drau': 'SPR-000014',  # → Villach
-            # Salzburg
-            'Salzburg': 'SPR-000015',
-            'Hallein': 'SPR-000016',
-            # Tirol
-            'Innsbruck': 'SPR-000017',
-            'Kufstein': 'SPR-000018',
-            'Schwaz': 'SPR-000019',
-            # Vorarlberg
-            'Bregenz': 'SPR-000020',
-            'Feldkirch': 'SPR-000021',
-            'Dornbirn': 'SPR-000022',
-            # Burgenland
-            'Eisenstadt': 'SPR-000023',
-        }
-
-        notarstellen = Notarstelle.objects.all()
-        zugeordnet = 0
-        nicht_zugeordnet = 0
-
-        for stelle in notarstellen:
-            # Wenn bereits Sprengel zugeordnet, überspringen
-            if stelle.sprengel:
-                self.stdout.write(
-                    f'  {stelle.bezeichnung} hat bereits Sprengel: {stelle.sprengel.bezeichnung}'
-                )
-                continue
+        try:
+            if options['regeln']:
+                regeln = regeln_aus_zeilen(zeilen_lesen(options['regeln'], blatt=options['blatt']))
+            else:
+                regeln = standard_regeln()
+            regelwerk = Regelwerk(regeln)
+        except (OSError, QuellenFehler, RegelFehler) as e:
+            raise CommandError(str(e))
+        self.stdout.write(
+            f'{len(regelwerk.bereiche)} PLZ-Regeln, {len(regelwerk.staedte)} Stadt-Regeln'
+        )
 
-            # Finde passenden Sprengel basierend auf Stadt
-            sprengel_id = stadt_mapping.get(stelle.stadt)
+        ergebnis = zuordnen(
+            regelwerk,
+            dry_run=dry_run,
+            ueberschreiben=options['ueberschreiben'],
+            chunk_size=max(options['chunk_size'], 1),
+        )
 
-            if sprengel_id:
-                try:
-                    sprengel = Sprengel.objects.get(bezeichnung=sprengel_id)
-                    stelle.sprengel = sprengel
-                    stelle.save()
-                    zugeordnet += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'  ✓ {stelle.bezeichnung} ({stelle.stadt}) → {sprengel.name}'
-                        )
-                    )
-                except Sprengel.DoesNotExist:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f'  ✗ Sprengel {sprengel_id} nicht gefunden für {stelle.bezeichnung}'
-                        )
-                    )
-                    nicht_zugeordnet += 1
-            else:
-                self.stdout.write(
-                    self.style.WARNING(
-                        f'  ⚠ Kein Sprengel-Mapping für Stadt "{stelle.stadt}" ({stelle.bezeichnung})'
-                    )
-                )
-                nicht_zugeordnet += 1
+        for stelle, alt, regel in ergebnis.aenderungen:
+            self.stdout.write(self.style.SUCCESS(
+                f'  ✓ {stelle.bezeichnung} ({stelle.plz} {stelle.stadt}): '
+                f'{alt or "-"} → {regel.sprengel_id} [{regel}]'
+            ))
+        for stelle, regel in ergebnis.unbekannter_sprengel:
+            self.stdout.write(self.style.ERROR(
+                f'  ✗ Sprengel {regel.sprengel_id} nicht gefunden für {stelle.bezeichnung} [{regel}]'
+            ))
+        for stelle in ergebnis.ohne_regel:
+            self.stdout.write(self.style.WARNING(
+                f'  ⚠ Keine Regel für {stelle.bezeichnung} ({stelle.plz} {stelle.stadt})'
+            ))
 
         self.stdout.write(self.style.SUCCESS('\n=== Zusammenfassung ==='))
-        self.stdout.write(f'Zugeordnet: {zugeordnet}')
-        self.stdout.write(f'Nicht zugeordnet: {nicht_zugeordnet}')
-        self.stdout.write(self.style.SUCCESS('\nSprengel-Zuordnung abgeschlossen!'))
+        self.stdout.write(f'{"Würden zugeordnet" if dry_run else "Zugeordnet"}: {len(ergebnis.aenderungen)}')
+        self.stdout.write(f'Unverändert: {ergebnis.unveraendert}')
+        if ergebnis.beibehalten:
+            self.stdout.write(f'Bereits zugeordnet (ohne --ueberschreiben beibehalten): {ergebnis.beibehalten}')
+        self.stdout.write(f'Nicht zugeordnet: {ergebnis.nicht_zugeordnet}')
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('\nDRY RUN abgeschlossen - keine Änderungen gespeichert'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\nSprengel-Zuordnung abgeschlossen!'))
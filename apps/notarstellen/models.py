@@ -4,9 +4,34 @@ Models für Notarstellen-Verwaltung.
 Notarstellen sind die Notariate, die von der Kammer verwaltet werden.
 """
 from django.db import models
+from django.db.models import OuterRef
+from apps.kern.abfragen import anzahl_unterabfrage
+from apps.kern.ids import naechste_id
 from apps.kern.models import ZeitstempelModel, AktivModel
 
 
+class NotarstelleQuerySet(models.QuerySet):
+    """QuerySet für Notarstellen."""
+
+    def mit_zaehlern(self):
+        """
+        Annotiert die Zähler für anzahl_notare() und anzahl_anwaerter().
+
+        Die Methoden liefern dann die Werte aus derselben Abfrage, statt je
+        Notarstelle eine eigene COUNT-Abfrage abzusetzen.
+        """
+        from apps.personen.models import Notar, NotarAnwaerter
+
+        return self.annotate(
+            _anzahl_notare=anzahl_unterabfrage(
+                Notar.objects.filter(notarstelle=OuterRef('pk'), ende_datum__isnull=True)
+            ),
+            _anzahl_anwaerter=anzahl_unterabfrage(
+                NotarAnwaerter.objects.filter(notarstelle=OuterRef('pk'), ende_datum__isnull=True)
+            ),
+        )
+
+
 class Notarstelle(ZeitstempelModel, AktivModel):
     """
     Notarstelle/Notariat.
@@ -79,6 +104,8 @@ class Notarstelle(ZeitstempelModel, AktivModel):
         help_text='Interne Notizen und Bemerkungen'
     )
 
+    objects = NotarstelleQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Notarstelle'
         verbose_name_plural = 'Notarstellen'
@@ -99,26 +126,18 @@ class Notarstelle(ZeitstempelModel, AktivModel):
         return ', '.join(teile)
 
     def anzahl_notare(self):
-        """Gibt die Anzahl der zugeordneten Notare zurück."""
+        """Gibt die Anzahl der zugeordneten Notare zurück (annotiert per mit_zaehlern())."""
+        if hasattr(self, '_anzahl_notare'):
+            return self._anzahl_notare
         return self.notare.filter(ende_datum__isnull=True).count()
 
     def anzahl_anwaerter(self):
-        """Gibt die Anzahl der zugeordneten Notariatskandidat zurück."""
+        """Gibt die Anzahl der zugeordneten Notariatskandidat zurück (annotiert per mit_zaehlern())."""
+        if hasattr(self, '_anzahl_anwaerter'):
+            return self._anzahl_anwaerter
         return self.anwaerter.filter(ende_datum__isnull=True).count()
 
     @classmethod
     def generate_next_id(cls):
-        """Generiert die nächste Notarstellen-Bezeichnung im Format: NST-000001"""
-        import re
-
-        last = cls.objects.filter(
-            bezeichnung__startswith='NST-'
-        ).order_by('-bezeichnung').first()
-
-        if last:
-            match = re.search(r'-(\d+)$', last.bezeichnung)
-            nummer = int(match.group(1)) + 1 if match else 1
-        else:
-            nummer = 1
-
-        return f"NST-{nummer:06d}"
+        """Reserviert die nächste Notarstellen-Bezeichnung im Format: NST-000001"""
+        return naechste_id('NST')
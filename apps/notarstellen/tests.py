@@ -1,3 +1,300 @@
+"""
+Tests für die Notarstellen-Verwaltung.
+"""
+from datetime import date
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from apps.kern.testhilfen import SeitenTestMixin
+from apps.notarstellen.models import Notarstelle
+from apps.personen.models import Notar, NotarAnwaerter
+from apps.sprengel.models import Sprengel
+
+KammerBenutzer = get_user_model()
+
+
+class ZaehlerTest(SeitenTestMixin, TestCase):
+    """Tests für NotarstelleQuerySet.mit_zaehlern() und SprengelQuerySet.mit_zaehlern()."""
+
+    def setUp(self):
+        super().setUp()
+        self.sprengel = Sprengel.objects.create(
+            bezeichnung='SPR-000001', name='Sprengel Wien Innere Stadt',
+            gerichtsbezirk='Innere Stadt', bundesland='Wien'
+        )
+
+    def _notarstellen_anlegen(self, anzahl, start=0):
+        """Legt Notarstellen mit je zwei Notaren (einer ausgeschieden) und einem Kandidaten an."""
+        for i in range(start, start + anzahl):
+            stelle = Notarstelle.objects.create(
+                bezeichnung=f'NST-{i:06d}', name=f'Notariat {i}', strasse='Graben 1',
+                plz='1010', stadt='Wien', sprengel=self.sprengel, ist_aktiv=i % 2 == 0
+            )
+            notar = Notar.objects.create(
+                notar_id=f'NOT-{i:06d}', vorname='Karl', nachname=f'Notar {i}',
+                email=f'notar{i}@example.com', notarstelle=stelle,
+                bestellt_am=date(2010, 1, 1), beginn_datum=date(2010, 1, 1)
+            )
+            Notar.objects.create(
+                notar_id=f'NOT-{i + 500:06d}', vorname='Eva', nachname=f'Notarin {i}',
+                email=f'notarin{i}@example.com', notarstelle=stelle, ist_aktiv=False,
+                bestellt_am=date(1990, 1, 1), beginn_datum=date(1990, 1, 1), ende_datum=date(2009, 12, 31)
+            )
+            NotarAnwaerter.objects.create(
+                anwaerter_id=f'NKA-{i:06d}', vorname='Anna', nachname=f'Kandidatin {i}',
+                email=f'kandidatin{i}@example.com', notarstelle=stelle,
+                betreuender_notar=notar, zugelassen_am=date(2022, 9, 1), beginn_datum=date(2022, 9, 1)
+            )
+
+    def test_zaehler_wie_ohne_annotation(self):
+        """Annotierte Zähler stimmen mit den einzeln abgefragten überein."""
+        self._notarstellen_anlegen(3)
+        for stelle in Notarstelle.objects.mit_zaehlern():
+            einzeln = Notarstelle.objects.get(pk=stelle.pk)
+            self.assertEqual(stelle.anzahl_notare(), einzeln.anzahl_notare())
+            self.assertEqual(stelle.anzahl_anwaerter(), einzeln.anzahl_anwaerter())
+            self.assertEqual((stelle.anzahl_notare(), stelle.anzahl_anwaerter()), (1, 1))
+
+        sprengel = Sprengel.objects.mit_zaehlern().get(pk='SPR-000001')
+        self.assertEqual(sprengel.anzahl_notarstellen, 3)
+        self.assertEqual(sprengel.anzahl_aktive_notarstellen, 2)
+        self.assertEqual(Sprengel.objects.get(pk='SPR-000001').anzahl_aktive_notarstellen, 2)
+
+    def test_notare_ohne_ende_zaehlen(self):
+        """Gezählt werden Notare ohne Ende-Datum, auch wenn sie (z.B. ruhend) inaktiv sind."""
+        self._notarstellen_anlegen(1)
+        stelle = Notarstelle.objects.get(bezeichnung='NST-000000')
+        Notar.objects.create(
+            notar_id='NOT-000900', vorname='Paul', nachname='Ruhend', email='ruhend@example.com',
+            notarstelle=stelle, ist_aktiv=False, bestellt_am=date(2012, 1, 1), beginn_datum=date(2012, 1, 1)
+        )
+
+        self.assertEqual(stelle.anzahl_notare(), 2)
+        self.assertEqual(Notarstelle.objects.mit_zaehlern().get(pk=stelle.pk).anzahl_notare(), 2)
+        response = self.client.get(reverse('notarstellen_liste'))
+        self.assertEqual([eintrag.anzahl_notare() for eintrag in response.context['notarstellen']], [2])
+
+    def test_query_anzahl_unabhaengig_von_datenmenge(self):
+        """Listen, Detailseite und Admin fragen die Zähler nicht pro Zeile ab."""
+        from django.test import Client
+
+        admin = KammerBenutzer.objects.create_superuser(
+            username='admin', email='admin@example.com', password='testpass123'
+        )
+        admin_client = Client()
+        admin_client.force_login(admin)
+        seiten = [
+            (reverse('notarstellen_liste'), self.client),
+            (reverse('sprengel_liste'), self.client),
+            (reverse('sprengel_detail', args=['SPR-000001']), self.client),
+            (reverse('admin:notarstellen_notarstelle_changelist'), admin_client),
+            (reverse('admin:sprengel_sprengel_changelist'), admin_client),
+        ]
+
+        def aufruf(url, client):
+            return lambda: self.assertEqual(client.get(url).status_code, 200)
+
+        self.assertQueryAnzahlKonstant(
+            self._notarstellen_anlegen, [aufruf(url, client) for url, client in seiten]
+        )
+
+
+class SprengelZuordnenTest(TestCase):
+    """Tests für die regelbasierte Sprengel-Zuordnung (sprengel_zuordnen)."""
+
+    def setUp(self):
+        for nummer, name, bezirk, bundesland in [
+            (1, 'Sprengel Wien Innere Stadt', 'Innere Stadt', 'Wien'),
+            (2, 'Sprengel Wien Favoriten', 'Favoriten', 'Wien'),
+            (8, 'Sprengel Linz', 'Linz', 'Oberösterreich'),
+        ]:
+            Sprengel.objects.create(
+                bezeichnung=f'SPR-{nummer:06d}', name=name, gerichtsbezirk=bezirk, bundesland=bundesland
+            )
+        for nummer, plz, stadt, sprengel in [
+            (1, '1010', 'Wien', None),
+            (2, '1100', 'Wien', 'SPR-000001'),
+            (3, '4020', 'linz ', None),
+            (4, '9999', 'Nirgendwo', None),
+        ]:
+            Notarstelle.objects.create(
+                bezeichnung=f'NST-{nummer:06d}', name=f'Notariat {nummer}', strasse='Hauptplatz 1',
+                plz=plz, stadt=stadt, sprengel_id=sprengel
+            )
+
+    def _datei(self, inhalt):
+        import os
+        import tempfile
+
+        datei = tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', delete=False)
+        datei.write(inhalt)
+        datei.close()
+        self.addCleanup(os.unlink, datei.name)
+        return datei.name
+
+    def _zuordnen(self, **optionen):
+        from io import StringIO
+        from django.core.management import call_command
+
+        ausgabe = StringIO()
+        call_command('sprengel_zuordnen', stdout=ausgabe, **optionen)
+        return ausgabe.getvalue()
+
+    def _sprengel(self):
+        return dict(Notarstelle.objects.values_list('bezeichnung', 'sprengel_id'))
+
+    def test_regelwerk(self):
+        """PLZ-Regeln gehen Stadt-Regeln vor; widersprüchliche Regeln werden abgelehnt."""
+        from apps.sprengel.zuordnung import RegelFehler, Regelwerk, regeln_aus_zeilen
+
+        regelwerk = Regelwerk(regeln_aus_zeilen([
+            {'sprengel': 'SPR-000001', 'plz': '1010-1099'},
+            {'sprengel': 'SPR-000002', 'plz_von': '1100', 'plz_bis': '1100'},
+            {'sprengel': 'SPR-000008', 'stadt': 'Linz'},
+            {'sprengel': 'SPR-000001', 'stadt': 'Wien'},
+        ]))
+        self.assertEqual(regelwerk.regel_fuer('1100', 'Wien').sprengel_id, 'SPR-000002')
+        self.assertEqual(regelwerk.regel_fuer('1200', 'Wien').sprengel_id, 'SPR-000001')
+        self.assertEqual(regelwerk.regel_fuer('A-4020', ' LINZ').sprengel_id, 'SPR-000008')
+        self.assertIsNone(regelwerk.regel_fuer('1000', 'Graz'))
+
+        with self.assertRaises(RegelFehler):
+            Regelwerk(regeln_aus_zeilen([
+                {'sprengel': 'SPR-000001', 'plz': '1010-1100'},
+                {'sprengel': 'SPR-000002', 'plz': '1100-1109'},
+            ]))
+        with self.assertRaises(RegelFehler):
+            regeln_aus_zeilen([{'sprengel': 'SPR-000001', 'plz': '1100-1010'}])
+
+    def test_standard_regeln_und_dry_run(self):
+        """Ohne Regeldatei gilt die Stadt-Tabelle; --dry-run berichtet nur."""
+        ausgabe = self._zuordnen(dry_run=True)
+        self.assertIn('NST-000001 (1010 Wien): - → SPR-000001', ausgabe)
+        self.assertIn('Keine Regel für NST-000004', ausgabe)
+        self.assertIn('Bereits zugeordnet (ohne --ueberschreiben beibehalten): 1', ausgabe)
+        self.assertEqual(self._sprengel()['NST-000001'], None)
+
+        self._zuordnen()
+        self.assertEqual(self._sprengel(), {
+            'NST-000001': 'SPR-000001', 'NST-000002': 'SPR-000001',
+            'NST-000003': 'SPR-000008', 'NST-000004': None,
+        })
+
+    def test_regeldatei_mit_ueberschreiben(self):
+        """PLZ-Bereiche aus der Datei ordnen auch bereits zugeordnete Stellen neu zu."""
+        from apps.sprengel.zuordnung import Regelwerk, regeln_aus_zeilen, zuordnen
+
+        datei = self._datei(
+            'sprengel,stadt,plz\n'
+            'SPR-000001,,1010-1099\n'
+            'SPR-000002,,1100-1109\n'
+            'SPR-000099,Linz,\n'
+        )
+        ausgabe = self._zuordnen(regeln=datei, ueberschreiben=True)
+        self.assertIn('Sprengel SPR-000099 nicht gefunden für NST-000003', ausgabe)
+        self.assertEqual(self._sprengel()['NST-000002'], 'SPR-000002')
+        self.assertEqual(self._sprengel()['NST-000001'], 'SPR-000001')
+
+        # Wiederholung: nichts mehr zu ändern, eine Abfrage Sprengel + eine für die Notarstellen
+        regelwerk = Regelwerk(regeln_aus_zeilen([{'sprengel': 'SPR-000001', 'plz': '1010-1099'}]))
+        with self.assertNumQueries(2):
+            ergebnis = zuordnen(regelwerk, ueberschreiben=True)
+        self.assertEqual((len(ergebnis.aenderungen), ergebnis.unveraendert), (0, 1))
+
+    def test_beschaedigte_regeldatei(self):
+        """Eine beschädigte Excel-Regeldatei bricht mit CommandError ab."""
+        import os
+        import tempfile
+        from django.core.management.base import CommandError
+
+        fd, pfad = tempfile.mkstemp(suffix='.xlsx')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'kein Excel')
+        self.addCleanup(os.unlink, pfad)
+        with self.assertRaisesMessage(CommandError, 'keine gültige Excel-Datei'):
+            self._zuordnen(regeln=pfad)
+
+
+class PrognoseTest(TestCase):
+    """Tests für die Nachbesetzungsprognose (apps.sprengel.prognose)."""
+
+    def setUp(self):
+        self.wien = Sprengel.objects.create(
+            bezeichnung='SPR-000001', name='Sprengel Wien Innere Stadt',
+            gerichtsbezirk='Innere Stadt', bundesland='Wien'
+        )
+        self.linz = Sprengel.objects.create(
+            bezeichnung='SPR-000008', name='Sprengel Linz', gerichtsbezirk='Linz', bundesland='Oberösterreich'
+        )
+        stellen = {}
+        for nummer, sprengel in [(1, self.wien), (2, self.linz), (3, None)]:
+            stellen[nummer] = Notarstelle.objects.create(
+                bezeichnung=f'NST-{nummer:06d}', name=f'Notariat {nummer}', strasse='Hauptplatz 1',
+                plz='1010', stadt='Wien', sprengel=sprengel
+            )
+        notare = []
+        for nummer, stelle, bestellt, ende in [
+            (1, 1, date(1995, 1, 1), date(2026, 6, 30)),   # Abgang 2026
+            (2, 1, date(2000, 1, 1), None),                # max. Amtsdauer 30 -> 2030
+            (3, 2, date(2010, 1, 1), date(2028, 12, 31)),  # Abgang 2028
+            (4, 2, date(1980, 1, 1), date(2020, 12, 31)),  # schon ausgeschieden
+            (5, 3, date(2015, 1, 1), None),                # ohne Sprengel
+        ]:
+            notare.append(Notar.objects.create(
+                notar_id=f'NOT-{nummer:06d}', vorname='Karl', nachname=f'Notar {nummer}',
+                email=f'notar{nummer}@example.com', notarstelle=stellen[stelle],
+                bestellt_am=bestellt, beginn_datum=bestellt, ende_datum=ende
+            ))
+        for nummer, stelle, zugelassen, geplant in [
+            (1, 1, date(2018, 9, 1), date(2027, 3, 1)),  # geplant 2027
+            (2, 2, date(2021, 9, 1), None),              # geschätzt 2021 + 7 = 2028
+            (3, 2, date(2010, 9, 1), None),              # überfällig -> erstes Jahr
+        ]:
+            NotarAnwaerter.objects.create(
+                anwaerter_id=f'NKA-{nummer:06d}', vorname='Anna', nachname=f'Kandidatin {nummer}',
+                email=f'kandidatin{nummer}@example.com', notarstelle=stellen[stelle],
+                betreuender_notar=notare[0], zugelassen_am=zugelassen, beginn_datum=zugelassen,
+                geplante_bestellung=geplant
+            )
+
+    def _werte(self, zeilen):
+        return {
+            (z.sprengel_bezeichnung, z.jahr): (z.bestand, z.abgaenge, z.kandidaten, z.saldo_kumuliert)
+            for z in zeilen
+        }
+
+    def test_prognose_pro_sprengel_und_jahr(self):
+        """Abgänge und Kandidaten landen im richtigen Sprengel und Jahr; fester Query-Aufwand."""
+        from apps.sprengel.prognose import prognose
+
+        with self.assertNumQueries(3):
+            zeilen = prognose(erstes_jahr=2026, anzahl_jahre=5)
+        werte = self._werte(zeilen)
+        self.assertEqual(len(zeilen), 15)  # 2 Sprengel + "Ohne Sprengel", je 5 Jahre
+        self.assertEqual(werte['SPR-000001', 2026], (2, 1, 0, -1))
+        self.assertEqual(werte['SPR-000001', 2027], (1, 0, 1, 0))
+        self.assertEqual(werte['SPR-000008', 2026], (1, 0, 1, 1))
+        self.assertEqual(werte['SPR-000008', 2028], (1, 1, 1, 1))
+        self.assertEqual(werte['', 2030], (1, 0, 0, 0))
+
+        werte = self._werte(prognose(erstes_jahr=2026, anzahl_jahre=5, sprengel=self.wien, max_amtsdauer=30))
+        self.assertEqual(set(sprengel for sprengel, _ in werte), {'SPR-000001'})
+        self.assertEqual(werte['SPR-000001', 2030], (1, 1, 0, -1))
+
+    def test_bericht(self):
+        """Filter-Seite und CSV-Export der Prognose."""
+        benutzer = KammerBenutzer.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client.force_login(benutzer)
+        parameter = {'erstes_jahr': 2026, 'anzahl_jahre': 3, 'sprengel': 'SPR-000008'}
+
+        response = self.client.get(reverse('filter_prognose'), parameter)
+        self.assertContains(response, 'SPR-000008 2026: 0 Abgänge, 1 Kandidaten (Saldo +1, kumuliert +1)')
 
-# Create your tests here.
+        response = self.client.get(reverse('export_prognose'), {**parameter, 'format': 'csv'})
+        zeilen = response.getvalue().decode('utf-8-sig').splitlines()
+        self.assertEqual(len(zeilen), 4)
+        self.assertIn('2028', zeilen[3])
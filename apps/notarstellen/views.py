@@ -4,7 +4,8 @@ Views für Notarstellen-Verwaltung.
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count
+from django.db.models import Q
+from apps.kern import ids
 from .models import Notarstelle
 from .forms import NotarstelleForm
 
@@ -17,10 +18,8 @@ def notarstellen_liste_view(request):
     status_filter = request.GET.get('status', '')
     bundesland_filter = request.GET.get('bundesland', '')
 
-    # Basis-Queryset
-    notarstellen = Notarstelle.objects.annotate(
-        anzahl_notare=Count('notare', filter=Q(notare__ist_aktiv=True))
-    ).order_by('bezeichnung')
+    # Basis-Queryset, Zähler pro Notarstelle in derselben Abfrage
+    notarstellen = Notarstelle.objects.mit_zaehlern().order_by('bezeichnung')
 
     # Suche
     if search:
@@ -72,7 +71,9 @@ def notarstelle_detail_view(request, bezeichnung):
 
     # Notare und Kandidat dieser Notarstelle
     notare = notarstelle.notare.filter(ist_aktiv=True).order_by('nachname', 'vorname')
-    anwaerter = notarstelle.anwaerter.filter(ist_aktiv=True).order_by('nachname', 'vorname')
+    anwaerter = notarstelle.anwaerter.filter(ist_aktiv=True).select_related(
+        'betreuender_notar'
+    ).order_by('nachname', 'vorname')
 
     context = {
         'notarstelle': notarstelle,
@@ -90,11 +91,12 @@ def notarstelle_erstellen_view(request):
         form = NotarstelleForm(request.POST)
         if form.is_valid():
             notarstelle = form.save()
+            ids.zaehler_anheben('NST', notarstelle.bezeichnung)
             messages.success(request, f'Notarstelle "{notarstelle.name}" wurde erfolgreich erstellt.')
             return redirect('notarstelle_detail', bezeichnung=notarstelle.bezeichnung)
     else:
-        # Automatische Bezeichnung-Generierung
-        form = NotarstelleForm(initial={'bezeichnung': Notarstelle.generate_next_id()})
+        # Nächste Bezeichnung nur anzeigen; der Zähler wird erst nach dem Speichern angehoben
+        form = NotarstelleForm(initial={'bezeichnung': ids.vorschau_id('NST')})
 
     context = {
         'form': form,
@@ -113,6 +115,7 @@ def notarstelle_bearbeiten_view(request, bezeichnung):
         form = NotarstelleForm(request.POST, instance=notarstelle)
         if form.is_valid():
             notarstelle = form.save()
+            ids.zaehler_anheben('NST', notarstelle.bezeichnung)
             messages.success(request, f'Notarstelle "{notarstelle.name}" wurde erfolgreich aktualisiert.')
             return redirect('notarstelle_detail', bezeichnung=notarstelle.bezeichnung)
     else:
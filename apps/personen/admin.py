@@ -2,7 +2,7 @@
 Admin-Konfiguration für Personen (Notare und Notariatskandidaten).
 """
 from django.contrib import admin
-from .models import Notar, NotarAnwaerter
+from .models import Besetzungszeitraum, CVExtraktion, Notar, NotarAnwaerter
 
 
 @admin.register(Notar)
@@ -123,3 +123,36 @@ class NotarAnwaerterAdmin(admin.ModelAdmin):
         monate = obj.dauer_in_monaten()
         return f"{monate} Monate"
     dauer_in_monaten.short_description = 'Dauer'
+
+
+@admin.register(Besetzungszeitraum)
+class BesetzungszeitraumAdmin(admin.ModelAdmin):
+    """Admin für den Besetzungsindex. Wird aus den Notaren abgeleitet und ist daher nur lesbar."""
+
+    list_display = ['notarstelle', 'notar', 'von', 'bis']
+    list_select_related = ['notarstelle', 'notar']
+    list_filter = ['notarstelle__sprengel']
+    search_fields = ['notarstelle__bezeichnung', 'notarstelle__name', 'notar__notar_id', 'notar__nachname']
+    date_hierarchy = 'von'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CVExtraktion)
+class CVExtraktionAdmin(admin.ModelAdmin):
+    """Admin für Lebenslauf-Extraktionen. Löschen erzwingt eine neue Analyse beim nächsten Upload."""
+
+    list_display = ['dateiname', 'extraktor', 'status', 'dauer_ms', 'erstellt_am']
+    list_filter = ['status', 'extraktor']
+    search_fields = ['dateiname', 'sha256']
+    readonly_fields = [
+        'id', 'sha256', 'extraktor', 'dateiname', 'status', 'daten', 'fehler',
+        'dauer_ms', 'erstellt_am', 'aktualisiert_am',
+    ]
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PersonenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.personen'
+
+    def ready(self):
+        """Registriert die Signal-Handler für den Autocomplete-Index."""
+        from . import signals  # noqa
@@ -0,0 +1,335 @@
+"""
+Prozesslokaler Autocomplete-Index für Notare und Notariatskandidaten.
+
+Statt bei jedem Tastendruck mehrere icontains-Abfragen (plus je eine Abfrage
+pro Treffer für Notarstelle bzw. betreuenden Notar) abzusetzen, hält jeder
+Prozess einen kleinen Index im Speicher:
+
+- Pro aktiver Person ein Eintrag mit fertig formatiertem Namen und Zusatz.
+- Suchtext aus Titel, Vor-, Nachname und ID, kleingeschrieben und mit
+  gefalteten Umlauten/Akzenten (Müller -> mueller, Zoë -> zoe).
+- Eine Zuordnung N-Gramm (2 und 3 Zeichen) -> Einträge, über die die
+  Kandidaten einer Suche per Mengenschnitt gefunden werden.
+
+Der Index wird beim ersten Zugriff aufgebaut (3 Queries) und per Signal
+(siehe signals.py) aktuell gehalten. Änderungen aus anderen Prozessen werden
+spätestens nach PRUEF_INTERVALL Sekunden über einen Fingerabdruck der
+Tabellen erkannt und führen zum Neuaufbau.
+"""
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count, Max, Q
+
+# Sekunden zwischen zwei Prüfungen auf Änderungen aus anderen Prozessen
+PRUEF_INTERVALL = 30
+
+UMLAUTE = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+
+
+def normalisieren(text):
+    """Kleinschreibung, Umlaute als ae/oe/ue/ss, sonstige Akzente entfernt."""
+    text = (text or '').lower().translate(UMLAUTE)
+    zerlegt = unicodedata.normalize('NFKD', text)
+    return ''.join(zeichen for zeichen in zerlegt if not unicodedata.combining(zeichen))
+
+
+def ngramme(text):
+    """Alle 2- und 3-Gramme der Wörter eines (normalisierten) Texts."""
+    ergebnis = set()
+    for wort in text.split():
+        for laenge in (2, 3):
+            for start in range(len(wort) - laenge + 1):
+                ergebnis.add(wort[start:start + laenge])
+    return ergebnis
+
+
+def _voller_name(titel, vorname, nachname):
+    return ' '.join(filter(None, [titel, vorname, nachname]))
+
+
+class _Eintrag:
+    """Eine Person im Index."""
+
+    __slots__ = (
+        'typ', 'pk', 'person_id', 'name', 'zusatz', 'suchtext', 'woerter',
+        'sortierung', 'notarstelle_id', 'betreuer_id',
+    )
+
+    def __init__(self, typ, pk, person_id, titel, vorname, nachname,
+                 notarstelle_id=None, betreuer_id=None):
+        self.typ = typ
+        self.pk = pk
+        self.person_id = person_id
+        self.name = _voller_name(titel, vorname, nachname)
+        self.zusatz = ''
+        self.suchtext = normalisieren(f'{titel} {vorname} {nachname} {person_id}')
+        self.woerter = self.suchtext.split()
+        self.sortierung = (normalisieren(nachname), normalisieren(vorname), person_id)
+        self.notarstelle_id = notarstelle_id
+        self.betreuer_id = betreuer_id
+
+    def als_dict(self):
+        return {
+            'id': self.person_id,
+            'name': self.name,
+            'typ': self.typ,
+            'zusatz': self.zusatz,
+        }
+
+
+class PersonenIndex:
+    """
+    N-Gramm-Index über aktive Notare und Notariatskandidaten.
+
+    Threadsicher: Änderungen und Neuaufbau laufen unter einer Sperre,
+    Suchen arbeiten auf einem konsistenten Stand.
+    """
+
+    def __init__(self):
+        self._sperre = threading.RLock()
+        self._bereit = False
+        self._eintraege = {}
+        self._ngramme = {}
+        self._notar_namen = {}
+        self._stellen_namen = {}
+        self._fingerabdruck = None
+        self._geprueft_um = 0.0
+
+    # ----- Suche -----
+
+    def suchen(self, suchbegriff, typ=None, limit=10):
+        """
+        Sucht Personen, deren Name oder ID alle Wörter des Suchbegriffs enthält.
+
+        Treffer, bei denen ein Wort am Wortanfang passt, kommen zuerst;
+        danach wird nach Nachname und Vorname sortiert.
+
+        Args:
+            suchbegriff: Eingabe des Benutzers
+            typ: Optional 'notar' oder 'kandidat'
+            limit: Maximale Treffer je Typ
+
+        Returns:
+            list: Dicts mit id, name, typ, zusatz (erst Notare, dann Kandidaten)
+        """
+        tokens = normalisieren(suchbegriff).split()
+        if not tokens:
+            return []
+        self._sicherstellen()
+
+        with self._sperre:
+            kandidaten = None
+            for token in tokens:
+                schluessel = [token] if len(token) <= 3 else [
+                    token[start:start + 3] for start in range(len(token) - 2)
+                ]
+                for gramm in schluessel:
+                    if len(gramm) < 2:
+                        continue
+                    treffer = self._ngramme.get(gramm, set())
+                    kandidaten = set(treffer) if kandidaten is None else kandidaten & treffer
+                    if not kandidaten:
+                        return []
+            if kandidaten is None:
+                kandidaten = set(self._eintraege)
+            eintraege = [self._eintraege[schluessel] for schluessel in kandidaten]
+
+        treffer = {'notar': [], 'kandidat': []}
+        for eintrag in eintraege:
+            if typ and eintrag.typ != typ:
+                continue
+            if all(token in eintrag.suchtext for token in tokens):
+                wortanfang = any(wort.startswith(tokens[0]) for wort in eintrag.woerter)
+                treffer[eintrag.typ].append(((not wortanfang, eintrag.sortierung), eintrag))
+
+        ergebnis = []
+        for art in ('notar', 'kandidat'):
+            treffer[art].sort(key=lambda paar: paar[0])
+            ergebnis.extend(eintrag.als_dict() for _, eintrag in treffer[art][:limit])
+        return ergebnis
+
+    # ----- Aufbau und Aktualisierung -----
+
+    def verwerfen(self):
+        """Verwirft den Index; er wird beim nächsten Zugriff neu aufgebaut."""
+        with self._sperre:
+            self._bereit = False
+
+    def _sicherstellen(self):
+        jetzt = time.monotonic()
+        if self._bereit and jetzt - self._geprueft_um < PRUEF_INTERVALL:
+            return
+        with self._sperre:
+            if self._bereit and jetzt - self._geprueft_um < PRUEF_INTERVALL:
+                return
+            fingerabdruck = self._fingerabdruck_lesen()
+            if not self._bereit or fingerabdruck != self._fingerabdruck:
+                self._aufbauen()
+                self._fingerabdruck = fingerabdruck
+            self._geprueft_um = jetzt
+
+    def _fingerabdruck_lesen(self):
+        """Anzahl und letzte Änderung der beteiligten Tabellen."""
+        from apps.notarstellen.models import Notarstelle
+        from .models import Notar, NotarAnwaerter
+
+        return tuple(
+            tuple(modell.objects.aggregate(anzahl=Count('pk'), zuletzt=Max('aktualisiert_am')).values())
+            for modell in (Notar, NotarAnwaerter, Notarstelle)
+        )
+
+    def _aufbauen(self):
+        from apps.notarstellen.models import Notarstelle
+        from .models import Notar, NotarAnwaerter
+
+        self._eintraege = {}
+        self._ngramme = {}
+        self._stellen_namen = dict(Notarstelle.objects.values_list('pk', 'name'))
+        self._notar_namen = {}
+
+        notare = Notar.objects.values_list(
+            'id', 'notar_id', 'titel', 'vorname', 'nachname', 'notarstelle_id', 'ist_aktiv'
+        )
+        for pk, notar_id, titel, vorname, nachname, stelle_id, aktiv in notare:
+            self._notar_namen[pk] = _voller_name(titel, vorname, nachname)
+            if aktiv:
+                self._hinzufuegen(_Eintrag(
+                    'notar', pk, notar_id, titel, vorname, nachname, notarstelle_id=stelle_id
+                ))
+
+        kandidaten = NotarAnwaerter.objects.filter(ist_aktiv=True).values_list(
+            'id', 'anwaerter_id', 'titel', 'vorname', 'nachname', 'betreuender_notar_id'
+        )
+        for pk, anwaerter_id, titel, vorname, nachname, betreuer_id in kandidaten:
+            self._hinzufuegen(_Eintrag(
+                'kandidat', pk, anwaerter_id, titel, vorname, nachname, betreuer_id=betreuer_id
+            ))
+        self._bereit = True
+
+    def _zusatz(self, eintrag):
+        if eintrag.typ == 'notar':
+            return self._stellen_namen.get(eintrag.notarstelle_id, '')
+        betreuer = self._notar_namen.get(eintrag.betreuer_id)
+        return f'bei {betreuer}' if betreuer else ''
+
+    def _hinzufuegen(self, eintrag):
+        eintrag.zusatz = self._zusatz(eintrag)
+        schluessel = (eintrag.typ, eintrag.pk)
+        self._eintraege[schluessel] = eintrag
+        for gramm in ngramme(eintrag.suchtext):
+            self._ngramme.setdefault(gramm, set()).add(schluessel)
+
+    def _entfernen(self, typ, pk):
+        eintrag = self._eintraege.pop((typ, pk), None)
+        if eintrag is None:
+            return
+        for gramm in ngramme(eintrag.suchtext):
+            menge = self._ngramme.get(gramm)
+            if menge is not None:
+                menge.discard((typ, pk))
+                if not menge:
+                    del self._ngramme[gramm]
+
+    def notar_aktualisieren(self, notar):
+        """Übernimmt einen gespeicherten Notar (inkl. Zusatz seiner Kandidaten)."""
+        with self._sperre:
+            if not self._bereit:
+                return
+            self._entfernen('notar', notar.pk)
+            self._notar_namen[notar.pk] = notar.get_voller_name()
+            if notar.ist_aktiv:
+                self._hinzufuegen(_Eintrag(
+                    'notar', notar.pk, notar.notar_id, notar.titel, notar.vorname,
+                    notar.nachname, notarstelle_id=notar.notarstelle_id
+                ))
+            for eintrag in self._eintraege.values():
+                if eintrag.typ == 'kandidat' and eintrag.betreuer_id == notar.pk:
+                    eintrag.zusatz = self._zusatz(eintrag)
+
+    def kandidat_aktualisieren(self, kandidat):
+        """Übernimmt einen gespeicherten Notariatskandidaten."""
+        with self._sperre:
+            if not self._bereit:
+                return
+            self._entfernen('kandidat', kandidat.pk)
+            if kandidat.ist_aktiv:
+                self._hinzufuegen(_Eintrag(
+                    'kandidat', kandidat.pk, kandidat.anwaerter_id, kandidat.titel,
+                    kandidat.vorname, kandidat.nachname, betreuer_id=kandidat.betreuender_notar_id
+                ))
+
+    def person_entfernen(self, typ, pk):
+        """Entfernt eine gelöschte Person ('notar' oder 'kandidat')."""
+        with self._sperre:
+            if not self._bereit:
+                return
+            self._entfernen(typ, pk)
+            if typ == 'notar':
+                self._notar_namen.pop(pk, None)
+
+    def notarstelle_aktualisieren(self, notarstelle):
+        """Übernimmt den Namen einer gespeicherten Notarstelle in den Zusatz."""
+        with self._sperre:
+            if not self._bereit:
+                return
+            self._stellen_namen[notarstelle.pk] = notarstelle.name
+            for eintrag in self._eintraege.values():
+                if eintrag.typ == 'notar' and eintrag.notarstelle_id == notarstelle.pk:
+                    eintrag.zusatz = self._zusatz(eintrag)
+
+
+index = PersonenIndex()
+
+
+def suchen(suchbegriff, typ=None, limit=10):
+    """
+    Autocomplete-Suche über Notare und Kandidaten.
+
+    Nutzt den Index im Speicher; ist er per Setting PERSONEN_AUTOCOMPLETE_INDEX
+    abgeschaltet oder nicht aufbaubar, wird direkt in der Datenbank gesucht.
+    """
+    if getattr(settings, 'PERSONEN_AUTOCOMPLETE_INDEX', True):
+        try:
+            return index.suchen(suchbegriff, typ=typ, limit=limit)
+        except DatabaseError:
+            index.verwerfen()
+    return datenbank_suchen(suchbegriff, typ=typ, limit=limit)
+
+
+def datenbank_suchen(suchbegriff, typ=None, limit=10):
+    """Suche per icontains direkt in der Datenbank (ohne Index)."""
+    from .models import Notar, NotarAnwaerter
+
+    ergebnis = []
+    if not typ or typ == 'notar':
+        notare = Notar.objects.filter(
+            Q(vorname__icontains=suchbegriff) |
+            Q(nachname__icontains=suchbegriff) |
+            Q(notar_id__icontains=suchbegriff),
+            ist_aktiv=True
+        ).select_related('notarstelle')[:limit]
+        ergebnis.extend({
+            'id': notar.notar_id,
+            'name': notar.get_voller_name(),
+            'typ': 'notar',
+            'zusatz': notar.notarstelle.name if notar.notarstelle else ''
+        } for notar in notare)
+
+    if not typ or typ == 'kandidat':
+        kandidaten = NotarAnwaerter.objects.filter(
+            Q(vorname__icontains=suchbegriff) |
+            Q(nachname__icontains=suchbegriff) |
+            Q(anwaerter_id__icontains=suchbegriff),
+            ist_aktiv=True
+        ).select_related('betreuender_notar')[:limit]
+        ergebnis.extend({
+            'id': kandidat.anwaerter_id,
+            'name': kandidat.get_voller_name(),
+            'typ': 'kandidat',
+            'zusatz': f'bei {kandidat.betreuender_notar.get_voller_name()}' if kandidat.betreuender_notar else ''
+        } for kandidat in kandidaten)
+    return ergebnis
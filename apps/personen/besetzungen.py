@@ -0,0 +1,172 @@
+"""
+Besetzungsindex: wer hatte eine Notarstelle an einem Stichtag inne?
+
+Pro Notar gibt es einen Besetzungszeitraum (Notarstelle, von, bis), der aus
+Notar.notarstelle, beginn_datum und ende_datum abgeleitet wird. Der Index
+wird beim Speichern eines Notars (Signal), nach Import-Blöcken und nach
+Sammelbestellungen nachgeführt; beim Löschen eines Notars fällt der
+Zeitraum per CASCADE weg. neu_aufbauen() bzw. das Management Command
+besetzungen_aufbauen baut ihn vollständig neu auf.
+
+Abfragen laufen über die Indizes (notarstelle, von, bis) und (von, bis)
+statt über alle Notare:
+
+    inhaber_am(date(2023, 6, 30))                  # Notare am Stichtag
+    vakanzen(date(2023, 1, 1), date(2023, 12, 31))  # unbesetzte Zeiträume
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Q
+
+from apps.notarstellen.models import Notarstelle
+
+from .models import Besetzungszeitraum, Notar
+
+
+def _zeitraum(notar_pk, notarstelle_id, von, bis):
+    """Besetzungszeitraum für einen Notar, None wenn die Daten keinen gültigen Zeitraum ergeben."""
+    if von is None or (bis is not None and bis < von):
+        return None
+    return Besetzungszeitraum(notar_id=notar_pk, notarstelle_id=notarstelle_id, von=von, bis=bis)
+
+
+def aktualisieren(notare):
+    """
+    Schreibt die Besetzungszeiträume der angegebenen Notare neu.
+
+    Args:
+        notare: Iterable von Notar-Instanzen (gespeichert, mit pk)
+    """
+    zeitraeume, pks = [], []
+    for notar in notare:
+        pks.append(notar.pk)
+        zeitraum = _zeitraum(notar.pk, notar.notarstelle_id, notar.beginn_datum, notar.ende_datum)
+        if zeitraum:
+            zeitraeume.append(zeitraum)
+    if not pks:
+        return
+    # Ohne eigenen Savepoint: meist läuft bereits eine Transaktion (save, Import, Beförderung)
+    with transaction.atomic(savepoint=False):
+        Besetzungszeitraum.objects.filter(notar_id__in=pks).delete()
+        Besetzungszeitraum.objects.bulk_create(zeitraeume)
+
+
+def neu_aufbauen(chunk_size=1000):
+    """
+    Baut den Besetzungsindex aus allen Notaren neu auf.
+
+    Returns:
+        int: Anzahl angelegter Besetzungszeiträume
+    """
+    zeilen = Notar.objects.order_by().values_list('pk', 'notarstelle_id', 'beginn_datum', 'ende_datum')
+    anzahl = 0
+    with transaction.atomic():
+        Besetzungszeitraum.objects.all().delete()
+        block = []
+        for zeile in zeilen.iterator(chunk_size=chunk_size):
+            zeitraum = _zeitraum(*zeile)
+            if zeitraum:
+                block.append(zeitraum)
+            if len(block) >= chunk_size:
+                Besetzungszeitraum.objects.bulk_create(block)
+                anzahl += len(block)
+                block = []
+        Besetzungszeitraum.objects.bulk_create(block)
+        anzahl += len(block)
+    return anzahl
+
+
+def _ueberschneidet(von, bis):
+    """Filter für Besetzungszeiträume, die den Zeitraum von..bis (einschließlich) berühren."""
+    return Q(von__lte=bis) & (Q(bis__isnull=True) | Q(bis__gte=von))
+
+
+def besetzungen_am(stichtag, notarstellen=None):
+    """
+    Besetzungszeiträume, die am Stichtag laufen.
+
+    Args:
+        stichtag: date
+        notarstellen: Optional Notarstellen (QuerySet, Instanzen oder Bezeichnungen)
+    """
+    queryset = Besetzungszeitraum.objects.filter(_ueberschneidet(stichtag, stichtag))
+    if notarstellen is not None:
+        queryset = queryset.filter(notarstelle__in=notarstellen)
+    return queryset.select_related('notar', 'notarstelle')
+
+
+def inhaber_am(stichtag, notarstellen=None):
+    """
+    Notare, die am Stichtag eine (der angegebenen) Notarstelle(n) innehatten.
+
+    Returns:
+        QuerySet[Notar] mit der Notarstelle per select_related
+    """
+    besetzungen = besetzungen_am(stichtag, notarstellen).values('notar_id')
+    return Notar.objects.filter(pk__in=besetzungen).select_related('notarstelle').order_by(
+        'notarstelle', 'nachname', 'vorname'
+    )
+
+
+class Vakanz:
+    """Zeitraum (von/bis einschließlich), in dem eine Notarstelle unbesetzt war."""
+
+    def __init__(self, notarstelle, von, bis):
+        self.notarstelle = notarstelle
+        self.von = von
+        self.bis = bis
+
+    @property
+    def tage(self):
+        return (self.bis - self.von).days + 1
+
+    def __str__(self):
+        return (
+            f"{self.notarstelle.bezeichnung} - {self.notarstelle.name}: "
+            f"{self.von.strftime('%d.%m.%Y')} – {self.bis.strftime('%d.%m.%Y')} ({self.tage} Tage)"
+        )
+
+
+def vakanzen(von, bis, notarstellen=None):
+    """
+    Unbesetzte Zeiträume der Notarstellen zwischen von und bis (einschließlich).
+
+    Lädt nur die Besetzungszeiträume, die den Zeitraum berühren (eine
+    Query, nach Notarstelle und Beginn sortiert), und ermittelt die Lücken
+    in einem Durchlauf. Notarstellen ohne Besetzung sind über den ganzen
+    Zeitraum vakant.
+
+    Args:
+        von, bis: date
+        notarstellen: Optional QuerySet von Notarstellen (Standard: alle aktiven)
+
+    Returns:
+        list[Vakanz], sortiert nach Notarstelle und Beginn
+    """
+    if notarstellen is None:
+        notarstellen = Notarstelle.objects.filter(ist_aktiv=True)
+    stellen = {stelle.pk: stelle for stelle in notarstellen.only('bezeichnung', 'name').order_by()}
+
+    zeitraeume = Besetzungszeitraum.objects.filter(
+        _ueberschneidet(von, bis), notarstelle__in=notarstellen.values('pk')
+    ).order_by('notarstelle', 'von').values_list('notarstelle_id', 'von', 'bis')
+
+    besetzt = {}
+    for stelle_id, gruppe in groupby(zeitraeume.iterator(), key=lambda zeile: zeile[0]):
+        besetzt[stelle_id] = [(beginn, ende) for _, beginn, ende in gruppe]
+
+    ergebnis = []
+    for stelle_id in sorted(stellen):
+        frei_ab = von  # erster Tag, der noch nicht als besetzt bekannt ist
+        for beginn, ende in besetzt.get(stelle_id, ()):
+            if beginn > frei_ab:
+                ergebnis.append(Vakanz(stellen[stelle_id], frei_ab, beginn - timedelta(days=1)))
+            if ende is None or ende >= bis:
+                frei_ab = None
+                break
+            frei_ab = max(frei_ab, ende + timedelta(days=1))
+        if frei_ab is not None and frei_ab <= bis:
+            ergebnis.append(Vakanz(stellen[stelle_id], frei_ab, bis))
+    return ergebnis
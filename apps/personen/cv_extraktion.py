@@ -0,0 +1,386 @@
+"""
+Datenextraktion aus Lebenslauf-PDFs als Hintergrund-Auftrag.
+
+Der Upload legt nur einen Auftrag (CVExtraktion) an und kehrt sofort mit
+dessen ID zurück; ein Thread-Pool im Prozess führt die Extraktion aus, das
+Formular fragt den Status ab. Ergebnisse werden über den SHA-256 der
+PDF-Bytes wiederverwendet: derselbe Lebenslauf wird nur einmal analysiert.
+
+Extraktoren sind austauschbar (Setting CV_EXTRAKTOR):
+
+- "openrouter": KI-Analyse über OpenRouter (benötigt OPENROUTER_API_KEY).
+- "textlayer": Liest die Textebene des PDFs und sucht die Felder mit
+  regulären Ausdrücken. Ohne Netzwerk, Standard ohne API-Key und in Tests.
+- Punktierter Pfad zu einer eigenen Klasse mit `extrahieren(inhalt)`.
+
+Mit CV_EXTRAKTION_SYNCHRON = True läuft die Extraktion direkt im Request.
+"""
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import CVExtraktion
+
+logger = logging.getLogger(__name__)
+
+# Felder, die jeder Extraktor liefert (fehlende Werte als None)
+FELDER = ('titel', 'vorname', 'nachname', 'email', 'telefon', 'zugelassen_am', 'beginn_datum')
+
+# Aufträge, die so lange ohne Fortschritt "wartend"/"laeuft" sind (z.B. nach
+# einem Neustart des Servers), werden beim nächsten Upload neu gestartet.
+VERWAIST_NACH = timedelta(minutes=5)
+
+
+class ExtraktionsFehler(Exception):
+    """Die Extraktion ist fehlgeschlagen; die Meldung wird dem Benutzer angezeigt."""
+
+
+def felder_bereinigen(daten):
+    """Beschränkt ein Ergebnis auf FELDER, leere Werte werden zu None."""
+    bereinigt = {}
+    for feld in FELDER:
+        wert = daten.get(feld)
+        if isinstance(wert, str):
+            wert = wert.strip()
+        bereinigt[feld] = wert or None
+    return bereinigt
+
+
+# ===== Extraktoren =====
+
+class CVExtraktor:
+    """Basisklasse: `extrahieren` erhält die PDF-Bytes und gibt ein Dict mit FELDER zurück."""
+
+    def extrahieren(self, inhalt):
+        raise NotImplementedError
+
+
+class OpenRouterExtraktor(CVExtraktor):
+    """Analysiert das PDF mit einem multimodalen Modell über OpenRouter."""
+
+    API_URL = "https://openrouter.ai/api/v1/chat/completions"
+    MODELL = "google/gemini-2.5-flash"
+    TIMEOUT = 30
+
+    PROMPT = """Analysiere diesen Lebenslauf und extrahiere die folgenden Informationen im JSON-Format:
+
+{
+  "titel": "Akademischer Titel (z.B. Dr., Mag., Prof. Dr.)",
+  "vorname": "Vorname",
+  "nachname": "Nachname",
+  "email": "E-Mail-Adresse",
+  "telefon": "Telefonnummer",
+  "zugelassen_am": "Datum der Zulassung als Notariatskandidat (Format: YYYY-MM-DD)",
+  "beginn_datum": "Beginn der Tätigkeit (Format: YYYY-MM-DD)"
+}
+
+Wichtig:
+- Gib NUR das JSON-Objekt zurück, keine zusätzlichen Erklärungen
+- Falls eine Information nicht gefunden wurde, setze den Wert auf null
+- Datumsangaben immer im Format YYYY-MM-DD
+- Telefonnummer im Format: +43 ... (österreichisches Format)
+"""
+
+    def extrahieren(self, inhalt):
+        import requests
+
+        api_key = os.environ.get('OPENROUTER_API_KEY')
+        if not api_key:
+            raise ExtraktionsFehler('OpenRouter API-Key nicht konfiguriert (OPENROUTER_API_KEY in .env setzen)')
+
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "http://localhost:8000",
+            "X-Title": "Notariatskammer Verwaltung - CV Extraktion",
+        }
+        pdf_base64 = base64.b64encode(inhalt).decode('utf-8')
+        payload = {
+            "model": self.MODELL,
+            "messages": [{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": self.PROMPT},
+                    {"type": "image_url", "image_url": {"url": f"data:application/pdf;base64,{pdf_base64}"}},
+                ],
+            }],
+        }
+
+        try:
+            response = requests.post(self.API_URL, headers=headers, json=payload, timeout=self.TIMEOUT)
+        except requests.RequestException as e:
+            raise ExtraktionsFehler(f'Fehler bei der Kommunikation mit OpenRouter: {e}')
+
+        if response.status_code != 200:
+            try:
+                meldung = response.json().get('error', {}).get('message', response.text)
+            except ValueError:
+                meldung = response.text
+            raise ExtraktionsFehler(f'OpenRouter API Fehler {response.status_code}: {meldung[:500]}')
+
+        try:
+            antwort = response.json()['choices'][0]['message']['content']
+            # Die KI gibt manchmal zusätzlichen Text zurück, daher den JSON-Block suchen
+            json_match = re.search(r'\{[\s\S]*\}', antwort)
+            return json.loads(json_match.group() if json_match else antwort)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise ExtraktionsFehler(f'Fehler beim Parsen der AI-Antwort: {e}')
+
+
+class TextlayerExtraktor(CVExtraktor):
+    """
+    Liest die Textebene des PDFs und erkennt die Felder per Regex.
+
+    Unterstützt unkomprimierte sowie Flate-/ASCII85-/ASCIIHex-kodierte
+    Content-Streams mit einfachen Schriften (WinAnsi), wie sie ReportLab,
+    Word oder LibreOffice erzeugen. Gescannte PDFs ohne Textebene liefern
+    einen Fehler.
+    """
+
+    TITEL = r'(?:Univ\.-Prof\.|Prof\.|DDr\.|Dr\.|MMag\.|Mag\.|Dipl\.-Ing\.)'
+    NAMENSTEIL = r'[A-ZÄÖÜ][a-zäöüßéè]+(?:-[A-ZÄÖÜ][a-zäöüßéè]+)?'
+    NAME_ZEILE = re.compile(rf'^((?:{TITEL}\s*)*)({NAMENSTEIL}(?:\s+{NAMENSTEIL}){{1,3}})$')
+    KEINE_NAMEN = {'Lebenslauf', 'Curriculum', 'Vitae', 'Persönliche', 'Daten', 'Kontakt'}
+    DATUM = r'(\d{1,2})\.\s?(\d{1,2})\.\s?(\d{4})'
+    EMAIL = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+    TELEFON = re.compile(r'(?:Telefon|Tel\.|Mobil|Handy)\s*:?\s*(\+?\d[\d \t/()-]{5,}\d)', re.IGNORECASE)
+    ZULASSUNG = re.compile(rf'(?:Zulassung|zugelassen)[^\n\d]*?{DATUM}', re.IGNORECASE)
+    BEGINN = re.compile(rf'(?:\bseit|\bab|Beginn[^\n\d]*?)\s*{DATUM}', re.IGNORECASE)
+
+    def extrahieren(self, inhalt):
+        zeilen = pdf_textzeilen(inhalt)
+        if not zeilen:
+            raise ExtraktionsFehler('Das PDF enthält keinen lesbaren Text (gescanntes Dokument?)')
+        text = '\n'.join(zeilen)
+
+        daten = {}
+        for zeile in zeilen[:15]:
+            treffer = self.NAME_ZEILE.match(zeile)
+            if treffer and not self.KEINE_NAMEN & set(treffer.group(2).split()):
+                *vornamen, nachname = treffer.group(2).split()
+                daten['titel'] = ' '.join(treffer.group(1).split())
+                daten['vorname'] = ' '.join(vornamen)
+                daten['nachname'] = nachname
+                break
+
+        if email := self.EMAIL.search(text):
+            daten['email'] = email.group()
+        if telefon := self.TELEFON.search(text):
+            daten['telefon'] = ' '.join(telefon.group(1).split())
+        if zulassung := self.ZULASSUNG.search(text):
+            daten['zugelassen_am'] = self._iso_datum(zulassung)
+        beginn = self.BEGINN.search(text)
+        daten['beginn_datum'] = self._iso_datum(beginn) if beginn else daten.get('zugelassen_am')
+        if not any(daten.values()):
+            raise ExtraktionsFehler('Im PDF wurden keine Lebenslaufdaten erkannt')
+        return daten
+
+    def _iso_datum(self, treffer):
+        tag, monat, jahr = (int(teil) for teil in treffer.groups()[-3:])
+        return f"{jahr:04d}-{monat:02d}-{tag:02d}"
+
+
+# ===== PDF-Textebene =====
+
+STREAM_START = re.compile(rb'\bstream\r?\n')
+FILTER = re.compile(rb'/(ASCII85Decode|A85|FlateDecode|Fl|ASCIIHexDecode|AHx|\w+Decode)\b')
+KEIN_TEXT = re.compile(rb'/Subtype\s*/Image|/Type\s*/(?:XRef|Metadata|EmbeddedFile)|/Length[123]\b')
+TOKEN = re.compile(
+    rb'\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)'  # Literal-String (eine Klammerebene)
+    rb'|<[0-9A-Fa-f\s]*>'                          # Hex-String
+    rb'|[-+]?(?:\d+\.?\d*|\.\d+)'                   # Zahl
+    rb"|[A-Za-z'\"*]+",                            # Operator
+    re.S,
+)
+ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+ZEILENWECHSEL = {b'BT', b'ET', b'T*', b'Td', b'TD', b'Tm'}
+
+
+def _stream_dekodieren(kopf, daten):
+    for filter_name in FILTER.findall(kopf):
+        if filter_name in (b'ASCII85Decode', b'A85'):
+            daten = daten.strip()
+            daten = daten[2:] if daten.startswith(b'<~') else daten
+            daten = base64.a85decode(daten.split(b'~>')[0])
+        elif filter_name in (b'FlateDecode', b'Fl'):
+            daten = zlib.decompressobj().decompress(daten)
+        elif filter_name in (b'ASCIIHexDecode', b'AHx'):
+            daten = bytes.fromhex(re.sub(rb'[^0-9A-Fa-f]', b'', daten.split(b'>')[0]).decode())
+        else:
+            return None  # Bilder, LZW etc. enthalten keinen Text
+    return daten
+
+
+def _string_dekodieren(token):
+    if token.startswith(b'<'):
+        roh = re.sub(rb'\s', b'', token[1:-1])
+        roh = bytes.fromhex((roh + b'0' * (len(roh) % 2)).decode())
+        if roh.startswith(b'\xfe\xff'):
+            return roh[2:].decode('utf-16-be', errors='ignore')
+    else:
+        def ersetzen(treffer):
+            zeichen = treffer.group(1)
+            if zeichen[:1].isdigit():
+                return bytes([int(zeichen, 8) & 0xFF])
+            if zeichen in (b'\n', b'\r\n', b'\r'):
+                return b''
+            return ESCAPES.get(zeichen, zeichen)
+        roh = re.sub(rb'\\([0-7]{1,3}|\r\n|.)', ersetzen, token[1:-1], flags=re.S)
+    text = roh.decode('cp1252', errors='ignore')
+    return ''.join(zeichen for zeichen in text if zeichen.isprintable() or zeichen == ' ')
+
+
+def pdf_textzeilen(inhalt):
+    """Gibt die nicht leeren Textzeilen aller Content-Streams eines PDFs zurück."""
+    zeilen, aktuell = [], []
+    for start in STREAM_START.finditer(inhalt):
+        ende = inhalt.find(b'endstream', start.end())
+        if ende < 0:
+            break
+        kopf = inhalt[max(0, start.start() - 2000):start.start()]
+        kopf = kopf[kopf.rfind(b'obj'):]
+        if KEIN_TEXT.search(kopf):
+            continue
+        try:
+            daten = _stream_dekodieren(kopf, inhalt[start.end():ende])
+        except (ValueError, zlib.error):
+            continue
+        if not daten or b'BT' not in daten:
+            continue
+
+        operanden = []
+        for token in TOKEN.findall(daten):
+            if token[:1] in (b'(', b'<'):
+                operanden.append(_string_dekodieren(token))
+            elif token[:1].isalpha() or token in (b"'", b'"', b'T*'):
+                if token in (b"'", b'"'):
+                    zeilen.append(''.join(aktuell))
+                    aktuell = []
+                if token in (b'Tj', b'TJ', b"'", b'"'):
+                    for operand in operanden:
+                        if isinstance(operand, str):
+                            aktuell.append(operand)
+                        elif token == b'TJ' and operand < -200:
+                            aktuell.append(' ')
+                elif token in ZEILENWECHSEL:
+                    zeilen.append(''.join(aktuell))
+                    aktuell = []
+                operanden = []
+            else:
+                operanden.append(float(token))
+    zeilen.append(''.join(aktuell))
+    return [' '.join(zeile.split()) for zeile in zeilen if zeile.strip()]
+
+
+EXTRAKTOREN = {
+    'openrouter': OpenRouterExtraktor,
+    'textlayer': TextlayerExtraktor,
+}
+
+
+def extraktor_name():
+    """Name des konfigurierten Extraktors (ohne Setting: OpenRouter nur mit API-Key)."""
+    name = getattr(settings, 'CV_EXTRAKTOR', '')
+    if name:
+        return name
+    return 'openrouter' if os.environ.get('OPENROUTER_API_KEY') else 'textlayer'
+
+
+def extraktor_laden(name):
+    klasse = EXTRAKTOREN.get(name) or import_string(name)
+    return klasse()
+
+
+# ===== Aufträge =====
+
+_executor = None
+_executor_sperre = threading.Lock()
+
+
+def _executor_holen():
+    global _executor
+    with _executor_sperre:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CV_EXTRAKTION_WORKER', 2),
+                thread_name_prefix='cv-extraktion',
+            )
+        return _executor
+
+
+def job_starten(inhalt, dateiname=''):
+    """
+    Legt einen Auftrag für die PDF-Bytes an oder findet den vorhandenen.
+
+    Fertige Aufträge werden wiederverwendet, laufende nicht doppelt gestartet;
+    fehlgeschlagene oder verwaiste Aufträge werden neu eingereiht.
+
+    Returns:
+        tuple: (CVExtraktion, aus_cache)
+    """
+    job, angelegt = CVExtraktion.objects.get_or_create(
+        sha256=hashlib.sha256(inhalt).hexdigest(),
+        extraktor=extraktor_name(),
+        defaults={'dateiname': dateiname[:255]},
+    )
+    if not angelegt:
+        if job.status == 'fertig':
+            return job, True
+        verwaist = job.aktualisiert_am < timezone.now() - VERWAIST_NACH
+        if not job.ist_abgeschlossen and not verwaist:
+            return job, False
+        # Bedingtes UPDATE: bei gleichzeitigen Uploads reiht nur einer neu ein
+        neu_eingereiht = CVExtraktion.objects.filter(
+            pk=job.pk, status=job.status, aktualisiert_am=job.aktualisiert_am
+        ).update(status='wartend', fehler='', daten=None, dauer_ms=None, aktualisiert_am=timezone.now())
+        if not neu_eingereiht:
+            job.refresh_from_db()
+            return job, False
+
+    if getattr(settings, 'CV_EXTRAKTION_SYNCHRON', False):
+        ausfuehren(job.pk, inhalt)
+    else:
+        transaction.on_commit(lambda: _executor_holen().submit(_im_hintergrund, job.pk, inhalt))
+    job.refresh_from_db()
+    return job, False
+
+
+def _im_hintergrund(job_id, inhalt):
+    close_old_connections()
+    try:
+        ausfuehren(job_id, inhalt)
+    finally:
+        connection.close()
+
+
+def ausfuehren(job_id, inhalt):
+    """Führt einen wartenden Auftrag aus und speichert Ergebnis oder Fehler."""
+    if not CVExtraktion.objects.filter(pk=job_id, status='wartend').update(
+        status='laeuft', aktualisiert_am=timezone.now()
+    ):
+        return
+    job = CVExtraktion.objects.get(pk=job_id)
+    start = time.monotonic()
+    try:
+        job.daten = felder_bereinigen(extraktor_laden(job.extraktor).extrahieren(inhalt))
+        job.status = 'fertig'
+    except ExtraktionsFehler as e:
+        job.status, job.fehler = 'fehler', str(e)
+    except Exception as e:
+        logger.exception(f"CV-Extraktion {job_id} fehlgeschlagen")
+        job.status, job.fehler = 'fehler', f'Unerwarteter Fehler: {e}'
+    job.dauer_ms = int((time.monotonic() - start) * 1000)
+    job.save(update_fields=['status', 'daten', 'fehler', 'dauer_ms', 'aktualisiert_am'])
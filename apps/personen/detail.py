@@ -0,0 +1,136 @@
+"""
+Laden der Detail-Ansichten von Notaren und Notariatskandidaten.
+
+Eine Detailseite zeigt neben der Person ihre Workflows, Dokumente,
+gesendeten E-Mails und Service-Ausführungen (beim Notar zusätzlich die
+betreuten Kandidaten). Statt diese Sammlungen im Template einzeln und
+vollständig nachzuladen, plant der Loader alle Abfragen vorab:
+
+- eine Abfrage für die Person mit Notarstelle und allen Zählern
+  (skalare Unterabfragen, keine JOIN-Vervielfachung),
+- je Sammlung ein Prefetch, begrenzt auf die jüngsten Einträge (NEUESTE,
+  Standard 5),
+- eine Abfrage für die Service-Ausführungen, die über Dokumente oder
+  E-Mails mit der Person verknüpft sind.
+
+Die Zahl der Abfragen ist damit unabhängig davon, wie viel zur Person
+gespeichert ist.
+"""
+from django.db.models import OuterRef, Prefetch, Q
+from django.shortcuts import get_object_or_404
+
+from apps.emails.models import GesendeteEmail
+from apps.kern.abfragen import anzahl_unterabfrage
+from apps.services.models import Dokument, ServiceAusfuehrung
+from apps.workflows.models import WorkflowInstanz
+
+from .models import Notar, NotarAnwaerter
+
+# Anzahl der jüngsten Einträge je Sammlung
+NEUESTE = 5
+
+
+def _sammlungen(person_feld, anzahl):
+    """
+    Prefetches und Zähler, die Notar und Kandidat gemeinsam haben.
+
+    Args:
+        person_feld: 'notar' oder 'anwaerter' (Fremdschlüssel in Dokument/GesendeteEmail)
+        anzahl: Anzahl der jüngsten Einträge je Sammlung
+
+    Returns:
+        tuple: (Liste von Prefetch-Objekten, dict mit Zähler-Annotationen)
+    """
+    betroffen = 'betroffene_notare' if person_feld == 'notar' else 'betroffene_kandidaten'
+    prefetches = [
+        Prefetch(
+            'workflows_als_betroffener',
+            queryset=WorkflowInstanz.objects.select_related('workflow_typ').order_by('-erstellt_am')[:anzahl],
+            to_attr='neueste_workflows',
+        ),
+        Prefetch(
+            'dokumente',
+            queryset=Dokument.objects.defer('beschreibung', 'tags').order_by('-erstellt_am')[:anzahl],
+            to_attr='neueste_dokumente',
+        ),
+        Prefetch(
+            'gesendete_emails',
+            queryset=GesendeteEmail.objects.defer('nachricht').order_by('-gesendet_am')[:anzahl],
+            to_attr='neueste_emails',
+        ),
+    ]
+    zaehler = {
+        'anzahl_workflows': anzahl_unterabfrage(WorkflowInstanz.objects.filter(**{betroffen: OuterRef('pk')})),
+        'anzahl_dokumente': anzahl_unterabfrage(Dokument.objects.filter(**{person_feld: OuterRef('pk')})),
+        'anzahl_emails': anzahl_unterabfrage(GesendeteEmail.objects.filter(**{person_feld: OuterRef('pk')})),
+        'anzahl_service_ausfuehrungen': anzahl_unterabfrage(_service_ausfuehrungen(person_feld, OuterRef('pk'))),
+    }
+    return prefetches, zaehler
+
+
+def _service_ausfuehrungen(person_feld, person):
+    """Service-Ausführungen, die ein Dokument für die Person erzeugt oder ihr eine E-Mail gesendet haben."""
+    return ServiceAusfuehrung.objects.filter(
+        Q(**{f'generierte_dokumente__{person_feld}': person})
+        | Q(**{f'gesendete_emails__{person_feld}': person})
+    )
+
+
+def _service_ausfuehrungen_anhaengen(person, person_feld, anzahl):
+    """Hängt die jüngsten Service-Ausführungen der Person als `neueste_service_ausfuehrungen` an."""
+    person.neueste_service_ausfuehrungen = list(
+        _service_ausfuehrungen(person_feld, person.pk)
+        .select_related('service', 'ausgefuehrt_von')
+        .defer('ergebnis_daten')
+        .distinct()
+        .order_by('-erstellt_am')[:anzahl]
+    )
+    return person
+
+
+def notar_laden(notar_id, anzahl=NEUESTE):
+    """
+    Lädt einen Notar für die Detailseite (404, wenn es ihn nicht gibt).
+
+    Angehängt werden neueste_workflows, neueste_dokumente, neueste_emails,
+    neueste_service_ausfuehrungen und aktive_betreute_anwaerter sowie die
+    Zähler anzahl_workflows, anzahl_dokumente, anzahl_emails,
+    anzahl_service_ausfuehrungen und anzahl_betreute.
+    """
+    prefetches, zaehler = _sammlungen('notar', anzahl)
+    aktive_betreute = NotarAnwaerter.objects.filter(ist_aktiv=True, ende_datum__isnull=True)
+    notar = get_object_or_404(
+        Notar.objects.select_related('notarstelle', 'notarstelle__sprengel').annotate(
+            anzahl_betreute=anzahl_unterabfrage(aktive_betreute.filter(betreuender_notar=OuterRef('pk'))),
+            **zaehler,
+        ).prefetch_related(
+            *prefetches,
+            Prefetch(
+                'betreute_anwaerter',
+                queryset=aktive_betreute.only(
+                    'anwaerter_id', 'titel', 'vorname', 'nachname', 'beginn_datum', 'betreuender_notar'
+                ).order_by('-beginn_datum')[:anzahl],
+                to_attr='aktive_betreute_anwaerter',
+            ),
+        ),
+        notar_id=notar_id,
+    )
+    return _service_ausfuehrungen_anhaengen(notar, 'notar', anzahl)
+
+
+def anwaerter_laden(anwaerter_id, anzahl=NEUESTE):
+    """
+    Lädt einen Notariatskandidaten für die Detailseite (404, wenn es ihn nicht gibt).
+
+    Angehängt werden neueste_workflows, neueste_dokumente, neueste_emails und
+    neueste_service_ausfuehrungen sowie die Zähler anzahl_workflows,
+    anzahl_dokumente, anzahl_emails und anzahl_service_ausfuehrungen.
+    """
+    prefetches, zaehler = _sammlungen('anwaerter', anzahl)
+    anwaerter = get_object_or_404(
+        NotarAnwaerter.objects.select_related(
+            'betreuender_notar', 'notarstelle', 'notarstelle__sprengel'
+        ).annotate(**zaehler).prefetch_related(*prefetches),
+        anwaerter_id=anwaerter_id,
+    )
+    return _service_ausfuehrungen_anhaengen(anwaerter, 'anwaerter', anzahl)
@@ -0,0 +1,182 @@
+"""
+Dublettensuche für Notare und Notariatskandidaten.
+
+Statt jede Person mit jeder anderen unscharf zu vergleichen, werden nur
+Personen verglichen, die einen Block teilen: gleicher phonetischer Nachname
+(Kölner Phonetik) oder gleiche normalisierte E-Mail. Beide Schlüssel sind
+indizierte Spalten (siehe PersonBasis), die Prüfung einer neuen Person
+kostet damit eine Index-Abfrage pro Tabelle.
+
+Als mögliche Dublette gilt ein Paar mit
+- gleicher normalisierter E-Mail oder
+- gleich klingendem Nachnamen und gleich klingendem Vornamen (auch als
+  Präfix, z.B. "Hans" / "Hans-Peter").
+"""
+import hashlib
+from collections import defaultdict
+from itertools import combinations
+
+from django.db.models import Q
+
+from .models import Notar, NotarAnwaerter
+from .phonetik import email_normalisieren, koelner_phonetik
+
+# (Model, Typ, ID-Feld)
+PERSONEN_MODELLE = (
+    (Notar, 'notar', 'notar_id'),
+    (NotarAnwaerter, 'kandidat', 'anwaerter_id'),
+)
+
+
+def gruende(a, b):
+    """
+    Gründe, warum zwei Personen Dubletten sein könnten (leer = keine Dublette).
+
+    Args:
+        a, b: Tupel (nachname_phonetik, vorname_phonetik, email_normalisiert)
+    """
+    ergebnis = []
+    if a[2] and a[2] == b[2]:
+        ergebnis.append('gleiche E-Mail')
+    if a[0] and a[0] == b[0] and a[1] and b[1] and (a[1].startswith(b[1]) or b[1].startswith(a[1])):
+        ergebnis.append('gleich klingender Name')
+    return ergebnis
+
+
+def schluessel(vorname, nachname, email):
+    """Vergleichsschlüssel (nachname_phonetik, vorname_phonetik, email_normalisiert) zu Angaben."""
+    return koelner_phonetik(nachname), koelner_phonetik(vorname), email_normalisieren(email)
+
+
+def bestaetigung(vorname, nachname, email):
+    """
+    Token, mit dem ein Formular die Dubletten-Warnung für genau diese Angaben bestätigt.
+
+    Abgeleitet aus den Vergleichsschlüsseln: ändern sich Name oder E-Mail so,
+    dass andere Treffer möglich sind, passt das Token nicht mehr.
+    """
+    return hashlib.sha256('|'.join(schluessel(vorname, nachname, email)).encode()).hexdigest()[:16]
+
+
+class Treffer:
+    """Eine bestehende Person, die der geprüften ähnelt."""
+
+    def __init__(self, person, typ, gruende):
+        self.person = person
+        self.typ = typ
+        self.gruende = gruende
+
+
+def kandidaten_finden(vorname, nachname, email, ausser=None):
+    """
+    Sucht bestehende Notare und Kandidaten, die Dubletten der Angaben sein könnten.
+
+    Args:
+        vorname, nachname, email: Angaben der neuen oder geänderten Person
+        ausser: Person, die nicht als Treffer zählt (beim Bearbeiten sie selbst)
+
+    Returns:
+        list[Treffer]: Notare zuerst, dann Kandidaten, jeweils nach Name
+    """
+    angaben = schluessel(vorname, nachname, email)
+    bedingung = Q()
+    if angaben[0]:
+        bedingung |= Q(nachname_phonetik=angaben[0])
+    if angaben[2]:
+        bedingung |= Q(email_normalisiert=angaben[2])
+    if not bedingung:
+        return []
+
+    treffer = []
+    for model, typ, _ in PERSONEN_MODELLE:
+        personen = model.objects.filter(bedingung)
+        if isinstance(ausser, model):
+            personen = personen.exclude(pk=ausser.pk)
+        for person in personen:
+            person_gruende = gruende(
+                angaben, (person.nachname_phonetik, person.vorname_phonetik, person.email_normalisiert)
+            )
+            if person_gruende:
+                treffer.append(Treffer(person, typ, person_gruende))
+    return treffer
+
+
+def cluster_finden(nur_aktive=True):
+    """
+    Gruppiert alle Personen des Registers zu Clustern möglicher Dubletten.
+
+    Personen mit gleichen Codes bzw. gleicher E-Mail werden direkt
+    gruppiert; paarweise verglichen werden nur die verschiedenen
+    Vorname-Codes innerhalb eines Nachnamen-Blocks (Präfix-Regel). Der
+    Aufwand wächst damit mit der Zahl der Personen, nicht mit deren Quadrat,
+    auch wenn ein Nachname sehr häufig ist. Zusammenhängende Treffer
+    bilden einen Cluster.
+
+    Returns:
+        tuple: (Liste von Clustern, Anzahl Code-Vergleiche). Ein Cluster ist eine
+        Liste von dicts mit typ, bezeichnung, name, email und gruende,
+        größte Cluster zuerst.
+    """
+    personen = []
+    for model, typ, id_feld in PERSONEN_MODELLE:
+        eintraege = model.objects.all()
+        if nur_aktive:
+            eintraege = eintraege.filter(ist_aktiv=True)
+        for eintrag in eintraege.values(
+            id_feld, 'titel', 'vorname', 'nachname', 'email',
+            'nachname_phonetik', 'vorname_phonetik', 'email_normalisiert',
+        ).order_by():
+            personen.append({
+                'typ': typ,
+                'bezeichnung': eintrag[id_feld],
+                'name': ' '.join(filter(None, [eintrag['titel'], eintrag['vorname'], eintrag['nachname']])),
+                'email': eintrag['email'],
+                'schluessel': (eintrag['nachname_phonetik'], eintrag['vorname_phonetik'], eintrag['email_normalisiert']),
+                'gruende': set(),
+            })
+
+    # Union-Find über alle Personen, die sich ähneln
+    eltern = list(range(len(personen)))
+
+    def wurzel(i):
+        while eltern[i] != i:
+            eltern[i] = eltern[eltern[i]]
+            i = eltern[i]
+        return i
+
+    def vereinigen(gruppe, grund):
+        for i in gruppe:
+            personen[i]['gruende'].add(grund)
+            eltern[wurzel(i)] = wurzel(gruppe[0])
+
+    # Blöcke: Nachname-Code -> Vorname-Code -> Personen, sowie E-Mail -> Personen.
+    # Gleiche Codes bzw. gleiche E-Mail sind ohne paarweisen Vergleich Dubletten;
+    # verglichen werden nur die verschiedenen Vorname-Codes eines Nachnamen-Blocks.
+    namen = defaultdict(lambda: defaultdict(list))
+    emails = defaultdict(list)
+    for i, person in enumerate(personen):
+        nachname_code, vorname_code, email = person['schluessel']
+        if nachname_code and vorname_code:
+            namen[nachname_code][vorname_code].append(i)
+        if email:
+            emails[email].append(i)
+
+    vergleiche = 0
+    for vornamen in namen.values():
+        for gruppe in vornamen.values():
+            if len(gruppe) > 1:
+                vereinigen(gruppe, 'gleich klingender Name')
+        for code_a, code_b in combinations(sorted(vornamen), 2):
+            vergleiche += 1
+            if code_b.startswith(code_a):
+                vereinigen(vornamen[code_a] + vornamen[code_b], 'gleich klingender Name')
+    for gruppe in emails.values():
+        if len(gruppe) > 1:
+            vereinigen(gruppe, 'gleiche E-Mail')
+
+    cluster = defaultdict(list)
+    for i, person in enumerate(personen):
+        if person['gruende']:
+            cluster[wurzel(i)].append(person)
+    ergebnis = sorted(cluster.values(), key=lambda c: (-len(c), c[0]['name']))
+    return ergebnis, vergleiche
@@ -0,0 +1,412 @@
+"""
+Streaming-Import für Notarstellen, Notare und Notariatskandidaten.
+
+Die Quelle liefert Zeilen als dicts (CSV über csv.DictReader, Excel über
+openpyxl im read_only-Modus, jeweils zeilenweise gestreamt). Verarbeitet
+wird blockweise:
+
+- Fremdschlüssel (Notarstelle, betreuender Notar) werden aus einmal
+  geladenen Maps aufgelöst, nicht mit einer Query pro Zeile.
+- Pro Block werden die vorhandenen Datensätze mit einer Query geladen und
+  verglichen; daraus entsteht die Übersicht neu / geändert / unverändert.
+- Nur neue und geänderte Zeilen werden mit
+  bulk_create(update_conflicts=True) geschrieben.
+
+bulk_create löst keine Signale aus. Nach dem Commit wird deshalb der
+Autocomplete-Index verworfen; die ID-Zähler werden auf die importierten
+IDs angehoben. Die Besetzungszeiträume importierter Notare werden pro
+Block neu geschrieben.
+"""
+import csv
+import time
+from collections import Counter
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from zipfile import BadZipFile
+
+from django.db import transaction
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from apps.kern import ids
+from apps.notarstellen.models import Notarstelle
+
+from . import autocomplete, besetzungen
+from .models import Notar, NotarAnwaerter, PersonBasis
+
+
+class ImportFehler(Exception):
+    """Eine Zeile kann nicht importiert werden und wird übersprungen."""
+
+
+class QuellenFehler(Exception):
+    """Die Importdatei kann nicht gelesen werden."""
+
+
+EXCEL_ENDUNGEN = ('.xlsx', '.xlsm')
+
+
+def csv_zeilen(pfad):
+    """Liest eine CSV-Datei zeilenweise als dicts."""
+    with open(pfad, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def _zellwert(wert):
+    """Vereinheitlicht Excel-Zellwerte: Texte und Zahlen als str, Datum/bool unverändert."""
+    if wert is None:
+        return ''
+    if isinstance(wert, str):
+        return wert.strip()
+    if isinstance(wert, float) and wert.is_integer():
+        return str(int(wert))
+    if isinstance(wert, (int, float)) and not isinstance(wert, bool):
+        return str(wert)
+    return wert
+
+
+def xlsx_zeilen(pfad, blatt=None):
+    """
+    Liest ein Excel-Blatt zeilenweise als dicts (erste Zeile = Spaltennamen).
+
+    openpyxl läuft im read_only-Modus; der Speicherbedarf hängt nicht von
+    der Größe des Blatts ab. Leere Zeilen werden übersprungen. Beschädigte
+    oder nicht als Excel lesbare Dateien ergeben einen QuellenFehler.
+    """
+    try:
+        mappe = load_workbook(pfad, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException, KeyError) as e:
+        # KeyError: ZIP-Archiv ohne Excel-Bestandteile (z.B. [Content_Types].xml)
+        raise QuellenFehler(f'{pfad} ist keine gültige Excel-Datei ({e})')
+    try:
+        if blatt and blatt not in mappe.sheetnames:
+            raise QuellenFehler(f'Blatt "{blatt}" nicht gefunden in {pfad}')
+        tabelle = mappe[blatt] if blatt else mappe.active
+        zeilen = tabelle.iter_rows(values_only=True)
+        kopf = [str(spalte).strip() if spalte is not None else '' for spalte in next(zeilen, ())]
+        for werte in zeilen:
+            if all(wert in (None, '') for wert in werte):
+                continue
+            yield {spalte: _zellwert(wert) for spalte, wert in zip(kopf, werte) if spalte}
+    finally:
+        mappe.close()
+
+
+def zeilen_lesen(pfad, spalten=None, blatt=None):
+    """
+    Liest CSV- oder Excel-Dateien (nach Dateiendung) zeilenweise.
+
+    Args:
+        pfad: Pfad zur Datei
+        spalten: Optionale Zuordnung {Spalte in der Datei: Feldname}; nicht
+                 zugeordnete Spalten behalten ihren Namen
+        blatt: Name des Excel-Blatts (Standard: aktives Blatt)
+    """
+    if Path(pfad).suffix.lower() in EXCEL_ENDUNGEN:
+        zeilen = xlsx_zeilen(pfad, blatt)
+    else:
+        zeilen = csv_zeilen(pfad)
+    if not spalten:
+        return zeilen
+    return ({spalten.get(spalte, spalte): wert for spalte, wert in zeile.items()} for zeile in zeilen)
+
+
+def _text(zeile, spalte):
+    return zeile.get(spalte) or ''
+
+
+def _datum(zeile, spalte, pflicht=True):
+    wert = zeile.get(spalte)
+    if not wert:
+        if pflicht:
+            raise ImportFehler(f'{spalte} fehlt')
+        return None
+    if isinstance(wert, datetime):
+        return wert.date()
+    if isinstance(wert, date):
+        return wert
+    try:
+        return date.fromisoformat(wert)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(wert, '%d.%m.%Y').date()
+    except ValueError:
+        raise ImportFehler(f'{spalte}: ungültiges Datum "{wert}"')
+
+
+def _wahrheitswert(zeile, spalte, standard):
+    wert = zeile.get(spalte)
+    if wert in (None, ''):
+        return standard
+    if isinstance(wert, bool):
+        return wert
+    return str(wert).strip().lower() in ('true', 'ja', '1')
+
+
+class ImportErgebnis:
+    """Zählt die Ergebnisse eines Imports."""
+
+    def __init__(self):
+        self.neu = 0
+        self.geaendert = 0
+        self.unveraendert = 0
+        self.uebersprungen = 0
+        self.geaenderte_felder = Counter()
+        self.sekunden = 0.0
+
+    @property
+    def zeilen(self):
+        return self.neu + self.geaendert + self.unveraendert + self.uebersprungen
+
+    @property
+    def zeilen_pro_sekunde(self):
+        return int(self.zeilen / self.sekunden) if self.sekunden else self.zeilen
+
+
+class ImportZiel:
+    """
+    Basisklasse eines Import-Ziels.
+
+    Unterklassen legen Model, Schlüsselspalte, ID-Präfix und die zu
+    schreibenden Felder fest und wandeln eine Zeile in Feldwerte um.
+    """
+    model = None
+    schluessel = None
+    praefix = None
+    felder = ()
+    # Aus `felder` berechnete Spalten: werden mitgeschrieben, aber nicht verglichen
+    abgeleitete_felder = ()
+
+    def __init__(self, lauf):
+        self.lauf = lauf
+        meta = self.model._meta
+        self.attnames = [meta.get_field(feld).attname for feld in self.felder]
+
+    def umwandeln(self, zeile):
+        """Liefert {attname: Wert} für eine Zeile oder wirft ImportFehler."""
+        raise NotImplementedError
+
+    def vorbereiten(self, objekt):
+        """Wird vor dem Schreiben für jedes neue oder geänderte Objekt aufgerufen."""
+
+    def nach_block(self, schluessel):
+        """Wird nach jedem Block mit den verarbeiteten Schlüsseln aufgerufen."""
+
+
+class NotarstellenZiel(ImportZiel):
+    model = Notarstelle
+    schluessel = 'bezeichnung'
+    praefix = 'NST'
+    felder = ('name', 'strasse', 'plz', 'stadt', 'bundesland', 'telefon', 'email', 'ist_aktiv')
+
+    def umwandeln(self, zeile):
+        return {
+            'name': zeile['name'],
+            'strasse': zeile['strasse'],
+            'plz': zeile['plz'],
+            'stadt': zeile['stadt'],
+            'bundesland': zeile['bundesland'],
+            'telefon': _text(zeile, 'telefon'),
+            'email': _text(zeile, 'email'),
+            'ist_aktiv': _wahrheitswert(zeile, 'ist_aktiv', True),
+        }
+
+    def nach_block(self, schluessel):
+        self.lauf.notarstellen.update(schluessel)
+
+
+class PersonenZiel(ImportZiel):
+    """Gemeinsame Felder von Notaren und Kandidaten."""
+    abgeleitete_felder = PersonBasis.DUBLETTEN_SCHLUESSEL
+
+    def vorbereiten(self, objekt):
+        objekt.dubletten_schluessel_setzen()
+
+    def _notarstelle(self, zeile):
+        bezeichnung = zeile['notarstelle']
+        if bezeichnung not in self.lauf.notarstellen:
+            raise ImportFehler(
+                f'Notarstelle {bezeichnung} nicht gefunden für {zeile["vorname"]} {zeile["nachname"]}'
+            )
+        return bezeichnung
+
+    def _person(self, zeile):
+        return {
+            'vorname': zeile['vorname'],
+            'nachname': zeile['nachname'],
+            'titel': _text(zeile, 'titel'),
+            'email': zeile['email'],
+            'telefon': _text(zeile, 'telefon'),
+            'notarstelle_id': self._notarstelle(zeile),
+            'beginn_datum': _datum(zeile, 'beginn_datum'),
+            'ist_aktiv': _wahrheitswert(zeile, 'ist_aktiv', True),
+        }
+
+
+class NotareZiel(PersonenZiel):
+    model = Notar
+    schluessel = 'notar_id'
+    praefix = 'NOT'
+    felder = (
+        'vorname', 'nachname', 'titel', 'email', 'telefon', 'notarstelle',
+        'bestellt_am', 'beginn_datum', 'ende_datum', 'war_vorher_anwaerter', 'ist_aktiv',
+    )
+
+    def umwandeln(self, zeile):
+        return {
+            **self._person(zeile),
+            'bestellt_am': _datum(zeile, 'bestellt_am'),
+            'ende_datum': _datum(zeile, 'ende_datum', pflicht=False),
+            'war_vorher_anwaerter': _wahrheitswert(zeile, 'war_vorher_anwaerter', False),
+        }
+
+    def nach_block(self, schluessel):
+        if self.lauf.dry_run:
+            # Im Dry Run gibt es keine pk; es genügt, dass der Notar bekannt ist
+            for notar_id in schluessel:
+                self.lauf.notare.setdefault(notar_id, None)
+        else:
+            self.lauf.notare_verwerfen()
+            besetzungen.aktualisieren(
+                Notar.objects.filter(notar_id__in=schluessel).only(
+                    'notarstelle', 'beginn_datum', 'ende_datum'
+                )
+            )
+
+
+class AnwaerterZiel(PersonenZiel):
+    model = NotarAnwaerter
+    schluessel = 'anwaerter_id'
+    praefix = 'NKA'
+    felder = (
+        'vorname', 'nachname', 'titel', 'email', 'telefon', 'notarstelle', 'betreuender_notar',
+        'zugelassen_am', 'beginn_datum', 'geplante_bestellung', 'ist_aktiv',
+    )
+
+    def umwandeln(self, zeile):
+        notar_id = zeile.get('betreuender_notar')
+        if not notar_id or notar_id not in self.lauf.notare:
+            raise ImportFehler(
+                f'Betreuender Notar {notar_id or "-"} nicht gefunden für {zeile["vorname"]} {zeile["nachname"]}'
+            )
+        return {
+            **self._person(zeile),
+            'betreuender_notar_id': self.lauf.notare[notar_id],
+            'zugelassen_am': _datum(zeile, 'zugelassen_am'),
+            'geplante_bestellung': _datum(zeile, 'geplante_bestellung', pflicht=False),
+        }
+
+
+class ImportLauf:
+    """
+    Ein Import-Lauf über ein oder mehrere Ziele.
+
+    Hält die Fremdschlüssel-Maps, damit später importierte Ziele die im
+    selben Lauf angelegten Notarstellen und Notare kennen (auch im Dry Run).
+    """
+
+    def __init__(self, dry_run=False, chunk_size=1000, warnung=None):
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.warnung = warnung
+        self._notarstellen = None
+        self._notare = None
+
+    @property
+    def notarstellen(self):
+        """Menge der bekannten Notarstellen-Bezeichnungen (= pk)."""
+        if self._notarstellen is None:
+            self._notarstellen = set(Notarstelle.objects.values_list('pk', flat=True))
+        return self._notarstellen
+
+    @property
+    def notare(self):
+        """Map notar_id → pk der bekannten Notare."""
+        if self._notare is None:
+            self._notare = dict(Notar.objects.values_list('notar_id', 'pk'))
+        return self._notare
+
+    def notare_verwerfen(self):
+        self._notare = None
+
+    def importieren(self, ziel_klasse, zeilen):
+        """
+        Importiert alle Zeilen in das Ziel.
+
+        Args:
+            ziel_klasse: Unterklasse von ImportZiel
+            zeilen: Iterable von dicts (Spaltenname → Wert)
+
+        Returns:
+            ImportErgebnis
+        """
+        ziel = ziel_klasse(self)
+        ergebnis = ImportErgebnis()
+        start = time.monotonic()
+
+        nummerierte = enumerate(zeilen, start=2)  # Zeile 1 = Kopfzeile
+        while True:
+            block = list(islice(nummerierte, self.chunk_size))
+            if not block:
+                break
+            self._block_verarbeiten(ziel, block, ergebnis)
+
+        if not self.dry_run and (ergebnis.neu or ergebnis.geaendert):
+            ids.zaehler_abgleichen(ziel.praefix)
+            transaction.on_commit(autocomplete.index.verwerfen)
+
+        ergebnis.sekunden = time.monotonic() - start
+        return ergebnis
+
+    def _block_verarbeiten(self, ziel, block, ergebnis):
+        werte = {}
+        for nummer, zeile in block:
+            try:
+                schluessel = zeile[ziel.schluessel]
+                werte[schluessel] = ziel.umwandeln(zeile)
+            except KeyError as e:
+                self._ueberspringen(ergebnis, nummer, f'Spalte {e} fehlt')
+            except ImportFehler as e:
+                self._ueberspringen(ergebnis, nummer, str(e))
+
+        vorhanden = {
+            eintrag[ziel.schluessel]: eintrag
+            for eintrag in ziel.model.objects.filter(
+                **{f'{ziel.schluessel}__in': list(werte)}
+            ).values(ziel.schluessel, *ziel.attnames)
+        }
+
+        zu_schreiben = []
+        for schluessel, daten in werte.items():
+            alt = vorhanden.get(schluessel)
+            if alt is None:
+                ergebnis.neu += 1
+            else:
+                geaendert = [
+                    feld for feld, attname in zip(ziel.felder, ziel.attnames)
+                    if alt[attname] != daten[attname]
+                ]
+                if not geaendert:
+                    ergebnis.unveraendert += 1
+                    continue
+                ergebnis.geaendert += 1
+                ergebnis.geaenderte_felder.update(geaendert)
+            objekt = ziel.model(**{ziel.schluessel: schluessel, **daten})
+            ziel.vorbereiten(objekt)
+            zu_schreiben.append(objekt)
+
+        if zu_schreiben and not self.dry_run:
+            ziel.model.objects.bulk_create(
+                zu_schreiben,
+                update_conflicts=True,
+                unique_fields=[ziel.schluessel],
+                update_fields=[*ziel.felder, *ziel.abgeleitete_felder, 'aktualisiert_am'],
+            )
+        ziel.nach_block(werte)
+
+    def _ueberspringen(self, ergebnis, nummer, grund):
+        ergebnis.uebersprungen += 1
+        if self.warnung:
+            self.warnung(f'Zeile {nummer}: {grund}')
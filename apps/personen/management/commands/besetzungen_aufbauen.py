@@ -0,0 +1,31 @@
+"""
+Management Command: Baut den Besetzungsindex (Besetzungszeiträume der
+Notarstellen) aus allen Notaren neu auf.
+
+Im Betrieb wird der Index laufend nachgeführt (siehe
+apps.personen.besetzungen); der Command ist für Datenkorrekturen direkt in
+der Datenbank gedacht.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from apps.personen import besetzungen
+
+
+class Command(BaseCommand):
+    help = 'Baut die Besetzungszeiträume der Notarstellen aus den Notaren neu auf'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Anzahl Notare pro Block (Standard: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        anzahl = besetzungen.neu_aufbauen(chunk_size=max(options['chunk_size'], 1))
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ {anzahl} Besetzungszeiträume angelegt ({time.monotonic() - start:.2f} s)'
+        ))
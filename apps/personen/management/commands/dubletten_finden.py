@@ -0,0 +1,43 @@
+"""
+Management Command: Listet mögliche Dubletten unter Notaren und Notariatskandidaten.
+
+Verglichen wird nur innerhalb von Blöcken mit gleichem phonetischem Nachnamen
+(Kölner Phonetik) oder gleicher normalisierter E-Mail (siehe
+apps.personen.dubletten). Der Command ändert keine Daten.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from apps.personen import dubletten
+
+TYPEN = {'notar': 'Notar', 'kandidat': 'Kandidat'}
+
+
+class Command(BaseCommand):
+    help = 'Listet Cluster möglicher Dubletten unter Notaren und Notariatskandidaten'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inaktive',
+            action='store_true',
+            help='Bezieht auch inaktive Personen ein (z.B. beförderte Kandidaten)'
+        )
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        cluster, vergleiche = dubletten.cluster_finden(nur_aktive=not options['inaktive'])
+        dauer = time.monotonic() - start
+
+        for nummer, personen in enumerate(cluster, start=1):
+            gruende = sorted(set().union(*(person['gruende'] for person in personen)))
+            self.stdout.write(f'\nCluster {nummer} ({len(personen)} Personen, {", ".join(gruende)}):')
+            for person in personen:
+                self.stdout.write(
+                    f'  {person["bezeichnung"]:12} {TYPEN[person["typ"]]:9} {person["name"]} <{person["email"]}>'
+                )
+
+        zusammenfassung = f'{len(cluster)} Cluster mit {sum(len(c) for c in cluster)} Personen ({vergleiche} Vergleiche, {dauer:.2f} s)'
+        if cluster:
+            self.stdout.write(self.style.WARNING(f'\n{zusammenfassung}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'\n✓ Keine Dubletten gefunden ({vergleiche} Vergleiche, {dauer:.2f} s)'))
@@ -1,16 +1,31 @@
 """
-Management Command zum Importieren von echten österreichischen Notaren aus CSV-Dateien.
+Management Command zum Importieren von echten österreichischen Notaren aus CSV- oder Excel-Dateien.
+
+Die Dateien werden blockweise gelesen und per Bulk-Upsert geschrieben
+(siehe apps.personen.importer). Vorhandene Datensätze werden anhand der
+Bezeichnung (NST-/NOT-/NKA-ID) aktualisiert, unveränderte übersprungen.
+
+Excel-Dateien (.xlsx) mit abweichenden Spaltennamen, z.B. vom Ministerium:
+
+    python manage.py import_notare --notare register.xlsx --blatt Notare \
+        --spalte "Notar-Nr.=notar_id" --spalte "Bestellung=bestellt_am"
 """
-import csv
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
+from apps.personen.importer import (
+    AnwaerterZiel,
+    ImportLauf,
+    NotareZiel,
+    NotarstellenZiel,
+    QuellenFehler,
+    zeilen_lesen,
+)
 from apps.personen.models import Notar, NotarAnwaerter
 from apps.notarstellen.models import Notarstelle
-from datetime import datetime
 
 
 class Command(BaseCommand):
-    help = 'Importiert echte österreichische Notare, Kandidat und Notarstellen aus CSV-Dateien'
+    help = 'Importiert echte österreichische Notare, Kandidat und Notarstellen aus CSV- oder Excel-Dateien'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -21,158 +36,114 @@ class Command(BaseCommand):
         parser.add_argument(
             '--notarstellen',
             type=str,
-            help='Pfad zur CSV-Datei mit Notarstellen',
+            help='Pfad zur CSV- oder Excel-Datei mit Notarstellen',
         )
         parser.add_argument(
             '--notare',
             type=str,
-            help='Pfad zur CSV-Datei mit Notaren',
+            help='Pfad zur CSV- oder Excel-Datei mit Notaren',
         )
         parser.add_argument(
             '--anwaerter',
             type=str,
-            help='Pfad zur CSV-Datei mit Notariatskandidatn',
+            help='Pfad zur CSV- oder Excel-Datei mit Notariatskandidatn',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Zeigt nur an, was neu angelegt oder geändert würde',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Anzahl Zeilen pro Block (Standard: 1000)',
+        )
+        parser.add_argument(
+            '--spalte',
+            action='append',
+            default=[],
+            metavar='SPALTE=FELD',
+            help='Ordnet eine Spalte der Datei einem Feld zu, z.B. "Notar-Nr.=notar_id" (mehrfach möglich)',
+        )
+        parser.add_argument(
+            '--blatt',
+            type=str,
+            help='Name des Excel-Blatts (Standard: aktives Blatt)',
         )
 
     @transaction.atomic
     def handle(self, *args, **options):
-        if options['clear_dummy']:
-            self.stdout.write(self.style.WARNING('Lösche bestehende Dummy-Daten...'))
-            NotarAnwaerter.objects.all().delete()
-            Notar.objects.all().delete()
-            Notarstelle.objects.all().delete()
-            self.stdout.write(self.style.SUCCESS('✓ Dummy-Daten gelöscht'))
-
-        # Import Notarstellen
-        if options['notarstellen']:
-            self.import_notarstellen(options['notarstellen'])
-
-        # Import Notare
-        if options['notare']:
-            self.import_notare(options['notare'])
-
-        # Import Kandidat
-        if options['anwaerter']:
-            self.import_anwaerter(options['anwaerter'])
+        dry_run = options['dry_run']
+        spalten = self.spalten_lesen(options['spalte'])
+        if dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN - Keine Änderungen werden gespeichert'))
 
-        self.stdout.write(self.style.SUCCESS('\n✓ Import erfolgreich abgeschlossen!'))
-
-    def import_notarstellen(self, csv_path):
-        self.stdout.write(f'\nImportiere Notarstellen aus {csv_path}...')
-        count = 0
-
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                notarstelle, created = Notarstelle.objects.update_or_create(
-                    bezeichnung=row['bezeichnung'],
-                    defaults={
-                        'name': row['name'],
-                        'strasse': row['strasse'],
-                        'plz': row['plz'],
-                        'stadt': row['stadt'],
-                        'bundesland': row['bundesland'],
-                        'telefon': row.get('telefon', ''),
-                        'email': row.get('email', ''),
-                        'ist_aktiv': row.get('ist_aktiv', 'True').lower() == 'true',
-                    }
-                )
-                count += 1
-                if created:
-                    self.stdout.write(f'  + {notarstelle.name}')
-                else:
-                    self.stdout.write(f'  → {notarstelle.name} (aktualisiert)')
-
-        self.stdout.write(self.style.SUCCESS(f'✓ {count} Notarstellen importiert'))
-
-    def import_notare(self, csv_path):
-        self.stdout.write(f'\nImportiere Notare aus {csv_path}...')
-        count = 0
-
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Notarstelle finden
-                try:
-                    notarstelle = Notarstelle.objects.get(bezeichnung=row['notarstelle'])
-                except Notarstelle.DoesNotExist:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'  ! Notarstelle {row["notarstelle"]} nicht gefunden für {row["vorname"]} {row["nachname"]}'
-                        )
-                    )
-                    continue
-
-                notar, created = Notar.objects.update_or_create(
-                    notar_id=row['notar_id'],
-                    defaults={
-                        'vorname': row['vorname'],
-                        'nachname': row['nachname'],
-                        'titel': row.get('titel', ''),
-                        'email': row['email'],
-                        'telefon': row.get('telefon', ''),
-                        'notarstelle': notarstelle,
-                        'bestellt_am': datetime.strptime(row['bestellt_am'], '%Y-%m-%d').date(),
-                        'beginn_datum': datetime.strptime(row['beginn_datum'], '%Y-%m-%d').date(),
-                        'ende_datum': datetime.strptime(row['ende_datum'], '%Y-%m-%d').date() if row.get('ende_datum') else None,
-                        'war_vorher_anwaerter': row.get('war_vorher_anwaerter', 'False').lower() == 'true',
-                        'ist_aktiv': row.get('ist_aktiv', 'True').lower() == 'true',
-                    }
-                )
-                count += 1
-                if created:
-                    self.stdout.write(f'  + {notar.titel} {notar.vorname} {notar.nachname}')
-                else:
-                    self.stdout.write(f'  → {notar.titel} {notar.vorname} {notar.nachname} (aktualisiert)')
-
-        self.stdout.write(self.style.SUCCESS(f'✓ {count} Notare importiert'))
-
-    def import_anwaerter(self, csv_path):
-        self.stdout.write(f'\nImportiere Notariatskandidat aus {csv_path}...')
-        count = 0
+        if options['clear_dummy']:
+            if dry_run:
+                self.stdout.write(self.style.WARNING(
+                    f'Würde {NotarAnwaerter.objects.count()} Kandidaten, {Notar.objects.count()} Notare '
+                    f'und {Notarstelle.objects.count()} Notarstellen löschen '
+                    f'(der Vergleich unten bezieht sich auf den aktuellen Bestand)'
+                ))
+            else:
+                self.stdout.write(self.style.WARNING('Lösche bestehende Dummy-Daten...'))
+                NotarAnwaerter.objects.all().delete()
+                Notar.objects.all().delete()
+                Notarstelle.objects.all().delete()
+                self.stdout.write(self.style.SUCCESS('✓ Dummy-Daten gelöscht'))
+
+        lauf = ImportLauf(
+            dry_run=dry_run,
+            chunk_size=max(options['chunk_size'], 1),
+            warnung=lambda text: self.stdout.write(self.style.WARNING(f'  ! {text}')),
+        )
 
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Notarstelle finden
+        for option, ziel, titel in [
+            ('notarstellen', NotarstellenZiel, 'Notarstellen'),
+            ('notare', NotareZiel, 'Notare'),
+            ('anwaerter', AnwaerterZiel, 'Notariatskandidat'),
+        ]:
+            if options[option]:
+                self.stdout.write(f'\nImportiere {titel} aus {options[option]}...')
+                zeilen = zeilen_lesen(options[option], spalten=spalten, blatt=options['blatt'])
                 try:
-                    notarstelle = Notarstelle.objects.get(bezeichnung=row['notarstelle'])
-                except Notarstelle.DoesNotExist:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'  ! Notarstelle {row["notarstelle"]} nicht gefunden für {row["vorname"]} {row["nachname"]}'
-                        )
-                    )
-                    continue
-
-                # Betreuender Notar (optional)
-                betreuender_notar = None
-                if row.get('betreuender_notar'):
-                    try:
-                        betreuender_notar = Notar.objects.get(notar_id=row['betreuender_notar'])
-                    except Notar.DoesNotExist:
-                        pass
-
-                anwaerter, created = NotarAnwaerter.objects.update_or_create(
-                    anwaerter_id=row['anwaerter_id'],
-                    defaults={
-                        'vorname': row['vorname'],
-                        'nachname': row['nachname'],
-                        'titel': row.get('titel', ''),
-                        'email': row['email'],
-                        'telefon': row.get('telefon', ''),
-                        'notarstelle': notarstelle,
-                        'betreuender_notar': betreuender_notar,
-                        'zugelassen_am': datetime.strptime(row['zugelassen_am'], '%Y-%m-%d').date(),
-                        'beginn_datum': datetime.strptime(row['beginn_datum'], '%Y-%m-%d').date(),
-                        'geplante_bestellung': datetime.strptime(row['geplante_bestellung'], '%Y-%m-%d').date() if row.get('geplante_bestellung') else None,
-                        'ist_aktiv': row.get('ist_aktiv', 'True').lower() == 'true',
-                    }
-                )
-                count += 1
-                if created:
-                    self.stdout.write(f'  + {anwaerter.titel} {anwaerter.vorname} {anwaerter.nachname}')
-                else:
-                    self.stdout.write(f'  → {anwaerter.titel} {anwaerter.vorname} {anwaerter.nachname} (aktualisiert)')
-
-        self.stdout.write(self.style.SUCCESS(f'✓ {count} Notariatskandidat importiert'))
+                    ergebnis = lauf.importieren(ziel, zeilen)
+                except (OSError, QuellenFehler) as e:
+                    raise CommandError(str(e))
+                self.ergebnis_ausgeben(titel, ergebnis, dry_run)
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('\nDRY RUN abgeschlossen - keine Änderungen gespeichert'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\n✓ Import erfolgreich abgeschlossen!'))
+
+    def spalten_lesen(self, angaben):
+        """Wandelt die --spalte-Angaben in {Spalte: Feld} um."""
+        spalten = {}
+        for angabe in angaben:
+            spalte, trenner, feld = angabe.rpartition('=')
+            if not trenner or not spalte.strip() or not feld.strip():
+                raise CommandError(f'Ungültige Spaltenzuordnung "{angabe}", erwartet SPALTE=FELD')
+            spalten[spalte.strip()] = feld.strip()
+        return spalten
+
+    def ergebnis_ausgeben(self, titel, ergebnis, dry_run):
+        zusammenfassung = (
+            f'{ergebnis.neu} neu, {ergebnis.geaendert} geändert, '
+            f'{ergebnis.unveraendert} unverändert, {ergebnis.uebersprungen} übersprungen'
+        )
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'DRY RUN {titel}: {zusammenfassung}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✓ {titel}: {zusammenfassung}'))
+
+        if ergebnis.geaenderte_felder:
+            felder = ', '.join(
+                f'{feld} ({anzahl})' for feld, anzahl in ergebnis.geaenderte_felder.most_common()
+            )
+            self.stdout.write(f'  Geänderte Felder: {felder}')
+        self.stdout.write(
+            f'  {ergebnis.zeilen} Zeilen in {ergebnis.sekunden:.2f} s '
+            f'({ergebnis.zeilen_pro_sekunde} Zeilen/s)'
+        )
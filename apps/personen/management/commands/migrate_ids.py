@@ -10,6 +10,7 @@ WICHTIG: Vor Ausführung Datenbank-Backup erstellen!
 import re
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from apps.kern import ids
 from apps.personen.models import Notar, NotarAnwaerter
 from apps.notarstellen.models import Notarstelle
 
@@ -59,6 +60,10 @@ class Command(BaseCommand):
                 if dry_run:
                     raise Exception("DRY RUN - Rollback")
 
+                # ID-Zähler an die migrierten IDs anpassen
+                for praefix in ('NOT', 'NKA', 'NST'):
+                    ids.zaehler_abgleichen(praefix)
+
             self.stdout.write(self.style.SUCCESS('\n✅ Migration erfolgreich abgeschlossen!'))
 
         except Exception as e:
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:51
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personen', '0003_alter_notar_notar_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVExtraktion',
+            fields=[
+                ('erstellt_am', models.DateTimeField(auto_now_add=True, verbose_name='Erstellt am')),
+                ('aktualisiert_am', models.DateTimeField(auto_now=True, verbose_name='Aktualisiert am')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('sha256', models.CharField(help_text='Prüfsumme der PDF-Datei', max_length=64, verbose_name='SHA-256')),
+                ('extraktor', models.CharField(help_text='z.B. "openrouter" oder "textlayer"', max_length=100, verbose_name='Extraktor')),
+                ('dateiname', models.CharField(blank=True, max_length=255, verbose_name='Dateiname')),
+                ('status', models.CharField(choices=[('wartend', 'Wartend'), ('laeuft', 'Läuft'), ('fertig', 'Fertig'), ('fehler', 'Fehler')], default='wartend', max_length=20, verbose_name='Status')),
+                ('daten', models.JSONField(blank=True, null=True, verbose_name='Extrahierte Daten')),
+                ('fehler', models.TextField(blank=True, verbose_name='Fehlermeldung')),
+                ('dauer_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Dauer (ms)')),
+            ],
+            options={
+                'verbose_name': 'CV-Extraktion',
+                'verbose_name_plural': 'CV-Extraktionen',
+                'ordering': ['-erstellt_am'],
+                'constraints': [models.UniqueConstraint(fields=('sha256', 'extraktor'), name='cv_extraktion_inhalt_eindeutig')],
+            },
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:56
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+# Stand von apps.personen.phonetik und autocomplete.normalisieren bei dieser
+# Migration; bewusst kopiert, damit spätere Änderungen an den Modulen die
+# Migration nicht verändern.
+UMLAUTE = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+VOKALE = set('aeijouy')
+
+
+def _normalisieren(text):
+    text = (text or '').lower().translate(UMLAUTE)
+    zerlegt = unicodedata.normalize('NFKD', text)
+    return ''.join(zeichen for zeichen in zerlegt if not unicodedata.combining(zeichen))
+
+
+def _code(buchstabe, vorher, nachher, am_anfang):
+    if buchstabe in VOKALE:
+        return '0'
+    if buchstabe == 'h':
+        return ''
+    if buchstabe == 'b':
+        return '1'
+    if buchstabe == 'p':
+        return '3' if nachher == 'h' else '1'
+    if buchstabe in 'dt':
+        return '8' if nachher in ('c', 's', 'z') else '2'
+    if buchstabe in 'fvw':
+        return '3'
+    if buchstabe in 'gkq':
+        return '4'
+    if buchstabe == 'c':
+        if am_anfang:
+            return '4' if nachher in ('a', 'h', 'k', 'l', 'o', 'q', 'r', 'u', 'x') else '8'
+        if vorher in ('s', 'z'):
+            return '8'
+        return '4' if nachher in ('a', 'h', 'k', 'o', 'q', 'u', 'x') else '8'
+    if buchstabe == 'x':
+        return '8' if vorher in ('c', 'k', 'q') else '48'
+    if buchstabe == 'l':
+        return '5'
+    if buchstabe in 'mn':
+        return '6'
+    if buchstabe == 'r':
+        return '7'
+    if buchstabe in 'sz':
+        return '8'
+    return ''
+
+
+def _koelner_phonetik(text):
+    buchstaben = [zeichen for zeichen in _normalisieren(text) if 'a' <= zeichen <= 'z']
+    roh = []
+    for i, buchstabe in enumerate(buchstaben):
+        vorher = buchstaben[i - 1] if i else ''
+        nachher = buchstaben[i + 1] if i + 1 < len(buchstaben) else ''
+        roh.append(_code(buchstabe, vorher, nachher, am_anfang=(i == 0)))
+    code = ''
+    for ziffer in ''.join(roh):
+        if not code or code[-1] != ziffer:
+            code += ziffer
+    return code[:1] + code[1:].replace('0', '')
+
+
+def _email_normalisieren(email):
+    email = (email or '').strip().lower()
+    lokal, trenner, domain = email.rpartition('@')
+    if not trenner:
+        return email
+    return f"{lokal.split('+', 1)[0]}@{domain}"
+
+
+def schluessel_befuellen(apps, schema_editor):
+    """Setzt die Dubletten-Schlüssel für alle vorhandenen Personen."""
+    for model_name in ('Notar', 'NotarAnwaerter'):
+        model = apps.get_model('personen', model_name)
+        personen = list(model.objects.only('vorname', 'nachname', 'email'))
+        for person in personen:
+            person.nachname_phonetik = _koelner_phonetik(person.nachname)
+            person.vorname_phonetik = _koelner_phonetik(person.vorname)
+            person.email_normalisiert = _email_normalisieren(person.email)
+        model.objects.bulk_update(
+            personen, ['nachname_phonetik', 'vorname_phonetik', 'email_normalisiert'], batch_size=500
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personen', '0004_cvextraktion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notar',
+            name='email_normalisiert',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254, verbose_name='E-Mail (normalisiert)'),
+        ),
+        migrations.AddField(
+            model_name='notar',
+            name='nachname_phonetik',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100, verbose_name='Nachname (Kölner Phonetik)'),
+        ),
+        migrations.AddField(
+            model_name='notar',
+            name='vorname_phonetik',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Vorname (Kölner Phonetik)'),
+        ),
+        migrations.AddField(
+            model_name='notaranwaerter',
+            name='email_normalisiert',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254, verbose_name='E-Mail (normalisiert)'),
+        ),
+        migrations.AddField(
+            model_name='notaranwaerter',
+            name='nachname_phonetik',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100, verbose_name='Nachname (Kölner Phonetik)'),
+        ),
+        migrations.AddField(
+            model_name='notaranwaerter',
+            name='vorname_phonetik',
+            field=models.CharField(blank=True, editable=False, max_length=100, verbose_name='Vorname (Kölner Phonetik)'),
+        ),
+        migrations.RunPython(schluessel_befuellen, migrations.RunPython.noop),
+    ]
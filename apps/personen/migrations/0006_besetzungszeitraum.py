@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-17 07:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def zeitraeume_aufbauen(apps, schema_editor):
+    """Legt die Besetzungszeiträume aller vorhandenen Notare an."""
+    Notar = apps.get_model('personen', 'Notar')
+    Besetzungszeitraum = apps.get_model('personen', 'Besetzungszeitraum')
+    Besetzungszeitraum.objects.bulk_create([
+        Besetzungszeitraum(notar_id=pk, notarstelle_id=notarstelle_id, von=von, bis=bis)
+        for pk, notarstelle_id, von, bis in Notar.objects.values_list(
+            'pk', 'notarstelle_id', 'beginn_datum', 'ende_datum'
+        )
+        if bis is None or bis >= von
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notarstellen', '0003_notarstelle_sprengel'),
+        ('personen', '0005_dubletten_schluessel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Besetzungszeitraum',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('von', models.DateField(verbose_name='Von')),
+                ('bis', models.DateField(blank=True, help_text='Letzter Tag (einschließlich); leer = andauernd', null=True, verbose_name='Bis')),
+                ('notar', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='besetzungszeitraum', to='personen.notar', verbose_name='Notar')),
+                ('notarstelle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='besetzungszeitraeume', to='notarstellen.notarstelle', verbose_name='Notarstelle')),
+            ],
+            options={
+                'verbose_name': 'Besetzungszeitraum',
+                'verbose_name_plural': 'Besetzungszeiträume',
+                'ordering': ['notarstelle', 'von'],
+                'indexes': [models.Index(fields=['notarstelle', 'von', 'bis'], name='personen_be_notarst_3e6dbb_idx'), models.Index(fields=['von', 'bis'], name='personen_be_von_8defab_idx')],
+            },
+        ),
+        migrations.RunPython(zeitraeume_aufbauen, migrations.RunPython.noop),
+    ]
@@ -3,9 +3,13 @@ Models für Personen-Verwaltung.
 
 Notare und Notariatskandidaten, die von der Kammer verwaltet werden.
 """
+import uuid
+
 from django.db import models
+from apps.kern.ids import naechste_id
 from apps.kern.models import ZeitstempelModel, AktivModel
 from apps.notarstellen.models import Notarstelle
+from .phonetik import email_normalisieren, koelner_phonetik
 
 
 class PersonBasis(ZeitstempelModel, AktivModel):
@@ -52,9 +56,46 @@ class PersonBasis(ZeitstempelModel, AktivModel):
         help_text='Ende der Tätigkeit (falls beendet)'
     )
 
+    # Schlüssel für die Dublettensuche (siehe dubletten.py), werden beim Speichern gesetzt
+    nachname_phonetik = models.CharField(
+        max_length=100,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name='Nachname (Kölner Phonetik)'
+    )
+    vorname_phonetik = models.CharField(
+        max_length=100,
+        blank=True,
+        editable=False,
+        verbose_name='Vorname (Kölner Phonetik)'
+    )
+    email_normalisiert = models.CharField(
+        max_length=254,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name='E-Mail (normalisiert)'
+    )
+
+    DUBLETTEN_SCHLUESSEL = ('nachname_phonetik', 'vorname_phonetik', 'email_normalisiert')
+
     class Meta:
         abstract = True
 
+    def save(self, *args, **kwargs):
+        self.dubletten_schluessel_setzen()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'vorname', 'nachname', 'email'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, *self.DUBLETTEN_SCHLUESSEL}
+        super().save(*args, **kwargs)
+
+    def dubletten_schluessel_setzen(self):
+        """Berechnet die Schlüssel für die Dublettensuche (auch vor bulk_create aufrufen)."""
+        self.nachname_phonetik = koelner_phonetik(self.nachname)
+        self.vorname_phonetik = koelner_phonetik(self.vorname)
+        self.email_normalisiert = email_normalisieren(self.email)
+
     def get_voller_name(self):
         """Gibt den vollständigen Namen inkl. Titel zurück."""
         teile = [self.titel, self.vorname, self.nachname]
@@ -120,20 +161,8 @@ class Notar(PersonBasis):
 
     @classmethod
     def generate_next_id(cls):
-        """Generiert die nächste Notar-ID im Format: NOT-000001"""
-        import re
-
-        last = cls.objects.filter(
-            notar_id__startswith='NOT-'
-        ).order_by('-notar_id').first()
-
-        if last:
-            match = re.search(r'-(\d+)$', last.notar_id)
-            nummer = int(match.group(1)) + 1 if match else 1
-        else:
-            nummer = 1
-
-        return f"NOT-{nummer:06d}"
+        """Reserviert die nächste Notar-ID im Format: NOT-000001"""
+        return naechste_id('NOT')
 
 
 class NotarAnwaerter(PersonBasis):
@@ -200,17 +229,120 @@ class NotarAnwaerter(PersonBasis):
 
     @classmethod
     def generate_next_id(cls):
-        """Generiert die nächste Kandidaten-ID im Format: NKA-000001"""
-        import re
+        """Reserviert die nächste Kandidaten-ID im Format: NKA-000001"""
+        return naechste_id('NKA')
 
-        last = cls.objects.filter(
-            anwaerter_id__startswith='NKA-'
-        ).order_by('-anwaerter_id').first()
 
-        if last:
-            match = re.search(r'-(\d+)$', last.anwaerter_id)
-            nummer = int(match.group(1)) + 1 if match else 1
-        else:
-            nummer = 1
+class Besetzungszeitraum(models.Model):
+    """
+    Zeitraum, in dem ein Notar eine Notarstelle innehatte.
+
+    Abgeleitet aus Notar.notarstelle, beginn_datum und ende_datum und bei
+    jeder Änderung eines Notars neu geschrieben (siehe besetzungen.py).
+    Indiziert für Stichtags- und Zeitraumabfragen pro Notarstelle.
+    """
+    notar = models.OneToOneField(
+        Notar,
+        on_delete=models.CASCADE,
+        related_name='besetzungszeitraum',
+        verbose_name='Notar'
+    )
+    notarstelle = models.ForeignKey(
+        Notarstelle,
+        on_delete=models.CASCADE,
+        related_name='besetzungszeitraeume',
+        verbose_name='Notarstelle'
+    )
+    von = models.DateField(verbose_name='Von')
+    bis = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='Bis',
+        help_text='Letzter Tag (einschließlich); leer = andauernd'
+    )
+
+    class Meta:
+        verbose_name = 'Besetzungszeitraum'
+        verbose_name_plural = 'Besetzungszeiträume'
+        ordering = ['notarstelle', 'von']
+        indexes = [
+            models.Index(fields=['notarstelle', 'von', 'bis']),
+            models.Index(fields=['von', 'bis']),
+        ]
+
+    def __str__(self):
+        bis = self.bis.strftime('%d.%m.%Y') if self.bis else 'heute'
+        return f"{self.notarstelle_id}: {self.notar.get_voller_name()} {self.von.strftime('%d.%m.%Y')} – {bis}"
+
+
+class CVExtraktion(ZeitstempelModel):
+    """
+    Auftrag zur Datenextraktion aus einem Lebenslauf-PDF.
+
+    Pro Inhalt (SHA-256 der PDF-Bytes) und Extraktor gibt es genau einen
+    Auftrag; ein erneuter Upload derselben Datei liefert das gespeicherte
+    Ergebnis. Das PDF selbst wird nicht gespeichert.
+    """
+
+    STATUS_CHOICES = [
+        ('wartend', 'Wartend'),
+        ('laeuft', 'Läuft'),
+        ('fertig', 'Fertig'),
+        ('fehler', 'Fehler'),
+    ]
+
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    sha256 = models.CharField(
+        max_length=64,
+        verbose_name='SHA-256',
+        help_text='Prüfsumme der PDF-Datei'
+    )
+    extraktor = models.CharField(
+        max_length=100,
+        verbose_name='Extraktor',
+        help_text='z.B. "openrouter" oder "textlayer"'
+    )
+    dateiname = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Dateiname'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='wartend',
+        verbose_name='Status'
+    )
+    daten = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='Extrahierte Daten'
+    )
+    fehler = models.TextField(
+        blank=True,
+        verbose_name='Fehlermeldung'
+    )
+    dauer_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Dauer (ms)'
+    )
+
+    class Meta:
+        verbose_name = 'CV-Extraktion'
+        verbose_name_plural = 'CV-Extraktionen'
+        ordering = ['-erstellt_am']
+        constraints = [
+            models.UniqueConstraint(fields=['sha256', 'extraktor'], name='cv_extraktion_inhalt_eindeutig'),
+        ]
+
+    def __str__(self):
+        return f"{self.dateiname or self.sha256[:12]} ({self.get_status_display()})"
 
-        return f"NKA-{nummer:06d}"
+    @property
+    def ist_abgeschlossen(self):
+        return self.status in ('fertig', 'fehler')
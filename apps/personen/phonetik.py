@@ -0,0 +1,79 @@
+"""
+Schlüssel für die Dublettensuche bei Personen.
+
+- Kölner Phonetik: Laut-Code für deutsche Namen. "Müller", "Mueller" und
+  "Möller" ergeben 657, "Schmidt", "Schmitt" und "Schmid" ergeben 862.
+- Normalisierte E-Mail: klein geschrieben, ohne "+Zusatz" im Lokalteil.
+
+Die Schlüssel werden beim Speichern einer Person gesetzt (PersonBasis.save)
+und sind indiziert; siehe dubletten.py für die Suche.
+"""
+from .autocomplete import normalisieren
+
+VOKALE = set('aeijouy')
+
+
+def _code(buchstabe, vorher, nachher, am_anfang):
+    """Code eines Buchstabens nach den Regeln der Kölner Phonetik."""
+    if buchstabe in VOKALE:
+        return '0'
+    if buchstabe == 'h':
+        return ''
+    if buchstabe == 'b':
+        return '1'
+    if buchstabe == 'p':
+        return '3' if nachher == 'h' else '1'
+    if buchstabe in 'dt':
+        return '8' if nachher in ('c', 's', 'z') else '2'
+    if buchstabe in 'fvw':
+        return '3'
+    if buchstabe in 'gkq':
+        return '4'
+    if buchstabe == 'c':
+        if am_anfang:
+            return '4' if nachher in ('a', 'h', 'k', 'l', 'o', 'q', 'r', 'u', 'x') else '8'
+        if vorher in ('s', 'z'):
+            return '8'
+        return '4' if nachher in ('a', 'h', 'k', 'o', 'q', 'u', 'x') else '8'
+    if buchstabe == 'x':
+        return '8' if vorher in ('c', 'k', 'q') else '48'
+    if buchstabe == 'l':
+        return '5'
+    if buchstabe in 'mn':
+        return '6'
+    if buchstabe == 'r':
+        return '7'
+    if buchstabe in 'sz':
+        return '8'
+    return ''
+
+
+def koelner_phonetik(text):
+    """
+    Kölner Phonetik eines Namens, z.B. koelner_phonetik('Müller') -> '657'.
+
+    Umlaute und Akzente werden vorher gefaltet, Nicht-Buchstaben ignoriert;
+    mehrteilige Namen ergeben einen durchgehenden Code.
+    """
+    buchstaben = [zeichen for zeichen in normalisieren(text) if 'a' <= zeichen <= 'z']
+    roh = []
+    for i, buchstabe in enumerate(buchstaben):
+        vorher = buchstaben[i - 1] if i else ''
+        nachher = buchstaben[i + 1] if i + 1 < len(buchstaben) else ''
+        roh.append(_code(buchstabe, vorher, nachher, am_anfang=(i == 0)))
+
+    # Mehrfache Codes zusammenfassen, dann "0" außer am Anfang entfernen
+    code = ''
+    for ziffer in ''.join(roh):
+        if not code or code[-1] != ziffer:
+            code += ziffer
+    return code[:1] + code[1:].replace('0', '')
+
+
+def email_normalisieren(email):
+    """Vergleichbare Form einer E-Mail, z.B. ' Max.Muster+kammer@Example.at ' -> 'max.muster@example.at'."""
+    email = (email or '').strip().lower()
+    lokal, trenner, domain = email.rpartition('@')
+    if not trenner:
+        return email
+    return f"{lokal.split('+', 1)[0]}@{domain}"
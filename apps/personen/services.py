@@ -2,11 +2,147 @@
 Service-Layer für Personen-App.
 Enthält Business-Logik für Notare und Notariatskandidat.
 """
+from functools import partial
+
 from django.db import transaction
 from django.utils import timezone
+from apps.kern import ids
+from . import autocomplete, besetzungen
 from .models import Notar, NotarAnwaerter
 
 
+class BefoerderungsErgebnis:
+    """Ergebnis einer einzelnen Beförderung innerhalb eines Batches."""
+
+    def __init__(self, anwaerter, notarstelle, bestellt_am):
+        self.anwaerter = anwaerter
+        self.notarstelle = notarstelle
+        self.bestellt_am = bestellt_am
+        self.notar = None
+        self.fehler = None
+
+    @property
+    def erfolg(self):
+        return self.notar is not None
+
+    def als_dict(self):
+        """JSON-taugliche Darstellung (z.B. für ServiceAusfuehrung.ergebnis_daten)."""
+        return {
+            'anwaerter_nummer': self.anwaerter.anwaerter_id,
+            'name': self.anwaerter.get_voller_name(),
+            'notarstelle': self.notarstelle.bezeichnung,
+            'bestellt_am': self.bestellt_am.strftime('%d.%m.%Y'),
+            'notar_nummer': self.notar.notar_id if self.notar else None,
+            'erfolg': self.erfolg,
+            'fehler': self.fehler,
+        }
+
+
+@transaction.atomic
+def anwaerter_zu_notar_befoerdern_batch(befoerderungen, erstellt_von=None):
+    """
+    Befördert mehrere Notariatskandidaten in einer Transaktion zum Notar.
+
+    Alle Einträge werden vorab gegen den aktuellen Datenbankstand geprüft
+    (Kandidaten werden dafür gesperrt). Ungültige Einträge werden mit
+    Fehlermeldung zurückgegeben, die gültigen gemeinsam geschrieben: ein
+    Block Notar-IDs, ein bulk_create für die Notare, ein bulk_update für
+    die Kandidaten.
+
+    Args:
+        befoerderungen: Iterable von (anwaerter, notarstelle, bestellt_am)-Tripeln;
+            bestellt_am darf None sein (= heute)
+        erstellt_von: KammerBenutzer der die Bestellung durchführt (optional)
+
+    Returns:
+        list[BefoerderungsErgebnis]: Ein Ergebnis pro Eintrag, in Eingabereihenfolge
+    """
+    heute = timezone.now().date()
+    ergebnisse = [
+        BefoerderungsErgebnis(anwaerter, notarstelle, bestellt_am or heute)
+        for anwaerter, notarstelle, bestellt_am in befoerderungen
+    ]
+    if not ergebnisse:
+        return ergebnisse
+
+    aktuell = NotarAnwaerter.objects.select_for_update().only(
+        'ist_aktiv', 'ende_datum', 'notiz'
+    ).in_bulk([e.anwaerter.pk for e in ergebnisse])
+    vergebene_emails = set(Notar.objects.filter(
+        email__in=[e.anwaerter.email for e in ergebnisse]
+    ).values_list('email', flat=True))
+
+    gueltig, gesehen = [], set()
+    for ergebnis in ergebnisse:
+        anwaerter = ergebnis.anwaerter
+        gespeichert = aktuell.get(anwaerter.pk)
+        if gespeichert is None:
+            ergebnis.fehler = f"Kandidat {anwaerter.anwaerter_id} existiert nicht mehr."
+        elif anwaerter.pk in gesehen:
+            ergebnis.fehler = f"Kandidat {anwaerter.get_voller_name()} ist mehrfach in der Liste."
+        elif not gespeichert.ist_aktiv:
+            ergebnis.fehler = (
+                f"Kandidat {anwaerter.get_voller_name()} ist bereits inaktiv und kann nicht befördert werden."
+            )
+        elif anwaerter.email in vergebene_emails:
+            ergebnis.fehler = f"Es gibt bereits einen Notar mit der E-Mail {anwaerter.email}."
+        elif not ergebnis.notarstelle.ist_aktiv:
+            ergebnis.fehler = f"Notarstelle {ergebnis.notarstelle.bezeichnung} ist nicht aktiv."
+        else:
+            # Notiz und Status vom gesperrten Stand übernehmen
+            anwaerter.ist_aktiv = gespeichert.ist_aktiv
+            anwaerter.ende_datum = gespeichert.ende_datum
+            anwaerter.notiz = gespeichert.notiz
+            gueltig.append(ergebnis)
+        gesehen.add(anwaerter.pk)
+
+    if not gueltig:
+        return ergebnisse
+
+    jetzt = timezone.now()
+    notar_ids = ids.ids_reservieren('NOT', len(gueltig))
+    for ergebnis, notar_id in zip(gueltig, notar_ids):
+        anwaerter, bestellt_am = ergebnis.anwaerter, ergebnis.bestellt_am
+        ergebnis.notar = Notar(
+            notar_id=notar_id,
+            vorname=anwaerter.vorname,
+            nachname=anwaerter.nachname,
+            titel=anwaerter.titel or '',
+            email=anwaerter.email,
+            telefon=anwaerter.telefon,
+            notarstelle=ergebnis.notarstelle,
+            bestellt_am=bestellt_am,
+            beginn_datum=bestellt_am,  # Beginn als Notar = Bestellungsdatum
+            war_vorher_anwaerter=True,
+            notiz=f"Befördert von Notariatskandidat {anwaerter.anwaerter_id} am {bestellt_am.strftime('%d.%m.%Y')}",
+            ist_aktiv=True,
+        )
+        ergebnis.notar.dubletten_schluessel_setzen()
+
+        # Kandidat als inaktiv markieren (NICHT löschen!)
+        neue_notiz = (
+            f"Zum Notar bestellt am {bestellt_am.strftime('%d.%m.%Y')} "
+            f"(Notar-ID: {notar_id}, Notarstelle: {ergebnis.notarstelle.bezeichnung})"
+        )
+        anwaerter.notiz = f"{anwaerter.notiz or ''}\n\n{neue_notiz}".strip()
+        anwaerter.ist_aktiv = False
+        anwaerter.ende_datum = bestellt_am
+        anwaerter.aktualisiert_am = jetzt
+
+    Notar.objects.bulk_create([e.notar for e in gueltig])
+    NotarAnwaerter.objects.bulk_update(
+        [e.anwaerter for e in gueltig], ['ist_aktiv', 'ende_datum', 'notiz', 'aktualisiert_am']
+    )
+
+    # Bulk-Operationen lösen keine post_save-Signale aus
+    besetzungen.aktualisieren([e.notar for e in gueltig])
+    for ergebnis in gueltig:
+        transaction.on_commit(partial(autocomplete.index.notar_aktualisieren, ergebnis.notar))
+        transaction.on_commit(partial(autocomplete.index.kandidat_aktualisieren, ergebnis.anwaerter))
+
+    return ergebnisse
+
+
 @transaction.atomic
 def anwaerter_zu_notar_befoerdern(anwaerter, notarstelle, bestellt_am=None, erstellt_von=None):
     """
@@ -17,6 +153,8 @@ def anwaerter_zu_notar_befoerdern(anwaerter, notarstelle, bestellt_am=None, erst
     2. Markiert den Kandidat als inaktiv (wird NICHT gelöscht für Historie!)
     3. Verknüpft Notar mit Kandidat für Nachverfolgbarkeit
 
+    Für mehrere Kandidaten siehe anwaerter_zu_notar_befoerdern_batch.
+
     Args:
         anwaerter: NotarAnwaerter-Instanz die befördert werden soll
         notarstelle: Notarstelle zu der der Notar bestellt wird
@@ -27,53 +165,14 @@ def anwaerter_zu_notar_befoerdern(anwaerter, notarstelle, bestellt_am=None, erst
         Notar: Die neu erstellte Notar-Instanz
 
     Raises:
-        ValueError: Wenn der Kandidat nicht aktiv ist
+        ValueError: Wenn der Kandidat nicht befördert werden kann (z.B. bereits inaktiv)
     """
-    if not anwaerter.ist_aktiv:
-        raise ValueError(
-            f"Kandidat {anwaerter.get_full_name()} ist bereits inaktiv und kann nicht befördert werden."
-        )
-
-    # Standardwert für bestellt_am
-    if bestellt_am is None:
-        bestellt_am = timezone.now().date()
-
-    # Neuen Notar erstellen mit allen Daten des Anwärters
-    notar = Notar.objects.create(
-        # Basisdaten von PersonBasis
-        vorname=anwaerter.vorname,
-        nachname=anwaerter.nachname,
-        titel=anwaerter.titel or '',
-        email=anwaerter.email,
-        telefon=anwaerter.telefon,
-
-        # Notar-spezifische Felder
-        notarstelle=notarstelle,
-        bestellt_am=bestellt_am,
-        beginn_datum=bestellt_am,  # Beginn als Notar = Bestellungsdatum
-
-        # Markierung dass er vorher Kandidat war
-        war_vorher_anwaerter=True,
-
-        # Notiz mit Referenz zum Kandidat
-        notiz=f"Befördert von Notariatskandidat {anwaerter.anwaerter_id} am {bestellt_am.strftime('%d.%m.%Y')}",
-
-        # Status
-        ist_aktiv=True
-    )
-
-    # Kandidat als inaktiv markieren (NICHT löschen!)
-    anwaerter.ist_aktiv = False
-    anwaerter.ende_datum = bestellt_am
-
-    # Notiz hinzufügen
-    alte_notiz = anwaerter.notiz or ''
-    neue_notiz = f"Zum Notar bestellt am {bestellt_am.strftime('%d.%m.%Y')} (Notar-ID: {notar.notar_id}, Notarstelle: {notarstelle.bezeichnung})"
-    anwaerter.notiz = f"{alte_notiz}\n\n{neue_notiz}".strip()
-
-    anwaerter.save()
-
-    return notar
+    ergebnis = anwaerter_zu_notar_befoerdern_batch(
+        [(anwaerter, notarstelle, bestellt_am)], erstellt_von=erstellt_von
+    )[0]
+    if not ergebnis.erfolg:
+        raise ValueError(ergebnis.fehler)
+    return ergebnis.notar
 
 
 def anwaerter_wartezeit_berechnen(anwaerter):
@@ -0,0 +1,53 @@
+"""
+Signal-Handler für die Personen-Verwaltung.
+
+Hält den Autocomplete-Index (siehe autocomplete.py) bei Änderungen an
+Notaren, Notariatskandidaten und Notarstellen aktuell. Übernommen wird erst
+nach dem Commit, damit zurückgerollte Änderungen nicht im Index landen.
+
+Außerdem wird der Besetzungsindex (siehe besetzungen.py) beim Speichern
+eines Notars in derselben Transaktion nachgeführt.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.notarstellen.models import Notarstelle
+from . import besetzungen
+from .autocomplete import index
+from .models import Notar, NotarAnwaerter
+
+
+@receiver(post_save, sender=Notar)
+def notar_indizieren(sender, instance, **kwargs):
+    """Übernimmt einen gespeicherten Notar in den Autocomplete-Index."""
+    transaction.on_commit(partial(index.notar_aktualisieren, instance))
+
+
+@receiver(post_save, sender=Notar)
+def besetzung_aktualisieren(sender, instance, raw=False, **kwargs):
+    """Schreibt den Besetzungszeitraum eines gespeicherten Notars neu."""
+    if not raw:
+        besetzungen.aktualisieren([instance])
+
+
+@receiver(post_save, sender=NotarAnwaerter)
+def kandidat_indizieren(sender, instance, **kwargs):
+    """Übernimmt einen gespeicherten Kandidaten in den Autocomplete-Index."""
+    transaction.on_commit(partial(index.kandidat_aktualisieren, instance))
+
+
+@receiver(post_delete, sender=Notar)
+@receiver(post_delete, sender=NotarAnwaerter)
+def person_aus_index_entfernen(sender, instance, **kwargs):
+    """Entfernt eine gelöschte Person aus dem Autocomplete-Index."""
+    typ = 'notar' if sender is Notar else 'kandidat'
+    transaction.on_commit(partial(index.person_entfernen, typ, instance.pk))
+
+
+@receiver(post_save, sender=Notarstelle)
+def notarstelle_indizieren(sender, instance, **kwargs):
+    """Aktualisiert den Zusatz (Notarstelle) der Notare im Autocomplete-Index."""
+    transaction.on_commit(partial(index.notarstelle_aktualisieren, instance))
@@ -1,3 +1,852 @@
-from django.test import TestCase
+"""
+Tests für die Personen-Verwaltung.
+"""
+from datetime import date
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.kern.testhilfen import SeitenTestMixin, notarstelle_anlegen
+from apps.notarstellen.models import Notarstelle
+from apps.personen import autocomplete
+from apps.personen.models import Notar, NotarAnwaerter
+
+KammerBenutzer = get_user_model()
+
+
+class PersonenAutocompleteTest(TestCase):
+    """Tests für den Autocomplete-Index und personen_autocomplete_api."""
+
+    def setUp(self):
+        autocomplete.index.verwerfen()
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.benutzer)
+        self.stelle = Notarstelle.objects.create(
+            bezeichnung='NST-000001', name='Notariat Wien 1',
+            strasse='Stephansplatz 3', plz='1010', stadt='Wien'
+        )
+        self.notar = Notar.objects.create(
+            notar_id='NOT-000001', titel='Dr.', vorname='Jürgen', nachname='Müller',
+            email='mueller@example.com', notarstelle=self.stelle,
+            bestellt_am=date(2015, 3, 15), beginn_datum=date(2015, 3, 15)
+        )
+        self.kandidat = NotarAnwaerter.objects.create(
+            anwaerter_id='NKA-000001', vorname='Anna', nachname='Schmidt',
+            email='schmidt@example.com', notarstelle=self.stelle,
+            betreuender_notar=self.notar, zugelassen_am=date(2022, 9, 1),
+            beginn_datum=date(2022, 9, 1)
+        )
+        Notar.objects.create(
+            notar_id='NOT-000002', vorname='Max', nachname='Inaktiv',
+            email='inaktiv@example.com', notarstelle=self.stelle, ist_aktiv=False,
+            bestellt_am=date(2010, 1, 1), beginn_datum=date(2010, 1, 1)
+        )
+
+    def _api(self, q, **params):
+        response = self.client.get(reverse('personen_autocomplete_api'), {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_umlaute_und_zusatz(self):
+        """Umlaute werden gefaltet, der Zusatz kommt aus dem Index."""
+        self.assertEqual(self._api('muell'), [{
+            'id': 'NOT-000001', 'name': 'Dr. Jürgen Müller', 'typ': 'notar',
+            'zusatz': 'Notariat Wien 1'
+        }])
+        self.assertEqual(self._api('Mül')[0]['id'], 'NOT-000001')
+        self.assertEqual(self._api('schmidt')[0]['zusatz'], 'bei Dr. Jürgen Müller')
+
+    def test_mehrere_woerter_ids_und_typfilter(self):
+        """Alle Wörter müssen passen; IDs sind suchbar; inaktive fehlen."""
+        self.assertEqual([p['id'] for p in self._api('anna schm')], ['NKA-000001'])
+        self.assertEqual(self._api('anna müller'), [])
+        self.assertEqual([p['id'] for p in self._api('nka-0000')], ['NKA-000001'])
+        self.assertEqual(self._api('inaktiv'), [])
+        self.assertEqual(self._api('000001', typ='notar')[0]['typ'], 'notar')
+        self.assertEqual(len(self._api('000001', typ='notar')), 1)
+
+    def test_antwort_ohne_queries(self):
+        """Nach dem Aufbau beantwortet der Index Anfragen ohne Datenbank-Queries."""
+        self._api('muell')
+        with self.assertNumQueries(2):  # nur Session und Benutzer
+            self._api('schmidt')
+
+    def test_signale_halten_index_aktuell(self):
+        """Änderungen an Personen und Notarstellen landen nach dem Commit im Index."""
+        self._api('muell')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notar.nachname = 'Meier'
+            self.notar.save()
+            self.stelle.name = 'Notariat Wien Mitte'
+            self.stelle.save()
+        self.assertEqual(self._api('muell'), [])
+        self.assertEqual(self._api('meier')[0]['zusatz'], 'Notariat Wien Mitte')
+        self.assertEqual(self._api('schmidt')[0]['zusatz'], 'bei Dr. Jürgen Meier')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kandidat.delete()
+        self.assertEqual(self._api('schmidt'), [])
+
+    @override_settings(PERSONEN_AUTOCOMPLETE_INDEX=False)
+    def test_datenbank_fallback(self):
+        """Ohne Index wird direkt in der Datenbank gesucht."""
+        self.assertEqual(self._api('Schmidt')[0]['zusatz'], 'bei Dr. Jürgen Müller')
+
+
+class PersonenListenTest(SeitenTestMixin, TestCase):
+    """Tests für Seitennavigation, Sortierung und Statistiken der Personenlisten."""
+
+    def setUp(self):
+        super().setUp()
+        self.stelle = notarstelle_anlegen()
+
+    def _notare_anlegen(self, anzahl, start=0):
+        Notar.objects.bulk_create([
+            Notar(
+                notar_id=f'NOT-{i:06d}', vorname='Vorname', nachname=f'Nachname {i:03d}',
+                email=f'notar{i}@example.com', notarstelle=self.stelle,
+                ist_aktiv=i % 3 != 0,
+                bestellt_am=date(2000 + i % 20, 1, 1), beginn_datum=date(2000, 1, 1)
+            )
+            for i in range(start, start + anzahl)
+        ])
+
+    def test_seiten_und_groesse(self):
+        """Die Liste wird seitenweise ausgeliefert, ?pro_seite ist begrenzt."""
+        self._notare_anlegen(30)
+        response = self.client.get(reverse('notare_liste'))
+        self.assertEqual(len(response.context['notare']), 25)
+        self.assertEqual(response.context['seite'].paginator.count, 30)
+        self.assertContains(response, 'Seite 1 von 2')
+
+        response = self.client.get(reverse('notare_liste'), {'seite': 2})
+        self.assertEqual(len(response.context['notare']), 5)
+
+        response = self.client.get(reverse('notare_liste'), {'pro_seite': 10, 'seite': 99})
+        self.assertEqual(response.context['seite'].number, 3)
+        response = self.client.get(reverse('notare_liste'), {'pro_seite': 5000})
+        self.assertEqual(response.context['pro_seite'], 100)
+
+    def test_sortierung(self):
+        """?sortierung wählt eine erlaubte Sortierung, Unbekanntes fällt auf Name zurück."""
+        self._notare_anlegen(5)
+        response = self.client.get(reverse('notare_liste'), {'sortierung': '-name'})
+        self.assertEqual(response.context['notare'][0].nachname, 'Nachname 004')
+        response = self.client.get(reverse('notare_liste'), {'sortierung': 'email; DROP'})
+        self.assertEqual(response.context['sortierung'], 'name')
+        self.assertEqual(response.context['notare'][0].nachname, 'Nachname 000')
+
+    def test_statistiken(self):
+        """Die Kennzahlen stimmen mit den Filtern überein."""
+        self._notare_anlegen(9)
+        NotarAnwaerter.objects.create(
+            anwaerter_id='NKA-000001', vorname='Anna', nachname='Schmidt',
+            email='schmidt@example.com', notarstelle=self.stelle,
+            betreuender_notar=Notar.objects.first(), zugelassen_am=date(2022, 9, 1),
+            beginn_datum=date(2022, 9, 1)
+        )
+        NotarAnwaerter.objects.create(
+            anwaerter_id='NKA-000002', vorname='Ben', nachname='Berger',
+            email='berger@example.com', notarstelle=self.stelle, ist_aktiv=False,
+            betreuender_notar=Notar.objects.first(), zugelassen_am=date(2021, 9, 1), beginn_datum=date(2021, 9, 1)
+        )
+        stats = self.client.get(reverse('notare_liste')).context['stats']
+        self.assertEqual(stats, {'total': 9, 'aktiv': 6, 'inaktiv': 3})
+        stats = self.client.get(reverse('anwaerter_liste')).context['stats']
+        self.assertEqual(stats, {'total': 2, 'aktiv': 1, 'mit_betreuung': 2})
+
+    def test_query_anzahl_unabhaengig_von_datenmenge(self):
+        """Die Anzahl der Queries wächst nicht mit der Anzahl der Personen."""
+        queries = self.assertQueryAnzahlKonstant(
+            self._notare_anlegen, [lambda: self.client.get(reverse('notare_liste'))], anzahl=5, weitere=200
+        )
+        self.assertEqual(queries, [6])
+
+
+class ImportNotareTest(TestCase):
+    """Tests für den Bulk-Import (import_notare / apps.personen.importer)."""
+
+    NOTARSTELLEN = (
+        'bezeichnung,name,strasse,plz,stadt,bundesland,telefon,email,ist_aktiv\n'
+        'NST-000001,Notariat Wien 1,Stephansplatz 3,1010,Wien,Wien,,wien1@example.com,True\n'
+    )
+    NOTARE_KOPF = (
+        'notar_id,vorname,nachname,titel,email,telefon,notarstelle,'
+        'bestellt_am,beginn_datum,ende_datum,war_vorher_anwaerter,ist_aktiv\n'
+    )
+    ANWAERTER = (
+        'anwaerter_id,vorname,nachname,titel,email,telefon,notarstelle,betreuender_notar,'
+        'zugelassen_am,beginn_datum,geplante_bestellung,ist_aktiv\n'
+        'NKA-000001,Anna,Schmidt,Mag.,schmidt@example.com,,NST-000001,NOT-000001,'
+        '2022-09-01,2022-09-01,,True\n'
+    )
+
+    def _datei(self, inhalt):
+        import os
+        import tempfile
+
+        datei = tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', delete=False)
+        datei.write(inhalt)
+        datei.close()
+        self.addCleanup(os.unlink, datei.name)
+        return datei.name
+
+    def _notare(self, anzahl, nachname='Muster', notarstelle='NST-000001'):
+        zeilen = [
+            f'NOT-{i:06d},Max,{nachname},Dr.,notar{i}@example.com,,{notarstelle},'
+            f'2015-03-15,2015-03-15,,False,True\n'
+            for i in range(1, anzahl + 1)
+        ]
+        return self._datei(self.NOTARE_KOPF + ''.join(zeilen))
+
+    def _import(self, **optionen):
+        from io import StringIO
+        from django.core.management import call_command
+
+        ausgabe = StringIO()
+        call_command('import_notare', stdout=ausgabe, **optionen)
+        return ausgabe.getvalue()
+
+    def test_import_und_wiederholung(self):
+        """Der erste Lauf legt an, ein identischer zweiter Lauf schreibt nichts."""
+        dateien = {
+            'notarstellen': self._datei(self.NOTARSTELLEN),
+            'notare': self._notare(3),
+            'anwaerter': self._datei(self.ANWAERTER),
+        }
+        ausgabe = self._import(**dateien)
+        self.assertIn('Notare: 3 neu, 0 geändert, 0 unverändert, 0 übersprungen', ausgabe)
+        self.assertEqual(NotarAnwaerter.objects.get().betreuender_notar.notar_id, 'NOT-000001')
+        self.assertEqual(Notar.generate_next_id(), 'NOT-000004')
+
+        ausgabe = self._import(**dateien)
+        self.assertIn('Notare: 0 neu, 0 geändert, 3 unverändert', ausgabe)
+        self.assertIn('Notariatskandidat: 0 neu, 0 geändert, 1 unverändert', ausgabe)
+
+    def test_dry_run_zeigt_aenderungen(self):
+        """Der Dry Run vergleicht nur; Objekte aus demselben Lauf gelten als bekannt."""
+        dateien = {
+            'notarstellen': self._datei(self.NOTARSTELLEN),
+            'notare': self._notare(2),
+            'anwaerter': self._datei(self.ANWAERTER),
+        }
+        ausgabe = self._import(dry_run=True, **dateien)
+        self.assertIn('DRY RUN Notariatskandidat: 1 neu', ausgabe)
+        self.assertFalse(Notarstelle.objects.exists())
+
+        self._import(**dateien)
+        ausgabe = self._import(dry_run=True, notare=self._notare(2, nachname='Neu'))
+        self.assertIn('DRY RUN Notare: 0 neu, 2 geändert', ausgabe)
+        self.assertIn('Geänderte Felder: nachname (2)', ausgabe)
+        self.assertFalse(Notar.objects.filter(nachname='Neu').exists())
+
+        self._import(notare=self._notare(2, nachname='Neu'))
+        self.assertEqual(Notar.objects.filter(nachname='Neu').count(), 2)
+
+    def test_ungueltige_zeilen_werden_uebersprungen(self):
+        """Unbekannte Notarstellen und fehlende Pflichtdaten überspringen nur die Zeile."""
+        self._import(notarstellen=self._datei(self.NOTARSTELLEN))
+        datei = self._datei(
+            self.NOTARE_KOPF
+            + 'NOT-000001,Max,Muster,,a@example.com,,NST-999999,2015-03-15,2015-03-15,,False,True\n'
+            + 'NOT-000002,Max,Muster,,b@example.com,,NST-000001,,2015-03-15,,False,True\n'
+            + 'NOT-000003,Max,Muster,,c@example.com,,NST-000001,2015-03-15,2015-03-15,,False,True\n'
+        )
+        ausgabe = self._import(notare=datei)
+        self.assertIn('Zeile 2: Notarstelle NST-999999 nicht gefunden', ausgabe)
+        self.assertIn('Zeile 3: bestellt_am fehlt', ausgabe)
+        self.assertEqual(list(Notar.objects.values_list('notar_id', flat=True)), ['NOT-000003'])
+
+    def test_query_anzahl_unabhaengig_von_zeilen(self):
+        """Fremdschlüssel kommen aus einer Map; pro Block fällt eine feste Anzahl Queries an."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._import(notarstellen=self._datei(self.NOTARSTELLEN), notare=self._notare(1))
+        Notar.objects.all().delete()
+        with CaptureQueriesContext(connection) as wenige:
+            self._import(notare=self._notare(5))
+        Notar.objects.all().delete()
+        with CaptureQueriesContext(connection) as viele:
+            self._import(notare=self._notare(50))
+        self.assertEqual(len(wenige.captured_queries), len(viele.captured_queries))
+
+    def _excel(self, kopf, zeilen, blatt='Notare'):
+        import os
+        import tempfile
+        from openpyxl import Workbook
+
+        mappe = Workbook()
+        tabelle = mappe.active
+        tabelle.title = blatt
+        tabelle.append(kopf)
+        for zeile in zeilen:
+            tabelle.append(zeile)
+        fd, pfad = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        mappe.save(pfad)
+        self.addCleanup(os.unlink, pfad)
+        return pfad
+
+    def test_excel_mit_spaltenzuordnung(self):
+        """Excel-Zellen (Datum, Zahl, bool) und umbenannte Spalten laufen durch denselben Import."""
+        from datetime import datetime
+
+        self._import(notarstellen=self._datei(self.NOTARSTELLEN))
+        pfad = self._excel(
+            ['Notar-Nr.', 'Vorname', 'Nachname', 'E-Mail', 'Telefon', 'Notarstelle',
+             'Bestellung', 'Beginn', 'Aktiv'],
+            [
+                ['NOT-000001', 'Max', 'Muster', 'max@example.com', 4315123456, 'NST-000001',
+                 datetime(2015, 3, 15), '15.03.2015', True],
+                [None, None, None, None, None, None, None, None, None],
+                ['NOT-000002', 'Eva', 'Beispiel', 'eva@example.com', None, 'NST-000001',
+                 datetime(2016, 1, 4), datetime(2016, 1, 4), 'Nein'],
+            ],
+        )
+        spalten = [
+            'Notar-Nr.=notar_id', 'Vorname=vorname', 'Nachname=nachname', 'E-Mail=email',
+            'Telefon=telefon', 'Notarstelle=notarstelle', 'Bestellung=bestellt_am',
+            'Beginn=beginn_datum', 'Aktiv=ist_aktiv',
+        ]
+        ausgabe = self._import(notare=pfad, spalte=spalten, blatt='Notare')
+        self.assertIn('Notare: 2 neu, 0 geändert, 0 unverändert, 0 übersprungen', ausgabe)
+
+        max_ = Notar.objects.get(notar_id='NOT-000001')
+        self.assertEqual((max_.telefon, max_.beginn_datum), ('4315123456', date(2015, 3, 15)))
+        self.assertFalse(Notar.objects.get(notar_id='NOT-000002').ist_aktiv)
+
+        ausgabe = self._import(notare=pfad, spalte=spalten)
+        self.assertIn('Notare: 0 neu, 0 geändert, 2 unverändert', ausgabe)
+
+    def test_excel_unbekanntes_blatt(self):
+        """Ein fehlendes Blatt bricht mit einer verständlichen Meldung ab."""
+        from django.core.management.base import CommandError
+
+        pfad = self._excel(['notar_id'], [['NOT-000001']])
+        with self.assertRaisesMessage(CommandError, 'Blatt "Register" nicht gefunden'):
+            self._import(notare=pfad, blatt='Register')
+
+    def test_excel_beschaedigt(self):
+        """Beschädigte oder fremde .xlsx-Dateien ergeben einen QuellenFehler statt eines Tracebacks."""
+        import os
+        import tempfile
+        import zipfile
+        from django.core.management.base import CommandError
+        from apps.personen.importer import QuellenFehler, zeilen_lesen
+
+        fd, kaputt = tempfile.mkstemp(suffix='.xlsx')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'kein Excel')
+        self.addCleanup(os.unlink, kaputt)
+        fd, fremd = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        with zipfile.ZipFile(fremd, 'w') as archiv:
+            archiv.writestr('notiz.txt', 'kein Excel')
+        self.addCleanup(os.unlink, fremd)
+
+        for pfad in (kaputt, fremd):
+            with self.assertRaisesMessage(QuellenFehler, 'keine gültige Excel-Datei'):
+                list(zeilen_lesen(pfad))
+        with self.assertRaisesMessage(CommandError, 'keine gültige Excel-Datei'):
+            self._import(notare=kaputt)
+
+
+@override_settings(CV_EXTRAKTOR='textlayer', CV_EXTRAKTION_SYNCHRON=True)
+class CVExtraktionTest(TestCase):
+    """Tests für die Lebenslauf-Extraktion (apps.personen.cv_extraktion)."""
+
+    def setUp(self):
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.benutzer)
+
+    def _lebenslauf(self, name='Mag. Julia Schneider'):
+        from apps.kern import pdf
+
+        elemente = pdf.kopf(name)
+        elemente.append(pdf.schluessel_wert_tabelle([
+            ['E-Mail:', 'julia.schneider@notariat.at'],
+            ['Telefon:', '+43 664 1234567'],
+            ['Adresse:', 'Mariahilfer Straße 45, 1060 Wien'],
+        ]))
+        elemente.append(pdf.klein('Notariatskandidatin, Notariat Dr. Karl Müller (Wien), seit 01.10.2024'))
+        elemente.append(pdf.klein('Zulassung als Notariatskandidatin: 01.09.2024'))
+        return pdf.erstellen(elemente)
+
+    def _hochladen(self, inhalt, dateiname='lebenslauf.pdf'):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        datei = SimpleUploadedFile(dateiname, inhalt, content_type='application/pdf')
+        return self.client.post(reverse('ai_extract_cv_data'), {'pdf_file': datei})
+
+    def test_textlayer_extraktion(self):
+        """Der lokale Extraktor erkennt Name, Titel, Kontaktdaten und Datumsangaben."""
+        response = self._hochladen(self._lebenslauf())
+        self.assertEqual(response.status_code, 200)
+        ergebnis = response.json()
+        self.assertTrue(ergebnis['success'])
+        self.assertFalse(ergebnis['cached'])
+        self.assertEqual(ergebnis['data'], {
+            'titel': 'Mag.', 'vorname': 'Julia', 'nachname': 'Schneider',
+            'email': 'julia.schneider@notariat.at', 'telefon': '+43 664 1234567',
+            'zugelassen_am': '2024-09-01', 'beginn_datum': '2024-10-01',
+        })
+
+    def test_gleiche_datei_aus_cache(self):
+        """Dieselbe Datei wird nur einmal analysiert, der Status ist abrufbar."""
+        from apps.personen.models import CVExtraktion
+
+        inhalt = self._lebenslauf()
+        erste = self._hochladen(inhalt).json()
+        zweite = self._hochladen(inhalt, dateiname='kopie.pdf').json()
+        self.assertEqual(zweite['job_id'], erste['job_id'])
+        self.assertTrue(zweite['cached'])
+        self.assertEqual(CVExtraktion.objects.count(), 1)
+
+        status = self.client.get(erste['status_url']).json()
+        self.assertEqual(status['status'], 'fertig')
+        self.assertEqual(status['data']['nachname'], 'Schneider')
+
+    def test_hintergrund_auftrag(self):
+        """Ohne synchrone Ausführung liefert der Upload sofort 202 und die Job-ID."""
+        from unittest import mock
+
+        from apps.personen import cv_extraktion
+
+        with override_settings(CV_EXTRAKTION_SYNCHRON=False), \
+                mock.patch.object(cv_extraktion, '_executor_holen') as executor:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self._hochladen(self._lebenslauf())
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'wartend')
+        job_id = executor.return_value.submit.call_args.args[1]
+        self.assertEqual(str(job_id), response.json()['job_id'])
+
+        # Der Worker führt den Auftrag aus, danach liefert der Status das Ergebnis
+        cv_extraktion.ausfuehren(job_id, executor.return_value.submit.call_args.args[2])
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['data']['email'], 'julia.schneider@notariat.at')
+
+    def test_fehler_und_ungueltige_datei(self):
+        """PDFs ohne erkennbare Daten ergeben einen Fehler, andere Dateien werden abgelehnt."""
+        from apps.kern import pdf
+
+        ergebnis = self._hochladen(pdf.erstellen([pdf.klein('Protokoll der Sitzung')])).json()
+        self.assertEqual(ergebnis['status'], 'fehler')
+        self.assertIn('keine Lebenslaufdaten', ergebnis['message'])
+
+        response = self._hochladen(b'kein pdf', dateiname='notiz.txt')
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchBefoerderungTest(TestCase):
+    """Tests für die Beförderung mehrerer Kandidaten (anwaerter_zu_notar_befoerdern_batch)."""
+
+    def setUp(self):
+        self.stelle = Notarstelle.objects.create(
+            bezeichnung='NST-000001', name='Notariat Wien 1',
+            strasse='Stephansplatz 3', plz='1010', stadt='Wien'
+        )
+        self.neue_stelle = Notarstelle.objects.create(
+            bezeichnung='NST-000002', name='Notariat Graz 1',
+            strasse='Hauptplatz 1', plz='8010', stadt='Graz'
+        )
+        self.notar = Notar.objects.create(
+            notar_id='NOT-000001', vorname='Karl', nachname='Müller',
+            email='mueller@example.com', notarstelle=self.stelle,
+            bestellt_am=date(2010, 1, 1), beginn_datum=date(2010, 1, 1)
+        )
+        self.kandidaten = [
+            NotarAnwaerter.objects.create(
+                anwaerter_id=f'NKA-00000{nummer}', vorname=f'Kandidat{nummer}', nachname='Test',
+                email=f'kandidat{nummer}@example.com', notarstelle=self.stelle,
+                betreuender_notar=self.notar, zugelassen_am=date(2020, 1, 1),
+                beginn_datum=date(2020, 1, 1), notiz='Alte Notiz'
+            )
+            for nummer in range(1, 6)
+        ]
+
+    def test_batch_mit_ergebnis_pro_eintrag(self):
+        """Gültige Einträge werden mit einem ID-Block geschrieben, ungültige gemeldet."""
+        from apps.kern import ids
+        from apps.personen.services import anwaerter_zu_notar_befoerdern_batch
+
+        ids.zaehler_abgleichen('NOT')
+        inaktiv = self.kandidaten[4]
+        inaktiv.ist_aktiv = False
+        inaktiv.save()
+        bestellt = date(2025, 3, 1)
+        befoerderungen = [(k, self.neue_stelle, bestellt) for k in self.kandidaten[:4]]
+        befoerderungen += [(self.kandidaten[0], self.neue_stelle, bestellt), (inaktiv, self.neue_stelle, None)]
+
+        # Sperren + Prüfen (2), ID-Block (4), Notare anlegen, Kandidaten aktualisieren,
+        # Besetzungszeiträume (2), Savepoint (2)
+        with self.assertNumQueries(12):
+            ergebnisse = anwaerter_zu_notar_befoerdern_batch(befoerderungen)
+
+        self.assertEqual([e.erfolg for e in ergebnisse], [True] * 4 + [False, False])
+        self.assertIn('mehrfach', ergebnisse[4].fehler)
+        self.assertIn('bereits inaktiv', ergebnisse[5].fehler)
+        self.assertEqual(
+            [e.notar.notar_id for e in ergebnisse[:4]],
+            ['NOT-000002', 'NOT-000003', 'NOT-000004', 'NOT-000005']
+        )
+
+        notar = Notar.objects.get(notar_id='NOT-000003')
+        self.assertEqual((notar.email, notar.notarstelle_id, notar.bestellt_am),
+                         ('kandidat2@example.com', 'NST-000002', bestellt))
+        self.assertTrue(notar.war_vorher_anwaerter)
+        kandidat = NotarAnwaerter.objects.get(pk=self.kandidaten[1].pk)
+        self.assertFalse(kandidat.ist_aktiv)
+        self.assertEqual(kandidat.ende_datum, bestellt)
+        self.assertTrue(kandidat.notiz.startswith('Alte Notiz\n\nZum Notar bestellt am 01.03.2025 (Notar-ID: NOT-000003'))
+
+        # Ein zweiter Lauf scheitert für alle: Kandidaten inaktiv
+        ergebnisse = anwaerter_zu_notar_befoerdern_batch(befoerderungen[:2])
+        self.assertFalse(any(e.erfolg for e in ergebnisse))
+
+    def test_einzelne_befoerderung(self):
+        """Die Einzel-Funktion vergibt eine Notar-ID und wirft ValueError bei Fehlern."""
+        from apps.personen.services import anwaerter_zu_notar_befoerdern
+
+        notar = anwaerter_zu_notar_befoerdern(self.kandidaten[0], self.neue_stelle, date(2025, 3, 1))
+        self.assertEqual(notar.notar_id, 'NOT-000002')
+        self.assertFalse(self.kandidaten[0].ist_aktiv)
+        with self.assertRaisesMessage(ValueError, 'bereits inaktiv'):
+            anwaerter_zu_notar_befoerdern(self.kandidaten[0], self.neue_stelle)
+
+    def test_batch_api(self):
+        """Die API führt den Service im Batch-Modus aus und protokolliert ihn."""
+        from apps.services.models import ServiceAusfuehrung
+        from apps.services.registry import service_registry
+
+        service_registry.sync_mit_datenbank()
+        benutzer = KammerBenutzer.objects.create_user(
+            username='leitung', email='leitung@example.com', password='testpass123', rolle='leitung'
+        )
+        self.client.force_login(benutzer)
+
+        response = self.client.post(reverse('anwaerter_befoerdern_api'), {'befoerderungen': [
+            {'anwaerter': 'NKA-000001', 'notarstelle': 'NST-000002', 'bestellt_am': '2025-03-01'},
+            {'anwaerter': 'NKA-000002', 'notarstelle': 'NST-000002'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        ergebnis = response.json()
+        self.assertEqual(ergebnis['anzahl_erfolgreich'], 2)
+        self.assertEqual([b['notar_nummer'] for b in ergebnis['befoerderungen']], ['NOT-000002', 'NOT-000003'])
+        self.assertTrue(ServiceAusfuehrung.objects.get(pk=ergebnis['ausfuehrung_id']).erfolgreich)
+
+        response = self.client.post(reverse('anwaerter_befoerdern_api'), {'befoerderungen': [
+            {'anwaerter': 'NKA-000099', 'notarstelle': 'NST-000002'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class DublettenTest(TestCase):
+    """Tests für Kölner Phonetik und Dublettensuche (apps.personen.dubletten)."""
+
+    def setUp(self):
+        self.stelle = Notarstelle.objects.create(
+            bezeichnung='NST-000001', name='Notariat Wien 1',
+            strasse='Stephansplatz 3', plz='1010', stadt='Wien'
+        )
+        self.notar = Notar.objects.create(
+            notar_id='NOT-000001', titel='Mag.', vorname='Jürgen', nachname='Müller',
+            email='J.Mueller+kammer@Example.com', notarstelle=self.stelle,
+            bestellt_am=date(2015, 3, 15), beginn_datum=date(2015, 3, 15)
+        )
+        self.kandidat = NotarAnwaerter.objects.create(
+            anwaerter_id='NKA-000001', vorname='Anna', nachname='Schmidt',
+            email='schmidt@example.com', notarstelle=self.stelle,
+            betreuender_notar=self.notar, zugelassen_am=date(2022, 9, 1),
+            beginn_datum=date(2022, 9, 1)
+        )
+
+    def test_koelner_phonetik(self):
+        """Referenzwerte der Kölner Phonetik; Umlaute und Schreibvarianten ergeben denselben Code."""
+        from apps.personen.phonetik import email_normalisieren, koelner_phonetik
+
+        self.assertEqual(koelner_phonetik('Müller-Lüdenscheidt'), '65752682')
+        self.assertEqual(koelner_phonetik('Breschnew'), '17863')
+        self.assertEqual(koelner_phonetik('Wikipedia'), '3412')
+        self.assertEqual({koelner_phonetik(n) for n in ['Müller', 'Mueller', 'Möller']}, {'657'})
+        self.assertEqual({koelner_phonetik(n) for n in ['Schmidt', 'Schmitt', 'Schmid']}, {'862'})
+        self.assertEqual(email_normalisieren(' Max.Muster+kammer@Example.AT '), 'max.muster@example.at')
+
+    def test_schluessel_beim_speichern(self):
+        """Die Schlüssel werden bei save() gesetzt, auch mit update_fields."""
+        self.assertEqual(
+            (self.notar.nachname_phonetik, self.notar.vorname_phonetik, self.notar.email_normalisiert),
+            ('657', '0746', 'j.mueller@example.com')
+        )
+        self.kandidat.nachname = 'Maier'
+        self.kandidat.save(update_fields=['nachname'])
+        self.kandidat.refresh_from_db()
+        self.assertEqual(self.kandidat.nachname_phonetik, '67')
+
+    def test_kandidaten_finden(self):
+        """Gleich klingender Name oder gleiche E-Mail sind Treffer, anderer Vorname nicht."""
+        from apps.personen import dubletten
+
+        treffer = dubletten.kandidaten_finden('Juergen', 'Mueller', 'neu@example.com')
+        self.assertEqual([(t.person, t.gruende) for t in treffer], [(self.notar, ['gleich klingender Name'])])
+
+        treffer = dubletten.kandidaten_finden('Hans', 'Huber', 'j.mueller@EXAMPLE.com')
+        self.assertEqual([t.gruende for t in treffer], [['gleiche E-Mail']])
+
+        self.assertEqual(dubletten.kandidaten_finden('Peter', 'Müller', 'peter@example.com'), [])
+        self.assertEqual(dubletten.kandidaten_finden('Jürgen', 'Müller', 'x@example.com', ausser=self.notar), [])
+
+    def test_erstellen_warnt_vor_dublette(self):
+        """Das Formular zeigt mögliche Dubletten und legt erst nach Bestätigung an."""
+        benutzer = KammerBenutzer.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client.force_login(benutzer)
+        daten = {
+            'anwaerter_id': 'NKA-000002', 'vorname': 'Anna', 'nachname': 'Schmitt',
+            'email': 'anna.schmitt@example.com', 'notarstelle': 'NST-000001',
+            'betreuender_notar': self.notar.pk, 'zugelassen_am': '2023-01-01',
+            'beginn_datum': '2023-01-01', 'ist_aktiv': 'on',
+        }
+
+        response = self.client.post(reverse('anwaerter_erstellen'), daten)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Mögliche Dubletten gefunden')
+        self.assertContains(response, 'NKA-000001')
+        self.assertFalse(NotarAnwaerter.objects.filter(anwaerter_id='NKA-000002').exists())
+
+        token = response.context['dubletten_token']
+
+        # Nach der Warnung geänderte E-Mail: die Bestätigung gilt nicht mehr
+        response = self.client.post(reverse('anwaerter_erstellen'), {
+            **daten, 'email': 'j.mueller@example.com', 'dubletten_bestaetigt': token,
+        })
+        self.assertContains(response, 'Mögliche Dubletten gefunden')
+        self.assertContains(response, 'NOT-000001')
+        self.assertFalse(NotarAnwaerter.objects.filter(anwaerter_id='NKA-000002').exists())
+
+        response = self.client.post(reverse('anwaerter_erstellen'), {**daten, 'dubletten_bestaetigt': token})
+        self.assertRedirects(response, reverse('anwaerter_detail', args=['NKA-000002']))
+
+    def test_cluster_und_command(self):
+        """Der Bericht gruppiert zusammenhängende Treffer über beide Tabellen."""
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from apps.personen import dubletten
+
+        NotarAnwaerter.objects.create(
+            anwaerter_id='NKA-000002', vorname='Jürgen', nachname='Möller',
+            email='jm@example.com', notarstelle=self.stelle, betreuender_notar=self.notar,
+            zugelassen_am=date(2022, 9, 1), beginn_datum=date(2022, 9, 1)
+        )
+        NotarAnwaerter.objects.create(
+            anwaerter_id='NKA-000003', vorname='Sepp', nachname='Gruber',
+            email='JM@example.com', notarstelle=self.stelle, betreuender_notar=self.notar,
+            zugelassen_am=date(2022, 9, 1), beginn_datum=date(2022, 9, 1)
+        )
+
+        cluster, _ = dubletten.cluster_finden()
+        self.assertEqual(len(cluster), 1)
+        self.assertEqual(
+            sorted(person['bezeichnung'] for person in cluster[0]),
+            ['NKA-000002', 'NKA-000003', 'NOT-000001']
+        )
+
+        ausgabe = StringIO()
+        call_command('dubletten_finden', stdout=ausgabe)
+        self.assertIn('Cluster 1 (3 Personen, gleich klingender Name, gleiche E-Mail)', ausgabe.getvalue())
+
+
+class PersonenDetailTest(SeitenTestMixin, TestCase):
+    """Tests für die Detailseiten von Notar und Kandidat (apps.personen.detail)."""
+
+    def setUp(self):
+        super().setUp()
+        self.stelle = notarstelle_anlegen()
+        self.notar = Notar.objects.create(
+            notar_id='NOT-000001', vorname='Karl', nachname='Müller',
+            email='mueller@example.com', notarstelle=self.stelle,
+            bestellt_am=date(2010, 1, 1), beginn_datum=date(2010, 1, 1)
+        )
+        self.anwaerter = NotarAnwaerter.objects.create(
+            anwaerter_id='NKA-000001', vorname='Anna', nachname='Schmidt',
+            email='schmidt@example.com', notarstelle=self.stelle,
+            betreuender_notar=self.notar, zugelassen_am=date(2022, 9, 1),
+            beginn_datum=date(2022, 9, 1)
+        )
+
+    def _verlauf_anlegen(self, anzahl, start=0):
+        """Legt je Person Workflows, Dokumente, E-Mails und Service-Ausführungen an."""
+        from apps.emails.models import GesendeteEmail
+        from apps.services.models import Dokument, ServiceAusfuehrung, ServiceDefinition, ServiceKategorie
+        from apps.workflows.models import WorkflowInstanz, WorkflowTyp
+
+        typ, _ = WorkflowTyp.objects.get_or_create(name='Bestellung', kuerzel='BES')
+        kategorie, _ = ServiceKategorie.objects.get_or_create(name='Dokumente')
+        service, _ = ServiceDefinition.objects.get_or_create(
+            service_id='stammblatt_pdf_einzeln', defaults={'name': 'Stammblatt', 'kategorie': kategorie}
+        )
+        for i in range(start, start + anzahl):
+            workflow = WorkflowInstanz.objects.create(
+                workflow_typ=typ, name=f'Workflow {i}', erstellt_von=self.benutzer
+            )
+            workflow.betroffene_notare.add(self.notar)
+            workflow.betroffene_kandidaten.add(self.anwaerter)
+            for feld, person in (('notar', self.notar), ('anwaerter', self.anwaerter)):
+                ausfuehrung = ServiceAusfuehrung.objects.create(service=service, ausgefuehrt_von=self.benutzer)
+                # Dokument und E-Mail derselben Ausführung zählen einmal
+                Dokument.objects.create(
+                    titel=f'Stammblatt {i}', datei=f'dokumente/stammblatt_{i}.pdf', dateiname=f'stammblatt_{i}.pdf',
+                    dateityp='application/pdf', dateigroesse=1000, generiert_von_service=ausfuehrung,
+                    **{feld: person}
+                )
+                GesendeteEmail.objects.create(
+                    empfaenger=person.email, betreff=f'Nachricht {i}', nachricht='Text',
+                    service_ausfuehrung=ausfuehrung, **{feld: person}
+                )
+
+    def test_notar_zaehler_und_neueste(self):
+        """Der Loader liefert Zähler über alles und nur die neuesten Einträge."""
+        from apps.personen import detail
+
+        self._verlauf_anlegen(detail.NEUESTE + 2)
+        notar = detail.notar_laden('NOT-000001')
+        self.assertEqual(notar.anzahl_workflows, detail.NEUESTE + 2)
+        self.assertEqual(notar.anzahl_dokumente, detail.NEUESTE + 2)
+        self.assertEqual(notar.anzahl_emails, detail.NEUESTE + 2)
+        self.assertEqual(notar.anzahl_service_ausfuehrungen, detail.NEUESTE + 2)
+        self.assertEqual(notar.anzahl_betreute, 1)
+        self.assertEqual(len(notar.neueste_dokumente), detail.NEUESTE)
+        self.assertEqual(len(notar.neueste_service_ausfuehrungen), detail.NEUESTE)
+        self.assertEqual(notar.neueste_workflows[0].name, f'Workflow {detail.NEUESTE + 1}')
+        self.assertEqual(notar.aktive_betreute_anwaerter, [self.anwaerter])
+
+        anwaerter = detail.anwaerter_laden('NKA-000001')
+        self.assertEqual(anwaerter.anzahl_emails, detail.NEUESTE + 2)
+        self.assertEqual(len(anwaerter.neueste_emails), detail.NEUESTE)
+
+    def test_query_anzahl_unabhaengig_von_datenmenge(self):
+        """Beide Detailseiten kommen mit einer festen Anzahl Queries aus."""
+        queries = self.assertQueryAnzahlKonstant(self._verlauf_anlegen, [
+            lambda: self.assertContains(
+                self.client.get(reverse('notar_detail', args=['NOT-000001'])), 'Stammblatt 1'
+            ),
+            lambda: self.assertContains(
+                self.client.get(reverse('anwaerter_detail', args=['NKA-000001'])), 'Nachricht 1'
+            ),
+        ])
+        # Session, Benutzer, Person mit Zählern, 4 bzw. 3 Prefetches, Service-Ausführungen
+        self.assertEqual(queries, [8, 7])
+
+    def test_unbekannte_person(self):
+        """Unbekannte IDs ergeben 404."""
+        response = self.client.get(reverse('notar_detail', args=['NOT-999999']))
+        self.assertEqual(response.status_code, 404)
+
+
+class BesetzungenTest(TestCase):
+    """Tests für den Besetzungsindex (apps.personen.besetzungen) und den Vakanzen-Bericht."""
+
+    def setUp(self):
+        self.stelle = Notarstelle.objects.create(
+            bezeichnung='NST-000001', name='Notariat Wien 1',
+            strasse='Stephansplatz 3', plz='1010', stadt='Wien'
+        )
+        self.leere_stelle = Notarstelle.objects.create(
+            bezeichnung='NST-000002', name='Notariat Graz 1',
+            strasse='Hauptplatz 1', plz='8010', stadt='Graz'
+        )
+        self.vorgaenger = Notar.objects.create(
+            notar_id='NOT-000001', vorname='Eva', nachname='Huber', ist_aktiv=False,
+            email='huber@example.com', notarstelle=self.stelle, bestellt_am=date(2000, 1, 1),
+            beginn_datum=date(2000, 1, 1), ende_datum=date(2023, 3, 31)
+        )
+        self.nachfolger = Notar.objects.create(
+            notar_id='NOT-000002', vorname='Karl', nachname='Müller',
+            email='mueller@example.com', notarstelle=self.stelle,
+            bestellt_am=date(2023, 7, 1), beginn_datum=date(2023, 7, 1)
+        )
+
+    def test_index_folgt_notaren(self):
+        """Speichern, Ändern und Löschen eines Notars führen den Index nach."""
+        from apps.personen.models import Besetzungszeitraum
+
+        self.assertEqual(
+            list(Besetzungszeitraum.objects.values_list('notar__notar_id', 'von', 'bis')),
+            [('NOT-000001', date(2000, 1, 1), date(2023, 3, 31)), ('NOT-000002', date(2023, 7, 1), None)]
+        )
+        self.nachfolger.notarstelle = self.leere_stelle
+        self.nachfolger.ende_datum = date(2024, 12, 31)
+        self.nachfolger.save()
+        zeitraum = Besetzungszeitraum.objects.get(notar=self.nachfolger)
+        self.assertEqual((zeitraum.notarstelle_id, zeitraum.bis), ('NST-000002', date(2024, 12, 31)))
+
+        self.nachfolger.delete()
+        self.assertEqual(Besetzungszeitraum.objects.count(), 1)
+
+        # Ungültige Zeiträume (Ende vor Beginn) kommen nicht in den Index
+        self.vorgaenger.ende_datum = date(1999, 12, 31)
+        self.vorgaenger.save()
+        self.assertFalse(Besetzungszeitraum.objects.exists())
+
+    def test_inhaber_am_stichtag(self):
+        """inhaber_am liefert den Notar, der die Stelle am Stichtag innehatte."""
+        from apps.personen import besetzungen
+
+        self.assertEqual(list(besetzungen.inhaber_am(date(2023, 3, 31))), [self.vorgaenger])
+        self.assertEqual(list(besetzungen.inhaber_am(date(2023, 5, 1))), [])
+        self.assertEqual(list(besetzungen.inhaber_am(date(2025, 1, 1), [self.stelle])), [self.nachfolger])
+        self.assertEqual(list(besetzungen.inhaber_am(date(2025, 1, 1), [self.leere_stelle])), [])
+
+    def test_vakanzen_und_neuaufbau(self):
+        """Lücken zwischen Besetzungen und unbesetzte Stellen werden als Vakanzen gemeldet."""
+        from apps.personen import besetzungen
+        from apps.personen.models import Besetzungszeitraum
+
+        Besetzungszeitraum.objects.all().delete()
+        self.assertEqual(besetzungen.neu_aufbauen(), 2)
+
+        with self.assertNumQueries(2):
+            vakanzen = besetzungen.vakanzen(date(2023, 1, 1), date(2023, 12, 31))
+        self.assertEqual(
+            [(v.notarstelle.bezeichnung, v.von, v.bis, v.tage) for v in vakanzen],
+            [
+                ('NST-000001', date(2023, 4, 1), date(2023, 6, 30), 91),
+                ('NST-000002', date(2023, 1, 1), date(2023, 12, 31), 365),
+            ]
+        )
+        self.assertEqual(besetzungen.vakanzen(date(2024, 1, 1), date(2024, 12, 31), Notarstelle.objects.filter(
+            pk='NST-000001'
+        )), [])
+
+    def test_vakanzen_bericht(self):
+        """Filter-Seite und CSV-Export des Vakanzen-Berichts."""
+        benutzer = KammerBenutzer.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client.force_login(benutzer)
+        parameter = {'von': '2023-01-01', 'bis': '2023-12-31'}
+
+        response = self.client.get(reverse('filter_vakanzen'), parameter)
+        self.assertContains(response, 'NST-000001 - Notariat Wien 1: 01.04.2023 – 30.06.2023 (91 Tage)')
+
+        response = self.client.get(reverse('export_vakanzen'), {**parameter, 'format': 'csv'})
+        inhalt = response.getvalue().decode('utf-8-sig')
+        self.assertIn('NST-000002', inhalt)
+        self.assertIn('01.04.2023', inhalt)
+
+        response = self.client.get(reverse('filter_vakanzen'), {'von': '2023-12-31', 'bis': '2023-01-01'})
+        self.assertContains(response, 'Das Ende des Zeitraums liegt vor dem Beginn.')
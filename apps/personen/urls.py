@@ -22,6 +22,10 @@ urlpatterns = [
     path('anwaerter/<str:anwaerter_id>/loeschen/', views.anwaerter_loeschen_view, name='anwaerter_loeschen'),
     path('anwaerter/<str:anwaerter_id>/zu-notar/', views.anwaerter_zu_notar_view, name='anwaerter_zu_notar'),
 
+    # Batch-Beförderung
+    path('api/anwaerter/befoerdern/', views.anwaerter_befoerdern_api, name='anwaerter_befoerdern_api'),
+
     # AI Agent
     path('api/ai-extract-cv/', views.ai_extract_cv_data, name='ai_extract_cv_data'),
+    path('api/ai-extract-cv/<uuid:job_id>/', views.ai_extract_cv_status, name='ai_extract_cv_status'),
 ]
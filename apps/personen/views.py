@@ -4,23 +4,72 @@ Views für Personen-Verwaltung (Notare und Notariatskandidat).
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from django.http import HttpResponse
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, Q
 from .models import Notar, NotarAnwaerter
+from . import detail, dubletten
+from apps.kern import ids
+from apps.kern.pagination import seitengroesse
 from apps.notarstellen.models import Notarstelle
 from .forms import NotarForm, NotarAnwaerterForm
 
 
+# Sortierungen der Listen (Parameter ?sortierung=...)
+NOTARE_SORTIERUNGEN = {
+    'name': ('nachname', 'vorname', 'pk'),
+    '-name': ('-nachname', '-vorname', '-pk'),
+    'id': ('notar_id',),
+    '-id': ('-notar_id',),
+    'bestellt': ('bestellt_am', 'nachname', 'pk'),
+    '-bestellt': ('-bestellt_am', 'nachname', 'pk'),
+    'notarstelle': ('notarstelle__name', 'nachname', 'pk'),
+    '-notarstelle': ('-notarstelle__name', 'nachname', 'pk'),
+}
+ANWAERTER_SORTIERUNGEN = {
+    'name': ('nachname', 'vorname', 'pk'),
+    '-name': ('-nachname', '-vorname', '-pk'),
+    'id': ('anwaerter_id',),
+    '-id': ('-anwaerter_id',),
+    'zugelassen': ('zugelassen_am', 'nachname', 'pk'),
+    '-zugelassen': ('-zugelassen_am', 'nachname', 'pk'),
+    'notarstelle': ('notarstelle__name', 'nachname', 'pk'),
+    '-notarstelle': ('-notarstelle__name', 'nachname', 'pk'),
+}
+
+# Spalten der Notarstelle, die in den Listen angezeigt werden
+LISTEN_NOTARSTELLE_FELDER = (
+    'notarstelle__name', 'notarstelle__stadt', 'notarstelle__sprengel__bezeichnung'
+)
+LISTEN_PERSON_FELDER = (
+    'titel', 'vorname', 'nachname', 'email', 'telefon', 'ist_aktiv', 'ende_datum',
+)
+
+
+def _sortierung(request, sortierungen):
+    """Liefert (Schlüssel, Sortierfelder) für ?sortierung (Standard: Name)."""
+    schluessel = request.GET.get('sortierung', 'name')
+    if schluessel not in sortierungen:
+        schluessel = 'name'
+    return schluessel, sortierungen[schluessel]
+
+
 @login_required
 def notare_liste_view(request):
-    """Liste aller Notare."""
+    """Liste aller Notare (seitenweise, sortierbar)."""
     # Such- und Filterparameter
     search = request.GET.get('search', '')
     status_filter = request.GET.get('status', '')
     notarstelle_filter = request.GET.get('notarstelle', '')
+    sortierung, sortierfelder = _sortierung(request, NOTARE_SORTIERUNGEN)
 
-    # Basis-Queryset
-    notare = Notar.objects.select_related('notarstelle', 'notarstelle__sprengel').order_by('nachname', 'vorname')
+    # Basis-Queryset: nur die Spalten, die die Liste anzeigt
+    notare = Notar.objects.select_related(
+        'notarstelle', 'notarstelle__sprengel'
+    ).only(
+        'notar_id', 'bestellt_am', 'war_vorher_anwaerter',
+        *LISTEN_PERSON_FELDER, *LISTEN_NOTARSTELLE_FELDER
+    ).order_by(*sortierfelder)
 
     # Suche
     if search:
@@ -41,18 +90,25 @@ def notare_liste_view(request):
     if notarstelle_filter:
         notare = notare.filter(notarstelle_id=notarstelle_filter)
 
-    # Statistiken
-    stats = {
-        'total': Notar.objects.count(),
-        'aktiv': Notar.objects.filter(ist_aktiv=True, ende_datum__isnull=True).count(),
-        'inaktiv': Notar.objects.filter(Q(ist_aktiv=False) | Q(ende_datum__isnull=False)).count(),
-    }
+    pro_seite = seitengroesse(request)
+    seite = Paginator(notare, pro_seite).get_page(request.GET.get('seite'))
+
+    # Statistiken in einer Aggregat-Query
+    aktiv = Q(ist_aktiv=True, ende_datum__isnull=True)
+    stats = Notar.objects.aggregate(
+        total=Count('pk'),
+        aktiv=Count('pk', filter=aktiv),
+        inaktiv=Count('pk', filter=~aktiv),
+    )
 
     # Notarstellen für Filter-Dropdown
-    notarstellen = Notarstelle.objects.filter(ist_aktiv=True).order_by('name')
+    notarstellen = Notarstelle.objects.filter(ist_aktiv=True).only('bezeichnung', 'name').order_by('name')
 
     context = {
-        'notare': notare,
+        'notare': seite,
+        'seite': seite,
+        'pro_seite': pro_seite,
+        'sortierung': sortierung,
         'stats': stats,
         'search': search,
         'status_filter': status_filter,
@@ -66,23 +122,9 @@ def notare_liste_view(request):
 @login_required
 def notar_detail_view(request, notar_id):
     """Detail-Ansicht eines Notars."""
-    notar = get_object_or_404(
-        Notar.objects.select_related('notarstelle', 'notarstelle__sprengel'),
-        notar_id=notar_id
-    )
-
-    # Workflows des Notars (falls er vorher Kandidat war)
-    workflows = []
-    if notar.war_vorher_anwaerter:
-        from apps.workflows.models import WorkflowInstanz
-        # Versuche Workflows zu finden, die mit diesem Notar verknüpft sind
-        workflows = WorkflowInstanz.objects.filter(
-            betroffene_notare=notar
-        ).order_by('-erstellt_am')[:5]
-
+    # Notar, Zähler und die jüngsten Einträge aller Sammlungen in wenigen Abfragen
     context = {
-        'notar': notar,
-        'workflows': workflows,
+        'notar': detail.notar_laden(notar_id),
     }
 
     return render(request, 'personen/notar_detail.html', context)
@@ -90,18 +132,21 @@ def notar_detail_view(request, notar_id):
 
 @login_required
 def anwaerter_liste_view(request):
-    """Liste aller Notariatskandidat."""
+    """Liste aller Notariatskandidat (seitenweise, sortierbar)."""
     # Such- und Filterparameter
     search = request.GET.get('search', '')
     status_filter = request.GET.get('status', '')
+    notarstelle_filter = request.GET.get('notarstelle', '')
     betreuender_notar_filter = request.GET.get('betreuender_notar', '')
+    sortierung, sortierfelder = _sortierung(request, ANWAERTER_SORTIERUNGEN)
 
-    # Basis-Queryset
+    # Basis-Queryset: nur die Spalten, die die Liste anzeigt
     anwaerter = NotarAnwaerter.objects.select_related(
-        'betreuender_notar',
         'notarstelle',
         'notarstelle__sprengel'
-    ).order_by('nachname', 'vorname')
+    ).only(
+        'anwaerter_id', *LISTEN_PERSON_FELDER, *LISTEN_NOTARSTELLE_FELDER
+    ).order_by(*sortierfelder)
 
     # Suche
     if search:
@@ -118,27 +163,36 @@ def anwaerter_liste_view(request):
     elif status_filter == 'inaktiv':
         anwaerter = anwaerter.filter(Q(ist_aktiv=False) | Q(ende_datum__isnull=False))
 
-    # Betreuender Notar Filter
+    # Notarstellen- und Betreuer-Filter
+    if notarstelle_filter:
+        anwaerter = anwaerter.filter(notarstelle_id=notarstelle_filter)
     if betreuender_notar_filter:
         anwaerter = anwaerter.filter(betreuender_notar_id=betreuender_notar_filter)
 
-    # Statistiken
-    stats = {
-        'total': NotarAnwaerter.objects.count(),
-        'aktiv': NotarAnwaerter.objects.filter(ist_aktiv=True, ende_datum__isnull=True).count(),
-        'mit_betreuung': NotarAnwaerter.objects.filter(betreuender_notar__isnull=False).count(),
-    }
+    pro_seite = seitengroesse(request)
+    seite = Paginator(anwaerter, pro_seite).get_page(request.GET.get('seite'))
 
-    # Betreuende Notare für Filter
-    betreuende_notare = Notar.objects.filter(ist_aktiv=True).order_by('nachname', 'vorname')
+    # Statistiken in einer Aggregat-Query
+    stats = NotarAnwaerter.objects.aggregate(
+        total=Count('pk'),
+        aktiv=Count('pk', filter=Q(ist_aktiv=True, ende_datum__isnull=True)),
+        mit_betreuung=Count('pk', filter=Q(betreuender_notar__isnull=False)),
+    )
+
+    # Notarstellen für Filter-Dropdown
+    notarstellen = Notarstelle.objects.filter(ist_aktiv=True).only('bezeichnung', 'name').order_by('name')
 
     context = {
-        'anwaerter': anwaerter,
+        'anwaerter': seite,
+        'seite': seite,
+        'pro_seite': pro_seite,
+        'sortierung': sortierung,
         'stats': stats,
         'search': search,
         'status_filter': status_filter,
+        'notarstelle_filter': notarstelle_filter,
         'betreuender_notar_filter': betreuender_notar_filter,
-        'betreuende_notare': betreuende_notare,
+        'notarstellen': notarstellen,
     }
 
     return render(request, 'personen/anwaerter_liste.html', context)
@@ -147,20 +201,9 @@ def anwaerter_liste_view(request):
 @login_required
 def anwaerter_detail_view(request, anwaerter_id):
     """Detail-Ansicht eines Notariatskandidats."""
-    anwaerter = get_object_or_404(
-        NotarAnwaerter.objects.select_related('betreuender_notar', 'notarstelle', 'notarstelle__sprengel'),
-        anwaerter_id=anwaerter_id
-    )
-
-    # Workflows des Anwärters
-    from apps.workflows.models import WorkflowInstanz
-    workflows = WorkflowInstanz.objects.filter(
-        betroffene_kandidaten=anwaerter
-    ).select_related('workflow_typ', 'erstellt_von').order_by('-erstellt_am')
-
+    # Kandidat, Zähler und die jüngsten Einträge aller Sammlungen in wenigen Abfragen
     context = {
-        'anwaerter': anwaerter,
-        'workflows': workflows,
+        'anwaerter': detail.anwaerter_laden(anwaerter_id),
     }
 
     return render(request, 'personen/anwaerter_detail.html', context)
@@ -168,21 +211,44 @@ def anwaerter_detail_view(request, anwaerter_id):
 
 # ===== CRUD Views für Notare =====
 
+def _dubletten_pruefen(request, form):
+    """
+    Sucht mögliche Dubletten zu einer neuen Person.
+
+    Returns:
+        tuple: (Treffer, Bestätigungs-Token für das Formular). Keine Treffer,
+        wenn keine gefunden wurden oder der Benutzer die Warnung für genau
+        diese Angaben bestätigt hat (Feld dubletten_bestaetigt); wurden Name
+        oder E-Mail danach geändert, wird erneut geprüft.
+    """
+    daten = form.cleaned_data
+    token = dubletten.bestaetigung(daten['vorname'], daten['nachname'], daten['email'])
+    if request.POST.get('dubletten_bestaetigt') == token:
+        return [], token
+    return dubletten.kandidaten_finden(daten['vorname'], daten['nachname'], daten['email']), token
+
+
 @login_required
 def notar_erstellen_view(request):
     """Erstellen eines neuen Notars."""
+    dubletten_treffer, dubletten_token = [], ''
     if request.method == 'POST':
         form = NotarForm(request.POST)
         if form.is_valid():
-            notar = form.save()
-            messages.success(request, f'Notar "{notar.get_voller_name()}" wurde erfolgreich erstellt.')
-            return redirect('notar_detail', notar_id=notar.notar_id)
+            dubletten_treffer, dubletten_token = _dubletten_pruefen(request, form)
+            if not dubletten_treffer:
+                notar = form.save()
+                ids.zaehler_anheben('NOT', notar.notar_id)
+                messages.success(request, f'Notar "{notar.get_voller_name()}" wurde erfolgreich erstellt.')
+                return redirect('notar_detail', notar_id=notar.notar_id)
     else:
-        # Automatische ID-Generierung
-        form = NotarForm(initial={'notar_id': Notar.generate_next_id()})
+        # Nächste ID nur anzeigen; der Zähler wird erst nach dem Speichern angehoben
+        form = NotarForm(initial={'notar_id': ids.vorschau_id('NOT')})
 
     context = {
         'form': form,
+        'dubletten': dubletten_treffer,
+        'dubletten_token': dubletten_token,
         'title': 'Neuer Notar',
         'submit_text': 'Erstellen',
     }
@@ -198,6 +264,7 @@ def notar_bearbeiten_view(request, notar_id):
         form = NotarForm(request.POST, instance=notar)
         if form.is_valid():
             notar = form.save()
+            ids.zaehler_anheben('NOT', notar.notar_id)
             messages.success(request, f'Notar "{notar.get_voller_name()}" wurde erfolgreich aktualisiert.')
             return redirect('notar_detail', notar_id=notar.notar_id)
     else:
@@ -234,19 +301,24 @@ def notar_loeschen_view(request, notar_id):
 @login_required
 def anwaerter_erstellen_view(request):
     """Erstellen eines neuen Notariatskandidats."""
+    dubletten_treffer, dubletten_token = [], ''
     if request.method == 'POST':
         form = NotarAnwaerterForm(request.POST)
         if form.is_valid():
-            anwaerter = form.save()
-            messages.success(request, f'Notariatskandidat "{anwaerter.get_voller_name()}" wurde erfolgreich erstellt.')
-            return redirect('anwaerter_detail', anwaerter_id=anwaerter.anwaerter_id)
+            dubletten_treffer, dubletten_token = _dubletten_pruefen(request, form)
+            if not dubletten_treffer:
+                anwaerter = form.save()
+                ids.zaehler_anheben('NKA', anwaerter.anwaerter_id)
+                messages.success(request, f'Notariatskandidat "{anwaerter.get_voller_name()}" wurde erfolgreich erstellt.')
+                return redirect('anwaerter_detail', anwaerter_id=anwaerter.anwaerter_id)
     else:
-        # Automatisch die nächste ID generieren
-        next_id = NotarAnwaerter.generate_next_id()
-        form = NotarAnwaerterForm(initial={'anwaerter_id': next_id})
+        # Nächste ID nur anzeigen; der Zähler wird erst nach dem Speichern angehoben
+        form = NotarAnwaerterForm(initial={'anwaerter_id': ids.vorschau_id('NKA')})
 
     context = {
         'form': form,
+        'dubletten': dubletten_treffer,
+        'dubletten_token': dubletten_token,
         'title': 'Neuer Notariatskandidat',
         'submit_text': 'Erstellen',
     }
@@ -262,6 +334,7 @@ def anwaerter_bearbeiten_view(request, anwaerter_id):
         form = NotarAnwaerterForm(request.POST, instance=anwaerter)
         if form.is_valid():
             anwaerter = form.save()
+            ids.zaehler_anheben('NKA', anwaerter.anwaerter_id)
             messages.success(request, f'Notariatskandidat "{anwaerter.get_voller_name()}" wurde erfolgreich aktualisiert.')
             return redirect('anwaerter_detail', anwaerter_id=anwaerter.anwaerter_id)
     else:
@@ -299,42 +372,26 @@ def anwaerter_zu_notar_view(request, anwaerter_id):
     anwaerter = get_object_or_404(NotarAnwaerter, anwaerter_id=anwaerter_id)
 
     if request.method == 'POST':
-        # Generiere neue Notar-ID
-        import re
-        letzte_notar = Notar.objects.filter(
-            notar_id__startswith='NOT-'
-        ).order_by('-notar_id').first()
-
-        if letzte_notar and letzte_notar.notar_id:
-            match = re.search(r'NOT-(\d+)', letzte_notar.notar_id)
-            if match:
-                nummer = int(match.group(1)) + 1
-            else:
-                nummer = 1
-        else:
-            nummer = 1
-
-        neue_notar_id = f'NOT-{nummer:03d}'
-
-        # Erstelle neuen Notar aus Kandidaten-Daten
-        notar = Notar.objects.create(
-            notar_id=neue_notar_id,
-            vorname=anwaerter.vorname,
-            nachname=anwaerter.nachname,
-            titel=anwaerter.titel,
-            email=anwaerter.email,
-            telefon=anwaerter.telefon,
-            notarstelle=anwaerter.notarstelle,
-            bestellt_am=request.POST.get('bestellt_am'),
-            beginn_datum=anwaerter.beginn_datum,
-            war_vorher_anwaerter=True,
-            ist_aktiv=True,
-            notiz=f'Umgewandelt von Kandidat {anwaerter.anwaerter_id}\n\n{anwaerter.notiz or ""}'
-        )
-
-        # Deaktiviere den Kandidat
-        anwaerter.ist_aktiv = False
-        anwaerter.save()
+        with transaction.atomic():
+            # Erstelle neuen Notar aus Kandidaten-Daten
+            notar = Notar.objects.create(
+                notar_id=Notar.generate_next_id(),
+                vorname=anwaerter.vorname,
+                nachname=anwaerter.nachname,
+                titel=anwaerter.titel,
+                email=anwaerter.email,
+                telefon=anwaerter.telefon,
+                notarstelle=anwaerter.notarstelle,
+                bestellt_am=request.POST.get('bestellt_am'),
+                beginn_datum=anwaerter.beginn_datum,
+                war_vorher_anwaerter=True,
+                ist_aktiv=True,
+                notiz=f'Umgewandelt von Kandidat {anwaerter.anwaerter_id}\n\n{anwaerter.notiz or ""}'
+            )
+
+            # Deaktiviere den Kandidat
+            anwaerter.ist_aktiv = False
+            anwaerter.save()
 
         messages.success(
             request,
@@ -381,144 +438,35 @@ def notare_vergleichen_view(request):
 
 def notare_vergleich_pdf_export(notare):
     """Exportiert den Notar-Vergleich als PDF."""
-    from django.http import HttpResponse
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.units import cm
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    from io import BytesIO
-
-    # PDF-Buffer
-    buffer = BytesIO()
-
-    # PDF im Querformat erstellen
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=landscape(A4),
-        rightMargin=1*cm,
-        leftMargin=1*cm,
-        topMargin=1.5*cm,
-        bottomMargin=1.5*cm
-    )
-
-    # Container für PDF-Elemente
-    elements = []
-
-    # Styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#9EBDD5'),
-        spaceAfter=20,
-    )
-
-    # Titel
-    elements.append(Paragraph('Notar-Vergleich', title_style))
-    elements.append(Spacer(1, 0.5*cm))
+    from apps.kern import pdf
 
-    # Style für kleine Texte
-    small_style = ParagraphStyle(
-        'SmallText',
-        parent=styles['Normal'],
-        fontSize=8,
-        leading=10,
-    )
-
-    # Vergleichstabelle erstellen
-    data = []
-
-    # Header
-    header = ['Eigenschaft'] + [notar.get_voller_name() for notar in notare]
-    data.append(header)
+    def datum(wert):
+        return wert.strftime('%d.%m.%Y') if wert else '—'
 
-    # Datenzeilen mit Paragraph-Wrapping für lange Texte
-    rows = [
+    zeilen = [
         ('Notar-ID', [notar.notar_id for notar in notare]),
         ('Titel', [notar.titel or '—' for notar in notare]),
-        ('E-Mail', [Paragraph(notar.email or '—', small_style) for notar in notare]),
+        ('E-Mail', [pdf.klein(notar.email) for notar in notare]),
         ('Telefon', [notar.telefon or '—' for notar in notare]),
-        ('Notarstelle', [Paragraph(notar.notarstelle.name, small_style) for notar in notare]),
+        ('Notarstelle', [pdf.klein(notar.notarstelle.name) for notar in notare]),
         ('Ort', [notar.notarstelle.stadt for notar in notare]),
-        ('Bestellt am', [notar.bestellt_am.strftime('%d.%m.%Y') if notar.bestellt_am else '—' for notar in notare]),
-        ('Beginn', [notar.beginn_datum.strftime('%d.%m.%Y') if notar.beginn_datum else '—' for notar in notare]),
-        ('Ende', [notar.ende_datum.strftime('%d.%m.%Y') if notar.ende_datum else '—' for notar in notare]),
+        ('Bestellt am', [datum(notar.bestellt_am) for notar in notare]),
+        ('Beginn', [datum(notar.beginn_datum) for notar in notare]),
+        ('Ende', [datum(notar.ende_datum) for notar in notare]),
         ('Status', ['Aktiv' if notar.ist_aktiv and not notar.ende_datum else 'Inaktiv' for notar in notare]),
         ('War Kandidat', ['Ja' if notar.war_vorher_anwaerter else 'Nein' for notar in notare]),
     ]
 
-    for label, values in rows:
-        data.append([label] + values)
-
-    # Tabelle erstellen - mehr Platz für Daten-Spalten
-    col_width = (landscape(A4)[0] - 2*cm - 4.5*cm) / len(notare)  # Verfügbarer Platz gleichmäßig verteilen
-    table = Table(data, colWidths=[4.5*cm] + [col_width] * len(notare))
-
-    # Tabellen-Style
-    table.setStyle(TableStyle([
-        # Header
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#9EBDD5')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('TOPPADDING', (0, 0), (-1, 0), 12),
-
-        # Erste Spalte (Labels)
-        ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#F5F5F7')),
-        ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 1), (0, -1), 9),
-
-        # Daten
-        ('FONTNAME', (1, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (1, 1), (-1, -1), 9),
-        ('ROWBACKGROUNDS', (1, 1), (-1, -1), [colors.white, colors.HexColor('#FAFAFA')]),
-
-        # Borders
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#9EBDD5')),
-
-        # Padding
-        ('LEFTPADDING', (0, 0), (-1, -1), 8),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-    ]))
-
-    elements.append(table)
-
-    # Fußnote
-    elements.append(Spacer(1, 1*cm))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.grey,
-    )
-    from django.utils import timezone as tz
-    elements.append(Paragraph(
-        f'Erstellt am: {tz.now().strftime("%d.%m.%Y %H:%M")} | Notariatskammer Verwaltung',
-        footer_style
-    ))
-
-    # PDF generieren
-    doc.build(elements)
-
-    # Response
-    pdf = buffer.getvalue()
-    buffer.close()
-
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="notar_vergleich.pdf"'
-    response.write(pdf)
-
-    return response
+    elemente = [
+        *pdf.kopf('Notar-Vergleich'),
+        pdf.vergleichstabelle(
+            [notar.get_voller_name() for notar in notare], zeilen
+        ),
+        *pdf.fuss(),
+    ]
+    inhalt = pdf.erstellen(elemente, querformat=True, rand=1 * cm, rand_oben=1.5 * cm)
+    return pdf.pdf_antwort(inhalt, 'notar_vergleich.pdf')
 
 
 @login_required
@@ -555,269 +503,133 @@ def anwaerter_vergleichen_view(request):
 
 def anwaerter_vergleich_pdf_export(request, anwaerter):
     """Kandidaten-Vergleich als PDF exportieren."""
-    from io import BytesIO
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib import colors
     from reportlab.lib.units import cm
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4),
-                           leftMargin=1.5*cm, rightMargin=1.5*cm,
-                           topMargin=2*cm, bottomMargin=2*cm)
-
-    elements = []
-    styles = getSampleStyleSheet()
-
-    # Titel
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#9EBDD5'),
-        spaceAfter=20,
-    )
-    elements.append(Paragraph('Kandidaten-Vergleich', title_style))
-    elements.append(Spacer(1, 0.5*cm))
-
-    # Style für kleine Texte
-    small_style = ParagraphStyle(
-        'SmallText',
-        parent=styles['Normal'],
-        fontSize=8,
-        leading=10,
-    )
+    from apps.kern import pdf
 
-    # Tabellendaten vorbereiten
-    data = []
+    def datum(wert):
+        return wert.strftime('%d.%m.%Y') if wert else '—'
 
-    # Header
-    header = ['Eigenschaft'] + [anw.get_voller_name() for anw in anwaerter]
-    data.append(header)
-
-    # Datenzeilen mit Paragraph-Wrapping für lange Texte
-    rows = [
+    zeilen = [
         ('Kandidaten-ID', [anw.anwaerter_id for anw in anwaerter]),
         ('Titel', [anw.titel or '—' for anw in anwaerter]),
-        ('E-Mail', [Paragraph(anw.email or '—', small_style) for anw in anwaerter]),
+        ('E-Mail', [pdf.klein(anw.email) for anw in anwaerter]),
         ('Telefon', [anw.telefon or '—' for anw in anwaerter]),
-        ('Notarstelle', [Paragraph(anw.notarstelle.name, small_style) for anw in anwaerter]),
+        ('Notarstelle', [pdf.klein(anw.notarstelle.name) for anw in anwaerter]),
         ('Ort', [anw.notarstelle.stadt for anw in anwaerter]),
-        ('Betreuender Notar', [Paragraph(anw.betreuender_notar.get_voller_name(), small_style) if anw.betreuender_notar else '—' for anw in anwaerter]),
-        ('Zugelassen am', [anw.zugelassen_am.strftime('%d.%m.%Y') if anw.zugelassen_am else '—' for anw in anwaerter]),
-        ('Beginn', [anw.beginn_datum.strftime('%d.%m.%Y') if anw.beginn_datum else '—' for anw in anwaerter]),
-        ('Ende', [anw.ende_datum.strftime('%d.%m.%Y') if anw.ende_datum else '—' for anw in anwaerter]),
+        ('Betreuender Notar', [
+            pdf.klein(anw.betreuender_notar.get_voller_name()) if anw.betreuender_notar else '—'
+            for anw in anwaerter
+        ]),
+        ('Zugelassen am', [datum(anw.zugelassen_am) for anw in anwaerter]),
+        ('Beginn', [datum(anw.beginn_datum) for anw in anwaerter]),
+        ('Ende', [datum(anw.ende_datum) for anw in anwaerter]),
         ('Status', ['Aktiv' if anw.ist_aktiv and not anw.ende_datum else 'Inaktiv' for anw in anwaerter]),
     ]
 
-    for label, values in rows:
-        data.append([label] + values)
-
-    # Tabelle erstellen - mehr Platz für Daten-Spalten
-    col_width = (landscape(A4)[0] - 2*cm - 4.5*cm) / len(anwaerter)  # Verfügbarer Platz gleichmäßig verteilen
-    table = Table(data, colWidths=[4.5*cm] + [col_width] * len(anwaerter))
-
-    # Tabellenstil
-    table.setStyle(TableStyle([
-        # Header
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#9EBDD5')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('TOPPADDING', (0, 0), (-1, 0), 12),
-
-        # Erste Spalte (Labels)
-        ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#F5F5F7')),
-        ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 1), (0, -1), 9),
-
-        # Daten
-        ('FONTNAME', (1, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (1, 1), (-1, -1), 9),
-        ('ROWBACKGROUNDS', (1, 1), (-1, -1), [colors.white, colors.HexColor('#FAFAFA')]),
-
-        # Borders
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#9EBDD5')),
-
-        # Padding
-        ('LEFTPADDING', (0, 0), (-1, -1), 8),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-    ]))
-
-    elements.append(table)
-
-    # Fußnote
-    elements.append(Spacer(1, 1*cm))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=colors.grey,
-    )
-    from django.utils import timezone as tz
-    elements.append(Paragraph(
-        f'Erstellt am: {tz.now().strftime("%d.%m.%Y %H:%M")} | Notariatskammer Verwaltung',
-        footer_style
-    ))
-
-    # PDF generieren
-    doc.build(elements)
-
-    # Response
-    pdf = buffer.getvalue()
-    buffer.close()
-
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="anwaerter_vergleich.pdf"'
-    response.write(pdf)
-
-    return response
+    elemente = [
+        *pdf.kopf('Kandidaten-Vergleich', groesse=18),
+        pdf.vergleichstabelle(
+            [anw.get_voller_name() for anw in anwaerter], zeilen
+        ),
+        *pdf.fuss(),
+    ]
+    inhalt = pdf.erstellen(elemente, querformat=True, rand=1.5 * cm, rand_oben=2 * cm)
+    return pdf.pdf_antwort(inhalt, 'anwaerter_vergleich.pdf')
 
 
 # ===== AI Agent für Lebenslauf-Analyse =====
 
 from django.http import JsonResponse
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
-import json
-import base64
-import re
-import os
-import requests
+from . import cv_extraktion
+from .models import CVExtraktion
+
+
+def _cv_job_antwort(job, aus_cache=False):
+    """JSON-Darstellung eines Extraktionsauftrags für das Formular."""
+    antwort = {
+        'job_id': str(job.pk),
+        'status': job.status,
+        'status_url': reverse('ai_extract_cv_status', args=[job.pk]),
+        'extraktor': job.extraktor,
+        'cached': aus_cache,
+    }
+    if job.status == 'fertig':
+        antwort.update(success=True, data=job.daten)
+    elif job.status == 'fehler':
+        antwort.update(error='Fehler bei der Analyse', message=job.fehler)
+    return antwort
+
 
 @login_required
 @require_http_methods(["POST"])
 def ai_extract_cv_data(request):
     """
-    Extrahiert Daten aus einem Lebenslauf-PDF mittels OpenRouter AI.
+    Startet die Datenextraktion aus einem Lebenslauf-PDF.
 
     Erwartet: PDF-Datei als multipart/form-data
-    Gibt zurück: JSON mit extrahierten Feldern
+    Gibt zurück: JSON mit job_id und status_url (202), bei bereits
+    analysierten Dateien direkt die extrahierten Felder (200)
     """
-    try:
-        # PDF-Datei aus Request holen
-        if 'pdf_file' not in request.FILES:
-            return JsonResponse({'error': 'Keine PDF-Datei hochgeladen'}, status=400)
-
-        pdf_file = request.FILES['pdf_file']
-
-        # PDF zu Base64 konvertieren
-        pdf_content = pdf_file.read()
-        pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
-
-        api_url = "https://openrouter.ai/api/v1/chat/completions"
-        api_key = os.environ.get('OPENROUTER_API_KEY')
-
-        if not api_key:
-            return JsonResponse({
-                'error': 'OpenRouter API-Key nicht konfiguriert',
-                'message': 'Bitte OPENROUTER_API_KEY in .env Datei setzen'
-            }, status=500)
-
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-            "HTTP-Referer": "http://localhost:8000",
-            "X-Title": "Notariatskammer Verwaltung - CV Extraktion",
-        }
-
-        # Prompt für die AI
-        prompt = """Analysiere diesen Lebenslauf und extrahiere die folgenden Informationen im JSON-Format:
-
-{
-  "titel": "Akademischer Titel (z.B. Dr., Mag., Prof. Dr.)",
-  "vorname": "Vorname",
-  "nachname": "Nachname",
-  "email": "E-Mail-Adresse",
-  "telefon": "Telefonnummer",
-  "zugelassen_am": "Datum der Zulassung als Notariatskandidat (Format: YYYY-MM-DD)",
-  "beginn_datum": "Beginn der Tätigkeit (Format: YYYY-MM-DD)"
-}
+    if 'pdf_file' not in request.FILES:
+        return JsonResponse({'error': 'Keine PDF-Datei hochgeladen'}, status=400)
 
-Wichtig:
-- Gib NUR das JSON-Objekt zurück, keine zusätzlichen Erklärungen
-- Falls eine Information nicht gefunden wurde, setze den Wert auf null
-- Datumsangaben immer im Format YYYY-MM-DD
-- Telefonnummer im Format: +43 ... (österreichisches Format)
-"""
+    pdf_file = request.FILES['pdf_file']
+    inhalt = pdf_file.read()
+    if not inhalt.lstrip().startswith(b'%PDF-'):
+        return JsonResponse({'error': 'Die Datei ist kein PDF'}, status=400)
+
+    job, aus_cache = cv_extraktion.job_starten(inhalt, dateiname=pdf_file.name)
+    return JsonResponse(_cv_job_antwort(job, aus_cache), status=200 if job.ist_abgeschlossen else 202)
+
+
+@login_required
+@require_http_methods(["GET"])
+def ai_extract_cv_status(request, job_id):
+    """Status und ggf. Ergebnis eines Extraktionsauftrags (wird vom Formular abgefragt)."""
+    job = get_object_or_404(CVExtraktion, pk=job_id)
+    return JsonResponse(_cv_job_antwort(job))
+
+
+# ===== Batch-Beförderung =====
+
+import json
+
+
+@login_required
+@require_http_methods(["POST"])
+def anwaerter_befoerdern_api(request):
+    """
+    Befördert mehrere Notariatskandidaten in einem Schritt (z.B. nach einer Präsidiumssitzung).
+
+    Erwartet JSON:
+        {"befoerderungen": [{"anwaerter": "NKA-000001", "notarstelle": "NST-000002",
+                             "bestellt_am": "2025-03-01"}, ...]}
+    Gibt zurück: JSON mit dem Ergebnis pro Eintrag (Notar-ID oder Fehlermeldung)
+
+    Läuft über den Service 'anwaerter_zu_notar_befoerdern' (Berechtigung und Protokoll).
+    """
+    from apps.services.registry import service_registry
+
+    try:
+        eintraege = json.loads(request.body)['befoerderungen']
+        nummern = [eintrag['anwaerter'] for eintrag in eintraege]
+        pks = dict(NotarAnwaerter.objects.filter(anwaerter_id__in=nummern).values_list('anwaerter_id', 'pk'))
+        befoerderungen = [{
+            'anwaerter_id': pks[eintrag['anwaerter']],
+            'notarstelle_id': eintrag['notarstelle'],
+            'bestellt_am': eintrag.get('bestellt_am'),
+        } for eintrag in eintraege]
+    except (ValueError, KeyError, TypeError) as e:
+        return JsonResponse({'error': 'Ungültige Anfrage', 'details': f'Fehlender oder unbekannter Wert: {e}'}, status=400)
+
+    service_klasse = service_registry.get('anwaerter_zu_notar_befoerdern')
+    try:
+        ausfuehrung = service_klasse(benutzer=request.user, befoerderungen=befoerderungen).execute()
+    except PermissionError as e:
+        return JsonResponse({'error': str(e)}, status=403)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
-        payload = {
-            "model": "google/gemini-2.5-flash",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": prompt
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:application/pdf;base64,{pdf_base64}"
-                            }
-                        }
-                    ]
-                }
-            ]
-        }
-
-        response = requests.post(api_url, headers=headers, json=payload, timeout=30)
-
-        if response.status_code != 200:
-            error_details = response.text
-            try:
-                error_json = response.json()
-                error_message = error_json.get('error', {}).get('message', error_details)
-            except:
-                error_message = error_details
-
-            return JsonResponse({
-                'error': f'OpenRouter API Fehler: {response.status_code}',
-                'message': error_message,
-                'details': error_details[:500]  # Nur ersten 500 Zeichen
-            }, status=500)
-
-        result = response.json()
-
-        # AI-Antwort extrahieren
-        ai_response = result['choices'][0]['message']['content']
-
-        # JSON aus der Antwort extrahieren
-        # Manchmal gibt die AI zusätzlichen Text zurück, also suchen wir nach dem JSON-Block
-        json_match = re.search(r'\{[\s\S]*\}', ai_response)
-
-        if json_match:
-            extracted_data = json.loads(json_match.group())
-        else:
-            extracted_data = json.loads(ai_response)
-
-        return JsonResponse({
-            'success': True,
-            'data': extracted_data
-        })
-
-    except json.JSONDecodeError as e:
-        return JsonResponse({
-            'error': 'Fehler beim Parsen der AI-Antwort',
-            'details': str(e),
-            'raw_response': ai_response if 'ai_response' in locals() else None
-        }, status=500)
-    except requests.RequestException as e:
-        return JsonResponse({
-            'error': 'Fehler bei der Kommunikation mit OpenRouter',
-            'details': str(e)
-        }, status=500)
-    except Exception as e:
-        return JsonResponse({
-            'error': 'Unerwarteter Fehler',
-            'details': str(e)
-        }, status=500)
+    return JsonResponse({'ausfuehrung_id': ausfuehrung.id, **ausfuehrung.ergebnis_daten})
@@ -18,12 +18,9 @@ from apps.notarstellen.models import Notarstelle
 logger = logging.getLogger(__name__)
 
 try:
-    from reportlab.lib.pagesizes import A4
     from reportlab.lib.units import cm
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib import colors
+    from reportlab.platypus import Paragraph, Spacer
+    from apps.kern import pdf
     REPORTLAB_AVAILABLE = True
 except ImportError:
     REPORTLAB_AVAILABLE = False
@@ -126,67 +123,26 @@ class StammblattPDFEinzelnService(BaseService):
         Returns:
             BytesIO-Buffer mit PDF-Inhalt
         """
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#1a1a1a'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=12,
-            spaceBefore=20
-        )
-
-        # Content-Elemente
-        elements = []
+        stile = pdf.stile()
+        abschnitt = stile['Abschnitt']
 
         # Titel
-        elements.append(Paragraph("Stammblatt Notariatskandidat", title_style))
-        elements.append(Spacer(1, 0.5*cm))
+        elements = pdf.kopf(
+            "Stammblatt Notariatskandidat", farbe='#1a1a1a', groesse=18, zentriert=True, abstand=30
+        )
 
         # Persönliche Daten
-        elements.append(Paragraph("Persönliche Daten", heading_style))
-
-        personal_data = [
+        elements.append(Paragraph("Persönliche Daten", abschnitt))
+        elements.append(pdf.schluessel_wert_tabelle([
             ['Name:', anwaerter.get_voller_name()],
             ['Titel:', anwaerter.titel or '-'],
             ['E-Mail:', anwaerter.email or '-'],
             ['Telefon:', anwaerter.telefon or '-'],
-        ]
-
-        personal_table = Table(personal_data, colWidths=[5*cm, 12*cm])
-        personal_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2c3e50')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
         ]))
-        elements.append(personal_table)
         elements.append(Spacer(1, 0.5*cm))
 
         # Status & Wartezeit
-        elements.append(Paragraph("Status & Wartezeit", heading_style))
+        elements.append(Paragraph("Status & Wartezeit", abschnitt))
 
         wartezeit_daten = []
         if anwaerter.zugelassen_am:
@@ -204,22 +160,12 @@ class StammblattPDFEinzelnService(BaseService):
 
         wartezeit_daten.append(['Aktiv:', 'Ja' if anwaerter.ist_aktiv else 'Nein'])
 
-        wartezeit_table = Table(wartezeit_daten, colWidths=[5*cm, 12*cm])
-        wartezeit_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2c3e50')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(wartezeit_table)
+        elements.append(pdf.schluessel_wert_tabelle(wartezeit_daten))
         elements.append(Spacer(1, 0.5*cm))
 
         # Betreuender Notar
         if anwaerter.betreuender_notar:
-            elements.append(Paragraph("Betreuender Notar", heading_style))
+            elements.append(Paragraph("Betreuender Notar", abschnitt))
 
             notar = anwaerter.betreuender_notar
             notar_daten = [
@@ -231,42 +177,18 @@ class StammblattPDFEinzelnService(BaseService):
             if notar.notarstelle:
                 notar_daten.append(['Notarstelle:', str(notar.notarstelle)])
 
-            notar_table = Table(notar_daten, colWidths=[5*cm, 12*cm])
-            notar_table.setStyle(TableStyle([
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 11),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2c3e50')),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            elements.append(notar_table)
+            elements.append(pdf.schluessel_wert_tabelle(notar_daten))
             elements.append(Spacer(1, 0.5*cm))
 
         # Notizen
         if anwaerter.notiz:
-            elements.append(Paragraph("Notizen", heading_style))
-            notiz_text = Paragraph(anwaerter.notiz.replace('\n', '<br/>'), styles['Normal'])
-            elements.append(notiz_text)
+            elements.append(Paragraph("Notizen", abschnitt))
+            elements.append(Paragraph(anwaerter.notiz.replace('\n', '<br/>'), stile['Normal']))
 
         # Fußzeile
-        elements.append(Spacer(1, 1*cm))
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=colors.grey,
-            alignment=TA_CENTER
-        )
-        footer_text = f"Erstellt am {timezone.now().strftime('%d.%m.%Y um %H:%M Uhr')} | Notariatskammer"
-        elements.append(Paragraph(footer_text, footer_style))
-
-        # PDF bauen
-        doc.build(elements)
-        buffer.seek(0)
+        elements.extend(pdf.fuss('Notariatskammer', zentriert=True))
 
-        return buffer
+        return io.BytesIO(pdf.erstellen(elements))
 
 
 @service(
@@ -464,60 +386,25 @@ class BesetzungsvorschlagService(BaseService):
         empfehlung: str
     ) -> io.BytesIO:
         """Erstellt das PDF-Dokument für den Besetzungsvorschlag."""
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#1a1a1a'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=12,
-            spaceBefore=20
-        )
-
-        elements = []
+        stile = pdf.stile()
+        abschnitt = stile['Abschnitt']
 
         # Titel
-        elements.append(Paragraph("Besetzungsvorschlag", title_style))
-        elements.append(Spacer(1, 0.5*cm))
+        elements = pdf.kopf(
+            "Besetzungsvorschlag", farbe='#1a1a1a', groesse=18, zentriert=True, abstand=30
+        )
 
         # Notarstelle
-        elements.append(Paragraph("Zu besetzende Notarstelle", heading_style))
-        notarstelle_daten = [
+        elements.append(Paragraph("Zu besetzende Notarstelle", abschnitt))
+        elements.append(pdf.schluessel_wert_tabelle([
             ['Bezeichnung:', notarstelle.bezeichnung],
             ['Name:', notarstelle.name],
             ['Ort:', notarstelle.stadt or '-'],
-        ]
-        notarstelle_table = Table(notarstelle_daten, colWidths=[5*cm, 12*cm])
-        notarstelle_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
         ]))
-        elements.append(notarstelle_table)
         elements.append(Spacer(1, 1*cm))
 
         # Bewerber-Vergleichstabelle
-        elements.append(Paragraph("Bewerber im Vergleich", heading_style))
+        elements.append(Paragraph("Bewerber im Vergleich", abschnitt))
 
         # Tabellendaten
         table_data = [
@@ -543,50 +430,22 @@ class BesetzungsvorschlagService(BaseService):
                 notar_text
             ])
 
-        bewerber_table = Table(table_data, colWidths=[2*cm, 5*cm, 4*cm, 6*cm])
-        bewerber_table.setStyle(TableStyle([
-            # Header
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            # Body
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # Rang zentriert
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            # Zebra-Streifen
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-            # Rahmen
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        bewerber_table = pdf.datentabelle(
+            table_data[0], table_data[1:],
+            stil=pdf.daten_tabellenstil(farbe=pdf.DUNKEL, schrift=10, kopf_schrift=11, abstand=8),
+            spaltenbreiten=[2*cm, 5*cm, 4*cm, 6*cm]
+        )
+        bewerber_table.setStyle([('ALIGN', (0, 1), (0, -1), 'CENTER')])  # Rang zentriert
         elements.append(bewerber_table)
         elements.append(Spacer(1, 1*cm))
 
         # Empfehlung
         if empfehlung:
-            elements.append(Paragraph("Empfehlung der Kammer", heading_style))
-            empfehlung_para = Paragraph(empfehlung.replace('\n', '<br/>'), styles['Normal'])
-            elements.append(empfehlung_para)
+            elements.append(Paragraph("Empfehlung der Kammer", abschnitt))
+            elements.append(Paragraph(empfehlung.replace('\n', '<br/>'), stile['Normal']))
             elements.append(Spacer(1, 0.5*cm))
 
         # Fußzeile
-        elements.append(Spacer(1, 1*cm))
-        footer_style = ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=colors.grey,
-            alignment=TA_CENTER
-        )
-        footer_text = f"Erstellt am {timezone.now().strftime('%d.%m.%Y um %H:%M Uhr')} | Notariatskammer"
-        elements.append(Paragraph(footer_text, footer_style))
-
-        # PDF bauen
-        doc.build(elements)
-        buffer.seek(0)
+        elements.extend(pdf.fuss('Notariatskammer', zentriert=True))
 
-        return buffer
+        return io.BytesIO(pdf.erstellen(elements))
@@ -1,14 +1,15 @@
 """
 Workflow-Services für Verwaltungsakte.
 """
-from typing import Dict, Any
+from datetime import date
+from typing import Dict, Any, List, Tuple
 from django.db import transaction
 import logging
 
 from apps.services.base import BaseService, service
 from apps.personen.models import NotarAnwaerter, Notar
 from apps.notarstellen.models import Notarstelle
-from apps.personen.services import anwaerter_zu_notar_befoerdern
+from apps.personen.services import anwaerter_zu_notar_befoerdern, anwaerter_zu_notar_befoerdern_batch
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,12 @@ class AnwaerterZuNotarBefoerdernService(BaseService):
     """
     Befördert einen Notariatskandidat zum Notar.
 
+    Batch-Modus: Statt anwaerter_id/notarstelle_id eine Liste
+    `befoerderungen` mit Dicts {anwaerter_id, notarstelle_id, bestellt_am}
+    übergeben (z.B. nach einer Präsidiumssitzung). Alle Beförderungen
+    laufen in einer Transaktion, das Ergebnis enthält pro Eintrag Erfolg
+    oder Fehlermeldung.
+
     ⚠️ WICHTIG: Diese Aktion kann nicht rückgängig gemacht werden!
     """
 
@@ -47,6 +54,10 @@ class AnwaerterZuNotarBefoerdernService(BaseService):
 
     def validiere_parameter(self) -> None:
         """Validiert die erforderlichen Parameter."""
+        if self.hole_parameter('befoerderungen', required=False) is not None:
+            self._befoerderungen = self._befoerderungen_laden()
+            return
+
         anwaerter_id = self.hole_parameter('anwaerter_id', required=True)
         notarstelle_id = self.hole_parameter('notarstelle_id', required=True)
 
@@ -75,9 +86,53 @@ class AnwaerterZuNotarBefoerdernService(BaseService):
                 f"{notarstelle.aktueller_notar.get_voller_name()}"
             )
 
+    def _befoerderungen_laden(self) -> List[Tuple[NotarAnwaerter, Notarstelle, Any]]:
+        """Lädt Kandidaten und Notarstellen des Batch-Modus mit je einer Query."""
+        eintraege = self.hole_parameter('befoerderungen')
+        if not eintraege:
+            raise ValueError("Die Liste 'befoerderungen' ist leer")
+
+        anwaerter = NotarAnwaerter.objects.in_bulk([e['anwaerter_id'] for e in eintraege])
+        notarstellen = Notarstelle.objects.in_bulk([e['notarstelle_id'] for e in eintraege])
+
+        befoerderungen = []
+        for eintrag in eintraege:
+            if eintrag['anwaerter_id'] not in anwaerter:
+                raise ValueError(f"Notariatskandidat mit ID {eintrag['anwaerter_id']} nicht gefunden")
+            if eintrag['notarstelle_id'] not in notarstellen:
+                raise ValueError(f"Notarstelle mit ID {eintrag['notarstelle_id']} nicht gefunden")
+            bestellt_am = eintrag.get('bestellt_am')
+            if isinstance(bestellt_am, str):
+                bestellt_am = date.fromisoformat(bestellt_am)
+            befoerderungen.append(
+                (anwaerter[eintrag['anwaerter_id']], notarstellen[eintrag['notarstelle_id']], bestellt_am)
+            )
+        return befoerderungen
+
+    def _batch_ausfuehren(self) -> Dict[str, Any]:
+        """Führt alle Beförderungen des Batch-Modus in einer Transaktion durch."""
+        befoerderungen = getattr(self, '_befoerderungen', None) or self._befoerderungen_laden()
+        ergebnisse = anwaerter_zu_notar_befoerdern_batch(befoerderungen, erstellt_von=self.benutzer)
+        erfolgreich = sum(1 for e in ergebnisse if e.erfolg)
+
+        logger.info(
+            f"{erfolgreich} von {len(ergebnisse)} Kandidaten zum Notar befördert "
+            f"(Notar-IDs: {', '.join(e.notar.notar_id for e in ergebnisse if e.erfolg) or '-'})"
+        )
+
+        return {
+            'befoerderungen': [e.als_dict() for e in ergebnisse],
+            'anzahl_erfolgreich': erfolgreich,
+            'anzahl_fehlgeschlagen': len(ergebnisse) - erfolgreich,
+            'erfolg': erfolgreich == len(ergebnisse)
+        }
+
     @transaction.atomic
     def ausfuehren(self) -> Dict[str, Any]:
         """Führt die Beförderung durch."""
+        if self.hole_parameter('befoerderungen', required=False) is not None:
+            return self._batch_ausfuehren()
+
         anwaerter_id = self.hole_parameter('anwaerter_id')
         notarstelle_id = self.hole_parameter('notarstelle_id')
         bestellt_am = self.hole_parameter('bestellt_am', required=False)
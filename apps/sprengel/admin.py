@@ -53,6 +53,10 @@ class SprengelAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Zähler für Liste und Statistik in derselben Abfrage laden."""
+        return super().get_queryset(request).mit_zaehlern()
+
     def get_readonly_fields(self, request, obj=None):
         """Bezeichnung wird nach Erstellung read-only."""
         if obj:  # Bearbeiten
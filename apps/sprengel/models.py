@@ -2,9 +2,31 @@
 Models für Sprengel-Verwaltung.
 """
 from django.db import models
+from django.db.models import OuterRef
+from apps.kern.abfragen import anzahl_unterabfrage
+from apps.kern.ids import naechste_id
 from apps.kern.models import ZeitstempelModel, AktivModel
 
 
+class SprengelQuerySet(models.QuerySet):
+    """QuerySet für Sprengel."""
+
+    def mit_zaehlern(self):
+        """
+        Annotiert die Zähler für anzahl_notarstellen und anzahl_aktive_notarstellen.
+
+        Die Properties liefern dann die Werte aus derselben Abfrage, statt je
+        Sprengel eine eigene COUNT-Abfrage abzusetzen.
+        """
+        from apps.notarstellen.models import Notarstelle
+
+        notarstellen = Notarstelle.objects.filter(sprengel=OuterRef('pk'))
+        return self.annotate(
+            _anzahl_notarstellen=anzahl_unterabfrage(notarstellen),
+            _anzahl_aktive_notarstellen=anzahl_unterabfrage(notarstellen.filter(ist_aktiv=True)),
+        )
+
+
 class Sprengel(ZeitstempelModel, AktivModel):
     """
     Notarsprengel / Amtssprengel - gerichtlicher Zuständigkeitsbereich.
@@ -55,6 +77,8 @@ class Sprengel(ZeitstempelModel, AktivModel):
         help_text='Zusätzliche Informationen zum Sprengel'
     )
 
+    objects = SprengelQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Sprengel'
         verbose_name_plural = 'Sprengel'
@@ -69,27 +93,19 @@ class Sprengel(ZeitstempelModel, AktivModel):
 
     @classmethod
     def generate_next_id(cls):
-        """Generiert die nächste Sprengel-ID im Format: SPR-000001"""
-        import re
-
-        last = cls.objects.filter(
-            bezeichnung__startswith='SPR-'
-        ).order_by('-bezeichnung').first()
-
-        if last:
-            match = re.search(r'-(\d+)$', last.bezeichnung)
-            nummer = int(match.group(1)) + 1 if match else 1
-        else:
-            nummer = 1
-
-        return f"SPR-{nummer:06d}"
+        """Reserviert die nächste Sprengel-ID im Format: SPR-000001"""
+        return naechste_id('SPR')
 
     @property
     def anzahl_notarstellen(self):
-        """Anzahl der Notarstellen in diesem Sprengel."""
+        """Anzahl der Notarstellen in diesem Sprengel (annotiert per mit_zaehlern())."""
+        if hasattr(self, '_anzahl_notarstellen'):
+            return self._anzahl_notarstellen
         return self.notarstellen.count()
 
     @property
     def anzahl_aktive_notarstellen(self):
-        """Anzahl der aktiven Notarstellen in diesem Sprengel."""
+        """Anzahl der aktiven Notarstellen in diesem Sprengel (annotiert per mit_zaehlern())."""
+        if hasattr(self, '_anzahl_aktive_notarstellen'):
+            return self._anzahl_aktive_notarstellen
         return self.notarstellen.filter(ist_aktiv=True).count()
@@ -0,0 +1,161 @@
+"""
+Prognose von Abgängen und Nachbesetzungen pro Sprengel und Jahr.
+
+Für die Planung von Besetzungsverfahren wird je Sprengel und Jahr
+gegenübergestellt:
+
+- Abgänge: aktive Notare, deren Ende (ende_datum) in das Jahr fällt oder
+  die - wenn max_amtsdauer angegeben ist - in dem Jahr die maximale
+  Amtsdauer ab Bestellung erreichen. Das Personenregister kennt kein
+  Geburtsdatum; eine Altersgrenze lässt sich daher nur über die Amtsdauer
+  annähern.
+- Kandidaten: aktive Notariatskandidaten, die im Jahr zur Bestellung
+  anstehen - laut geplanter Bestellung, sonst geschätzt als zugelassen_am
+  plus ausbildung_jahre.
+
+Bereits fällige Einträge (Jahr vor dem Prognosebeginn) zählen im ersten
+Jahr.
+
+Die benötigten Spalten werden mit je einer Query (values_list) geladen und
+in kompakte Arrays (Sprengel-Index, Jahres-Index) übersetzt; gezählt wird
+in flachen Zählerlisten (Sprengel x Jahr) in einem Durchlauf pro Array.
+"""
+from array import array
+from datetime import date
+
+from django.db.models import Q
+
+from apps.personen.models import Notar, NotarAnwaerter
+
+from .models import Sprengel
+
+OHNE_SPRENGEL = ('', 'Ohne Sprengel')
+
+# Geschätzte Dauer von der Zulassung bis zur Bestellung, wenn keine
+# geplante Bestellung eingetragen ist
+AUSBILDUNG_JAHRE = 7
+
+
+class PrognoseZeile:
+    """Prognose für einen Sprengel in einem Jahr."""
+
+    def __init__(self, sprengel_bezeichnung, sprengel_name, jahr, bestand, abgaenge, kandidaten, saldo_kumuliert):
+        self.sprengel_bezeichnung = sprengel_bezeichnung
+        self.sprengel_name = sprengel_name
+        self.jahr = jahr
+        self.bestand = bestand  # aktive Notare zu Jahresbeginn (ohne Nachbesetzungen)
+        self.abgaenge = abgaenge
+        self.kandidaten = kandidaten
+        self.saldo_kumuliert = saldo_kumuliert
+
+    @property
+    def saldo(self):
+        """Kandidaten minus Abgänge im Jahr; negativ = mehr Vakanzen als Kandidaten."""
+        return self.kandidaten - self.abgaenge
+
+    def __str__(self):
+        sprengel = self.sprengel_bezeichnung or self.sprengel_name
+        return (
+            f'{sprengel} {self.jahr}: {self.abgaenge} Abgänge, {self.kandidaten} Kandidaten '
+            f'(Saldo {self.saldo:+d}, kumuliert {self.saldo_kumuliert:+d})'
+        )
+
+
+def _jahres_indizes(jahre, erstes_jahr, anzahl_jahre):
+    """
+    Übersetzt Jahre in Indizes 0..anzahl_jahre-1; frühere Jahre werden auf 0
+    gesetzt, spätere (und fehlende) auf -1 (= außerhalb der Prognose).
+    """
+    letztes = erstes_jahr + anzahl_jahre - 1
+    return array('i', (
+        -1 if jahr is None or jahr > letztes else max(jahr - erstes_jahr, 0)
+        for jahr in jahre
+    ))
+
+
+def _zaehlen(sprengel_indizes, jahres_indizes, anzahl_jahre, anzahl_sprengel):
+    """Zählt (Sprengel, Jahr)-Paare in eine flache Liste mit anzahl_sprengel * anzahl_jahre Feldern."""
+    zaehler = [0] * (anzahl_sprengel * anzahl_jahre)
+    for sprengel_index, jahres_index in zip(sprengel_indizes, jahres_indizes):
+        if jahres_index >= 0:
+            zaehler[sprengel_index * anzahl_jahre + jahres_index] += 1
+    return zaehler
+
+
+def prognose(erstes_jahr=None, anzahl_jahre=10, sprengel=None, max_amtsdauer=None,
+             ausbildung_jahre=AUSBILDUNG_JAHRE):
+    """
+    Berechnet Abgänge und anstehende Bestellungen pro Sprengel und Jahr.
+
+    Args:
+        erstes_jahr: Erstes Prognosejahr (Standard: laufendes Jahr)
+        anzahl_jahre: Anzahl Jahre
+        sprengel: Optional ein Sprengel; sonst alle (plus "Ohne Sprengel", falls betroffen)
+        max_amtsdauer: Optional maximale Amtsdauer in Jahren ab Bestellung
+        ausbildung_jahre: Geschätzte Jahre bis zur Bestellung ohne geplante Bestellung
+
+    Returns:
+        list[PrognoseZeile], sortiert nach Sprengel und Jahr
+    """
+    erstes_jahr = erstes_jahr or date.today().year
+    stichtag = date(erstes_jahr, 1, 1)
+
+    notare = Notar.objects.filter(Q(ende_datum__isnull=True) | Q(ende_datum__gte=stichtag), ist_aktiv=True)
+    kandidaten = NotarAnwaerter.objects.filter(ist_aktiv=True, ende_datum__isnull=True)
+    sprengel_liste = Sprengel.objects.order_by('bezeichnung')
+    if sprengel is not None:
+        notare = notare.filter(notarstelle__sprengel=sprengel)
+        kandidaten = kandidaten.filter(notarstelle__sprengel=sprengel)
+        sprengel_liste = sprengel_liste.filter(pk=sprengel.pk)
+
+    sprengel_namen = list(sprengel_liste.values_list('bezeichnung', 'name'))
+    index = {bezeichnung: i for i, (bezeichnung, _) in enumerate(sprengel_namen)}
+    ohne_sprengel = len(sprengel_namen)
+
+    # Notare: Sprengel und Jahr des Abgangs
+    notar_sprengel, notar_jahre = array('i'), []
+    for sprengel_id, bestellt_am, ende_datum in notare.values_list(
+        'notarstelle__sprengel_id', 'bestellt_am', 'ende_datum'
+    ).iterator():
+        notar_sprengel.append(index.get(sprengel_id, ohne_sprengel))
+        jahr = ende_datum.year if ende_datum else None
+        if max_amtsdauer:
+            grenze = bestellt_am.year + max_amtsdauer
+            jahr = grenze if jahr is None else min(jahr, grenze)
+        notar_jahre.append(jahr)
+
+    # Kandidaten: Sprengel und (geplantes oder geschätztes) Jahr der Bestellung
+    kandidat_sprengel, kandidat_jahre = array('i'), []
+    for sprengel_id, geplante_bestellung, zugelassen_am in kandidaten.values_list(
+        'notarstelle__sprengel_id', 'geplante_bestellung', 'zugelassen_am'
+    ).iterator():
+        kandidat_sprengel.append(index.get(sprengel_id, ohne_sprengel))
+        kandidat_jahre.append(
+            geplante_bestellung.year if geplante_bestellung else zugelassen_am.year + ausbildung_jahre
+        )
+
+    anzahl_sprengel = len(sprengel_namen) + 1
+    abgaenge = _zaehlen(
+        notar_sprengel, _jahres_indizes(notar_jahre, erstes_jahr, anzahl_jahre), anzahl_jahre, anzahl_sprengel
+    )
+    zugaenge = _zaehlen(
+        kandidat_sprengel, _jahres_indizes(kandidat_jahre, erstes_jahr, anzahl_jahre), anzahl_jahre, anzahl_sprengel
+    )
+    bestand = [0] * anzahl_sprengel
+    for sprengel_index in notar_sprengel:
+        bestand[sprengel_index] += 1
+
+    if bestand[ohne_sprengel] or any(zugaenge[ohne_sprengel * anzahl_jahre:]):
+        sprengel_namen.append(OHNE_SPRENGEL)
+
+    zeilen = []
+    for s, (bezeichnung, name) in enumerate(sprengel_namen):
+        aktuell, saldo_kumuliert = bestand[s], 0
+        for j in range(anzahl_jahre):
+            feld = s * anzahl_jahre + j
+            saldo_kumuliert += zugaenge[feld] - abgaenge[feld]
+            zeilen.append(PrognoseZeile(
+                bezeichnung, name, erstes_jahr + j, aktuell, abgaenge[feld], zugaenge[feld], saldo_kumuliert
+            ))
+            aktuell -= abgaenge[feld]
+    return zeilen
@@ -4,7 +4,8 @@ Views für Sprengel-Verwaltung.
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q, Count
+from django.db.models import Q
+from apps.kern import ids
 from .models import Sprengel
 from .forms import SprengelForm
 
@@ -17,10 +18,8 @@ def sprengel_liste_view(request):
     status_filter = request.GET.get('status', '')
     bundesland_filter = request.GET.get('bundesland', '')
 
-    # Basis-Queryset
-    sprengel = Sprengel.objects.annotate(
-        anzahl_notarstellen_count=Count('notarstellen', filter=Q(notarstellen__ist_aktiv=True))
-    ).order_by('bezeichnung')
+    # Basis-Queryset, Zähler pro Sprengel in derselben Abfrage
+    sprengel = Sprengel.objects.mit_zaehlern().order_by('bezeichnung')
 
     # Suche
     if search:
@@ -67,7 +66,7 @@ def sprengel_liste_view(request):
 @login_required
 def sprengel_detail_view(request, bezeichnung):
     """Zeigt Details eines Sprengels."""
-    sprengel = get_object_or_404(Sprengel, bezeichnung=bezeichnung)
+    sprengel = get_object_or_404(Sprengel.objects.mit_zaehlern(), bezeichnung=bezeichnung)
 
     # Notarstellen in diesem Sprengel
     notarstellen = sprengel.notarstellen.all().order_by('name')
@@ -87,12 +86,12 @@ def sprengel_erstellen_view(request):
         form = SprengelForm(request.POST)
         if form.is_valid():
             sprengel = form.save()
+            ids.zaehler_anheben('SPR', sprengel.bezeichnung)
             messages.success(request, f'Sprengel "{sprengel.name}" wurde erfolgreich erstellt.')
             return redirect('sprengel_detail', bezeichnung=sprengel.bezeichnung)
     else:
-        # Auto-generiere die nächste ID
-        next_id = Sprengel.generate_next_id()
-        form = SprengelForm(initial={'bezeichnung': next_id})
+        # Nächste Bezeichnung nur anzeigen; der Zähler wird erst nach dem Speichern angehoben
+        form = SprengelForm(initial={'bezeichnung': ids.vorschau_id('SPR')})
 
     context = {
         'form': form,
@@ -111,6 +110,7 @@ def sprengel_bearbeiten_view(request, bezeichnung):
         form = SprengelForm(request.POST, instance=sprengel)
         if form.is_valid():
             sprengel = form.save()
+            ids.zaehler_anheben('SPR', sprengel.bezeichnung)
             messages.success(request, f'Sprengel "{sprengel.name}" wurde erfolgreich aktualisiert.')
             return redirect('sprengel_detail', bezeichnung=sprengel.bezeichnung)
     else:
@@ -128,10 +128,10 @@ def sprengel_bearbeiten_view(request, bezeichnung):
 @login_required
 def sprengel_loeschen_view(request, bezeichnung):
     """Löscht einen Sprengel."""
-    sprengel = get_object_or_404(Sprengel, bezeichnung=bezeichnung)
+    sprengel = get_object_or_404(Sprengel.objects.mit_zaehlern(), bezeichnung=bezeichnung)
 
     # Prüfen, ob Sprengel Notarstellen hat
-    if sprengel.notarstellen.exists():
+    if sprengel.anzahl_notarstellen:
         messages.error(
             request,
             f'Sprengel "{sprengel.name}" kann nicht gelöscht werden, da noch {sprengel.anzahl_notarstellen} Notarstelle(n) zugeordnet sind.'
@@ -0,0 +1,247 @@
+"""
+Regelbasierte Zuordnung von Notarstellen zu Sprengeln.
+
+Eine Regel ordnet entweder einen PLZ-Bereich oder eine Stadt einem Sprengel
+zu. Die Regeln kommen aus einer Tabelle (CSV/Excel, siehe
+regeln_aus_zeilen) oder aus der eingebauten STADT_REGELN-Tabelle.
+
+Die Zuordnung läuft mengenbasiert: alle Sprengel-Bezeichnungen werden
+einmal geladen, die Notarstellen in einem Durchlauf mit den Regeln
+verglichen und nur geänderte Zeilen blockweise geschrieben (ein UPDATE
+pro Ziel-Sprengel und Block). PLZ-Regeln gehen Stadt-Regeln vor, weil sie
+genauer sind.
+"""
+import bisect
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notarstellen.models import Notarstelle
+
+from .models import Sprengel
+
+# Eingebaute Zuordnung Stadt -> Sprengel (basierend auf Gerichtsbezirk)
+STADT_REGELN = {
+    # Wien - verteilen auf verschiedene Sprengel
+    'Wien': 'SPR-000001',  # Wien Innere Stadt als Standard
+    # Niederösterreich
+    'St. Pölten': 'SPR-000004',
+    'Wiener Neustadt': 'SPR-000005',
+    'Baden': 'SPR-000006',
+    'Krems': 'SPR-000007',
+    'Amstetten': 'SPR-000004',  # → St. Pölten
+    # Oberösterreich
+    'Linz': 'SPR-000008',
+    'Wels': 'SPR-000009',
+    'Steyr': 'SPR-000010',
+    'Traun': 'SPR-000008',  # → Linz
+    # Steiermark
+    'Graz': 'SPR-000011',
+    'Leoben': 'SPR-000012',
+    'Kapfenberg': 'SPR-000012',  # → Leoben
+    # Kärnten
+    'Klagenfurt': 'SPR-000013',
+    'Villach': 'SPR-000014',
+    'Wolfsberg': 'SPR-000013',  # → Klagenfurt
+    'Spittal an der Drau': 'SPR-000014',  # → Villach
+    # Salzburg
+    'Salzburg': 'SPR-000015',
+    'Hallein': 'SPR-000016',
+    # Tirol
+    'Innsbruck': 'SPR-000017',
+    'Kufstein': 'SPR-000018',
+    'Schwaz': 'SPR-000019',
+    # Vorarlberg
+    'Bregenz': 'SPR-000020',
+    'Feldkirch': 'SPR-000021',
+    'Dornbirn': 'SPR-000022',
+    # Burgenland
+    'Eisenstadt': 'SPR-000023',
+}
+
+
+class RegelFehler(Exception):
+    """Die Zuordnungsregeln sind ungültig oder widersprüchlich."""
+
+
+def _stadt_schluessel(stadt):
+    """Vergleichbare Form eines Ortsnamens: ohne Mehrfach-Leerzeichen, Groß-/Kleinschreibung egal."""
+    return ' '.join((stadt or '').split()).casefold()
+
+
+def _plz_zahl(plz):
+    """PLZ als Zahl, None wenn sie nicht rein numerisch ist."""
+    plz = (plz or '').strip()
+    return int(plz) if plz.isdigit() else None
+
+
+class Regel:
+    """Eine Zuordnungsregel: PLZ-Bereich (von/bis einschließlich) oder Stadt -> Sprengel."""
+
+    def __init__(self, sprengel_id, stadt='', plz_von=None, plz_bis=None, herkunft=''):
+        self.sprengel_id = sprengel_id
+        self.stadt = stadt
+        self.plz_von = plz_von
+        self.plz_bis = plz_bis
+        self.herkunft = herkunft
+
+    def __str__(self):
+        if self.plz_von is not None:
+            ziel = f'PLZ {self.plz_von}' if self.plz_von == self.plz_bis else f'PLZ {self.plz_von}-{self.plz_bis}'
+        else:
+            ziel = f'Stadt "{self.stadt}"'
+        return f'{ziel} → {self.sprengel_id}' + (f' ({self.herkunft})' if self.herkunft else '')
+
+
+def standard_regeln():
+    """Die eingebauten Stadt-Regeln."""
+    return [Regel(sprengel_id, stadt=stadt, herkunft='Standard') for stadt, sprengel_id in STADT_REGELN.items()]
+
+
+def regeln_aus_zeilen(zeilen):
+    """
+    Liest Regeln aus Tabellenzeilen (dicts, z.B. aus importer.zeilen_lesen).
+
+    Spalten:
+        sprengel: Sprengel-Bezeichnung (Pflicht)
+        stadt: Ortsname, oder
+        plz: einzelne PLZ ("1010") oder Bereich ("1010-1239"), oder
+        plz_von / plz_bis: Bereichsgrenzen (einschließlich)
+
+    Raises:
+        RegelFehler: bei unvollständigen oder ungültigen Zeilen
+    """
+    regeln = []
+    for nummer, zeile in enumerate(zeilen, start=2):
+        herkunft = f'Zeile {nummer}'
+        sprengel_id = str(zeile.get('sprengel') or '').strip()
+        stadt = str(zeile.get('stadt') or '').strip()
+        plz = str(zeile.get('plz') or '').strip()
+        von = str(zeile.get('plz_von') or '').strip()
+        bis = str(zeile.get('plz_bis') or '').strip()
+        if not sprengel_id:
+            raise RegelFehler(f'{herkunft}: Spalte "sprengel" fehlt')
+        if plz:
+            von, _, bis = plz.partition('-')
+        if von or bis:
+            plz_von, plz_bis = _plz_zahl(von), _plz_zahl(bis or von)
+            if plz_von is None or plz_bis is None or plz_von > plz_bis:
+                raise RegelFehler(f'{herkunft}: ungültiger PLZ-Bereich "{von}-{bis or von}"')
+            regeln.append(Regel(sprengel_id, plz_von=plz_von, plz_bis=plz_bis, herkunft=herkunft))
+        elif stadt:
+            regeln.append(Regel(sprengel_id, stadt=stadt, herkunft=herkunft))
+        else:
+            raise RegelFehler(f'{herkunft}: weder "stadt" noch "plz" angegeben')
+    return regeln
+
+
+class Regelwerk:
+    """
+    Regeln, aufbereitet für schnelle Abfragen.
+
+    Stadt-Regeln liegen in einem dict, PLZ-Bereiche sortiert in einer Liste
+    (Suche per bisect). Widersprüchliche Regeln - dieselbe Stadt mit
+    verschiedenen Sprengeln oder überlappende PLZ-Bereiche - werden
+    abgelehnt.
+    """
+
+    def __init__(self, regeln):
+        self.regeln = list(regeln)
+        self.staedte = {}
+        bereiche = []
+        for regel in self.regeln:
+            if regel.plz_von is not None:
+                bereiche.append(regel)
+                continue
+            schluessel = _stadt_schluessel(regel.stadt)
+            vorher = self.staedte.get(schluessel)
+            if vorher and vorher.sprengel_id != regel.sprengel_id:
+                raise RegelFehler(f'Widersprüchliche Regeln: {vorher} und {regel}')
+            self.staedte[schluessel] = regel
+
+        bereiche.sort(key=lambda regel: regel.plz_von)
+        for vorher, regel in zip(bereiche, bereiche[1:]):
+            if regel.plz_von <= vorher.plz_bis:
+                raise RegelFehler(f'Überlappende PLZ-Bereiche: {vorher} und {regel}')
+        self.bereiche = bereiche
+        self._bereich_anfaenge = [regel.plz_von for regel in bereiche]
+
+    def regel_fuer(self, plz, stadt):
+        """Passende Regel für eine Notarstelle (PLZ vor Stadt), None wenn keine passt."""
+        plz_zahl = _plz_zahl(plz)
+        if plz_zahl is not None and self.bereiche:
+            index = bisect.bisect_right(self._bereich_anfaenge, plz_zahl) - 1
+            if index >= 0 and plz_zahl <= self.bereiche[index].plz_bis:
+                return self.bereiche[index]
+        return self.staedte.get(_stadt_schluessel(stadt))
+
+
+class ZuordnungsErgebnis:
+    """Übersicht einer Zuordnung: Änderungen und nicht zuordenbare Notarstellen."""
+
+    def __init__(self):
+        self.aenderungen = []  # (Notarstelle, alte Sprengel-ID, Regel)
+        self.unveraendert = 0
+        self.beibehalten = 0  # hatten schon einen Sprengel, nicht überschrieben
+        self.ohne_regel = []  # Notarstellen
+        self.unbekannter_sprengel = []  # (Notarstelle, Regel)
+
+    @property
+    def nicht_zugeordnet(self):
+        return len(self.ohne_regel) + len(self.unbekannter_sprengel)
+
+
+def _speichern(aenderungen, chunk_size):
+    """
+    Schreibt die neuen Zuordnungen: pro Ziel-Sprengel ein UPDATE je Block von Bezeichnungen.
+
+    Da es nur wenige Sprengel gibt, ist das deutlich schneller als
+    bulk_update, das jede Zeile einzeln per CASE-Ausdruck setzt.
+    """
+    nach_sprengel = defaultdict(list)
+    for stelle, _, regel in aenderungen:
+        nach_sprengel[regel.sprengel_id].append(stelle.pk)
+    jetzt = timezone.now()
+    with transaction.atomic():
+        for sprengel_id, bezeichnungen in nach_sprengel.items():
+            for start in range(0, len(bezeichnungen), chunk_size):
+                Notarstelle.objects.filter(pk__in=bezeichnungen[start:start + chunk_size]).update(
+                    sprengel_id=sprengel_id, aktualisiert_am=jetzt
+                )
+
+
+def zuordnen(regelwerk, dry_run=False, ueberschreiben=False, chunk_size=1000):
+    """
+    Ordnet alle Notarstellen nach dem Regelwerk ihren Sprengeln zu.
+
+    Args:
+        regelwerk: Regelwerk
+        dry_run: Nur berechnen, nichts speichern
+        ueberschreiben: Auch Notarstellen neu zuordnen, die schon einen Sprengel haben
+        chunk_size: Zeilen pro Lese- und Schreibblock
+
+    Returns:
+        ZuordnungsErgebnis
+    """
+    sprengel_ids = set(Sprengel.objects.values_list('pk', flat=True))
+    ergebnis = ZuordnungsErgebnis()
+
+    notarstellen = Notarstelle.objects.only('bezeichnung', 'plz', 'stadt', 'sprengel').order_by('bezeichnung')
+    for stelle in notarstellen.iterator(chunk_size=chunk_size):
+        if stelle.sprengel_id and not ueberschreiben:
+            ergebnis.beibehalten += 1
+            continue
+        regel = regelwerk.regel_fuer(stelle.plz, stelle.stadt)
+        if regel is None:
+            ergebnis.ohne_regel.append(stelle)
+        elif regel.sprengel_id not in sprengel_ids:
+            ergebnis.unbekannter_sprengel.append((stelle, regel))
+        elif regel.sprengel_id == stelle.sprengel_id:
+            ergebnis.unveraendert += 1
+        else:
+            ergebnis.aenderungen.append((stelle, stelle.sprengel_id, regel))
+
+    if not dry_run and ergebnis.aenderungen:
+        _speichern(ergebnis.aenderungen, chunk_size)
+    return ergebnis
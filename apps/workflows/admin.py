@@ -2,14 +2,18 @@
 Admin-Konfiguration für Workflow-System.
 """
 from django.contrib import admin
-from django.utils.html import format_html
+from django.db.models import Count
+from django.utils.html import format_html, format_html_join
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import (
+    KennungSequenz,
     WorkflowTyp,
     WorkflowSchritt,
     WorkflowInstanz,
-    WorkflowSchrittInstanz
+    WorkflowSchrittInstanz,
+    WorkflowSchrittEreignis,
+    WorkflowSchrittStatistik
 )
 
 
@@ -48,14 +52,27 @@ class WorkflowTypAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Zählt Schritte und Instanzen per Annotation statt pro Zeile."""
+        return super().get_queryset(request).annotate(
+            _schritte_anzahl=Count('schritte', distinct=True),
+            _instanzen_anzahl=Count('instanzen', distinct=True)
+        )
+
+    def schritte_anzahl(self, obj):
+        """Zeigt Anzahl der Schritte."""
+        return obj._schritte_anzahl
+    schritte_anzahl.short_description = 'Schritte'
+    schritte_anzahl.admin_order_field = '_schritte_anzahl'
+
     def instanzen_anzahl(self, obj):
         """Zeigt Anzahl der Workflow-Instanzen."""
-        anzahl = obj.instanzen.count()
         return format_html(
             '<strong>{}</strong>',
-            anzahl
+            obj._instanzen_anzahl
         )
     instanzen_anzahl.short_description = 'Instanzen'
+    instanzen_anzahl.admin_order_field = '_instanzen_anzahl'
 
 
 @admin.register(WorkflowSchritt)
@@ -71,6 +88,7 @@ class WorkflowSchrittAdmin(admin.ModelAdmin):
         'email_vorlage_anzeige'
     ]
     list_filter = ['workflow_typ', 'ist_optional', 'service']
+    list_select_related = ['workflow_typ', 'service', 'email_vorlage']
     search_fields = ['name', 'beschreibung']
     ordering = ['workflow_typ', 'reihenfolge']
     readonly_fields = ['erstellt_am', 'aktualisiert_am']
@@ -120,6 +138,9 @@ class WorkflowSchrittInstanzInline(admin.TabularInline):
     fields = ['workflow_schritt', 'status', 'notizen']
     can_delete = False
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('workflow_schritt__workflow_typ')
+
     def has_add_permission(self, request, obj=None):
         """Schritte können nicht manuell hinzugefügt werden."""
         return False
@@ -141,6 +162,7 @@ class WorkflowInstanzAdmin(admin.ModelAdmin):
         'erstellt_am'
     ]
     list_filter = ['status', 'workflow_typ', 'erstellt_am']
+    list_select_related = ['workflow_typ', 'erstellt_von']
     search_fields = ['name', 'kennung']
     readonly_fields = ['kennung', 'jahr', 'laufende_nummer', 'erstellt_am', 'aktualisiert_am', 'archiviert_am', 'fortschritt_anzeige']
     date_hierarchy = 'erstellt_am'
@@ -167,6 +189,12 @@ class WorkflowInstanzAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Lädt die betroffenen Personen aller Zeilen mit je einer Query."""
+        return super().get_queryset(request).prefetch_related(
+            'betroffene_notare', 'betroffene_kandidaten'
+        )
+
     def status_display(self, obj):
         """Zeigt Status mit farbiger Badge."""
         farben = {
@@ -184,7 +212,7 @@ class WorkflowInstanzAdmin(admin.ModelAdmin):
 
     def fortschritt(self, obj):
         """Zeigt Fortschrittsbalken."""
-        prozent = obj.fortschritt_prozent()
+        prozent = obj.fortschritt_prozent
         return format_html(
             '<div style="width: 100px; background: #e9ecef; border-radius: 3px; overflow: hidden;">'
             '<div style="width: {}%; background: #0d6efd; color: white; text-align: center; '
@@ -197,21 +225,21 @@ class WorkflowInstanzAdmin(admin.ModelAdmin):
 
     def betroffene_personen_anzeige(self, obj):
         """Zeigt alle betroffenen Personen (Notare + Kandidaten)."""
-        personen = []
-        for notar in obj.betroffene_notare.all():
-            personen.append(f'🟠 {notar.get_voller_name()}')
-        for kandidat in obj.betroffene_kandidaten.all():
-            personen.append(f'🔵 {kandidat.get_voller_name()}')
+        personen = [
+            ('🟠', notar.get_voller_name()) for notar in obj.betroffene_notare.all()
+        ] + [
+            ('🔵', kandidat.get_voller_name()) for kandidat in obj.betroffene_kandidaten.all()
+        ]
         if not personen:
             return '-'
-        return format_html('<br>'.join(personen))
+        return format_html_join(mark_safe('<br>'), '{} {}', personen)
     betroffene_personen_anzeige.short_description = 'Betroffene Personen'
 
     def fortschritt_anzeige(self, obj):
         """Zeigt ausführliche Fortschrittsanzeige."""
-        prozent = obj.fortschritt_prozent()
-        alle_schritte = obj.schritt_instanzen.count()
-        abgeschlossen = obj.schritt_instanzen.filter(status='completed').count()
+        prozent = obj.fortschritt_prozent
+        alle_schritte = obj.schritte_gesamt
+        abgeschlossen = obj.schritte_erledigt
 
         return format_html(
             '<div style="margin-bottom: 10px;">'
@@ -241,8 +269,9 @@ class WorkflowSchrittInstanzAdmin(admin.ModelAdmin):
         'status_display'
     ]
     list_filter = ['status', 'workflow_schritt__workflow_typ']
+    list_select_related = ['workflow_instanz', 'workflow_schritt__workflow_typ']
     search_fields = ['workflow_instanz__name', 'workflow_schritt__name']
-    readonly_fields = ['erstellt_am', 'aktualisiert_am']
+    readonly_fields = ['offen_seit', 'abgeschlossen_am', 'erstellt_am', 'aktualisiert_am']
 
     fieldsets = (
         ('Zuordnung', {
@@ -252,7 +281,7 @@ class WorkflowSchrittInstanzAdmin(admin.ModelAdmin):
             'fields': ('status', 'notizen')
         }),
         ('Zeitstempel', {
-            'fields': ('erstellt_am', 'aktualisiert_am')
+            'fields': ('offen_seit', 'abgeschlossen_am', 'erstellt_am', 'aktualisiert_am')
         }),
     )
 
@@ -272,3 +301,57 @@ class WorkflowSchrittInstanzAdmin(admin.ModelAdmin):
     status_display.short_description = 'Status'
 
 
+@admin.register(KennungSequenz)
+class KennungSequenzAdmin(admin.ModelAdmin):
+    """Admin für die Sequenzen der Workflow-Kennungen."""
+
+    list_display = ['jahr', 'kuerzel', 'letzte_nummer']
+    list_filter = ['jahr']
+    search_fields = ['kuerzel']
+    readonly_fields = ['jahr', 'kuerzel']
+
+
+@admin.register(WorkflowSchrittEreignis)
+class WorkflowSchrittEreignisAdmin(admin.ModelAdmin):
+    """Admin für das Ereignis-Protokoll der Schritte (nur lesend)."""
+
+    list_display = ['zeitpunkt', 'typ', 'workflow_schritt', 'schritt_instanz', 'dauer_sekunden', 'benutzer']
+    list_filter = ['typ', 'workflow_schritt__workflow_typ']
+    list_select_related = [
+        'workflow_schritt__workflow_typ',
+        'schritt_instanz__workflow_instanz',
+        'schritt_instanz__workflow_schritt',
+        'benutzer'
+    ]
+    search_fields = ['workflow_schritt__name', 'schritt_instanz__workflow_instanz__name']
+    date_hierarchy = 'zeitpunkt'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(WorkflowSchrittStatistik)
+class WorkflowSchrittStatistikAdmin(admin.ModelAdmin):
+    """Admin für die vorberechneten Durchlaufzeiten (nur lesend)."""
+
+    list_display = [
+        'workflow_schritt',
+        'anzahl_abschluesse',
+        'median_anzeige',
+        'p90_anzeige',
+        'anzahl_offen',
+        'offen_alter_anzeige',
+        'aktualisiert_am'
+    ]
+    list_filter = ['workflow_schritt__workflow_typ']
+    list_select_related = ['workflow_schritt__workflow_typ']
+    search_fields = ['workflow_schritt__name']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
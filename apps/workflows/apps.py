@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WorkflowsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.workflows'
+
+    def ready(self):
+        """Registriert die Signal-Handler für den Suchindex."""
+        from . import signals  # noqa
@@ -0,0 +1,24 @@
+"""
+Management Command: Berechnet die Durchlaufzeit-Statistiken der Schritte neu.
+
+Die Statistiken werden bei jedem Übergang inkrementell fortgeschrieben.
+Nach Änderungen am Schritt-Status außerhalb von WorkflowService (z.B. per
+SQL oder im Admin) können sie hiermit aus dem Ereignis-Protokoll und den
+offenen Schritten neu aufgebaut werden.
+"""
+import time
+from django.core.management.base import BaseCommand
+from apps.workflows import statistik
+
+
+class Command(BaseCommand):
+    help = 'Berechnet die Durchlaufzeit-Statistiken der Workflow-Schritte neu'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        anzahl = statistik.neu_berechnen()
+        dauer = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Statistik für {anzahl} Schritt(e) in {dauer:.2f}s berechnet')
+        )
@@ -0,0 +1,32 @@
+"""
+Management Command: Baut den Volltext-Suchindex für Workflows neu auf.
+
+Nötig nach Datenimporten per SQL oder wenn der Index (z.B. durch ein
+Restore der Datenbank) nicht mehr zu den Workflows passt.
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from apps.workflows import suche
+
+
+class Command(BaseCommand):
+    help = 'Baut den FTS5-Suchindex für Workflow-Instanzen neu auf'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write(
+                self.style.WARNING(
+                    f'Datenbank "{connection.vendor}" unterstützt kein FTS5 - '
+                    'die Suche verwendet icontains, es gibt keinen Index.'
+                )
+            )
+            return
+
+        start = time.perf_counter()
+        anzahl = suche.index_neu_aufbauen()
+        dauer = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {anzahl} Workflow(s) in {dauer:.2f}s indiziert')
+        )
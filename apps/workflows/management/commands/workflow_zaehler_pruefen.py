@@ -0,0 +1,59 @@
+"""
+Management Command: Prüft und repariert die Fortschritts-Zähler von Workflows.
+
+Die Felder schritte_gesamt/schritte_erledigt auf WorkflowInstanz werden
+inkrementell gepflegt. Änderungen an Schritt-Instanzen außerhalb von
+WorkflowService (z.B. per SQL oder QuerySet.update) können sie verfälschen.
+Dieser Command zählt nach und korrigiert Abweichungen.
+"""
+from django.core.management.base import BaseCommand
+from apps.workflows.services import WorkflowService
+
+
+class Command(BaseCommand):
+    help = 'Prüft und repariert die Fortschritts-Zähler von Workflow-Instanzen'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Zeigt nur Abweichungen an, ohne Änderungen vorzunehmen'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING('DRY RUN - Keine Änderungen werden gespeichert')
+            )
+
+        abweichungen = WorkflowService.zaehler_pruefen(reparieren=not dry_run)
+
+        if not abweichungen:
+            self.stdout.write(
+                self.style.SUCCESS('Alle Fortschritts-Zähler sind korrekt. Nichts zu reparieren.')
+            )
+            return
+
+        for eintrag in abweichungen:
+            workflow = eintrag['workflow']
+            gespeichert_gesamt, gespeichert_erledigt = eintrag['gespeichert']
+            ist_gesamt, ist_erledigt = eintrag['tatsaechlich']
+            self.stdout.write(
+                f'  {workflow.kennung or workflow.id} "{workflow.name}": '
+                f'{gespeichert_erledigt}/{gespeichert_gesamt} → {ist_erledigt}/{ist_gesamt}'
+            )
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'\nDRY RUN: {len(abweichungen)} Workflow(s) würden korrigiert werden.'
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'\n✓ {len(abweichungen)} Workflow(s) korrigiert!'
+                )
+            )
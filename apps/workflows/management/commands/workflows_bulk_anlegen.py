@@ -0,0 +1,136 @@
+"""
+Management Command: Legt viele Workflows eines Typs auf einmal an.
+
+Beispiele:
+    # Ein Bestellungsverfahren pro Kandidat
+    python manage.py workflows_bulk_anlegen --typ BES --benutzer admin \\
+        --kandidaten NKA-000001 NKA-000002 --name-vorlage "Bestellung {name}"
+
+    # Aus CSV (Spalten: name, notare, kandidaten; IDs mit Leerzeichen getrennt)
+    python manage.py workflows_bulk_anlegen --typ BES --benutzer admin --csv kohorte.csv
+"""
+import csv
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from apps.personen.models import Notar, NotarAnwaerter
+from apps.workflows.models import WorkflowTyp
+from apps.workflows.services import WorkflowService
+
+
+class Command(BaseCommand):
+    help = 'Legt viele Workflow-Instanzen eines Workflow-Typs per Bulk-Insert an'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--typ',
+            required=True,
+            help='Kürzel oder Name des Workflow-Typs'
+        )
+        parser.add_argument(
+            '--benutzer',
+            required=True,
+            help='Benutzername, unter dem die Workflows erstellt werden'
+        )
+        parser.add_argument(
+            '--csv',
+            help='CSV-Datei mit den Spalten name, notare, kandidaten'
+        )
+        parser.add_argument(
+            '--kandidaten',
+            nargs='+',
+            default=[],
+            help='Kandidaten-IDs (NKA-...), je Kandidat wird ein Workflow angelegt'
+        )
+        parser.add_argument(
+            '--name-vorlage',
+            default='{name}',
+            help='Namensvorlage für --kandidaten, z.B. "Bestellung {name}"'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Batch-Größe für die Bulk-Inserts (Standard: 500)'
+        )
+
+    def handle(self, *args, **options):
+        if not options['csv'] and not options['kandidaten']:
+            raise CommandError('Bitte --csv oder --kandidaten angeben.')
+
+        # Kürzel vor Name: das Kürzel eines Typs kann der Name eines anderen sein
+        workflow_typ = (
+            WorkflowTyp.objects.filter(kuerzel=options['typ']).first()
+            or WorkflowTyp.objects.filter(name=options['typ']).first()
+        )
+        if workflow_typ is None:
+            raise CommandError(f'Workflow-Typ "{options["typ"]}" nicht gefunden.')
+
+        try:
+            benutzer = get_user_model().objects.get(username=options['benutzer'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'Benutzer "{options["benutzer"]}" nicht gefunden.')
+
+        if options['csv']:
+            specs = self.specs_aus_csv(options['csv'])
+        else:
+            specs = self.specs_aus_kandidaten(options['kandidaten'], options['name_vorlage'])
+
+        if not specs:
+            self.stdout.write(self.style.WARNING('Keine Workflows anzulegen.'))
+            return
+
+        start = time.perf_counter()
+        workflows = WorkflowService.workflows_bulk_erstellen(
+            workflow_typ, specs, benutzer, chunk_size=options['chunk_size']
+        )
+        dauer = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ {len(workflows)} Workflow(s) "{workflow_typ.name}" angelegt '
+                f'({workflows[0].kennung} bis {workflows[-1].kennung}) in {dauer:.2f}s'
+            )
+        )
+
+    def specs_aus_kandidaten(self, kandidaten_ids, name_vorlage):
+        kandidaten = NotarAnwaerter.objects.in_bulk(kandidaten_ids, field_name='anwaerter_id')
+        specs = []
+        for kandidaten_id in kandidaten_ids:
+            kandidat = kandidaten.get(kandidaten_id)
+            if kandidat is None:
+                self.stdout.write(self.style.WARNING(f'  ! Kandidat {kandidaten_id} nicht gefunden'))
+                continue
+            specs.append({
+                'name': name_vorlage.format(name=kandidat.get_voller_name()),
+                'kandidaten': [kandidat.pk],
+            })
+        return specs
+
+    def specs_aus_csv(self, csv_path):
+        try:
+            with open(csv_path, 'r', encoding='utf-8') as f:
+                zeilen = list(csv.DictReader(f))
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(f'CSV-Datei kann nicht gelesen werden: {e}')
+
+        # Alle referenzierten Personen mit je einer Query auflösen
+        notar_ids = {i for zeile in zeilen for i in (zeile.get('notare') or '').split()}
+        kandidaten_ids = {i for zeile in zeilen for i in (zeile.get('kandidaten') or '').split()}
+        notare = dict(Notar.objects.filter(notar_id__in=notar_ids).values_list('notar_id', 'pk'))
+        kandidaten = dict(NotarAnwaerter.objects.filter(
+            anwaerter_id__in=kandidaten_ids
+        ).values_list('anwaerter_id', 'pk'))
+
+        for fehlend in sorted((notar_ids - notare.keys()) | (kandidaten_ids - kandidaten.keys())):
+            self.stdout.write(self.style.WARNING(f'  ! Person {fehlend} nicht gefunden'))
+
+        return [
+            {
+                'name': zeile['name'],
+                'notare': [notare[i] for i in (zeile.get('notare') or '').split() if i in notare],
+                'kandidaten': [kandidaten[i] for i in (zeile.get('kandidaten') or '').split() if i in kandidaten],
+            }
+            for zeile in zeilen
+            if zeile.get('name')
+        ]
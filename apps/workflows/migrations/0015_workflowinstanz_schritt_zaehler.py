@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:09
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def zaehler_befuellen(apps, schema_editor):
+    """Befüllt die Fortschritts-Zähler für bestehende Workflow-Instanzen."""
+    WorkflowInstanz = apps.get_model('workflows', 'WorkflowInstanz')
+
+    workflows = list(WorkflowInstanz.objects.annotate(
+        ist_gesamt=Count('schritt_instanzen'),
+        ist_erledigt=Count('schritt_instanzen', filter=Q(schritt_instanzen__status='completed'))
+    ))
+    for workflow in workflows:
+        workflow.schritte_gesamt = workflow.ist_gesamt
+        workflow.schritte_erledigt = workflow.ist_erledigt
+
+    WorkflowInstanz.objects.bulk_update(
+        workflows, ['schritte_gesamt', 'schritte_erledigt'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0014_alter_workflowinstanz_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowinstanz',
+            name='schritte_erledigt',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Schritte erledigt'),
+        ),
+        migrations.AddField(
+            model_name='workflowinstanz',
+            name='schritte_gesamt',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Schritte gesamt'),
+        ),
+        migrations.RunPython(zaehler_befuellen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0015_workflowinstanz_schritt_zaehler'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KennungSequenz',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jahr', models.PositiveIntegerField(verbose_name='Jahr')),
+                ('kuerzel', models.CharField(max_length=10, verbose_name='Kürzel')),
+                ('letzte_nummer', models.PositiveIntegerField(default=0, help_text='Zuletzt vergebene laufende Nummer', verbose_name='Letzte Nummer')),
+            ],
+            options={
+                'verbose_name': 'Kennungs-Sequenz',
+                'verbose_name_plural': 'Kennungs-Sequenzen',
+                'ordering': ['-jahr', 'kuerzel'],
+                'unique_together': {('jahr', 'kuerzel')},
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+from django.db import migrations
+
+# DDL und Befüllung sind bewusst hier festgehalten (Stand dieser Migration)
+# und nicht aus apps.workflows.suche importiert, damit spätere Änderungen am
+# Modul das Verhalten dieser Migration nicht verändern.
+INDEX_TABELLE = 'workflows_suchindex'
+GEWICHTUNG = 'bm25(10.0, 10.0, 2.0, 1.0, 1.0, 5.0)'
+
+
+def suchindex_anlegen(apps, schema_editor):
+    """Legt den FTS5-Suchindex an und befüllt ihn (nur SQLite)."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    WorkflowInstanz = apps.get_model('workflows', 'WorkflowInstanz')
+    WorkflowSchrittInstanz = apps.get_model('workflows', 'WorkflowSchrittInstanz')
+    WorkflowTyp = apps.get_model('workflows', 'WorkflowTyp')
+    Notar = apps.get_model('personen', 'Notar')
+    NotarAnwaerter = apps.get_model('personen', 'NotarAnwaerter')
+
+    workflows = WorkflowInstanz._meta.db_table
+    schritte = WorkflowSchrittInstanz._meta.db_table
+    typen = WorkflowTyp._meta.db_table
+    notare = Notar._meta.db_table
+    kandidaten = NotarAnwaerter._meta.db_table
+    notare_zuordnung = WorkflowInstanz._meta.get_field('betroffene_notare').remote_field.through._meta.db_table
+    kandidaten_zuordnung = WorkflowInstanz._meta.get_field('betroffene_kandidaten').remote_field.through._meta.db_table
+
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABELLE} USING fts5("
+        "name, kennung, typ, notizen, schritt_notizen, personen, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {INDEX_TABELLE}({INDEX_TABELLE}, rank) VALUES ('rank', %s)", [GEWICHTUNG]
+    )
+    schema_editor.execute(f'DELETE FROM {INDEX_TABELLE}')
+    schema_editor.execute(f"""
+        INSERT INTO {INDEX_TABELLE}(rowid, name, kennung, typ, notizen, schritt_notizen, personen)
+        SELECT
+            w.id, w.name, w.kennung, t.name, w.notizen,
+            COALESCE((
+                SELECT group_concat(s.notizen, ' ') FROM {schritte} s
+                WHERE s.workflow_instanz_id = w.id AND s.notizen != ''
+            ), ''),
+            COALESCE((
+                SELECT group_concat(p.titel || ' ' || p.vorname || ' ' || p.nachname || ' ' || p.notar_id, ' ')
+                FROM {notare_zuordnung} z JOIN {notare} p ON p.id = z.notar_id
+                WHERE z.workflowinstanz_id = w.id
+            ), '') || ' ' || COALESCE((
+                SELECT group_concat(p.titel || ' ' || p.vorname || ' ' || p.nachname || ' ' || p.anwaerter_id, ' ')
+                FROM {kandidaten_zuordnung} z JOIN {kandidaten} p ON p.id = z.notaranwaerter_id
+                WHERE z.workflowinstanz_id = w.id
+            ), '')
+        FROM {workflows} w JOIN {typen} t ON t.id = w.workflow_typ_id
+    """)
+    schema_editor.execute(f"INSERT INTO {INDEX_TABELLE}({INDEX_TABELLE}) VALUES ('optimize')")
+
+
+def suchindex_entfernen(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {INDEX_TABELLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0016_kennungsequenz'),
+        ('personen', '0003_alter_notar_notar_id_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(suchindex_anlegen, suchindex_entfernen),
+    ]
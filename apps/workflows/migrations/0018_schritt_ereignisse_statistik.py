@@ -0,0 +1,156 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:21
+
+import math
+from collections import defaultdict
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+# Stand von apps.workflows.statistik bei dieser Migration; bewusst kopiert,
+# damit spätere Änderungen am Modul die Migration nicht verändern.
+BUCKET_GRENZEN = [int(60 * 2 ** (i / 2)) for i in range(40)]
+
+
+def _bucket_index(sekunden):
+    for index, grenze in enumerate(BUCKET_GRENZEN):
+        if sekunden <= grenze:
+            return index
+    return len(BUCKET_GRENZEN)
+
+
+def _perzentil(histogramm, anteil):
+    gesamt = sum(histogramm)
+    if not gesamt:
+        return None
+    ziel = anteil * gesamt
+    kumuliert = 0
+    for index, anzahl in enumerate(histogramm):
+        kumuliert += anzahl
+        if kumuliert >= ziel:
+            break
+    obergrenze = BUCKET_GRENZEN[min(index, len(BUCKET_GRENZEN) - 1)]
+    if index == 0:
+        return obergrenze // 2
+    return int(math.sqrt(BUCKET_GRENZEN[index - 1] * obergrenze))
+
+
+def historie_befuellen(apps, schema_editor):
+    """
+    Übernimmt bestehende Schritt-Instanzen in Ereignis-Protokoll und Statistik.
+
+    Für Altbestände ist nur bekannt, wann ein Schritt angelegt und zuletzt
+    geändert wurde; daraus werden offen_seit, abgeschlossen_am und je ein
+    Abschluss-Ereignis abgeleitet.
+    """
+    WorkflowSchrittInstanz = apps.get_model('workflows', 'WorkflowSchrittInstanz')
+    WorkflowSchrittEreignis = apps.get_model('workflows', 'WorkflowSchrittEreignis')
+    WorkflowSchrittStatistik = apps.get_model('workflows', 'WorkflowSchrittStatistik')
+
+    WorkflowSchrittInstanz.objects.update(offen_seit=F('erstellt_am'))
+    WorkflowSchrittInstanz.objects.filter(status='completed').update(
+        abgeschlossen_am=F('aktualisiert_am')
+    )
+
+    statistiken = defaultdict(lambda: {
+        'histogramm': [0] * (len(BUCKET_GRENZEN) + 1),
+        'anzahl_abschluesse': 0,
+        'anzahl_offen': 0,
+        'summe_offen_seit': 0,
+    })
+
+    erledigte = WorkflowSchrittInstanz.objects.filter(status='completed').values_list(
+        'id', 'workflow_schritt_id', 'erstellt_am', 'aktualisiert_am'
+    )
+    ereignisse = []
+    for instanz_id, schritt_id, erstellt, abgeschlossen in erledigte.iterator(chunk_size=2000):
+        dauer = max(int((abgeschlossen - erstellt).total_seconds()), 0)
+        ereignisse.append(WorkflowSchrittEreignis(
+            schritt_instanz_id=instanz_id,
+            workflow_schritt_id=schritt_id,
+            typ='abgeschlossen',
+            zeitpunkt=abgeschlossen,
+            dauer_sekunden=dauer
+        ))
+        werte = statistiken[schritt_id]
+        werte['histogramm'][_bucket_index(dauer)] += 1
+        werte['anzahl_abschluesse'] += 1
+    WorkflowSchrittEreignis.objects.bulk_create(ereignisse, batch_size=500)
+
+    offene = WorkflowSchrittInstanz.objects.filter(status='pending').values_list(
+        'workflow_schritt_id', 'offen_seit'
+    )
+    for schritt_id, offen_seit in offene.iterator(chunk_size=2000):
+        werte = statistiken[schritt_id]
+        werte['anzahl_offen'] += 1
+        werte['summe_offen_seit'] += int(offen_seit.timestamp())
+
+    WorkflowSchrittStatistik.objects.bulk_create([
+        WorkflowSchrittStatistik(
+            workflow_schritt_id=schritt_id,
+            median_sekunden=_perzentil(werte['histogramm'], 0.5),
+            p90_sekunden=_perzentil(werte['histogramm'], 0.9),
+            **werte
+        )
+        for schritt_id, werte in statistiken.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0017_workflow_suchindex'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkflowSchrittStatistik',
+            fields=[
+                ('workflow_schritt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistik', serialize=False, to='workflows.workflowschritt', verbose_name='Workflow-Schritt')),
+                ('anzahl_abschluesse', models.PositiveIntegerField(default=0, verbose_name='Abschlüsse')),
+                ('histogramm', models.JSONField(default=list, help_text='Anzahl Abschlüsse je Dauer-Bucket', verbose_name='Histogramm')),
+                ('median_sekunden', models.PositiveIntegerField(blank=True, null=True, verbose_name='Median (Sekunden)')),
+                ('p90_sekunden', models.PositiveIntegerField(blank=True, null=True, verbose_name='p90 (Sekunden)')),
+                ('anzahl_offen', models.IntegerField(default=0, verbose_name='Offene Schritte')),
+                ('summe_offen_seit', models.BigIntegerField(default=0, help_text='Summe der Unix-Zeitstempel, seit denen die offenen Schritte offen sind', verbose_name='Summe offen seit')),
+                ('aktualisiert_am', models.DateTimeField(auto_now=True, verbose_name='Aktualisiert am')),
+            ],
+            options={
+                'verbose_name': 'Schritt-Statistik',
+                'verbose_name_plural': 'Schritt-Statistiken',
+            },
+        ),
+        migrations.AddField(
+            model_name='workflowschrittinstanz',
+            name='abgeschlossen_am',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Abgeschlossen am'),
+        ),
+        migrations.AddField(
+            model_name='workflowschrittinstanz',
+            name='offen_seit',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Zeitpunkt der Anlage bzw. der letzten Wiedereröffnung', verbose_name='Offen seit'),
+        ),
+        migrations.CreateModel(
+            name='WorkflowSchrittEreignis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('typ', models.CharField(choices=[('abgeschlossen', 'Abgeschlossen'), ('wiedereroeffnet', 'Wiedereröffnet')], max_length=20, verbose_name='Typ')),
+                ('zeitpunkt', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Zeitpunkt')),
+                ('dauer_sekunden', models.PositiveIntegerField(blank=True, help_text='Bei Abschlüssen: Zeit seit Anlage bzw. Wiedereröffnung', null=True, verbose_name='Dauer (Sekunden)')),
+                ('benutzer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='workflow_schritt_ereignisse', to=settings.AUTH_USER_MODEL, verbose_name='Benutzer')),
+                ('schritt_instanz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ereignisse', to='workflows.workflowschrittinstanz', verbose_name='Schritt-Instanz')),
+                ('workflow_schritt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ereignisse', to='workflows.workflowschritt', verbose_name='Workflow-Schritt')),
+            ],
+            options={
+                'verbose_name': 'Schritt-Ereignis',
+                'verbose_name_plural': 'Schritt-Ereignisse',
+                'ordering': ['-zeitpunkt'],
+                'indexes': [models.Index(fields=['workflow_schritt', 'typ', 'zeitpunkt'], name='workflows_w_workflo_a0d0a6_idx')],
+            },
+        ),
+        migrations.RunPython(historie_befuellen, migrations.RunPython.noop),
+    ]
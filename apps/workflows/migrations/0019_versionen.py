@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0018_schritt_ereignisse_statistik'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowinstanz',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Wird bei jeder Änderung des Fortschritts oder Status erhöht', verbose_name='Version'),
+        ),
+        migrations.AddField(
+            model_name='workflowschrittinstanz',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Wird bei jeder Statusänderung erhöht (optimistische Sperre)', verbose_name='Version'),
+        ),
+    ]
@@ -3,8 +3,10 @@ Models für Workflow-System.
 
 Dynamisches Workflow-System für Kammer-Prozesse wie Bestellungsprozess.
 """
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 from apps.kern.models import ZeitstempelModel
 from apps.personen.models import NotarAnwaerter
@@ -50,6 +52,13 @@ class WorkflowTyp(ZeitstempelModel):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instanz = super().from_db(db, field_names, values)
+        # Für den Suchindex: Umbenennungen erkennen (siehe signals.py)
+        instanz._geladener_name = instanz.__dict__.get('name')
+        return instanz
+
     def schritte_anzahl(self):
         """Anzahl der Schritte in diesem Workflow-Typ."""
         return self.schritte.count()
@@ -121,6 +130,62 @@ class WorkflowSchritt(ZeitstempelModel):
 
 
 
+class KennungSequenz(models.Model):
+    """
+    Zähler für die laufenden Nummern der Workflow-Kennungen je Jahr und Kürzel.
+
+    Ersetzt das Ermitteln der höchsten Nummer per Max() bei jeder Anlage:
+    Nummern werden per atomarem UPDATE hochgezählt, parallele Anlagen
+    erhalten so nie dieselbe Nummer.
+    """
+
+    jahr = models.PositiveIntegerField(verbose_name='Jahr')
+    kuerzel = models.CharField(max_length=10, verbose_name='Kürzel')
+    letzte_nummer = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Letzte Nummer',
+        help_text='Zuletzt vergebene laufende Nummer'
+    )
+
+    class Meta:
+        verbose_name = 'Kennungs-Sequenz'
+        verbose_name_plural = 'Kennungs-Sequenzen'
+        ordering = ['-jahr', 'kuerzel']
+        unique_together = [['jahr', 'kuerzel']]
+
+    def __str__(self):
+        return f"{self.jahr}-{self.kuerzel}: {self.letzte_nummer}"
+
+    @classmethod
+    def reservieren(cls, jahr, kuerzel, anzahl=1):
+        """
+        Zählt die Sequenz atomar um `anzahl` hoch (Block-Reservierung für Importe).
+
+        Beim ersten Zugriff auf (jahr, kuerzel) wird die Sequenz mit der
+        höchsten bereits vergebenen Nummer initialisiert.
+
+        Returns:
+            int: Letzte Nummer des reservierten Blocks
+        """
+        from django.db.models import Max
+
+        with transaction.atomic():
+            sequenz, _ = cls.objects.get_or_create(
+                jahr=jahr,
+                kuerzel=kuerzel,
+                defaults={
+                    'letzte_nummer': lambda: WorkflowInstanz.objects.filter(
+                        kennung__startswith=f'{jahr}-{kuerzel}-'
+                    ).aggregate(max_nummer=Max('laufende_nummer'))['max_nummer'] or 0
+                }
+            )
+            # Das UPDATE sperrt die Zeile bis zum Ende der Transaktion
+            cls.objects.filter(pk=sequenz.pk).update(
+                letzte_nummer=F('letzte_nummer') + anzahl
+            )
+            return cls.objects.values_list('letzte_nummer', flat=True).get(pk=sequenz.pk)
+
+
 class WorkflowInstanz(ZeitstempelModel):
     """
     Konkrete Ausführung eines Workflows.
@@ -206,6 +271,24 @@ class WorkflowInstanz(ZeitstempelModel):
         help_text='Laufende Nummer innerhalb Jahr und Typ'
     )
 
+    # Denormalisierte Fortschritts-Zähler (gepflegt per F()-Ausdruck)
+    schritte_gesamt = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Schritte gesamt'
+    )
+    schritte_erledigt = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Schritte erledigt'
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Version',
+        help_text='Wird bei jeder Änderung des Fortschritts oder Status erhöht'
+    )
+
     # Besetzungsverfahren-spezifisch
     referenten = models.ManyToManyField(
         'personen.Notar',
@@ -227,12 +310,57 @@ class WorkflowInstanz(ZeitstempelModel):
         verbose_name_plural = 'Workflow-Instanzen'
         ordering = ['-erstellt_am']
 
+    ZAEHLER_FELDER = ('schritte_gesamt', 'schritte_erledigt', 'version')
+
     def save(self, *args, **kwargs):
-        """Generiert automatisch Kennung beim ersten Speichern."""
-        if not self.kennung and self.workflow_typ_id:
+        """
+        Generiert automatisch Kennung beim ersten Speichern.
+
+        Bei Updates werden die Fortschritts-Zähler und die Version nie aus
+        dem Speicher zurückgeschrieben, damit ein veraltetes Objekt keine
+        parallel per F()-Ausdruck hochgezählten Werte überschreibt. Sonst
+        bleibt es bei den Feldern, die Django ohnehin speichern würde: den
+        übergebenen update_fields bzw. den geladenen Feldern (.only()/.defer()).
+        """
+        zurueckgestellt = self.get_deferred_fields()
+        if 'kennung' not in zurueckgestellt and not self.kennung and self.workflow_typ_id:
             self.kennung = self._generiere_kennung()
+        if (
+            not self._state.adding
+            and not kwargs.get('force_insert')
+            and kwargs.get('using') in (None, self._state.db)
+        ):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [
+                    feld.attname for feld in self._meta.concrete_fields
+                    if not feld.primary_key and feld.attname not in zurueckgestellt
+                ]
+            kwargs['update_fields'] = [
+                feld for feld in update_fields if feld not in self.ZAEHLER_FELDER
+            ]
         super().save(*args, **kwargs)
 
+    @classmethod
+    def zaehler_anpassen(cls, workflow_id, gesamt=0, erledigt=0):
+        """
+        Passt die Fortschritts-Zähler atomar in der Datenbank an.
+
+        Jede Änderung erhöht auch die Version des Workflows.
+
+        Args:
+            workflow_id: ID der Workflow-Instanz
+            gesamt: Differenz für schritte_gesamt
+            erledigt: Differenz für schritte_erledigt
+        """
+        aenderungen = {}
+        if gesamt:
+            aenderungen['schritte_gesamt'] = F('schritte_gesamt') + gesamt
+        if erledigt:
+            aenderungen['schritte_erledigt'] = F('schritte_erledigt') + erledigt
+        if aenderungen:
+            cls.objects.filter(pk=workflow_id).update(version=F('version') + 1, **aenderungen)
+
     def _generiere_kennung(self):
         """
         Generiert eindeutige Kennung: JAHR-KUERZEL-NUMMER (z.B. 2025-BES-001).
@@ -242,31 +370,40 @@ class WorkflowInstanz(ZeitstempelModel):
         - Kürzel des Workflow-Typs
         - Laufende Nummer (automatisch hochgezählt für Jahr + Typ)
         """
-        from django.utils import timezone
-        from django.db.models import Max
+        self.jahr, self.laufende_nummer = self.nummern_reservieren(self.workflow_typ)
+        return self.kennung_formatieren(self.jahr, self.workflow_typ.kuerzel, self.laufende_nummer)
+
+    @staticmethod
+    def kennung_formatieren(jahr, kuerzel, nummer):
+        """Setzt die Kennung zusammen (z.B. 2025-BES-001)."""
+        return f"{jahr}-{kuerzel}-{nummer:03d}"
+
+    @classmethod
+    def nummern_reservieren(cls, workflow_typ, anzahl=1):
+        """
+        Reserviert einen zusammenhängenden Block laufender Nummern.
 
-        # Aktuelles Jahr setzen
-        self.jahr = timezone.now().year
+        Args:
+            workflow_typ: Workflow-Typ (muss ein Kürzel haben)
+            anzahl: Anzahl der benötigten Nummern
+
+        Returns:
+            tuple: (jahr, erste_nummer)
+        """
+        from django.utils import timezone
 
-        # Kürzel vom WorkflowTyp holen
-        kuerzel = self.workflow_typ.kuerzel
-        if not kuerzel:
+        # Kürzel vom WorkflowTyp prüfen
+        if not workflow_typ.kuerzel:
             raise ValidationError(
-                f"WorkflowTyp '{self.workflow_typ.name}' hat kein Kürzel. "
+                f"WorkflowTyp '{workflow_typ.name}' hat kein Kürzel. "
                 "Bitte zuerst ein Kürzel vergeben."
             )
 
-        # Höchste laufende Nummer für dieses Jahr + Typ ermitteln
-        letzte_nummer = WorkflowInstanz.objects.filter(
-            workflow_typ=self.workflow_typ,
-            jahr=self.jahr
-        ).aggregate(max_nummer=Max('laufende_nummer'))['max_nummer'] or 0
+        # Aktuelles Jahr
+        jahr = timezone.now().year
 
-        # Neue Nummer generieren
-        self.laufende_nummer = letzte_nummer + 1
-
-        # Kennung zusammensetzen (z.B. 2025-BES-001)
-        return f"{self.jahr}-{kuerzel}-{self.laufende_nummer:03d}"
+        letzte_nummer = KennungSequenz.reservieren(jahr, workflow_typ.kuerzel, anzahl)
+        return jahr, letzte_nummer - anzahl + 1
 
     def alle_betroffenen_personen(self):
         """Liefert alle betroffenen Personen (Notare + Kandidaten) als Liste mit Typ."""
@@ -323,14 +460,10 @@ class WorkflowInstanz(ZeitstempelModel):
 
     @property
     def fortschritt_prozent(self):
-        """Berechnet den Fortschritt in Prozent."""
-        alle_schritte = self.schritt_instanzen.count()
-        if alle_schritte == 0:
+        """Berechnet den Fortschritt in Prozent (aus den Zählern, ohne Query)."""
+        if not self.schritte_gesamt:
             return 0
-        abgeschlossene_schritte = self.schritt_instanzen.filter(
-            status='completed'
-        ).count()
-        return int((abgeschlossene_schritte / alle_schritte) * 100)
+        return int((self.schritte_erledigt / self.schritte_gesamt) * 100)
 
     def aktuelle_schritte(self):
         """Liefert alle aktuell offenen Schritte."""
@@ -369,6 +502,22 @@ class WorkflowSchrittInstanz(ZeitstempelModel):
         blank=True,
         verbose_name='Notizen'
     )
+    offen_seit = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Offen seit',
+        help_text='Zeitpunkt der Anlage bzw. der letzten Wiedereröffnung'
+    )
+    abgeschlossen_am = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Abgeschlossen am'
+    )
+    version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Version',
+        help_text='Wird bei jeder Statusänderung erhöht (optimistische Sperre)'
+    )
 
     class Meta:
         verbose_name = 'Workflow-Schritt-Instanz'
@@ -379,6 +528,184 @@ class WorkflowSchrittInstanz(ZeitstempelModel):
     def __str__(self):
         return f"{self.workflow_instanz.name} - {self.workflow_schritt.name} ({self.get_status_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instanz = super().from_db(db, field_names, values)
+        instanz._geladener_status = instanz.__dict__.get('status')
+        instanz._geladene_notizen = instanz.__dict__.get('notizen')
+        return instanz
+
+    def save(self, *args, **kwargs):
+        """Speichert den Schritt und hält die Zähler der Workflow-Instanz aktuell."""
+        update_fields = kwargs.get('update_fields')
+        if self._state.adding:
+            gesamt = 1
+            erledigt = 1 if self.status == 'completed' else 0
+        elif update_fields is not None and 'status' not in update_fields:
+            gesamt = erledigt = 0
+        else:
+            gesamt = 0
+            vorher = getattr(self, '_geladener_status', self.status)
+            erledigt = (self.status == 'completed') - (vorher == 'completed')
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            WorkflowInstanz.zaehler_anpassen(
+                self.workflow_instanz_id, gesamt=gesamt, erledigt=erledigt
+            )
+        self._geladener_status = self.status
+
+    def delete(self, *args, **kwargs):
+        """Löscht den Schritt und zieht ihn von den Zählern und der Statistik ab."""
+        from . import statistik
+
+        vorher = getattr(self, '_geladener_status', self.status)
+        workflow_id = self.workflow_instanz_id
+        with transaction.atomic():
+            ergebnis = super().delete(*args, **kwargs)
+            WorkflowInstanz.zaehler_anpassen(
+                workflow_id, gesamt=-1, erledigt=-(vorher == 'completed')
+            )
+            if vorher == 'pending':
+                statistik.offene_entfernen([(self.workflow_schritt_id, self.offen_seit)])
+        return ergebnis
+
+
+class WorkflowSchrittEreignis(models.Model):
+    """
+    Append-only Protokoll der Abschlüsse und Wiedereröffnungen von Schritten.
+
+    Wird ausschließlich von WorkflowService geschrieben und nie geändert.
+    """
 
+    TYP_CHOICES = [
+        ('abgeschlossen', 'Abgeschlossen'),
+        ('wiedereroeffnet', 'Wiedereröffnet'),
+    ]
 
+    schritt_instanz = models.ForeignKey(
+        WorkflowSchrittInstanz,
+        on_delete=models.CASCADE,
+        related_name='ereignisse',
+        verbose_name='Schritt-Instanz'
+    )
+    workflow_schritt = models.ForeignKey(
+        WorkflowSchritt,
+        on_delete=models.CASCADE,
+        related_name='ereignisse',
+        verbose_name='Workflow-Schritt'
+    )
+    typ = models.CharField(
+        max_length=20,
+        choices=TYP_CHOICES,
+        verbose_name='Typ'
+    )
+    zeitpunkt = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Zeitpunkt'
+    )
+    dauer_sekunden = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Dauer (Sekunden)',
+        help_text='Bei Abschlüssen: Zeit seit Anlage bzw. Wiedereröffnung'
+    )
+    benutzer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='workflow_schritt_ereignisse',
+        verbose_name='Benutzer'
+    )
+
+    class Meta:
+        verbose_name = 'Schritt-Ereignis'
+        verbose_name_plural = 'Schritt-Ereignisse'
+        ordering = ['-zeitpunkt']
+        indexes = [
+            models.Index(fields=['workflow_schritt', 'typ', 'zeitpunkt']),
+        ]
 
+    def __str__(self):
+        return f"{self.get_typ_display()}: {self.workflow_schritt.name} ({self.zeitpunkt:%d.%m.%Y %H:%M})"
+
+
+class WorkflowSchrittStatistik(models.Model):
+    """
+    Vorberechnete Durchlaufzeiten je Template-Schritt.
+
+    Wird bei jedem Übergang inkrementell aktualisiert (siehe statistik.py),
+    damit Auswertungen ohne Scan der Ereignis-Historie angezeigt werden können.
+    Median und p90 werden aus einem logarithmischen Histogramm geschätzt.
+    """
+
+    workflow_schritt = models.OneToOneField(
+        WorkflowSchritt,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='statistik',
+        verbose_name='Workflow-Schritt'
+    )
+    anzahl_abschluesse = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Abschlüsse'
+    )
+    histogramm = models.JSONField(
+        default=list,
+        verbose_name='Histogramm',
+        help_text='Anzahl Abschlüsse je Dauer-Bucket'
+    )
+    median_sekunden = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Median (Sekunden)'
+    )
+    p90_sekunden = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='p90 (Sekunden)'
+    )
+    anzahl_offen = models.IntegerField(
+        default=0,
+        verbose_name='Offene Schritte'
+    )
+    summe_offen_seit = models.BigIntegerField(
+        default=0,
+        verbose_name='Summe offen seit',
+        help_text='Summe der Unix-Zeitstempel, seit denen die offenen Schritte offen sind'
+    )
+    aktualisiert_am = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Aktualisiert am'
+    )
+
+    class Meta:
+        verbose_name = 'Schritt-Statistik'
+        verbose_name_plural = 'Schritt-Statistiken'
+
+    def __str__(self):
+        return f"Statistik {self.workflow_schritt}"
+
+    @property
+    def offen_alter_sekunden(self):
+        """Durchschnittliches Alter der offenen Schritte in Sekunden."""
+        if self.anzahl_offen <= 0:
+            return None
+        jetzt = int(timezone.now().timestamp())
+        return max(jetzt - self.summe_offen_seit // self.anzahl_offen, 0)
+
+    @property
+    def median_anzeige(self):
+        from .statistik import dauer_formatieren
+        return dauer_formatieren(self.median_sekunden)
+
+    @property
+    def p90_anzeige(self):
+        from .statistik import dauer_formatieren
+        return dauer_formatieren(self.p90_sekunden)
+
+    @property
+    def offen_alter_anzeige(self):
+        from .statistik import dauer_formatieren
+        return dauer_formatieren(self.offen_alter_sekunden)
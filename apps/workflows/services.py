@@ -1,14 +1,35 @@
 """
 Vereinfachter Service für Checklisten-Workflow.
 """
+from collections import Counter
+from datetime import timedelta
+
 from django.db import transaction
+from django.db.models import Count, F, Q
 from django.utils import timezone
+from . import statistik, suche
 from .models import (
     WorkflowInstanz,
     WorkflowSchrittInstanz
 )
 
 
+class VersionsKonflikt(Exception):
+    """
+    Ein Schritt oder Workflow wurde inzwischen von jemand anderem geändert.
+
+    Attributes:
+        objekt: Das betroffene Objekt mit dem aktuellen Stand aus der Datenbank
+                (None bei Mengenoperationen)
+    """
+
+    def __init__(self, objekt, nachricht=None):
+        self.objekt = objekt
+        super().__init__(
+            nachricht or 'Der Eintrag wurde inzwischen von einem anderen Benutzer geändert.'
+        )
+
+
 class WorkflowService:
     """
     Vereinfachter Service für grundlegende Checklisten-Operationen.
@@ -36,16 +57,122 @@ class WorkflowService:
             erstellt_von=erstellt_von
         )
 
-        # Alle Schritt-Instanzen erstellen
-        for schritt in workflow_typ.schritte.all().order_by('reihenfolge'):
-            WorkflowSchrittInstanz.objects.create(
+        # Alle Schritt-Instanzen in einem INSERT erstellen
+        schritt_instanzen = WorkflowSchrittInstanz.objects.bulk_create([
+            WorkflowSchrittInstanz(
                 workflow_instanz=workflow,
                 workflow_schritt=schritt,
                 status='pending'
             )
+            for schritt in workflow_typ.schritte.all().order_by('reihenfolge')
+        ])
+
+        # bulk_create umgeht save(), daher Zähler hier nachziehen
+        WorkflowInstanz.zaehler_anpassen(workflow.id, gesamt=len(schritt_instanzen))
+        workflow.refresh_from_db(fields=WorkflowInstanz.ZAEHLER_FELDER)
+        statistik.offene_erfassen({
+            schritt_instanz.workflow_schritt_id: 1 for schritt_instanz in schritt_instanzen
+        })
 
         return workflow
 
+    @staticmethod
+    @transaction.atomic
+    def workflows_bulk_erstellen(workflow_typ, specs, erstellt_von, chunk_size=500):
+        """
+        Erstellt viele Workflows eines Typs auf einmal (z.B. eine Kohorte von Bestellungen).
+
+        Der Schritt-Plan des Templates wird einmal geladen, Kennungen werden als
+        Block reserviert und Instanzen, Schritt-Instanzen sowie die
+        Personen-Zuordnungen werden per bulk_create in Chunks geschrieben.
+
+        Args:
+            workflow_typ: Der Workflow-Typ (Template)
+            specs: Iterable von Dicts mit 'name' und optional 'notare',
+                   'kandidaten' (Objekte oder Primärschlüssel),
+                   'fertigstellungsdatum' und 'notizen'
+            erstellt_von: Benutzer, der die Workflows erstellt
+            chunk_size: Batch-Größe für bulk_create
+
+        Returns:
+            list: Die erstellten WorkflowInstanz-Objekte
+        """
+        specs = list(specs)
+        if not specs:
+            return []
+
+        # Schritt-Plan einmal kompilieren
+        schritt_plan = list(
+            workflow_typ.schritte.order_by('reihenfolge').values_list('id', flat=True)
+        )
+
+        # Kennungen als Block reservieren
+        jahr, erste_nummer = WorkflowInstanz.nummern_reservieren(workflow_typ, len(specs))
+
+        workflows = []
+        for nummer, spec in enumerate(specs, start=erste_nummer):
+            workflows.append(WorkflowInstanz(
+                workflow_typ=workflow_typ,
+                name=spec['name'],
+                status='aktiv',
+                erstellt_von=erstellt_von,
+                fertigstellungsdatum=spec.get('fertigstellungsdatum'),
+                notizen=spec.get('notizen', ''),
+                jahr=jahr,
+                laufende_nummer=nummer,
+                kennung=WorkflowInstanz.kennung_formatieren(jahr, workflow_typ.kuerzel, nummer),
+                schritte_gesamt=len(schritt_plan),
+            ))
+        WorkflowInstanz.objects.bulk_create(workflows, batch_size=chunk_size)
+
+        # Backends ohne RETURNING liefern keine PKs zurück
+        if any(workflow.pk is None for workflow in workflows):
+            pks = dict(WorkflowInstanz.objects.filter(
+                kennung__in=[workflow.kennung for workflow in workflows]
+            ).values_list('kennung', 'id'))
+            for workflow in workflows:
+                workflow.pk = pks[workflow.kennung]
+
+        NotarZuordnung = WorkflowInstanz.betroffene_notare.through
+        KandidatZuordnung = WorkflowInstanz.betroffene_kandidaten.through
+        schritte, notare, kandidaten = [], [], []
+
+        def _pk(person):
+            return getattr(person, 'pk', person)
+
+        for workflow, spec in zip(workflows, specs):
+            schritte.extend(
+                WorkflowSchrittInstanz(
+                    workflow_instanz_id=workflow.pk,
+                    workflow_schritt_id=schritt_id,
+                    status='pending'
+                )
+                for schritt_id in schritt_plan
+            )
+            notare.extend(
+                NotarZuordnung(workflowinstanz_id=workflow.pk, notar_id=_pk(notar))
+                for notar in spec.get('notare', ())
+            )
+            kandidaten.extend(
+                KandidatZuordnung(workflowinstanz_id=workflow.pk, notaranwaerter_id=_pk(kandidat))
+                for kandidat in spec.get('kandidaten', ())
+            )
+
+            # Speicher begrenzen: volle Chunks sofort schreiben
+            if len(schritte) >= chunk_size:
+                WorkflowSchrittInstanz.objects.bulk_create(schritte, batch_size=chunk_size)
+                schritte = []
+
+        WorkflowSchrittInstanz.objects.bulk_create(schritte, batch_size=chunk_size)
+        statistik.offene_erfassen({schritt_id: len(workflows) for schritt_id in schritt_plan})
+        NotarZuordnung.objects.bulk_create(notare, batch_size=chunk_size, ignore_conflicts=True)
+        KandidatZuordnung.objects.bulk_create(kandidaten, batch_size=chunk_size, ignore_conflicts=True)
+
+        # bulk_create sendet keine Signale: Suchindex mengenbasiert nachziehen
+        suche.index_aktualisieren([workflow.pk for workflow in workflows])
+
+        return workflows
+
     @staticmethod
     def workflow_starten(workflow_instanz):
         """
@@ -58,44 +185,243 @@ class WorkflowService:
         workflow_instanz.save()
 
     @staticmethod
-    def schritt_abschliessen(schritt_instanz, notizen=''):
+    @transaction.atomic
+    def schritt_abschliessen(schritt_instanz, notizen='', benutzer=None, version=None):
         """
         Markiert einen Schritt als 'completed'.
         Prüft automatisch, ob alle Schritte abgeschlossen sind und archiviert ggf. den Workflow.
 
+        Der Schritt wird per Compare-and-Set geändert: das UPDATE greift nur,
+        wenn die Version noch der erwarteten entspricht. So kann ein paralleler
+        Klick weder doppelt zählen noch einen fremden Stand überschreiben.
+
         Args:
             schritt_instanz: Die Schritt-Instanz
             notizen: Optionale Notizen zum Abschluss
+            benutzer: Ausführender Benutzer (für das Ereignis-Protokoll)
+            version: Erwartete Version (Standard: Version des geladenen Objekts)
+
+        Raises:
+            VersionsKonflikt: Der Schritt wurde inzwischen geändert
         """
-        schritt_instanz.status = 'completed'
+        war_offen = schritt_instanz.status == 'pending'
+        jetzt = timezone.now()
+        aenderungen = {'status': 'completed'}
         if notizen:
-            schritt_instanz.notizen = notizen
-        schritt_instanz.save()
+            aenderungen['notizen'] = notizen
+        if war_offen:
+            aenderungen['abgeschlossen_am'] = jetzt
+        WorkflowService._schritt_cas(schritt_instanz, version, aenderungen, jetzt)
 
-        # Prüfen ob alle Schritte completed sind
-        workflow = schritt_instanz.workflow_instanz
-        if workflow.schritt_instanzen.filter(status='pending').count() == 0:
-            WorkflowService.workflow_archivieren(workflow)
+        if notizen:
+            suche.index_aktualisieren([schritt_instanz.workflow_instanz_id])
+        if not war_offen:
+            return
+
+        statistik.abschluesse_erfassen(
+            [(schritt_instanz.id, schritt_instanz.workflow_schritt_id, schritt_instanz.offen_seit)],
+            benutzer=benutzer,
+            zeitpunkt=jetzt
+        )
+        WorkflowInstanz.zaehler_anpassen(schritt_instanz.workflow_instanz_id, erledigt=1)
+
+        # Archivieren nur, wenn in der Datenbank wirklich alle Schritte erledigt sind
+        WorkflowInstanz.objects.filter(
+            pk=schritt_instanz.workflow_instanz_id,
+            status='aktiv',
+            schritte_erledigt__gte=F('schritte_gesamt')
+        ).update(
+            status='archiviert', archiviert_am=jetzt, aktualisiert_am=jetzt,
+            version=F('version') + 1
+        )
+        WorkflowService._workflow_nachladen(schritt_instanz)
 
     @staticmethod
     @transaction.atomic
-    def schritt_rueckgaengig_machen(schritt_instanz):
+    def schritt_rueckgaengig_machen(schritt_instanz, benutzer=None, version=None):
         """
         Setzt einen abgeschlossenen Schritt zurück auf 'pending'.
         Falls der Workflow archiviert war, wird er wieder auf 'aktiv' gesetzt.
 
         Args:
             schritt_instanz: Die Schritt-Instanz
+            benutzer: Ausführender Benutzer (für das Ereignis-Protokoll)
+            version: Erwartete Version (Standard: Version des geladenen Objekts)
+
+        Raises:
+            VersionsKonflikt: Der Schritt wurde inzwischen geändert
         """
-        schritt_instanz.status = 'pending'
-        schritt_instanz.save()
+        if schritt_instanz.status != 'completed':
+            # Nichts zurückzusetzen
+            return
+
+        jetzt = timezone.now()
+        WorkflowService._schritt_cas(schritt_instanz, version, {
+            'status': 'pending',
+            'offen_seit': jetzt,
+            'abgeschlossen_am': None,
+        }, jetzt)
+
+        statistik.wiedereroeffnungen_erfassen(
+            [(schritt_instanz.id, schritt_instanz.workflow_schritt_id)],
+            benutzer=benutzer,
+            zeitpunkt=jetzt
+        )
+        WorkflowInstanz.zaehler_anpassen(schritt_instanz.workflow_instanz_id, erledigt=-1)
 
         # Falls Workflow archiviert war, wieder aktivieren
+        WorkflowInstanz.objects.filter(
+            pk=schritt_instanz.workflow_instanz_id,
+            status='archiviert',
+            schritte_erledigt__lt=F('schritte_gesamt')
+        ).update(
+            status='aktiv', archiviert_am=None, aktualisiert_am=jetzt,
+            version=F('version') + 1
+        )
+        WorkflowService._workflow_nachladen(schritt_instanz)
+
+    @staticmethod
+    def _schritt_cas(schritt_instanz, version, aenderungen, jetzt):
+        """
+        Schreibt Änderungen nur, wenn die Version des Schritts unverändert ist.
+
+        Aktualisiert bei Erfolg auch das übergebene Objekt.
+
+        Raises:
+            VersionsKonflikt: mit dem aktuellen Stand des Schritts
+        """
+        erwartet = schritt_instanz.version if version is None else version
+        geaendert = WorkflowSchrittInstanz.objects.filter(
+            pk=schritt_instanz.pk, version=erwartet
+        ).update(version=F('version') + 1, aktualisiert_am=jetzt, **aenderungen)
+        if not geaendert:
+            schritt_instanz.refresh_from_db()
+            raise VersionsKonflikt(schritt_instanz)
+
+        for feld, wert in aenderungen.items():
+            setattr(schritt_instanz, feld, wert)
+        schritt_instanz.version = erwartet + 1
+        schritt_instanz.aktualisiert_am = jetzt
+        schritt_instanz._geladener_status = schritt_instanz.status
+        schritt_instanz._geladene_notizen = schritt_instanz.notizen
+
+    @staticmethod
+    def _workflow_nachladen(schritt_instanz):
+        """Lädt Status und Zähler des Workflows eines Schritts nach dem Update neu."""
         workflow = schritt_instanz.workflow_instanz
-        if workflow.status == 'archiviert':
-            workflow.status = 'aktiv'
-            workflow.archiviert_am = None
-            workflow.save()
+        workflow.refresh_from_db(
+            fields=WorkflowInstanz.ZAEHLER_FELDER + ('status', 'archiviert_am', 'aktualisiert_am')
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def schritte_bulk_setzen(workflow_ids, status, benutzer=None, versionen=None):
+        """
+        Setzt alle Schritte der angegebenen Workflows mengenbasiert auf einen Status.
+
+        Statt pro Schritt zu speichern und nachzuzählen, läuft genau ein UPDATE
+        über alle betroffenen Schritt-Instanzen, gefolgt von einem einzigen
+        Archivierungs- bzw. Reaktivierungs-Durchlauf für die Workflows.
+
+        Args:
+            workflow_ids: IDs der Workflow-Instanzen
+            status: Neuer Schritt-Status ('completed' oder 'pending')
+            benutzer: Ausführender Benutzer (für das Ereignis-Protokoll)
+            versionen: Optional {workflow_id: erwartete Version}; weicht eine
+                       Version ab, wird nichts geändert
+
+        Returns:
+            dict: {workflow_id: {'anzahl': geänderte Schritte,
+                                 'workflow_status': neuer Workflow-Status,
+                                 'version': neue Workflow-Version}}
+
+        Raises:
+            VersionsKonflikt: Ein Workflow oder Schritt wurde inzwischen geändert
+        """
+        if status not in dict(WorkflowSchrittInstanz.STATUS_CHOICES):
+            raise ValueError(f"Ungültiger Schritt-Status: {status}")
+
+        workflow_ids = list(workflow_ids)
+        alter_status = 'pending' if status == 'completed' else 'completed'
+        jetzt = timezone.now()
+
+        # Compare-and-Set auf die Workflow-Versionen, bevor irgendetwas geändert wird
+        if versionen:
+            bedingung = Q()
+            for workflow_id, version in versionen.items():
+                bedingung |= Q(pk=workflow_id, version=version)
+            geprueft = WorkflowInstanz.objects.filter(bedingung).update(version=F('version') + 1)
+            if geprueft != len(versionen):
+                raise VersionsKonflikt(None)
+
+        auswahl = WorkflowSchrittInstanz.objects.filter(
+            workflow_instanz_id__in=workflow_ids,
+            status=alter_status
+        )
+        geaenderte_schritte = list(auswahl.order_by().values_list(
+            'id', 'workflow_instanz_id', 'workflow_schritt_id', 'offen_seit'
+        ))
+        anzahl_pro_workflow = Counter(workflow_id for _, workflow_id, _, _ in geaenderte_schritte)
+
+        # Nur die gelesenen Schritte ändern; hat ein paralleler Klick einen davon
+        # umgeschaltet, stimmt die Anzahl nicht und alles wird zurückgerollt
+        zu_aendern = WorkflowSchrittInstanz.objects.filter(
+            id__in=[schritt_id for schritt_id, _, _, _ in geaenderte_schritte],
+            status=alter_status
+        )
+        if status == 'completed':
+            geaendert = zu_aendern.update(
+                status=status, abgeschlossen_am=jetzt, aktualisiert_am=jetzt,
+                version=F('version') + 1
+            )
+        else:
+            geaendert = zu_aendern.update(
+                status=status, offen_seit=jetzt, abgeschlossen_am=None, aktualisiert_am=jetzt,
+                version=F('version') + 1
+            )
+        if geaendert != len(geaenderte_schritte):
+            raise VersionsKonflikt(None)
+
+        if status == 'completed':
+            statistik.abschluesse_erfassen(
+                [(schritt_id, vorlage_id, offen_seit)
+                 for schritt_id, _, vorlage_id, offen_seit in geaenderte_schritte],
+                benutzer=benutzer,
+                zeitpunkt=jetzt
+            )
+        else:
+            statistik.wiedereroeffnungen_erfassen(
+                [(schritt_id, vorlage_id) for schritt_id, _, vorlage_id, _ in geaenderte_schritte],
+                benutzer=benutzer,
+                zeitpunkt=jetzt
+            )
+
+        # Alle Schritte haben jetzt denselben Status: Zähler absolut setzen
+        workflows = WorkflowInstanz.objects.filter(id__in=workflow_ids)
+        workflows.update(
+            schritte_erledigt=F('schritte_gesamt') if status == 'completed' else 0
+        )
+
+        geaenderte_workflows = workflows.filter(id__in=list(anzahl_pro_workflow))
+        if status == 'completed':
+            geaenderte_workflows.exclude(status='archiviert').update(
+                status='archiviert', archiviert_am=jetzt, aktualisiert_am=jetzt,
+                version=F('version') + 1
+            )
+        else:
+            geaenderte_workflows.filter(status='archiviert').update(
+                status='aktiv', archiviert_am=None, aktualisiert_am=jetzt,
+                version=F('version') + 1
+            )
+
+        return {
+            workflow_id: {
+                'anzahl': anzahl_pro_workflow.get(workflow_id, 0),
+                'workflow_status': workflow_status,
+                'version': version,
+            }
+            for workflow_id, workflow_status, version in workflows.values_list('id', 'status', 'version')
+        }
 
     @staticmethod
     def workflow_archivieren(workflow_instanz):
@@ -109,6 +435,100 @@ class WorkflowService:
         workflow_instanz.archiviert_am = timezone.now()
         workflow_instanz.save()
 
+    @staticmethod
+    def zaehler_pruefen(reparieren=False):
+        """
+        Vergleicht die Fortschritts-Zähler mit den tatsächlichen Schritt-Instanzen.
+
+        Args:
+            reparieren: Abweichende Zähler direkt korrigieren
+
+        Returns:
+            list: Dicts mit Workflow und gespeicherten/tatsächlichen Werten
+        """
+        workflows = WorkflowInstanz.objects.annotate(
+            ist_gesamt=Count('schritt_instanzen'),
+            ist_erledigt=Count(
+                'schritt_instanzen',
+                filter=Q(schritt_instanzen__status='completed')
+            )
+        ).filter(
+            ~Q(schritte_gesamt=F('ist_gesamt')) |
+            ~Q(schritte_erledigt=F('ist_erledigt'))
+        ).only('id', 'kennung', 'name', *WorkflowInstanz.ZAEHLER_FELDER)
+
+        abweichungen = []
+        for workflow in workflows:
+            abweichungen.append({
+                'workflow': workflow,
+                'gespeichert': (workflow.schritte_gesamt, workflow.schritte_erledigt),
+                'tatsaechlich': (workflow.ist_gesamt, workflow.ist_erledigt),
+            })
+            workflow.schritte_gesamt = workflow.ist_gesamt
+            workflow.schritte_erledigt = workflow.ist_erledigt
+
+        if reparieren and abweichungen:
+            WorkflowInstanz.objects.bulk_update(
+                [eintrag['workflow'] for eintrag in abweichungen],
+                WorkflowInstanz.ZAEHLER_FELDER,
+                batch_size=500
+            )
+
+        return abweichungen
+
+    @staticmethod
+    def dashboard_kennzahlen(heute=None):
+        """
+        Ermittelt Workflow-Kennzahlen und Deadline-Buckets in einer Aggregat-Query.
+
+        Die Buckets entsprechen WorkflowInstanz.deadline_status, werden aber
+        per Count(..., filter=Q(...)) in SQL gezählt statt pro Objekt in Python.
+
+        Args:
+            heute: Stichtag (Standard: heutiges Datum)
+
+        Returns:
+            dict: {'workflows_gesamt', 'workflows_offen', 'workflows_abgeschlossen',
+                   'deadline_stats': {'ueberfaellig', '1_tag', '5_tage', 'mehr'}}
+        """
+        if heute is None:
+            heute = timezone.now().date()
+
+        offen = ~Q(status='archiviert')
+        morgen = heute + timedelta(days=1)
+        in_fuenf_tagen = heute + timedelta(days=5)
+        werte = WorkflowInstanz.objects.aggregate(
+            workflows_gesamt=Count('id'),
+            workflows_offen=Count('id', filter=offen),
+            workflows_abgeschlossen=Count('id', filter=Q(status='archiviert')),
+            ueberfaellig=Count('id', filter=offen & Q(
+                fertigstellungsdatum__lt=heute
+            )),
+            ein_tag=Count('id', filter=offen & Q(
+                fertigstellungsdatum__gte=heute,
+                fertigstellungsdatum__lte=morgen
+            )),
+            fuenf_tage=Count('id', filter=offen & Q(
+                fertigstellungsdatum__gt=morgen,
+                fertigstellungsdatum__lte=in_fuenf_tagen
+            )),
+            mehr=Count('id', filter=offen & Q(
+                fertigstellungsdatum__gt=in_fuenf_tagen
+            )),
+        )
+
+        return {
+            'workflows_gesamt': werte['workflows_gesamt'],
+            'workflows_offen': werte['workflows_offen'],
+            'workflows_abgeschlossen': werte['workflows_abgeschlossen'],
+            'deadline_stats': {
+                'ueberfaellig': werte['ueberfaellig'],
+                '1_tag': werte['ein_tag'],
+                '5_tage': werte['fuenf_tage'],
+                'mehr': werte['mehr'],
+            },
+        }
+
     @staticmethod
     def offene_workflows_holen():
         """
@@ -128,25 +548,45 @@ class WorkflowService:
         ).order_by('-erstellt_am')
 
     @staticmethod
-    def workflow_suchen(suchbegriff):
+    def workflow_suchen(suchbegriff, queryset=None):
         """
-        Sucht Workflows nach Name oder Workflow-Typ.
+        Sucht Workflows über den Volltext-Index (Name, Kennung, Typ, Notizen,
+        Schritt-Notizen und betroffene Personen).
+
+        Die Suche schränkt ein bestehendes QuerySet ein, so dass Status- und
+        Typ-Filter erhalten bleiben. Treffer werden mit `relevanz` annotiert
+        und danach sortiert. Ohne FTS5-Index (z.B. PostgreSQL) wird per
+        icontains gesucht und nach Erstellungsdatum sortiert.
 
         Args:
             suchbegriff: Suchbegriff für die Suche
+            queryset: Optional vorgefiltertes QuerySet von WorkflowInstanz
 
         Returns:
             QuerySet: Gefilterte Workflow-Instanzen
         """
-        from django.db.models import Q
-        return WorkflowInstanz.objects.filter(
+        if queryset is None:
+            queryset = WorkflowInstanz.objects.select_related(
+                'workflow_typ',
+                'erstellt_von'
+            ).prefetch_related(
+                'betroffene_notare',
+                'betroffene_kandidaten'
+            )
+
+        if suche.ist_verfuegbar():
+            ausdruck = suche.suchausdruck(suchbegriff)
+            if not ausdruck:
+                return queryset.none()
+            return queryset.filter(
+                id__in=suche.treffer_filter(ausdruck)
+            ).annotate(
+                relevanz=suche.relevanz(ausdruck)
+            ).order_by('-relevanz', '-erstellt_am')
+
+        return queryset.filter(
             Q(name__icontains=suchbegriff) |
+            Q(kennung__icontains=suchbegriff) |
             Q(workflow_typ__name__icontains=suchbegriff) |
             Q(notizen__icontains=suchbegriff)
-        ).select_related(
-            'workflow_typ',
-            'erstellt_von'
-        ).prefetch_related(
-            'betroffene_notare',
-            'betroffene_kandidaten'
         ).order_by('-erstellt_am')
@@ -0,0 +1,93 @@
+"""
+Signal-Handler für das Workflow-System.
+
+Hält den Volltext-Suchindex (siehe suche.py) bei Änderungen an Workflows,
+Schritt-Notizen, Schritten, Personen-Zuordnungen, Personennamen und
+Namen von Workflow-Typen aktuell. Beim Löschen eines Workflows werden seine
+offenen Schritte aus der Durchlaufzeit-Statistik (siehe statistik.py)
+genommen.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.personen.models import Notar, NotarAnwaerter
+from . import statistik, suche
+from .models import WorkflowInstanz, WorkflowSchrittInstanz, WorkflowTyp
+
+
+@receiver(post_save, sender=WorkflowInstanz)
+@receiver(post_delete, sender=WorkflowInstanz)
+def workflow_indizieren(sender, instance, **kwargs):
+    """Indiziert einen gespeicherten bzw. gelöschten Workflow neu."""
+    suche.index_aktualisieren([instance.pk])
+
+
+@receiver(pre_delete, sender=WorkflowInstanz)
+def offene_schritte_abziehen(sender, instance, **kwargs):
+    """
+    Zieht die offenen Schritte eines gelöschten Workflows von der Statistik ab.
+
+    Die Schritt-Instanzen werden per CASCADE ohne WorkflowSchrittInstanz.delete()
+    gelöscht; läuft in der Transaktion des Löschvorgangs.
+    """
+    statistik.offene_entfernen(
+        WorkflowSchrittInstanz.objects.filter(
+            workflow_instanz_id=instance.pk, status='pending'
+        ).values_list('workflow_schritt_id', 'offen_seit')
+    )
+
+
+@receiver(post_save, sender=WorkflowSchrittInstanz)
+def schritt_notizen_indizieren(sender, instance, created, **kwargs):
+    """Indiziert den Workflow neu, wenn sich Schritt-Notizen geändert haben."""
+    vorher = '' if created else getattr(instance, '_geladene_notizen', None)
+    if instance.notizen != vorher:
+        suche.index_aktualisieren([instance.workflow_instanz_id])
+    instance._geladene_notizen = instance.notizen
+
+
+@receiver(post_delete, sender=WorkflowSchrittInstanz)
+def geloeschten_schritt_indizieren(sender, instance, **kwargs):
+    """Indiziert den Workflow neu, wenn eine Schritt-Instanz mit Notizen gelöscht wurde."""
+    if instance.notizen:
+        suche.index_aktualisieren([instance.workflow_instanz_id])
+
+
+@receiver(post_save, sender=WorkflowTyp)
+def workflow_typ_indizieren(sender, instance, created, **kwargs):
+    """Indiziert die Workflows eines umbenannten Workflow-Typs neu."""
+    vorher = getattr(instance, '_geladener_name', None)
+    instance._geladener_name = instance.name
+    if created or instance.name == vorher or not suche.ist_verfuegbar():
+        return
+    suche.index_aktualisieren(
+        WorkflowInstanz.objects.filter(workflow_typ=instance).values_list('id', flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=WorkflowInstanz.betroffene_notare.through)
+@receiver(m2m_changed, sender=WorkflowInstanz.betroffene_kandidaten.through)
+def personen_zuordnung_indizieren(sender, instance, action, reverse, pk_set, **kwargs):
+    """Indiziert Workflows neu, deren betroffene Personen sich geändert haben."""
+    if reverse and action == 'pre_clear':
+        # Nach clear() von der Personen-Seite sind die Workflows nicht mehr ermittelbar
+        instance._suchindex_workflow_ids = list(
+            instance.workflows_als_betroffener.values_list('id', flat=True)
+        )
+    elif action in ('post_add', 'post_remove'):
+        suche.index_aktualisieren(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        suche.index_aktualisieren(
+            getattr(instance, '_suchindex_workflow_ids', []) if reverse else [instance.pk]
+        )
+
+
+@receiver(post_save, sender=Notar)
+@receiver(post_save, sender=NotarAnwaerter)
+def personen_namen_indizieren(sender, instance, created, **kwargs):
+    """Indiziert die Workflows einer Person nach Namensänderungen neu."""
+    if created or not suche.ist_verfuegbar():
+        return
+    suche.index_aktualisieren(
+        instance.workflows_als_betroffener.values_list('id', flat=True)
+    )
@@ -0,0 +1,265 @@
+"""
+Durchlaufzeiten von Workflow-Schritten.
+
+WorkflowService meldet hier jeden Übergang (Anlage, Abschluss,
+Wiedereröffnung), beim Löschen von Workflows und Schritt-Instanzen werden
+offene Schritte abgezogen (siehe WorkflowSchrittInstanz.delete und
+signals.py). Abschlüsse und Wiedereröffnungen werden als
+WorkflowSchrittEreignis protokolliert; gleichzeitig wird die
+WorkflowSchrittStatistik des Template-Schritts inkrementell fortgeschrieben:
+
+- Abschlüsse landen in einem logarithmischen Histogramm (Faktor √2 pro
+  Bucket), aus dem Median und p90 geschätzt werden.
+- Für offene Schritte werden Anzahl und Summe der "offen seit"-Zeitstempel
+  geführt, daraus ergibt sich das durchschnittliche Alter ohne Query.
+
+Alle Funktionen arbeiten mengenbasiert: die Anzahl der Queries hängt von der
+Anzahl der betroffenen Template-Schritte ab, nicht von der Anzahl der Instanzen.
+"""
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    WorkflowSchrittEreignis,
+    WorkflowSchrittInstanz,
+    WorkflowSchrittStatistik,
+)
+
+# Obergrenzen der Histogramm-Buckets in Sekunden: 1 Minute bis ca. 1,4 Jahre
+BUCKET_GRENZEN = [int(60 * 2 ** (i / 2)) for i in range(40)]
+
+
+def bucket_index(sekunden):
+    """Index des Histogramm-Buckets für eine Dauer."""
+    for index, grenze in enumerate(BUCKET_GRENZEN):
+        if sekunden <= grenze:
+            return index
+    return len(BUCKET_GRENZEN)
+
+
+def perzentil(histogramm, anteil):
+    """
+    Schätzt ein Perzentil aus dem Histogramm (geometrische Bucket-Mitte).
+
+    Args:
+        histogramm: Liste der Bucket-Zählungen
+        anteil: z.B. 0.5 für den Median, 0.9 für p90
+
+    Returns:
+        int oder None: Dauer in Sekunden
+    """
+    gesamt = sum(histogramm)
+    if not gesamt:
+        return None
+    ziel = anteil * gesamt
+    kumuliert = 0
+    for index, anzahl in enumerate(histogramm):
+        kumuliert += anzahl
+        if kumuliert >= ziel:
+            break
+    obergrenze = BUCKET_GRENZEN[min(index, len(BUCKET_GRENZEN) - 1)]
+    if index == 0:
+        return obergrenze // 2
+    untergrenze = BUCKET_GRENZEN[index - 1]
+    return int(math.sqrt(untergrenze * obergrenze))
+
+
+def dauer_formatieren(sekunden):
+    """Formatiert eine Dauer kompakt (z.B. '3 T 4 Std', '45 Min')."""
+    if sekunden is None:
+        return '-'
+    minuten = sekunden // 60
+    stunden, minuten = divmod(minuten, 60)
+    tage, stunden = divmod(stunden, 24)
+    if tage:
+        return f'{tage} T {stunden} Std' if stunden else f'{tage} T'
+    if stunden:
+        return f'{stunden} Std {minuten} Min' if minuten else f'{stunden} Std'
+    return f'{max(minuten, 1)} Min'
+
+
+def _statistiken_sicherstellen(schritt_ids):
+    WorkflowSchrittStatistik.objects.bulk_create(
+        [WorkflowSchrittStatistik(workflow_schritt_id=schritt_id) for schritt_id in schritt_ids],
+        ignore_conflicts=True
+    )
+
+
+def _zeitstempel(zeitpunkt):
+    return int(zeitpunkt.timestamp())
+
+
+@transaction.atomic
+def offene_erfassen(anzahl_pro_schritt, zeitpunkt=None):
+    """
+    Erfasst neu angelegte (offene) Schritt-Instanzen.
+
+    Args:
+        anzahl_pro_schritt: {workflow_schritt_id: Anzahl neuer Instanzen}
+        zeitpunkt: Zeitpunkt der Anlage (Standard: jetzt)
+    """
+    anzahl_pro_schritt = {k: v for k, v in anzahl_pro_schritt.items() if v}
+    if not anzahl_pro_schritt:
+        return
+    stempel = _zeitstempel(zeitpunkt or timezone.now())
+    _statistiken_sicherstellen(anzahl_pro_schritt)
+    for schritt_id, anzahl in anzahl_pro_schritt.items():
+        WorkflowSchrittStatistik.objects.filter(workflow_schritt_id=schritt_id).update(
+            anzahl_offen=F('anzahl_offen') + anzahl,
+            summe_offen_seit=F('summe_offen_seit') + anzahl * stempel
+        )
+
+
+@transaction.atomic
+def offene_entfernen(schritte):
+    """
+    Nimmt gelöschte offene Schritt-Instanzen aus der Statistik.
+
+    Args:
+        schritte: Iterable von (workflow_schritt_id, offen_seit) der gelöschten,
+                  noch offenen Schritt-Instanzen
+    """
+    pro_schritt = defaultdict(lambda: [0, 0])
+    for schritt_id, offen_seit in schritte:
+        werte = pro_schritt[schritt_id]
+        werte[0] += 1
+        werte[1] += _zeitstempel(offen_seit)
+    for schritt_id, (anzahl, summe) in pro_schritt.items():
+        WorkflowSchrittStatistik.objects.filter(workflow_schritt_id=schritt_id).update(
+            anzahl_offen=F('anzahl_offen') - anzahl,
+            summe_offen_seit=F('summe_offen_seit') - summe
+        )
+
+
+@transaction.atomic
+def abschluesse_erfassen(schritte, benutzer=None, zeitpunkt=None):
+    """
+    Protokolliert Abschlüsse und schreibt die Statistik fort.
+
+    Args:
+        schritte: Iterable von (schritt_instanz_id, workflow_schritt_id, offen_seit)
+                  im Zustand vor dem Abschluss
+        benutzer: Ausführender Benutzer (optional)
+        zeitpunkt: Zeitpunkt des Abschlusses (Standard: jetzt)
+    """
+    zeitpunkt = zeitpunkt or timezone.now()
+    ereignisse = []
+    pro_schritt = defaultdict(list)
+    for instanz_id, schritt_id, offen_seit in schritte:
+        dauer = max(int((zeitpunkt - offen_seit).total_seconds()), 0)
+        ereignisse.append(WorkflowSchrittEreignis(
+            schritt_instanz_id=instanz_id,
+            workflow_schritt_id=schritt_id,
+            typ='abgeschlossen',
+            zeitpunkt=zeitpunkt,
+            dauer_sekunden=dauer,
+            benutzer=benutzer
+        ))
+        pro_schritt[schritt_id].append((dauer, _zeitstempel(offen_seit)))
+
+    if not ereignisse:
+        return
+    WorkflowSchrittEreignis.objects.bulk_create(ereignisse, batch_size=500)
+
+    _statistiken_sicherstellen(pro_schritt)
+    statistiken = WorkflowSchrittStatistik.objects.select_for_update().filter(
+        workflow_schritt_id__in=list(pro_schritt)
+    )
+    for statistik in statistiken:
+        werte = pro_schritt[statistik.workflow_schritt_id]
+        histogramm = list(statistik.histogramm) + [0] * (len(BUCKET_GRENZEN) + 1 - len(statistik.histogramm))
+        for dauer, _ in werte:
+            histogramm[bucket_index(dauer)] += 1
+        statistik.histogramm = histogramm
+        statistik.anzahl_abschluesse += len(werte)
+        statistik.median_sekunden = perzentil(histogramm, 0.5)
+        statistik.p90_sekunden = perzentil(histogramm, 0.9)
+        statistik.save(update_fields=[
+            'histogramm', 'anzahl_abschluesse', 'median_sekunden', 'p90_sekunden', 'aktualisiert_am'
+        ])
+        WorkflowSchrittStatistik.objects.filter(pk=statistik.pk).update(
+            anzahl_offen=F('anzahl_offen') - len(werte),
+            summe_offen_seit=F('summe_offen_seit') - sum(stempel for _, stempel in werte)
+        )
+
+
+@transaction.atomic
+def wiedereroeffnungen_erfassen(schritte, benutzer=None, zeitpunkt=None):
+    """
+    Protokolliert Wiedereröffnungen; die Schritte zählen ab `zeitpunkt` als offen.
+
+    Args:
+        schritte: Iterable von (schritt_instanz_id, workflow_schritt_id)
+        benutzer: Ausführender Benutzer (optional)
+        zeitpunkt: Zeitpunkt der Wiedereröffnung (Standard: jetzt)
+    """
+    zeitpunkt = zeitpunkt or timezone.now()
+    ereignisse = [
+        WorkflowSchrittEreignis(
+            schritt_instanz_id=instanz_id,
+            workflow_schritt_id=schritt_id,
+            typ='wiedereroeffnet',
+            zeitpunkt=zeitpunkt,
+            benutzer=benutzer
+        )
+        for instanz_id, schritt_id in schritte
+    ]
+    if not ereignisse:
+        return
+    WorkflowSchrittEreignis.objects.bulk_create(ereignisse, batch_size=500)
+
+    anzahl_pro_schritt = defaultdict(int)
+    for ereignis in ereignisse:
+        anzahl_pro_schritt[ereignis.workflow_schritt_id] += 1
+    offene_erfassen(anzahl_pro_schritt, zeitpunkt)
+
+
+@transaction.atomic
+def neu_berechnen():
+    """
+    Berechnet alle Statistiken aus Ereignissen und offenen Schritten neu.
+
+    Für Reparaturen, z.B. nach Änderungen am Status außerhalb von
+    WorkflowService oder per QuerySet.delete() gelöschten Schritt-Instanzen.
+
+    Returns:
+        int: Anzahl der Statistik-Einträge
+    """
+    statistiken = defaultdict(lambda: {
+        'histogramm': [0] * (len(BUCKET_GRENZEN) + 1),
+        'anzahl_abschluesse': 0,
+        'anzahl_offen': 0,
+        'summe_offen_seit': 0,
+    })
+
+    abschluesse = WorkflowSchrittEreignis.objects.filter(
+        typ='abgeschlossen', dauer_sekunden__isnull=False
+    ).values_list('workflow_schritt_id', 'dauer_sekunden')
+    for schritt_id, dauer in abschluesse.iterator(chunk_size=2000):
+        werte = statistiken[schritt_id]
+        werte['histogramm'][bucket_index(dauer)] += 1
+        werte['anzahl_abschluesse'] += 1
+
+    offene = WorkflowSchrittInstanz.objects.filter(
+        status='pending'
+    ).values_list('workflow_schritt_id', 'offen_seit')
+    for schritt_id, offen_seit in offene.iterator(chunk_size=2000):
+        werte = statistiken[schritt_id]
+        werte['anzahl_offen'] += 1
+        werte['summe_offen_seit'] += _zeitstempel(offen_seit)
+
+    WorkflowSchrittStatistik.objects.all().delete()
+    WorkflowSchrittStatistik.objects.bulk_create([
+        WorkflowSchrittStatistik(
+            workflow_schritt_id=schritt_id,
+            median_sekunden=perzentil(werte['histogramm'], 0.5),
+            p90_sekunden=perzentil(werte['histogramm'], 0.9),
+            **werte
+        )
+        for schritt_id, werte in statistiken.items()
+    ], batch_size=500)
+    return len(statistiken)
@@ -0,0 +1,173 @@
+"""
+Volltext-Suchindex für Workflows (SQLite FTS5).
+
+Der Index enthält pro Workflow-Instanz Name, Kennung, Typ, Notizen,
+Schritt-Notizen und die Namen/IDs der betroffenen Personen. Die rowid der
+FTS-Tabelle ist die ID der Workflow-Instanz. Aktualisiert wird per
+INSERT ... SELECT direkt in der Datenbank, so dass auch viele Workflows
+mit einem Statement neu indiziert werden.
+
+Auf Datenbanken ohne FTS5 (z.B. PostgreSQL) ist der Index nicht
+verfügbar; WorkflowService.workflow_suchen fällt dann auf icontains zurück.
+Ob der Index existiert, wird einmal pro Prozess geprüft; index_neu_aufbauen()
+(Command workflow_suchindex_aufbauen) setzt das Ergebnis zurück.
+
+Nachgeführt wird per Signal (siehe signals.py) bei Änderungen an Workflows,
+Schritt-Notizen, gelöschten Schritten, betroffenen Personen, Personennamen
+und Umbenennungen von Workflow-Typen. Änderungen per QuerySet.update() oder
+SQL lösen keine Signale aus; danach ist workflow_suchindex_aufbauen nötig.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+INDEX_TABELLE = 'workflows_suchindex'
+
+# Maximale Anzahl IDs pro Statement (Limit für SQL-Parameter)
+CHUNK_GROESSE = 500
+
+# Gewichtung für bm25(): name, kennung, typ, notizen, schritt_notizen, personen
+GEWICHTUNG = (10.0, 10.0, 2.0, 1.0, 1.0, 5.0)
+
+# Ergebnis von ist_verfuegbar() je Datenbank (NAME), positiv wie negativ
+_verfuegbar = {}
+
+
+def ist_verfuegbar():
+    """Prüft ob der FTS5-Index in der aktuellen Datenbank existiert (gecacht)."""
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _verfuegbar:
+        _verfuegbar[name] = INDEX_TABELLE in connection.introspection.table_names()
+    return _verfuegbar[name]
+
+
+def verfuegbarkeit_zuruecksetzen():
+    """Verwirft das gecachte Ergebnis von ist_verfuegbar() (z.B. nach Anlegen des Index)."""
+    _verfuegbar.clear()
+
+
+def suchausdruck(suchbegriff):
+    """
+    Wandelt Benutzereingaben in einen sicheren FTS5-Ausdruck um.
+
+    Jedes Wort wird als Präfix gesucht, alle Wörter müssen vorkommen.
+    Sonderzeichen der FTS5-Syntax werden verworfen.
+    """
+    woerter = re.findall(r'\w+', suchbegriff or '')
+    return ' '.join(f'"{wort}"*' for wort in woerter)
+
+
+def treffer_filter(ausdruck):
+    """SQL-Ausdruck mit den IDs aller Treffer (für id__in)."""
+    return RawSQL(
+        f'SELECT rowid FROM {INDEX_TABELLE} WHERE {INDEX_TABELLE} MATCH %s',
+        [ausdruck]
+    )
+
+
+def relevanz(ausdruck):
+    """SQL-Ausdruck mit der Relevanz (negierter bm25-Rang, größer = besser)."""
+    from .models import WorkflowInstanz
+
+    tabelle = WorkflowInstanz._meta.db_table
+    return RawSQL(
+        f'SELECT -rank FROM {INDEX_TABELLE} '
+        f'WHERE {INDEX_TABELLE} MATCH %s AND rowid = "{tabelle}"."id"',
+        [ausdruck]
+    )
+
+
+def _insert_select_sql(where=''):
+    from .models import WorkflowInstanz, WorkflowSchrittInstanz, WorkflowTyp
+    from apps.personen.models import Notar, NotarAnwaerter
+
+    workflows = WorkflowInstanz._meta.db_table
+    schritte = WorkflowSchrittInstanz._meta.db_table
+    typen = WorkflowTyp._meta.db_table
+    notare = Notar._meta.db_table
+    kandidaten = NotarAnwaerter._meta.db_table
+    notare_zuordnung = WorkflowInstanz.betroffene_notare.through._meta.db_table
+    kandidaten_zuordnung = WorkflowInstanz.betroffene_kandidaten.through._meta.db_table
+
+    return f"""
+        INSERT INTO {INDEX_TABELLE}(rowid, name, kennung, typ, notizen, schritt_notizen, personen)
+        SELECT
+            w.id, w.name, w.kennung, t.name, w.notizen,
+            COALESCE((
+                SELECT group_concat(s.notizen, ' ') FROM {schritte} s
+                WHERE s.workflow_instanz_id = w.id AND s.notizen != ''
+            ), ''),
+            COALESCE((
+                SELECT group_concat(p.titel || ' ' || p.vorname || ' ' || p.nachname || ' ' || p.notar_id, ' ')
+                FROM {notare_zuordnung} z JOIN {notare} p ON p.id = z.notar_id
+                WHERE z.workflowinstanz_id = w.id
+            ), '') || ' ' || COALESCE((
+                SELECT group_concat(p.titel || ' ' || p.vorname || ' ' || p.nachname || ' ' || p.anwaerter_id, ' ')
+                FROM {kandidaten_zuordnung} z JOIN {kandidaten} p ON p.id = z.notaranwaerter_id
+                WHERE z.workflowinstanz_id = w.id
+            ), '')
+        FROM {workflows} w JOIN {typen} t ON t.id = w.workflow_typ_id
+        {where}
+    """
+
+
+def index_aktualisieren(workflow_ids):
+    """
+    Indiziert die angegebenen Workflows neu (gelöschte werden entfernt).
+
+    Args:
+        workflow_ids: IDs der Workflow-Instanzen
+    """
+    workflow_ids = [int(workflow_id) for workflow_id in workflow_ids]
+    if not workflow_ids or not ist_verfuegbar():
+        return
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(workflow_ids), CHUNK_GROESSE):
+            chunk = workflow_ids[start:start + CHUNK_GROESSE]
+            platzhalter = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f'DELETE FROM {INDEX_TABELLE} WHERE rowid IN ({platzhalter})',
+                chunk
+            )
+            cursor.execute(
+                _insert_select_sql(f'WHERE w.id IN ({platzhalter})'),
+                chunk
+            )
+
+
+def index_neu_aufbauen():
+    """
+    Legt den Index (falls nötig) an und baut ihn komplett neu auf.
+
+    Returns:
+        int: Anzahl der indizierten Workflows
+    """
+    if connection.vendor != 'sqlite':
+        return 0
+
+    with connection.cursor() as cursor:
+        tabelle_anlegen(cursor)
+        verfuegbarkeit_zuruecksetzen()
+        cursor.execute(f'DELETE FROM {INDEX_TABELLE}')
+        cursor.execute(_insert_select_sql())
+        cursor.execute(f"INSERT INTO {INDEX_TABELLE}({INDEX_TABELLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {INDEX_TABELLE}')
+        return cursor.fetchone()[0]
+
+
+def tabelle_anlegen(cursor):
+    """Legt die FTS5-Tabelle samt bm25-Gewichtung an (idempotent)."""
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {INDEX_TABELLE} USING fts5("
+        "name, kennung, typ, notizen, schritt_notizen, personen, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    gewichtung = ', '.join(str(wert) for wert in GEWICHTUNG)
+    cursor.execute(
+        f"INSERT INTO {INDEX_TABELLE}({INDEX_TABELLE}, rank) VALUES ('rank', %s)",
+        [f'bm25({gewichtung})']
+    )
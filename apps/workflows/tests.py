@@ -9,7 +9,7 @@ from apps.workflows.models import (
     WorkflowInstanz,
     WorkflowSchrittInstanz
 )
-from apps.workflows.services import WorkflowService
+from apps.workflows.services import VersionsKonflikt, WorkflowService
 
 KammerBenutzer = get_user_model()
 
@@ -78,6 +78,7 @@ class WorkflowInstanzModelTest(TestCase):
         )
         self.workflow_typ = WorkflowTyp.objects.create(
             name='Test-Workflow',
+            kuerzel='TST',
             ist_aktiv=True
         )
         # Schritte erstellen
@@ -124,6 +125,8 @@ class WorkflowInstanzModelTest(TestCase):
         )
 
         # 1 von 2 Schritten abgeschlossen = 50%
+        # (Zähler werden in der Datenbank gepflegt, daher neu laden)
+        workflow.refresh_from_db()
         self.assertEqual(workflow.fortschritt_prozent, 50)
 
 
@@ -138,6 +141,7 @@ class WorkflowServiceTest(TestCase):
         )
         self.workflow_typ = WorkflowTyp.objects.create(
             name='Test-Workflow',
+            kuerzel='TST',
             ist_aktiv=True
         )
         self.schritt1 = WorkflowSchritt.objects.create(
@@ -228,3 +232,1001 @@ class WorkflowServiceTest(TestCase):
         ergebnisse = WorkflowService.workflow_suchen('Alpha')
         self.assertEqual(ergebnisse.count(), 1)
         self.assertEqual(ergebnisse.first(), workflow1)
+
+
+class WorkflowFortschrittZaehlerTest(TestCase):
+    """Tests für die denormalisierten Fortschritts-Zähler."""
+
+    def setUp(self):
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.workflow_typ = WorkflowTyp.objects.create(
+            name='Test-Workflow',
+            kuerzel='TST',
+            ist_aktiv=True
+        )
+        for nummer in range(1, 5):
+            WorkflowSchritt.objects.create(
+                workflow_typ=self.workflow_typ,
+                name=f'Schritt {nummer}',
+                reihenfolge=nummer
+            )
+        self.workflow = WorkflowService.workflow_erstellen(
+            workflow_typ=self.workflow_typ,
+            name='Test',
+            erstellt_von=self.benutzer
+        )
+
+    def test_zaehler_nach_erstellen(self):
+        """Zähler werden beim Erstellen gesetzt."""
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.schritte_gesamt, 4)
+        self.assertEqual(self.workflow.schritte_erledigt, 0)
+
+    def test_zaehler_abschliessen_und_rueckgaengig(self):
+        """Abschließen und Rückgängigmachen passen die Zähler an."""
+        schritt = self.workflow.schritt_instanzen.first()
+        WorkflowService.schritt_abschliessen(schritt)
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.schritte_erledigt, 1)
+        self.assertEqual(self.workflow.fortschritt_prozent, 25)
+
+        # Erneutes Abschließen zählt nicht doppelt
+        WorkflowService.schritt_abschliessen(schritt)
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.schritte_erledigt, 1)
+
+        WorkflowService.schritt_rueckgaengig_machen(schritt)
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.schritte_erledigt, 0)
+
+    def test_fortschritt_ohne_queries(self):
+        """fortschritt_prozent liest nur die Zähler."""
+        workflow = WorkflowInstanz.objects.get(pk=self.workflow.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(workflow.fortschritt_prozent, 0)
+
+    def test_veraltetes_objekt_ueberschreibt_zaehler_nicht(self):
+        """Speichern eines veralteten Objekts lässt die Zähler unangetastet."""
+        veraltet = WorkflowInstanz.objects.get(pk=self.workflow.pk)
+        WorkflowService.schritt_abschliessen(self.workflow.schritt_instanzen.first())
+
+        veraltet.name = 'Umbenannt'
+        veraltet.save()
+
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.name, 'Umbenannt')
+        self.assertEqual(self.workflow.schritte_erledigt, 1)
+
+    def test_zurueckgestellte_felder_bleiben_zurueckgestellt(self):
+        """Bei .only()/.defer() werden nur die geladenen Felder (ohne Zähler) gespeichert."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        workflow = WorkflowInstanz.objects.only('name', 'schritte_erledigt').get(pk=self.workflow.pk)
+        WorkflowInstanz.objects.filter(pk=self.workflow.pk).update(notizen='Parallel geändert')
+
+        workflow.name = 'Umbenannt'
+        with CaptureQueriesContext(connection) as kontext:
+            workflow.save()
+        sql = [query['sql'] for query in kontext.captured_queries if '"workflows_workflowinstanz"' in query['sql']]
+        # Kein Nachladen zurückgestellter Felder, ein UPDATE nur mit den geladenen Feldern
+        self.assertEqual(len(sql), 1)
+        self.assertTrue(sql[0].startswith('UPDATE'))
+        self.assertNotIn('notizen', sql[0])
+        self.assertNotIn('schritte_erledigt', sql[0])
+
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.name, 'Umbenannt')
+        self.assertEqual(self.workflow.notizen, 'Parallel geändert')
+
+    def test_zaehler_pruefen_repariert(self):
+        """zaehler_pruefen findet und korrigiert Abweichungen."""
+        WorkflowInstanz.objects.filter(pk=self.workflow.pk).update(schritte_gesamt=0)
+
+        abweichungen = WorkflowService.zaehler_pruefen(reparieren=True)
+        self.assertEqual(len(abweichungen), 1)
+        self.assertEqual(abweichungen[0]['tatsaechlich'], (4, 0))
+
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.schritte_gesamt, 4)
+        self.assertEqual(WorkflowService.zaehler_pruefen(), [])
+
+
+class DashboardKennzahlenTest(TestCase):
+    """Tests für die aggregierten Dashboard-Kennzahlen."""
+
+    def setUp(self):
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.workflow_typ = WorkflowTyp.objects.create(
+            name='Test-Workflow',
+            kuerzel='TST',
+            ist_aktiv=True
+        )
+
+    def _workflow(self, tage=None, status='aktiv'):
+        from datetime import timedelta
+        from django.utils import timezone
+        datum = None
+        if tage is not None:
+            datum = timezone.now().date() + timedelta(days=tage)
+        return WorkflowInstanz.objects.create(
+            workflow_typ=self.workflow_typ,
+            name=f'Workflow {tage}',
+            status=status,
+            erstellt_von=self.benutzer,
+            fertigstellungsdatum=datum
+        )
+
+    def test_buckets_entsprechen_deadline_status(self):
+        """SQL-Buckets stimmen mit deadline_status überein."""
+        workflows = [self._workflow(tage) for tage in (-3, -1, 0, 1, 2, 5, 6, 30, None)]
+        self._workflow(-10, status='archiviert')
+
+        with self.assertNumQueries(1):
+            kennzahlen = WorkflowService.dashboard_kennzahlen()
+
+        erwartet = {'ueberfaellig': 0, '1_tag': 0, '5_tage': 0, 'mehr': 0}
+        for workflow in workflows:
+            if workflow.deadline_status:
+                erwartet[workflow.deadline_status] += 1
+
+        self.assertEqual(kennzahlen['deadline_stats'], erwartet)
+        self.assertEqual(kennzahlen['workflows_gesamt'], 10)
+        self.assertEqual(kennzahlen['workflows_offen'], 9)
+        self.assertEqual(kennzahlen['workflows_abgeschlossen'], 1)
+
+
+class SchritteBulkSetzenTest(TestCase):
+    """Tests für WorkflowService.schritte_bulk_setzen."""
+
+    def setUp(self):
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.workflow_typ = WorkflowTyp.objects.create(
+            name='Test-Workflow',
+            kuerzel='TST',
+            ist_aktiv=True
+        )
+        for nummer in range(1, 4):
+            WorkflowSchritt.objects.create(
+                workflow_typ=self.workflow_typ,
+                name=f'Schritt {nummer}',
+                reihenfolge=nummer
+            )
+        self.workflows = [
+            WorkflowService.workflow_erstellen(
+                workflow_typ=self.workflow_typ,
+                name=f'Workflow {nummer}',
+                erstellt_von=self.benutzer
+            )
+            for nummer in range(3)
+        ]
+        self.ids = [workflow.id for workflow in self.workflows]
+
+    def test_alle_abhaken_archiviert(self):
+        """Alle Schritte werden abgeschlossen und die Workflows archiviert."""
+        WorkflowService.schritt_abschliessen(self.workflows[0].schritt_instanzen.first())
+
+        # 7 Statements + SAVEPOINT/RELEASE + Ereignisse/Statistik (3 + 2 je Template-Schritt),
+        # unabhängig von der Anzahl der Workflows
+        with self.assertNumQueries(18):
+            ergebnis = WorkflowService.schritte_bulk_setzen(self.ids[1:2], 'completed')
+        self.assertEqual(ergebnis[self.ids[1]]['anzahl'], 3)
+        self.assertEqual(ergebnis[self.ids[1]]['workflow_status'], 'archiviert')
+
+        with self.assertNumQueries(18):
+            ergebnis = WorkflowService.schritte_bulk_setzen(
+                [self.ids[0], self.ids[2]], 'completed'
+            )
+        self.assertEqual(ergebnis[self.ids[0]]['anzahl'], 2)
+        self.assertEqual(ergebnis[self.ids[2]]['anzahl'], 3)
+        for workflow_id in (self.ids[0], self.ids[2]):
+            self.assertEqual(ergebnis[workflow_id]['workflow_status'], 'archiviert')
+
+        for workflow in self.workflows:
+            workflow.refresh_from_db()
+            self.assertEqual(workflow.status, 'archiviert')
+            self.assertIsNotNone(workflow.archiviert_am)
+            self.assertEqual(workflow.fortschritt_prozent, 100)
+        self.assertFalse(
+            WorkflowSchrittInstanz.objects.filter(status='pending').exists()
+        )
+
+    def test_alle_zuruecksetzen_reaktiviert(self):
+        """Zurücksetzen reaktiviert archivierte Workflows."""
+        WorkflowService.schritte_bulk_setzen(self.ids, 'completed')
+        ergebnis = WorkflowService.schritte_bulk_setzen(self.ids[:1], 'pending')
+
+        self.assertEqual(ergebnis[self.ids[0]]['anzahl'], 3)
+        self.assertEqual(ergebnis[self.ids[0]]['workflow_status'], 'aktiv')
+        self.assertEqual(list(ergebnis), self.ids[:1])
+        self.workflows[0].refresh_from_db()
+        self.assertEqual(self.workflows[0].schritte_erledigt, 0)
+        self.assertIsNone(self.workflows[0].archiviert_am)
+
+    def test_ungueltiger_status(self):
+        """Unbekannte Status werden abgelehnt."""
+        with self.assertRaises(ValueError):
+            WorkflowService.schritte_bulk_setzen(self.ids, 'erledigt')
+
+
+class WorkflowsBulkErstellenTest(TestCase):
+    """Tests für WorkflowService.workflows_bulk_erstellen."""
+
+    def setUp(self):
+        from datetime import date
+        from apps.notarstellen.models import Notarstelle
+        from apps.personen.models import Notar, NotarAnwaerter
+
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.workflow_typ = WorkflowTyp.objects.create(
+            name='Bestellung',
+            kuerzel='BES',
+            ist_aktiv=True
+        )
+        for nummer in range(1, 4):
+            WorkflowSchritt.objects.create(
+                workflow_typ=self.workflow_typ,
+                name=f'Schritt {nummer}',
+                reihenfolge=nummer
+            )
+        stelle = Notarstelle.objects.create(
+            bezeichnung='NST-000001', name='Notariat Wien 1',
+            strasse='Stephansplatz 3', plz='1010', stadt='Wien'
+        )
+        self.notar = Notar.objects.create(
+            notar_id='NOT-000001', vorname='Maria', nachname='Hofer',
+            email='hofer@example.com', notarstelle=stelle,
+            bestellt_am=date(2015, 3, 15), beginn_datum=date(2015, 3, 15)
+        )
+        self.kandidaten = [
+            NotarAnwaerter.objects.create(
+                anwaerter_id=f'NKA-00000{nummer}', vorname='Kandidat', nachname=str(nummer),
+                email=f'kandidat{nummer}@example.com', notarstelle=stelle,
+                betreuender_notar=self.notar, zugelassen_am=date(2022, 9, 1),
+                beginn_datum=date(2022, 9, 1)
+            )
+            for nummer in range(1, 6)
+        ]
+
+    def test_bulk_erstellen(self):
+        """Workflows, Schritte, Kennungen und Personen werden angelegt."""
+        vorhanden = WorkflowService.workflow_erstellen(
+            workflow_typ=self.workflow_typ,
+            name='Bestehend',
+            erstellt_von=self.benutzer
+        )
+        specs = [
+            {'name': f'Bestellung {kandidat.nachname}', 'kandidaten': [kandidat],
+             'notare': [self.notar.pk]}
+            for kandidat in self.kandidaten
+        ]
+
+        workflows = WorkflowService.workflows_bulk_erstellen(
+            self.workflow_typ, specs, self.benutzer, chunk_size=4
+        )
+
+        self.assertEqual(len(workflows), 5)
+        nummern = [workflow.laufende_nummer for workflow in workflows]
+        self.assertEqual(nummern, list(range(vorhanden.laufende_nummer + 1, vorhanden.laufende_nummer + 6)))
+        self.assertEqual(len({workflow.kennung for workflow in workflows}), 5)
+
+        for workflow, kandidat in zip(workflows, self.kandidaten):
+            workflow.refresh_from_db()
+            self.assertEqual(workflow.schritte_gesamt, 3)
+            self.assertEqual(workflow.schritt_instanzen.count(), 3)
+            self.assertEqual(list(workflow.betroffene_kandidaten.all()), [kandidat])
+            self.assertEqual(list(workflow.betroffene_notare.all()), [self.notar])
+
+        self.assertEqual(WorkflowService.zaehler_pruefen(), [])
+
+    def test_query_anzahl_unabhaengig_von_kohorte(self):
+        """Pro Workflow kommen keine Queries hinzu, nur weitere INSERT-Batches."""
+        import math
+
+        from django.db import connection
+        from django.db.models import AutoField
+        from django.test.utils import CaptureQueriesContext
+
+        KandidatZuordnung = WorkflowInstanz.betroffene_kandidaten.through
+
+        def batches(model, zeilen, chunk_size=500):
+            # Wie bulk_create: Batch-Größe durch das Parameter-Limit des Backends begrenzt
+            felder = [feld for feld in model._meta.concrete_fields if not isinstance(feld, AutoField)]
+            groesse = min(chunk_size, connection.ops.bulk_batch_size(felder, [None] * zeilen))
+            return math.ceil(zeilen / groesse)
+
+        def insert_batches(anzahl):
+            return (
+                batches(WorkflowInstanz, anzahl)
+                + batches(WorkflowSchrittInstanz, anzahl * 3)
+                + batches(KandidatZuordnung, anzahl)
+            )
+
+        def queries_fuer(anzahl):
+            specs = [{'name': f'W{i}', 'kandidaten': [self.kandidaten[i % 5]]} for i in range(anzahl)]
+            with CaptureQueriesContext(connection) as kontext:
+                WorkflowService.workflows_bulk_erstellen(self.workflow_typ, specs, self.benutzer)
+            return len(kontext)
+
+        queries_fuer(1)  # legt die Kennungs-Sequenz an
+        basis = queries_fuer(2) - insert_batches(2)
+        self.assertEqual(queries_fuer(40), basis + insert_batches(40))
+
+    def test_command_typ_und_csv_fehler(self):
+        """Das Kürzel hat Vorrang vor gleichlautenden Namen; fehlende CSV ergibt CommandError."""
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        WorkflowTyp.objects.create(name='BES', kuerzel='BSX', ist_aktiv=True)
+        call_command(
+            'workflows_bulk_anlegen', typ='BES', benutzer='testuser',
+            kandidaten=['NKA-000001'], stdout=StringIO()
+        )
+        self.assertEqual(WorkflowInstanz.objects.get().workflow_typ, self.workflow_typ)
+
+        with self.assertRaisesMessage(CommandError, 'CSV-Datei kann nicht gelesen werden'):
+            call_command(
+                'workflows_bulk_anlegen', typ='BES', benutzer='testuser',
+                csv='/nicht/vorhanden.csv', stdout=StringIO()
+            )
+
+
+class KennungSequenzTest(TestCase):
+    """Tests für die Kennungs-Sequenz."""
+
+    def setUp(self):
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.workflow_typ = WorkflowTyp.objects.create(
+            name='Bestellung',
+            kuerzel='BES',
+            ist_aktiv=True
+        )
+
+    def _workflow(self, name='Test'):
+        return WorkflowInstanz.objects.create(
+            workflow_typ=self.workflow_typ,
+            name=name,
+            erstellt_von=self.benutzer
+        )
+
+    def test_fortlaufende_kennungen(self):
+        """Kennungen werden fortlaufend aus der Sequenz vergeben."""
+        from apps.workflows.models import KennungSequenz
+
+        erster = self._workflow()
+        zweiter = self._workflow()
+
+        self.assertEqual(erster.kennung, f'{erster.jahr}-BES-001')
+        self.assertEqual(zweiter.kennung, f'{erster.jahr}-BES-002')
+        self.assertEqual(
+            KennungSequenz.objects.get(jahr=erster.jahr, kuerzel='BES').letzte_nummer, 2
+        )
+
+    def test_block_reservierung(self):
+        """Ein reservierter Block wird bei späteren Anlagen übersprungen."""
+        jahr, erste = WorkflowInstanz.nummern_reservieren(self.workflow_typ, 100)
+        self.assertEqual(erste, 1)
+
+        workflow = self._workflow()
+        self.assertEqual(workflow.laufende_nummer, 101)
+
+    def test_initialisierung_aus_bestand(self):
+        """Eine neue Sequenz startet nach der höchsten vorhandenen Nummer."""
+        from apps.workflows.models import KennungSequenz
+
+        bestehend = self._workflow()
+        KennungSequenz.objects.all().delete()
+        WorkflowInstanz.objects.filter(pk=bestehend.pk).update(laufende_nummer=41)
+
+        workflow = self._workflow()
+        self.assertEqual(workflow.laufende_nummer, 42)
+
+
+class WorkflowListePaginierungTest(TestCase):
+    """Tests für die Cursor-Paginierung der Workflow-Liste."""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.benutzer)
+        workflow_typ = WorkflowTyp.objects.create(
+            name='Test-Workflow',
+            kuerzel='TST',
+            ist_aktiv=True
+        )
+        for nummer in range(7):
+            WorkflowInstanz.objects.create(
+                workflow_typ=workflow_typ,
+                name=f'Workflow {nummer}',
+                erstellt_von=self.benutzer
+            )
+        # Zwei Workflows mit identischem Zeitstempel: Reihenfolge über die ID
+        jetzt = timezone.now()
+        for index, workflow in enumerate(WorkflowInstanz.objects.order_by('id')):
+            WorkflowInstanz.objects.filter(pk=workflow.pk).update(
+                erstellt_am=jetzt - timedelta(minutes=min(index, 5))
+            )
+        self.erwartet = list(
+            WorkflowInstanz.objects.order_by('-erstellt_am', '-id').values_list('id', flat=True)
+        )
+
+    def _ids(self, response):
+        return [workflow.id for workflow in response.context['seite']]
+
+    def test_vorwaerts_und_zurueck(self):
+        """Blättern liefert alle Workflows lückenlos und stabil."""
+        from django.urls import reverse
+
+        url = reverse('workflow_liste')
+        gesehen = []
+        seiten = []
+        cursor = None
+        while True:
+            params = {'pro_seite': 3}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get(url, params)
+            seite = response.context['seite']
+            seiten.append(self._ids(response))
+            gesehen.extend(seiten[-1])
+            if not seite.hat_naechste:
+                break
+            cursor = seite.naechster_cursor
+
+        self.assertEqual(gesehen, self.erwartet)
+        self.assertEqual([len(s) for s in seiten], [3, 3, 1])
+
+        # Von der letzten Seite zurück
+        response = self.client.get(url, {'pro_seite': 3, 'cursor': seite.vorheriger_cursor})
+        self.assertEqual(self._ids(response), seiten[1])
+
+    def test_ungueltiger_cursor_und_gesamt(self):
+        """Ungültige Cursor liefern Seite 1, die Gesamtanzahl ist optional."""
+        from django.urls import reverse
+
+        response = self.client.get(reverse('workflow_liste'), {'cursor': 'kaputt', 'gesamt': '1'})
+        self.assertEqual(self._ids(response), self.erwartet)
+        self.assertEqual(response.context['seite'].gesamt, 7)
+        self.assertFalse(response.context['seite'].hat_vorherige)
+
+    def test_manipulierter_cursor(self):
+        """Cursor mit falschen Typen oder None-Werten liefern Seite 1 statt eines Fehlers."""
+        import base64
+        import json
+        from django.db.models import F, FloatField
+        from django.db.models.functions import Cast
+        from django.urls import reverse
+        from apps.kern.pagination import KeysetPaginator
+
+        def cursor(*daten):
+            return base64.urlsafe_b64encode(json.dumps(daten).encode('utf-8')).decode('ascii')
+
+        manipuliert = [
+            cursor('n', '2025-01-01T00:00:00', 'x'),
+            cursor('n', None, 1),
+            cursor('n', '2025-01-01T00:00:00', None),
+            cursor('v', 'kein Datum', 1),
+            cursor('n', ['liste'], 1),
+        ]
+        for token in manipuliert:
+            response = self.client.get(reverse('workflow_liste'), {'cursor': token})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self._ids(response), self.erwartet)
+
+        # Sortierung nach einer Annotation (wie die Relevanz der Volltextsuche)
+        paginator = KeysetPaginator(
+            WorkflowInstanz.objects.annotate(relevanz=Cast(F('id'), FloatField())), 'relevanz', 3
+        )
+        ungueltig = [token for token in manipuliert if token != cursor('v', 'kein Datum', 1)]
+        for token in ungueltig + [cursor('n', {'a': 1}, 1), cursor('n', 1.5, 'x'), cursor('n', True, 1)]:
+            self.assertEqual(paginator._decode(token), (None, None, None))
+            self.assertEqual(len(paginator.seite(token)), 3)
+
+
+class WorkflowVolltextSucheTest(TestCase):
+    """Tests für den FTS5-Suchindex."""
+
+    def setUp(self):
+        from datetime import date
+        from apps.notarstellen.models import Notarstelle
+        from apps.personen.models import Notar
+
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.workflow_typ = WorkflowTyp.objects.create(
+            name='Bestellung',
+            kuerzel='BES',
+            ist_aktiv=True
+        )
+        self.anderer_typ = WorkflowTyp.objects.create(
+            name='Besetzung',
+            kuerzel='BSV',
+            ist_aktiv=True
+        )
+        WorkflowSchritt.objects.create(
+            workflow_typ=self.workflow_typ,
+            name='Antrag prüfen',
+            reihenfolge=1
+        )
+        stelle = Notarstelle.objects.create(
+            bezeichnung='NST-000001', name='Notariat Wien 1',
+            strasse='Stephansplatz 3', plz='1010', stadt='Wien'
+        )
+        self.notar = Notar.objects.create(
+            notar_id='NOT-000001', vorname='Maria', nachname='Hofer',
+            email='hofer@example.com', notarstelle=stelle,
+            bestellt_am=date(2015, 3, 15), beginn_datum=date(2015, 3, 15)
+        )
+        self.alpha = WorkflowService.workflow_erstellen(
+            workflow_typ=self.workflow_typ,
+            name='Projekt Alpha',
+            erstellt_von=self.benutzer
+        )
+        self.beta = WorkflowService.workflow_erstellen(
+            workflow_typ=self.anderer_typ,
+            name='Projekt Beta',
+            erstellt_von=self.benutzer
+        )
+
+    def _treffer(self, suchbegriff, queryset=None):
+        return list(WorkflowService.workflow_suchen(suchbegriff, queryset))
+
+    def test_suche_nach_name_und_kennung(self):
+        """Name und Kennung werden gefunden."""
+        self.assertEqual(self._treffer('alpha'), [self.alpha])
+        self.assertEqual(self._treffer(self.beta.kennung), [self.beta])
+        self.assertEqual(len(self._treffer('Projekt')), 2)
+
+    def test_suche_nach_schritt_notizen_und_personen(self):
+        """Schritt-Notizen und betroffene Personen sind durchsuchbar."""
+        schritt = self.alpha.schritt_instanzen.first()
+        WorkflowService.schritt_abschliessen(schritt, notizen='Unterlagen vollständig')
+        self.beta.betroffene_notare.add(self.notar)
+
+        self.assertEqual(self._treffer('vollstaendig unterlagen'), [])
+        self.assertEqual(self._treffer('Unterlagen'), [self.alpha])
+        self.assertEqual(self._treffer('hofer'), [self.beta])
+
+        self.notar.nachname = 'Huber'
+        self.notar.save()
+        self.assertEqual(self._treffer('huber'), [self.beta])
+
+        self.beta.betroffene_notare.remove(self.notar)
+        self.assertEqual(self._treffer('huber'), [])
+
+    def test_suche_behaelt_filter(self):
+        """Die Suche schränkt ein bereits gefiltertes QuerySet ein."""
+        gefiltert = WorkflowInstanz.objects.filter(workflow_typ=self.anderer_typ)
+        self.assertEqual(self._treffer('Projekt', gefiltert), [self.beta])
+
+    def test_ranking_und_sonderzeichen(self):
+        """Treffer im Namen ranken vor Treffern in Notizen; FTS-Syntax wird entschärft."""
+        self.beta.notizen = 'Siehe auch Alpha'
+        self.beta.save()
+
+        self.assertEqual(self._treffer('alpha'), [self.alpha, self.beta])
+        self.assertEqual(self._treffer('"alpha" (*-'), [self.alpha, self.beta])
+        self.assertEqual(self._treffer('***'), [])
+
+    def test_geloeschte_workflows_verschwinden(self):
+        """Gelöschte Workflows werden aus dem Index entfernt."""
+        from django.db import connection
+        from apps.workflows import suche
+
+        self.alpha.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {suche.INDEX_TABELLE}')
+            self.assertEqual([zeile[0] for zeile in cursor.fetchall()], [self.beta.pk])
+
+    def test_typ_umbenennen_und_schritt_loeschen(self):
+        """Umbenannte Workflow-Typen und gelöschte Schritte mit Notizen werden nachgeführt."""
+        typ = WorkflowTyp.objects.get(pk=self.anderer_typ.pk)
+        typ.name = 'Ausschreibung'
+        typ.save()
+        self.assertEqual(self._treffer('ausschreibung'), [self.beta])
+        self.assertEqual(self._treffer('besetzung'), [])
+
+        schritt = self.alpha.schritt_instanzen.first()
+        WorkflowService.schritt_abschliessen(schritt, notizen='Unterlagen vollständig')
+        self.assertEqual(self._treffer('Unterlagen'), [self.alpha])
+        schritt.delete()
+        self.assertEqual(self._treffer('Unterlagen'), [])
+
+    def test_verfuegbarkeit_gecacht(self):
+        """Auch ein fehlender Index wird gecacht; der Neuaufbau setzt den Cache zurück."""
+        from django.db import connection
+        from apps.workflows import suche
+
+        name = connection.settings_dict['NAME']
+        self.addCleanup(suche.verfuegbarkeit_zuruecksetzen)
+        suche._verfuegbar[name] = False
+        with self.assertNumQueries(0):
+            self.assertFalse(suche.ist_verfuegbar())
+        # Ohne Index: Suche per icontains
+        self.assertEqual(self._treffer('alpha'), [self.alpha])
+
+        suche.index_neu_aufbauen()
+        self.assertTrue(suche.ist_verfuegbar())
+
+
+class SchrittStatistikTest(TestCase):
+    """Tests für Ereignis-Protokoll und Durchlaufzeit-Statistik."""
+
+    def setUp(self):
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.workflow_typ = WorkflowTyp.objects.create(
+            name='Test-Workflow',
+            kuerzel='TST',
+            ist_aktiv=True
+        )
+        self.schritte = [
+            WorkflowSchritt.objects.create(
+                workflow_typ=self.workflow_typ,
+                name=f'Schritt {nummer}',
+                reihenfolge=nummer
+            )
+            for nummer in range(1, 3)
+        ]
+        self.workflows = [
+            WorkflowService.workflow_erstellen(
+                workflow_typ=self.workflow_typ,
+                name=f'Workflow {nummer}',
+                erstellt_von=self.benutzer
+            )
+            for nummer in range(4)
+        ]
+
+    def _statistik(self, schritt):
+        from apps.workflows.models import WorkflowSchrittStatistik
+        return WorkflowSchrittStatistik.objects.get(workflow_schritt=schritt)
+
+    def test_anlage_zaehlt_offene(self):
+        """Neue Workflows erhöhen die Anzahl offener Schritte."""
+        statistik = self._statistik(self.schritte[0])
+        self.assertEqual(statistik.anzahl_offen, 4)
+        self.assertEqual(statistik.anzahl_abschluesse, 0)
+        self.assertLess(statistik.offen_alter_sekunden, 60)
+
+    def test_abschluss_protokolliert_dauer(self):
+        """Abschlüsse werden protokolliert und fließen in Median/p90 ein."""
+        from datetime import timedelta
+        from django.utils import timezone
+
+        # Schritte vor unterschiedlich langer Zeit geöffnet
+        for tage, workflow in enumerate(self.workflows, start=1):
+            workflow.schritt_instanzen.filter(workflow_schritt=self.schritte[0]).update(
+                offen_seit=timezone.now() - timedelta(days=tage)
+            )
+        for workflow in self.workflows:
+            schritt = workflow.schritt_instanzen.get(workflow_schritt=self.schritte[0])
+            WorkflowService.schritt_abschliessen(schritt, benutzer=self.benutzer)
+
+        ereignisse = self.schritte[0].ereignisse.filter(typ='abgeschlossen')
+        self.assertEqual(ereignisse.count(), 4)
+        self.assertEqual(ereignisse.filter(benutzer=self.benutzer).count(), 4)
+
+        statistik = self._statistik(self.schritte[0])
+        self.assertEqual(statistik.anzahl_abschluesse, 4)
+        self.assertEqual(statistik.anzahl_offen, 0)
+        # Log-Buckets: Schätzung liegt innerhalb eines Faktors √2
+        tag = 86400
+        self.assertTrue(1.4 * tag <= statistik.median_sekunden <= 2.9 * tag)
+        self.assertTrue(2.8 * tag <= statistik.p90_sekunden <= 5.7 * tag)
+
+    def test_wiedereroeffnung(self):
+        """Zurücksetzen protokolliert ein Ereignis und zählt den Schritt wieder als offen."""
+        schritt = self.workflows[0].schritt_instanzen.get(workflow_schritt=self.schritte[0])
+        WorkflowService.schritt_abschliessen(schritt)
+        self.assertIsNotNone(schritt.abgeschlossen_am)
+        WorkflowService.schritt_rueckgaengig_machen(schritt)
+
+        schritt.refresh_from_db()
+        self.assertIsNone(schritt.abgeschlossen_am)
+        self.assertEqual(
+            list(schritt.ereignisse.order_by('id').values_list('typ', flat=True)),
+            ['abgeschlossen', 'wiedereroeffnet']
+        )
+        statistik = self._statistik(self.schritte[0])
+        self.assertEqual(statistik.anzahl_offen, 4)
+        self.assertEqual(statistik.anzahl_abschluesse, 1)
+
+    def test_bulk_entspricht_neuberechnung(self):
+        """Inkrementelle Fortschreibung stimmt mit der Neuberechnung überein."""
+        from apps.workflows import statistik
+
+        ids = [workflow.id for workflow in self.workflows]
+        WorkflowService.schritte_bulk_setzen(ids, 'completed')
+        WorkflowService.schritte_bulk_setzen(ids[:1], 'pending')
+
+        def zustand():
+            return {
+                schritt.id: (
+                    self._statistik(schritt).anzahl_abschluesse,
+                    self._statistik(schritt).anzahl_offen,
+                    self._statistik(schritt).summe_offen_seit,
+                    self._statistik(schritt).histogramm[:len(statistik.BUCKET_GRENZEN) + 1],
+                )
+                for schritt in self.schritte
+            }
+
+        vorher = zustand()
+        self.assertEqual(vorher[self.schritte[0].id][:2], (4, 1))
+        statistik.neu_berechnen()
+        self.assertEqual(zustand(), vorher)
+
+    def test_loeschen_zieht_offene_ab(self):
+        """Gelöschte Workflows und Schritt-Instanzen zählen nicht mehr als offen."""
+        from apps.workflows import statistik
+
+        schritt = self.workflows[0].schritt_instanzen.get(workflow_schritt=self.schritte[0])
+        WorkflowService.schritt_abschliessen(schritt)
+        self.workflows[0].delete()
+        self.workflows[1].delete()
+        self.workflows[2].schritt_instanzen.get(workflow_schritt=self.schritte[1]).delete()
+
+        erster, zweiter = self._statistik(self.schritte[0]), self._statistik(self.schritte[1])
+        self.assertEqual((erster.anzahl_offen, erster.anzahl_abschluesse), (2, 1))
+        self.assertEqual(zweiter.anzahl_offen, 1)
+        self.assertLess(zweiter.offen_alter_sekunden, 60)
+
+        vorher = [(s.anzahl_offen, s.summe_offen_seit) for s in (erster, zweiter)]
+        statistik.neu_berechnen()
+        self.assertEqual(
+            [(s.anzahl_offen, s.summe_offen_seit) for s in map(self._statistik, self.schritte)], vorher
+        )
+
+    def test_template_detail_zeigt_statistik(self):
+        """Die Template-Ansicht zeigt die Durchlaufzeiten an."""
+        from django.urls import reverse
+
+        WorkflowService.schritte_bulk_setzen([self.workflows[0].id], 'completed')
+        self.client.force_login(self.benutzer)
+        response = self.client.get(
+            reverse('workflow_template_detail', args=[self.workflow_typ.id])
+        )
+        self.assertContains(response, 'Median')
+        self.assertContains(response, '1 abgeschlossen')
+
+
+class AdminChangelistAbfragenTest(TestCase):
+    """Die Admin-Changelists laufen mit einer festen Anzahl Queries."""
+
+    # Obergrenze pro Changelist-Seite (Session, Benutzer, Zählung, Filter, Daten)
+    QUERY_BUDGET = 15
+
+    def setUp(self):
+        from datetime import date
+        from apps.notarstellen.models import Notarstelle
+        from apps.personen.models import Notar, NotarAnwaerter
+
+        self.admin = KammerBenutzer.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123'
+        )
+        self.client.force_login(self.admin)
+        self.workflow_typ = WorkflowTyp.objects.create(
+            name='Bestellung',
+            kuerzel='BES',
+            ist_aktiv=True
+        )
+        for nummer in range(1, 4):
+            WorkflowSchritt.objects.create(
+                workflow_typ=self.workflow_typ,
+                name=f'Schritt {nummer}',
+                reihenfolge=nummer
+            )
+        stelle = Notarstelle.objects.create(
+            bezeichnung='NST-000001', name='Notariat Wien 1',
+            strasse='Stephansplatz 3', plz='1010', stadt='Wien'
+        )
+        self.notar = Notar.objects.create(
+            notar_id='NOT-000001', vorname='Maria', nachname='Hofer',
+            email='hofer@example.com', notarstelle=stelle,
+            bestellt_am=date(2015, 3, 15), beginn_datum=date(2015, 3, 15)
+        )
+        self.kandidat = NotarAnwaerter.objects.create(
+            anwaerter_id='NKA-000001', vorname='Kandidat', nachname='Eins',
+            email='kandidat@example.com', notarstelle=stelle,
+            betreuender_notar=self.notar, zugelassen_am=date(2022, 9, 1),
+            beginn_datum=date(2022, 9, 1)
+        )
+
+    def _workflows_anlegen(self, anzahl):
+        WorkflowService.workflows_bulk_erstellen(
+            self.workflow_typ,
+            [
+                {'name': f'Workflow {nummer}', 'notare': [self.notar], 'kandidaten': [self.kandidat]}
+                for nummer in range(anzahl)
+            ],
+            erstellt_von=self.admin
+        )
+
+    def _abfragen(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as kontext:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(kontext)
+
+    def test_changelists_unabhaengig_von_zeilenanzahl(self):
+        """Mehr Zeilen erzeugen keine zusätzlichen Queries."""
+        from django.urls import reverse
+
+        urls = [
+            reverse('admin:workflows_workflowtyp_changelist'),
+            reverse('admin:workflows_workflowschritt_changelist'),
+            reverse('admin:workflows_workflowinstanz_changelist'),
+            reverse('admin:workflows_workflowschrittinstanz_changelist'),
+            reverse('admin:workflows_workflowschrittereignis_changelist'),
+        ]
+        self._workflows_anlegen(2)
+        WorkflowService.schritte_bulk_setzen(
+            WorkflowInstanz.objects.values_list('id', flat=True), 'completed'
+        )
+        wenige = {url: self._abfragen(url) for url in urls}
+
+        self._workflows_anlegen(20)
+        WorkflowService.schritte_bulk_setzen(
+            WorkflowInstanz.objects.values_list('id', flat=True), 'completed'
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                anzahl = self._abfragen(url)
+                self.assertEqual(anzahl, wenige[url])
+                self.assertLessEqual(anzahl, self.QUERY_BUDGET)
+
+    def test_betroffene_personen_escaped(self):
+        """Personennamen werden in der Changelist HTML-escaped."""
+        from django.urls import reverse
+
+        self.notar.vorname = '<b>Maria</b>'
+        self.notar.save()
+        self._workflows_anlegen(1)
+        response = self.client.get(reverse('admin:workflows_workflowinstanz_changelist'))
+        self.assertContains(response, '&lt;b&gt;Maria&lt;/b&gt;')
+        self.assertContains(response, 'Kandidat Eins')
+
+
+class OptimistischeSperreTest(TestCase):
+    """Tests für Compare-and-Set bei Schritt-Änderungen."""
+
+    def setUp(self):
+        self.benutzer = KammerBenutzer.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.workflow_typ = WorkflowTyp.objects.create(
+            name='Test-Workflow',
+            kuerzel='TST',
+            ist_aktiv=True
+        )
+        for nummer in range(1, 3):
+            WorkflowSchritt.objects.create(
+                workflow_typ=self.workflow_typ,
+                name=f'Schritt {nummer}',
+                reihenfolge=nummer
+            )
+        self.workflow = WorkflowService.workflow_erstellen(
+            workflow_typ=self.workflow_typ,
+            name='Workflow',
+            erstellt_von=self.benutzer
+        )
+        self.schritt = self.workflow.schritt_instanzen.order_by('workflow_schritt__reihenfolge').first()
+
+    def test_paralleler_abschluss_zaehlt_nicht_doppelt(self):
+        """Zwei Benutzer mit demselben Stand: nur der erste Abschluss greift."""
+        kopie_a = WorkflowSchrittInstanz.objects.get(pk=self.schritt.pk)
+        kopie_b = WorkflowSchrittInstanz.objects.get(pk=self.schritt.pk)
+
+        WorkflowService.schritt_abschliessen(kopie_a)
+        with self.assertRaises(VersionsKonflikt) as kontext:
+            WorkflowService.schritt_abschliessen(kopie_b)
+
+        self.assertEqual(kontext.exception.objekt.status, 'completed')
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.schritte_erledigt, 1)
+        self.assertEqual(self.schritt.ereignisse.count(), 1)
+
+    def test_veralteter_rueckgaengig_ueberschreibt_nicht(self):
+        """Ein Zurücksetzen mit veralteter Version ändert nichts."""
+        WorkflowService.schritt_abschliessen(self.schritt)
+        veraltet = self.schritt.version - 1
+
+        with self.assertRaises(VersionsKonflikt):
+            WorkflowService.schritt_rueckgaengig_machen(self.schritt, version=veraltet)
+        self.schritt.refresh_from_db()
+        self.assertEqual(self.schritt.status, 'completed')
+
+    def test_archivierung_nur_wenn_alles_erledigt(self):
+        """Archivieren und Reaktivieren folgen dem Stand in der Datenbank."""
+        schritte = list(self.workflow.schritt_instanzen.all())
+        for schritt in schritte:
+            WorkflowService.schritt_abschliessen(schritt)
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.status, 'archiviert')
+
+        WorkflowService.schritt_rueckgaengig_machen(schritte[0])
+        self.workflow.refresh_from_db()
+        self.assertEqual(self.workflow.status, 'aktiv')
+        self.assertIsNone(self.workflow.archiviert_am)
+
+    def test_bulk_mit_veralteter_workflow_version(self):
+        """Alle abhaken mit veralteter Workflow-Version wird komplett verworfen."""
+        version = self.workflow.version
+        WorkflowService.schritt_abschliessen(self.schritt)
+
+        with self.assertRaises(VersionsKonflikt):
+            WorkflowService.schritte_bulk_setzen(
+                [self.workflow.id], 'completed', versionen={self.workflow.id: version}
+            )
+        self.assertEqual(
+            self.workflow.schritt_instanzen.filter(status='completed').count(), 1
+        )
+
+        self.workflow.refresh_from_db()
+        ergebnis = WorkflowService.schritte_bulk_setzen(
+            [self.workflow.id], 'completed', versionen={self.workflow.id: self.workflow.version}
+        )
+        self.assertEqual(ergebnis[self.workflow.id]['workflow_status'], 'archiviert')
+
+    def test_toggle_view_konflikt(self):
+        """Der Toggle-Endpoint meldet Konflikte mit 409 und dem aktuellen Stand."""
+        from django.urls import reverse
+
+        self.client.force_login(self.benutzer)
+        url = reverse('schritt_toggle', args=[self.schritt.pk])
+        version = self.schritt.version
+
+        response = self.client.post(url, {'version': version})
+        self.assertEqual(response.status_code, 200)
+        daten = response.json()
+        self.assertEqual(daten['status'], 'completed')
+        self.assertEqual(daten['version'], version + 1)
+
+        # Zweiter Klick mit dem alten Stand (z.B. aus einem anderen Browser)
+        response = self.client.post(url, {'version': version})
+        self.assertEqual(response.status_code, 409)
+        daten = response.json()
+        self.assertTrue(daten['konflikt'])
+        self.assertEqual(daten['status'], 'completed')
+        self.assertEqual(daten['version'], version + 1)
+        self.schritt.refresh_from_db()
+        self.assertEqual(self.schritt.status, 'completed')
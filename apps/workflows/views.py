@@ -6,15 +6,25 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.db.models import Count, Q
+from django.db.models import Count
 from django.utils import timezone
 from .models import WorkflowInstanz, WorkflowSchrittInstanz, WorkflowTyp, WorkflowSchritt
-from .services import WorkflowService
+from .services import VersionsKonflikt, WorkflowService
 from .forms import WorkflowInstanzForm, WorkflowTypForm, WorkflowSchrittFormSet
+from apps.kern.pagination import KeysetPaginator, seitengroesse
+from apps.personen import autocomplete
 from apps.personen.models import Notar, NotarAnwaerter
 from apps.notarstellen.models import Notarstelle
 
 
+def _erwartete_version(request):
+    """Liest die vom Client erwartete Version aus dem POST (None wenn nicht gesendet)."""
+    try:
+        return int(request.POST['version'])
+    except (KeyError, ValueError):
+        return None
+
+
 @login_required
 def dashboard_view(request):
     """
@@ -22,41 +32,26 @@ def dashboard_view(request):
     """
     benutzer = request.user
 
+    # Workflow-Kennzahlen und Deadline-Buckets in einer Aggregat-Query
+    kennzahlen = WorkflowService.dashboard_kennzahlen()
+    deadline_stats = kennzahlen.pop('deadline_stats')
+
     # Statistiken
     statistiken = {
         'notare_gesamt': Notar.objects.filter(ist_aktiv=True).count(),
         'anwaerter_gesamt': NotarAnwaerter.objects.filter(ist_aktiv=True).count(),
         'notarstellen_gesamt': Notarstelle.objects.filter(ist_aktiv=True).count(),
-        'workflows_offen': WorkflowInstanz.objects.exclude(status='archiviert').count(),
-        'workflows_gesamt': WorkflowInstanz.objects.count(),
-        'workflows_abgeschlossen': WorkflowInstanz.objects.filter(status='archiviert').count(),
+        **kennzahlen,
     }
 
-    # Deadline-Statistiken (alle offenen Workflows mit Fertigstellungsdatum)
-    offene_workflows_mit_datum = WorkflowInstanz.objects.exclude(
-        status='archiviert'
-    ).exclude(
-        fertigstellungsdatum__isnull=True
-    )
-    deadline_stats = {
-        'ueberfaellig': 0,
-        '1_tag': 0,
-        '5_tage': 0,
-        'mehr': 0,
-    }
-
-    for workflow in offene_workflows_mit_datum:
-        status = workflow.deadline_status
-        if status in deadline_stats:
-            deadline_stats[status] += 1
-
     # Offene Workflows (neueste 10)
     offene_workflows = WorkflowService.offene_workflows_holen()[:10]
 
-    # Workflows nach Status
-    workflows_nach_status = WorkflowInstanz.objects.values('status').annotate(
-        anzahl=Count('id')
-    ).order_by('status')
+    # Workflows nach Status (aus den Kennzahlen abgeleitet, keine eigene Query)
+    workflows_nach_status = [
+        {'status': 'aktiv', 'anzahl': kennzahlen['workflows_offen']},
+        {'status': 'archiviert', 'anzahl': kennzahlen['workflows_abgeschlossen']},
+    ]
 
     context = {
         'statistiken': statistiken,
@@ -74,6 +69,8 @@ def workflow_liste_view(request):
     Liste aller Workflow-Instanzen mit Filterung.
 
     Archivierte Workflows werden standardmäßig ausgeblendet.
+    Paginiert per Cursor auf (-erstellt_am, id), damit auch tiefe Seiten
+    im Archiv keine OFFSET-Scans auslösen.
     """
     workflows = WorkflowInstanz.objects.select_related(
         'workflow_typ',
@@ -81,7 +78,7 @@ def workflow_liste_view(request):
     ).prefetch_related(
         'betroffene_notare',
         'betroffene_kandidaten'
-    ).order_by('-erstellt_am')
+    )
 
     # Filter nach Status
     status_filter = request.GET.get('status')
@@ -97,13 +94,25 @@ def workflow_liste_view(request):
     if typ_filter:
         workflows = workflows.filter(workflow_typ__id=typ_filter)
 
-    # Suche
+    # Suche (schränkt die gefilterte Liste ein, Treffer nach Relevanz)
     suche = request.GET.get('suche')
+    sortierfeld = 'erstellt_am'
     if suche:
-        workflows = WorkflowService.workflow_suchen(suche)
+        workflows = WorkflowService.workflow_suchen(suche, workflows)
+        if 'relevanz' in workflows.query.annotations:
+            sortierfeld = 'relevanz'
+
+    # Seitengröße (begrenzt) und Cursor
+    pro_seite = seitengroesse(request)
+    seite = KeysetPaginator(workflows, sortierfeld, pro_seite).seite(
+        request.GET.get('cursor'),
+        mit_gesamt=request.GET.get('gesamt') == '1'
+    )
 
     context = {
-        'workflows': workflows,
+        'workflows': seite,
+        'seite': seite,
+        'pro_seite': pro_seite,
         'status_filter': status_filter,
         'typ_filter': typ_filter,
         'suche': suche,
@@ -203,11 +212,19 @@ def schritt_abschliessen_view(request, schritt_id):
         notizen = request.POST.get('notizen', '')
 
         try:
-            WorkflowService.schritt_abschliessen(schritt, notizen)
+            WorkflowService.schritt_abschliessen(
+                schritt, notizen, benutzer=request.user, version=_erwartete_version(request)
+            )
             messages.success(
                 request,
                 f'Schritt "{schritt.workflow_schritt.name}" wurde erfolgreich abgeschlossen.'
             )
+        except VersionsKonflikt:
+            messages.warning(
+                request,
+                f'Schritt "{schritt.workflow_schritt.name}" wurde inzwischen von einem anderen '
+                'Benutzer geändert. Bitte prüfen Sie den aktuellen Stand.'
+            )
         except Exception as e:
             messages.error(request, f'Fehler beim Abschließen des Schritts: {str(e)}')
 
@@ -229,11 +246,19 @@ def schritt_rueckgaengig_machen_view(request, schritt_id):
 
     if request.method == 'POST':
         try:
-            WorkflowService.schritt_rueckgaengig_machen(schritt)
+            WorkflowService.schritt_rueckgaengig_machen(
+                schritt, benutzer=request.user, version=_erwartete_version(request)
+            )
             messages.success(
                 request,
                 f'Schritt "{schritt.workflow_schritt.name}" wurde rückgängig gemacht.'
             )
+        except VersionsKonflikt:
+            messages.warning(
+                request,
+                f'Schritt "{schritt.workflow_schritt.name}" wurde inzwischen von einem anderen '
+                'Benutzer geändert. Bitte prüfen Sie den aktuellen Stand.'
+            )
         except Exception as e:
             messages.error(request, f'Fehler beim Rückgängigmachen: {str(e)}')
 
@@ -252,34 +277,58 @@ def schritt_toggle_view(request, schritt_id):
     """
     AJAX-Endpoint: Toggle Schritt-Status (pending ↔ completed).
 
+    POST-Parameter:
+        - version: Version des Schritts, die der Client zuletzt gesehen hat
+
     Returns JSON:
     {
         "success": true,
         "status": "completed",  # neuer Status
+        "version": 4,  # neue Version des Schritts
         "fortschritt_prozent": 75,
-        "workflow_status": "aktiv"  # kann zu "archiviert" wechseln
+        "workflow_status": "aktiv",  # kann zu "archiviert" wechseln
+        "workflow_version": 9
     }
+
+    Hat ein anderer Benutzer den Schritt inzwischen geändert, wird nichts
+    geändert und mit Status 409 der aktuelle Stand geliefert
+    ("success": false, "konflikt": true).
     """
     try:
         schritt = get_object_or_404(WorkflowSchrittInstanz, pk=schritt_id)
         workflow = schritt.workflow_instanz
+        version = _erwartete_version(request)
 
         # Status togglen
-        if schritt.status == 'pending':
-            WorkflowService.schritt_abschliessen(schritt, notizen='')
-            neuer_status = 'completed'
-        else:
-            WorkflowService.schritt_rueckgaengig_machen(schritt)
-            neuer_status = 'pending'
-
-        # Workflow neu laden (könnte archiviert worden sein)
-        workflow.refresh_from_db()
+        try:
+            if schritt.status == 'pending':
+                WorkflowService.schritt_abschliessen(
+                    schritt, notizen='', benutzer=request.user, version=version
+                )
+            else:
+                WorkflowService.schritt_rueckgaengig_machen(
+                    schritt, benutzer=request.user, version=version
+                )
+        except VersionsKonflikt as konflikt:
+            workflow.refresh_from_db()
+            return JsonResponse({
+                'success': False,
+                'konflikt': True,
+                'error': str(konflikt),
+                'status': schritt.status,
+                'version': schritt.version,
+                'fortschritt_prozent': workflow.fortschritt_prozent,
+                'workflow_status': workflow.status,
+                'workflow_version': workflow.version
+            }, status=409)
 
         return JsonResponse({
             'success': True,
-            'status': neuer_status,
+            'status': schritt.status,
+            'version': schritt.version,
             'fortschritt_prozent': workflow.fortschritt_prozent,
-            'workflow_status': workflow.status
+            'workflow_status': workflow.status,
+            'workflow_version': workflow.version
         })
 
     except Exception as e:
@@ -463,8 +512,10 @@ def workflow_template_detail_view(request, template_id):
         id=template_id
     )
 
-    # Schritte des Templates
-    schritte = template.schritte.order_by('reihenfolge')
+    # Schritte des Templates samt vorberechneter Durchlaufzeiten
+    schritte = template.schritte.select_related(
+        'statistik', 'service', 'email_vorlage'
+    ).order_by('reihenfolge')
 
     # Letzte Instanzen (max 5)
     letzte_instanzen = template.instanzen.order_by('-erstellt_am')[:5]
@@ -653,19 +704,25 @@ def workflow_alle_schritte_abhaken_view(request, workflow_id):
     if request.method == 'POST':
         workflow = get_object_or_404(WorkflowInstanz, id=workflow_id)
 
-        # Alle pending Schritte holen
-        pending_schritte = workflow.schritt_instanzen.filter(status='pending')
-        anzahl = pending_schritte.count()
-
-        # Alle Schritte abschließen
-        for schritt in pending_schritte:
-            try:
-                WorkflowService.schritt_abschliessen(schritt, notizen='')
-            except Exception as e:
-                return JsonResponse({
-                    'success': False,
-                    'error': f'Fehler beim Abschließen: {str(e)}'
-                })
+        # Alle pending Schritte mengenbasiert abschließen
+        version = _erwartete_version(request)
+        try:
+            ergebnis = WorkflowService.schritte_bulk_setzen(
+                [workflow.id], 'completed', benutzer=request.user,
+                versionen=None if version is None else {workflow.id: version}
+            )
+        except VersionsKonflikt as konflikt:
+            return JsonResponse({
+                'success': False,
+                'konflikt': True,
+                'error': str(konflikt)
+            }, status=409)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': f'Fehler beim Abschließen: {str(e)}'
+            })
+        anzahl = ergebnis[workflow.id]['anzahl']
 
         return JsonResponse({
             'success': True,
@@ -684,19 +741,25 @@ def workflow_alle_schritte_zuruecksetzen_view(request, workflow_id):
     if request.method == 'POST':
         workflow = get_object_or_404(WorkflowInstanz, id=workflow_id)
 
-        # Alle completed Schritte holen
-        completed_schritte = workflow.schritt_instanzen.filter(status='completed')
-        anzahl = completed_schritte.count()
-
-        # Alle Schritte zurücksetzen
-        for schritt in completed_schritte:
-            try:
-                WorkflowService.schritt_rueckgaengig_machen(schritt)
-            except Exception as e:
-                return JsonResponse({
-                    'success': False,
-                    'error': f'Fehler beim Zurücksetzen: {str(e)}'
-                })
+        # Alle completed Schritte mengenbasiert zurücksetzen
+        version = _erwartete_version(request)
+        try:
+            ergebnis = WorkflowService.schritte_bulk_setzen(
+                [workflow.id], 'pending', benutzer=request.user,
+                versionen=None if version is None else {workflow.id: version}
+            )
+        except VersionsKonflikt as konflikt:
+            return JsonResponse({
+                'success': False,
+                'konflikt': True,
+                'error': str(konflikt)
+            }, status=409)
+        except Exception as e:
+            return JsonResponse({
+                'success': False,
+                'error': f'Fehler beim Zurücksetzen: {str(e)}'
+            })
+        anzahl = ergebnis[workflow.id]['anzahl']
 
         return JsonResponse({
             'success': True,
@@ -727,40 +790,7 @@ def personen_autocomplete_api(request):
     if len(query) < 2:
         return JsonResponse([], safe=False)
 
-    results = []
-
-    # Notare durchsuchen (nur wenn kein Filter oder Filter = 'notar')
-    if not typ_filter or typ_filter == 'notar':
-        notare = Notar.objects.filter(
-            Q(vorname__icontains=query) |
-            Q(nachname__icontains=query) |
-            Q(notar_id__icontains=query),
-            ist_aktiv=True
-        )[:10]
-
-        for notar in notare:
-            results.append({
-                'id': notar.notar_id,
-                'name': notar.get_voller_name(),
-                'typ': 'notar',
-                'zusatz': notar.notarstelle.name if notar.notarstelle else ''
-            })
-
-    # Kandidaten durchsuchen (nur wenn kein Filter oder Filter = 'kandidat')
-    if not typ_filter or typ_filter == 'kandidat':
-        kandidaten = NotarAnwaerter.objects.filter(
-            Q(vorname__icontains=query) |
-            Q(nachname__icontains=query) |
-            Q(anwaerter_id__icontains=query),
-            ist_aktiv=True
-        )[:10]
-
-        for kandidat in kandidaten:
-            results.append({
-                'id': kandidat.anwaerter_id,
-                'name': kandidat.get_voller_name(),
-                'typ': 'kandidat',
-                'zusatz': f'bei {kandidat.betreuender_notar.get_voller_name()}' if kandidat.betreuender_notar else ''
-            })
+    # Antwort aus dem Autocomplete-Index im Speicher (Fallback: Datenbank)
+    results = autocomplete.suchen(query, typ=typ_filter or None)
 
     return JsonResponse(results, safe=False)
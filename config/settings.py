@@ -160,6 +160,15 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
 
+# Personen-Autocomplete: Index im Speicher jedes Prozesses (False = Suche in der Datenbank)
+PERSONEN_AUTOCOMPLETE_INDEX = os.getenv('PERSONEN_AUTOCOMPLETE_INDEX', 'True') == 'True'
+
+# Lebenslauf-Extraktion: "openrouter", "textlayer" oder Pfad zu einer eigenen Klasse
+# (leer = OpenRouter, falls OPENROUTER_API_KEY gesetzt ist, sonst Textlayer-Parser)
+CV_EXTRAKTOR = os.getenv('CV_EXTRAKTOR', '')
+# True = Extraktion direkt im Request statt im Hintergrund-Thread
+CV_EXTRAKTION_SYNCHRON = os.getenv('CV_EXTRAKTION_SYNCHRON', 'False') == 'True'
+
 # Security Settings
 # Erlaubt iframes von der gleichen Domain (für PDF-Vorschau im DMS)
 X_FRAME_OPTIONS = 'SAMEORIGIN'